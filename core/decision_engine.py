@@ -13,9 +13,11 @@ import os
 import sys
 import io
 import json
-import pandas as pd
-from datetime import datetime
-from typing import Dict, Any, Optional
+import time
+import asyncio
+import functools
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple, List
 
 # Fix Windows console encoding for emojis
 if sys.platform == 'win32' and __name__ == "__main__":
@@ -24,35 +26,26 @@ if sys.platform == 'win32' and __name__ == "__main__":
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from core.sales_ledger import SalesLedger, get_ledger
+from core.kpi_materializer import get_materializer
+from core.event_store import get_event_store
+from core.shared_state import read_shared_state, kill_switch_active, LAST_ORDER_FIELDS
+from core.llm_gateway import (get_gateway, call_llm_api as llm_call, acall_llm_api,
+                              call_llm_json as llm_json, estimate_tokens, model_limits,
+                              with_deadline, LLMError)
+from core.llm_metrics import get_llm_metrics, metered
+from core.rollups import get_rollups
+from core.risk_simulator import CortexRiskSimulator
+
 # ═══════════════════════════════════════════════════════════════
-# LLM INTERFACE (Real Gemini API)
+# LLM INTERFACE (shared gateway: core/llm_gateway.py)
 # ═══════════════════════════════════════════════════════════════
 
-def call_llm_api(prompt: str, system_prompt: str) -> str:
-    """
-    Real LLM API call using Gemini.
-    Falls back to mock response if API unavailable.
-    """
-    try:
-        import google.generativeai as genai
-        from agi_config import config
-        
-        genai.configure(api_key=config.GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.0-flash-001')
-        
-        full_prompt = f"{system_prompt}\n\n{prompt}"
-        
-        print(f"\n🧠 [AGI THINKING] Processing with Gemini...")
-        response = model.generate_content(full_prompt)
-        
-        return response.text
-        
-    except Exception as e:
-        print(f"⚠️ Gemini API Error: {e}")
-        print("📋 Using fallback mock response...")
-        
-        # Fallback mock response for testing
-        return """
+# Wall-clock budget for one decision cycle, hedges and fallbacks included (0 = none)
+DECISION_DEADLINE_SECONDS = float(os.getenv("DECISION_DEADLINE_SECONDS", "240"))
+
+# Fallback mock response for testing / when no provider is configured
+MOCK_LLM_RESPONSE = """
 <think>
 1. 分析現狀：當前銷售數據顯示需要優化。
 2. 策略評估：
@@ -73,6 +66,154 @@ def call_llm_api(prompt: str, system_prompt: str) -> str:
 """
 
 
+def call_llm_api(prompt: str, system_prompt: str) -> str:
+    """
+    Real LLM API call through the shared gateway (pooled, initialised once,
+    routed to the fallback provider on failure). Falls back to the mock
+    response only when no provider is configured; raises LLMError when the
+    configured ones fail.
+    """
+    print(f"\n🧠 [AGI THINKING] Processing with {get_gateway().default_provider}...")
+    response = llm_call(prompt, system_prompt, fallback=None, namespace="decision", strict=True)
+    if response is None:
+        print("📋 Using fallback mock response...")
+        return MOCK_LLM_RESPONSE
+    return response
+
+
+def call_llm_json(prompt: str, system_prompt: str) -> Tuple[Optional[Dict[str, Any]], str, Dict[str, Any]]:
+    """
+    Streamed call for the synthesis step: returns (decision, raw text, stream
+    metrics) as soon as the object carrying "decision" closes, skipping any
+    <think> block. Falls back to the mock response (empty metrics) as
+    call_llm_api does.
+    """
+    print(f"\n🧠 [AGI THINKING] Streaming from {get_gateway().default_provider}...")
+    decision, raw, stream = llm_json(prompt, system_prompt, fallback=MOCK_LLM_RESPONSE,
+                                     predicate=lambda obj: "decision" in obj, namespace="decision",
+                                     strict=True)
+    if not stream:
+        print("📋 Using fallback mock response...")
+    return decision, raw, stream
+
+
+def abstain_on_llm_error(method):
+    """
+    A decision cycle whose configured providers all failed (or that ran out
+    of time) returns None, "no decision", instead of acting on the mock.
+    """
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await method(*args, **kwargs)
+            except LLMError as e:
+                print(f"⚠️ [Decision] No model answer ({e}); no decision this cycle")
+                return None
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except LLMError as e:
+            print(f"⚠️ [Decision] No model answer ({e}); no decision this cycle")
+            return None
+    return wrapper
+
+
+def extract_json_array(raw: str) -> List[Dict[str, Any]]:
+    """
+    Objects from a JSON array in an LLM reply. If the array as a whole is
+    malformed (e.g. truncated), every well-formed object is salvaged.
+    """
+    text = (raw or "").replace("```json", "").replace("```", "")
+    start, end = text.find("["), text.rfind("]") + 1
+    if start >= 0 and end > start:
+        try:
+            parsed = json.loads(text[start:end])
+            if isinstance(parsed, list):
+                return [item for item in parsed if isinstance(item, dict)]
+        except json.JSONDecodeError:
+            pass
+    decoder, items = json.JSONDecoder(), []
+    pos = text.find("{")
+    while pos >= 0:
+        try:
+            item, stop = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            pos = text.find("{", pos + 1)
+            continue
+        if isinstance(item, dict):
+            items.append(item)
+        pos = text.find("{", stop)
+    return items
+
+
+def extract_json_object(raw: str) -> Optional[Dict[str, Any]]:
+    """Last-resort parse of the outermost {...} in an LLM reply (markdown fences tolerated)."""
+    text = (raw or "").replace("```json", "").replace("```", "")
+    start, end = text.find("{"), text.rfind("}") + 1
+    if start < 0 or end <= start:
+        return None
+    try:
+        parsed = json.loads(text[start:end])
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+# ═══════════════════════════════════════════════════════════════
+# ADAPTIVE DEPTH (overridable via config.json "reasoning_depth")
+# ═══════════════════════════════════════════════════════════════
+DEPTH_DEFAULTS = {
+    "early_exit_confidence": 0.9,    # Step 1 confidence needed to skip critic + synthesis
+    "max_risk_of_ruin": 0.05,        # ...and the simulated P(revenue drop > 20%) must stay below this
+    "min_p_beats_hold": 0.5,         # ...and it must beat HOLD on at least this share of shared futures
+    "high_value_triggers": [],       # Trigger names whose non-HOLD proposals get the full loop plus extra critics
+    "high_value_revenue_24h": 500.0, # ...as does any trigger when this much 24h revenue is at stake
+    "extra_critic_rounds": 1,
+}
+
+CRITIC_SYSTEM = """
+你是一個嚴厲的風險控制專家與惡毒的批評家。
+你的任務是找出計畫中的漏洞、風險和邏輯錯誤。
+不要給面子，直接指出為什麼這個計畫可能會失敗或導致虧損。
+考慮：品牌傷害、利潤下降、客戶流失、執行風險等。
+"""
+
+# ═══════════════════════════════════════════════════════════════
+# PARALLEL PROPOSALS (analyze_and_decide_async)
+# ═══════════════════════════════════════════════════════════════
+PROPOSAL_COUNT = int(os.getenv("DECISION_PROPOSALS", "3"))
+PROPOSAL_CONCURRENCY = int(os.getenv("DECISION_CONCURRENCY", "4"))
+SYNTHESIS_CANDIDATES = 2  # Best-scored proposals handed to the synthesis step
+
+# Used when strategy_parameters has no "personas" list; keys override strategy_parameters
+DEFAULT_PERSONAS = [
+    {"name": "steady", "temperature": 0.2},
+    {"name": "guardian", "temperature": 0.7, "risk_tolerance": "low"},
+    {"name": "challenger", "temperature": 1.0, "risk_tolerance": "high", "strategy_mode": "aggressive"},
+]
+
+# ═══════════════════════════════════════════════════════════════
+# BATCH DECISIONS (analyze_and_decide_batch)
+# ═══════════════════════════════════════════════════════════════
+BATCH_CONTEXT_FRACTION = 0.5   # Share of the context window product lines may fill
+BATCH_TOKENS_PER_DECISION = 150  # Expected output per product (sizes chunks to max output)
+BATCH_MAX_PRODUCTS = int(os.getenv("BATCH_MAX_PRODUCTS", "40"))
+BATCH_RETRIES = int(os.getenv("BATCH_RETRIES", "2"))
+BATCH_ACTIONS = ("UPDATE_PRICE", "MODIFY_COPY", "HOLD")
+
+# Proposal actions -> CortexRiskSimulator hypotheses
+SIMULATED_ACTIONS = {
+    "UPDATE_PRICE": "UPDATE_PRICE",
+    "ADJUST_PRICE": "UPDATE_PRICE",
+    "MODIFY_COPY": "MODIFY_COPY",
+    "OPTIMIZE_COPY": "MODIFY_COPY",
+}
+
+
 class ECOMDecisionEngine:
     """
     ECOM Decision Engine with System 2 reasoning.
@@ -81,10 +222,15 @@ class ECOMDecisionEngine:
     Now reads dynamic config from config.json for RSI integration.
     """
     
-    def __init__(self, sales_data_path: str = "data/sales_history.csv"):
+    def __init__(self, sales_data_path: str = "data/sales_history.csv",
+                 ledger: Optional[SalesLedger] = None):
+        # sales_data_path is the legacy CSV, only used to seed an empty ledger
         self.data_path = sales_data_path
+        self.ledger = ledger or get_ledger(sales_data_path)
+        self.kpis = get_materializer(self.ledger)
         self.config = self._load_config()
         self.system_prompt = self._build_system_prompt()
+        self.risk = CortexRiskSimulator()
     
     def _load_config(self) -> Dict[str, Any]:
         """Load dynamic configuration from config.json."""
@@ -192,19 +338,19 @@ JSON 輸出格式：
     def _read_market_state(self) -> Dict[str, Any]:
         """
         讀取銷售數據，計算當前市場狀態 (KPIs)
+        讀取 KPI 快照 (增量維護)，只重播上次之後的新訂單
         """
-        if not os.path.exists(self.data_path):
-            return {
-                "conversion_rate": 0.0, 
-                "total_revenue": 0.0,
-                "total_orders": 0,
-                "data_available": False
-            }
-        
         try:
-            df = pd.read_csv(self.data_path)
+            # Webhook server publishes KPIs to the shared state bridge; replay the ledger only if it is down
+            shared = read_shared_state()
+            if shared is not None and not shared.is_stale:
+                snap = shared.to_dict()
+            else:
+                self.kpis.refresh()
+                snap = self.kpis.snapshot()
+            total_orders = snap["total_orders"]
             
-            if df.empty:
+            if total_orders == 0:
                 return {
                     "conversion_rate": 0.0,
                     "total_revenue": 0.0,
@@ -213,20 +359,14 @@ JSON 輸出格式：
                 }
             
             # Calculate KPIs
-            total_orders = len(df)
-            
-            # Convert amount to float safely
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0)
-            total_revenue = df['amount'].sum()
+            total_revenue = snap["total_revenue"]
             
             # Platform breakdown
-            platform_counts = df['platform'].value_counts().to_dict()
+            platform_counts = {p: v["orders"] for p, v in snap["platforms"].items()}
             
-            # Recent orders (last 24h)
-            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-            recent = df[df['timestamp'] > datetime.now() - pd.Timedelta(days=1)]
-            recent_orders = len(recent)
-            recent_revenue = recent['amount'].sum()
+            # Recent orders (last 24h) - ring buffer window
+            recent_orders = snap["window_24h"]["orders"]
+            recent_revenue = snap["window_24h"]["revenue"]
             
             # Mock traffic for CVR calculation (replace with real data)
             mock_traffic = max(total_orders * 20, 100)
@@ -239,7 +379,9 @@ JSON 輸出格式：
                 "recent_orders_24h": recent_orders,
                 "recent_revenue_24h": round(recent_revenue, 2),
                 "platforms": platform_counts,
-                "last_order": df.iloc[-1].to_dict() if not df.empty else None,
+                # Same keys whether the bridge or the ledger replay answered
+                "last_order": {k: snap["last_order"].get(k) for k in LAST_ORDER_FIELDS}
+                              if snap["last_order"] else None,
                 "data_available": True
             }
             
@@ -285,21 +427,370 @@ JSON 輸出格式：
         # 分數 > 0.6 才允許行動，否則否決
         return final_score > 0.6
 
+    @metered("decision_cycle")
+    @with_deadline(DECISION_DEADLINE_SECONDS)
+    @abstain_on_llm_error
     def analyze_and_decide(self, trigger_event: str) -> Optional[Dict]:
         """
         [ULTRA UPGRADE] 遞迴批判決策迴圈 (Recursive Critic Loop)
         
         Truth #2: AI 透過多步驟思考 (Think Harder) 來超越人類直覺。
-        This trades 3x token cost for exponentially better decisions.
+        This trades 3x token cost for exponentially better decisions, so the
+        depth is adaptive (see _choose_depth):
         
-        Step 1: Proposal (Draft 1) - Generate initial plan
-        Step 2: Critic - Attack the plan's weaknesses
+        Step 1: Proposal (Draft 1) - Generate initial plan + JSON summary
+                -> HOLD/PASS, or confident with low simulated risk: stop here
+        Step 2: Critic - Attack the plan's weaknesses (extra rounds for high-value triggers)
         Step 3: Synthesis - Combine insights into final decision
         """
         print("=" * 60)
         print(f"🎯 [ECOM DECISION ENGINE] Trigger: {trigger_event}")
         print("=" * 60)
         
+        settings, state, verdict = self._perceive()
+        if settings is None:
+            return verdict  # Halted (None) or vetoed (PASS)
+        
+        loop_start = time.perf_counter()
+        calls: List[int] = []  # Estimated tokens per LLM call
+
+        def ask(prompt: str, system: str) -> str:
+            reply = call_llm_api(prompt, system)
+            calls.append(estimate_tokens(prompt + system + reply))
+            return reply
+
+        print(f"\n🧠 [Deep Thinking] Initiating Adaptive-Depth Recursive Loop...")
+        
+        # ═══════════════════════════════════════════════════════════
+        # STEP 1: PROPOSAL (The Draft Plan)
+        # ═══════════════════════════════════════════════════════════
+        proposer_system, proposer_prompt = self._proposer_messages(settings, state, trigger_event)
+        plan_v1 = ask(proposer_prompt, proposer_system)
+        plan = extract_json_object(plan_v1)
+        print(f"\n💡 [Step 1: Proposal] Draft Generated")
+        print(f"   Preview: {plan_v1[:150].replace(chr(10), ' ')}...")
+        
+        critic_rounds, depth_reason, risk = self._choose_depth(trigger_event, plan, state)
+        print(f"\n🧭 [Depth] {1 + critic_rounds + (1 if critic_rounds else 0)} step(s) ({depth_reason})")
+        
+        if critic_rounds == 0:
+            # Early exit: the structured proposal is the decision
+            decision = dict(plan)
+            decision.setdefault("parameters", {})
+            decision["confidence_score"] = float(decision.get("confidence_score", 0) or 0)
+            decision.setdefault("reasoning", "Early exit after proposal")
+            if risk is not None:
+                decision["risk_simulation"] = {k: float(v) for k, v in risk.items()}
+            return self._finalize(decision, trigger_event, state, plan_v1, [], calls, loop_start, depth_reason)
+        
+        # ═══════════════════════════════════════════════════════════
+        # STEP 2: CRITIC (The Devil's Advocate) - one or more rounds
+        # ═══════════════════════════════════════════════════════════
+        critiques: List[str] = []
+        for round_no in range(1, critic_rounds + 1):
+            critiques.append(ask(self._critic_prompt(plan_v1, critiques), CRITIC_SYSTEM))
+            print(f"\n⚖️ [Step 2: Critic {round_no}/{critic_rounds}] Risks Identified")
+            print(f"   Preview: {critiques[-1][:150].replace(chr(10), ' ')}...")
+        critique = "\n\n".join(critiques)
+        
+        # ═══════════════════════════════════════════════════════════
+        # STEP 3: SYNTHESIS (The Final Arbiter)
+        # ═══════════════════════════════════════════════════════════
+        finalizer_system = self._finalizer_system(settings)
+        finalizer_prompt = self._finalizer_prompt(plan_v1, critique)
+        
+        # Streamed: the decision is used the moment its closing brace arrives
+        decision, final_decision_raw, stream = call_llm_json(finalizer_prompt, finalizer_system)
+        calls.append(estimate_tokens(finalizer_prompt + finalizer_system + final_decision_raw))
+        print(f"\n🎯 [Step 3: Synthesis] Final Decision Generated")
+        if stream.get("time_to_decision_ms") is not None:
+            print(f"   ⏱️ First token {stream['ttft_ms']:.0f}ms | decision {stream['time_to_decision_ms']:.0f}ms")
+        
+        # ═══════════════════════════════════════════════════════════
+        # PARSE FINAL JSON (whole-text fallback if no object streamed)
+        # ═══════════════════════════════════════════════════════════
+        if decision is None:
+            decision = self._parse_final(final_decision_raw)
+        if decision is None:
+            return None
+        result = self._finalize(decision, trigger_event, state, plan_v1, critiques, calls,
+                                loop_start, depth_reason)
+        result["recursive_loop"]["ttft_ms"] = stream.get("ttft_ms")
+        result["recursive_loop"]["time_to_decision_ms"] = stream.get("time_to_decision_ms")
+        return result
+    
+    @metered("decision_cycle")
+    @with_deadline(DECISION_DEADLINE_SECONDS)
+    @abstain_on_llm_error
+    async def analyze_and_decide_async(self, trigger_event: str, k: int = PROPOSAL_COUNT,
+                                       concurrency: int = PROPOSAL_CONCURRENCY) -> Optional[Dict]:
+        """
+        Parallel multi-proposal mode.
+        
+        Step 1: K proposals, one per persona (temperature / strategy overrides), concurrently
+        Step 2: one scored critique per proposal, concurrently
+        Step 3: one synthesis over the SYNTHESIS_CANDIDATES best-scored proposals
+        
+        Wall clock is about one serial pass regardless of K; `concurrency` caps
+        in-flight calls and the gateway applies per-provider rate limits.
+        """
+        print("=" * 60)
+        print(f"🎯 [ECOM DECISION ENGINE] Trigger: {trigger_event} (parallel x{k})")
+        print("=" * 60)
+        
+        settings, state, verdict = self._perceive()
+        if settings is None:
+            return verdict
+        
+        loop_start = time.perf_counter()
+        calls: List[int] = []
+        gate = asyncio.Semaphore(max(1, concurrency))
+        
+        async def ask(prompt: str, system: str, temperature: Optional[float] = None) -> str:
+            async with gate:
+                reply = await acall_llm_api(prompt, system, fallback=MOCK_LLM_RESPONSE,
+                                            namespace="decision", temperature=temperature, strict=True)
+            calls.append(estimate_tokens(prompt + system + reply))
+            return reply
+        
+        personas = self._personas(settings, k)
+        
+        async def propose(persona: Dict[str, Any]) -> str:
+            variant = {**settings, **{key: v for key, v in persona.items() if key not in ("name", "temperature")}}
+            system, prompt = self._proposer_messages(variant, state, trigger_event)
+            return await ask(prompt, system, persona.get("temperature"))
+        
+        print(f"\n🧠 [Deep Thinking] {len(personas)} proposals in parallel "
+              f"({', '.join(p['name'] for p in personas)})...")
+        drafts = await asyncio.gather(*(propose(p) for p in personas))
+        critiques = await asyncio.gather(*(ask(self._critic_prompt(d, scored=True), CRITIC_SYSTEM)
+                                           for d in drafts))
+        
+        candidates = []
+        for persona, draft, critique in zip(personas, drafts, critiques):
+            plan = extract_json_object(draft) or {}
+            risk_score = (extract_json_object(critique) or {}).get("risk_score")
+            try:
+                confidence = float(plan.get("confidence_score", 0) or 0)
+                risk = min(max(float(risk_score), 0.0), 10.0) if risk_score is not None else 5.0
+            except (TypeError, ValueError):
+                confidence, risk = 0.0, 5.0
+            candidates.append({"persona": persona["name"], "decision": plan.get("decision"),
+                               "confidence": confidence, "risk_score": risk,
+                               "score": round(confidence * (1 - risk / 10), 4),
+                               "draft": draft, "critique": critique})
+        candidates.sort(key=lambda c: c["score"], reverse=True)
+        best = candidates[:SYNTHESIS_CANDIDATES]
+        for c in candidates:
+            print(f"   ⚖️ {c['persona']:<12} {str(c['decision']):<14} score {c['score']:.2f}")
+        
+        plans = "\n\n".join(f"[候選計畫 {i} | {c['persona']} | 分數 {c['score']:.2f}]:\n{c['draft']}"
+                             for i, c in enumerate(best, 1))
+        reviews = "\n\n".join(f"[候選計畫 {i} 的批評]:\n{c['critique']}" for i, c in enumerate(best, 1))
+        final_decision_raw = await ask(self._finalizer_prompt(plans, reviews), self._finalizer_system(settings))
+        print(f"\n🎯 [Synthesis] Final Decision Generated from {len(best)} candidates")
+        
+        decision = self._parse_final(final_decision_raw)
+        if decision is None:
+            return None
+        decision["candidates"] = [{key: c[key] for key in ("persona", "decision", "confidence", "risk_score", "score")}
+                                  for c in candidates]
+        decision = self._finalize(decision, trigger_event, state, plans, [c["critique"] for c in best],
+                                  calls, loop_start, "parallel_proposals")
+        decision["recursive_loop"]["proposals"] = len(personas)
+        return decision
+    
+    def product_states(self, products: Optional[List[Any]] = None, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        Per-product market state from the sales rollups.
+        
+        products: product ids / names, or dicts with "product_id" (plus optional
+        "platform", "product_name", "price", ...). None = every product sold.
+        """
+        rollups = get_rollups(self.ledger)
+        since = datetime.now() - timedelta(days=days)
+        lifetime = {(r["platform"].lower(), r["product"]): r
+                    for r in rollups.range(group_by=("platform", "product"), by_bucket=False)}
+        recent = {(r["platform"].lower(), r["product"]): r
+                  for r in rollups.range(start=since, group_by=("platform", "product"), by_bucket=False)}
+        
+        if products is None:
+            products = [{"product_id": name, "platform": platform} for platform, name in lifetime]
+        
+        states = []
+        for item in products:
+            product = dict(item) if isinstance(item, dict) else {"product_id": str(item)}
+            product["product_id"] = str(product.get("product_id") or product.get("product_name"))
+            name = product.get("product_name", product["product_id"])
+            platform = str(product.get("platform", "")).lower()
+            keys = [(platform, name)] if platform else [k for k in lifetime if k[1] == name]
+            total = [lifetime[k] for k in keys if k in lifetime]
+            last = [recent[k] for k in keys if k in recent]
+            product.setdefault("platform", keys[0][0] if keys else "gumroad")
+            product.update({
+                "orders": sum(r["orders"] for r in total),
+                "revenue": round(sum(r["revenue"] for r in total), 2),
+                f"orders_{days}d": sum(r["orders"] for r in last),
+                f"revenue_{days}d": round(sum(r["revenue"] for r in last), 2),
+            })
+            product["aov"] = round(product["revenue"] / product["orders"], 2) if product["orders"] else 0.0
+            states.append(product)
+        return states
+    
+    @metered("decision_batch")
+    def analyze_and_decide_batch(self, products: Optional[List[Any]] = None,
+                                 trigger_event: str = "catalog_optimization") -> List[Dict]:
+        """
+        One decision per product, many products per LLM call.
+        
+        Product states are packed into chunks sized to the model's context
+        window and output limit; each chunk must answer with a JSON array of
+        per-product decisions. Products missing from (or invalid in) the
+        answer are re-chunked and retried, up to BATCH_RETRIES times; any
+        still unresolved come back as HOLD with "parse_failed": True.
+        """
+        print("=" * 60)
+        print(f"🎯 [ECOM DECISION ENGINE] Batch trigger: {trigger_event}")
+        print("=" * 60)
+        
+        settings, state, verdict = self._perceive()
+        states = self.product_states(products)
+        if settings is None:
+            if verdict is None:
+                return []
+            return [{**verdict, "parameters": {"platform": p["platform"], "product_id": p["product_id"]}}
+                    for p in states]
+        
+        system, _ = self._proposer_messages(settings, state, trigger_event)
+        context_tokens, output_tokens = model_limits()
+        overhead = estimate_tokens(system + self._batch_prompt(trigger_event, state, [], 0))
+        input_budget = int(context_tokens * BATCH_CONTEXT_FRACTION) - overhead
+        per_chunk = max(1, min(BATCH_MAX_PRODUCTS, output_tokens // BATCH_TOKENS_PER_DECISION))
+        
+        lines = {p["product_id"]: json.dumps(p, ensure_ascii=False, default=str) for p in states}
+        by_id = {p["product_id"]: p for p in states}
+        decided: Dict[str, Dict] = {}
+        pending = list(by_id)
+        
+        for attempt in range(1 + BATCH_RETRIES):
+            if not pending:
+                break
+            chunks, chunk, used = [], [], 0
+            for pid in pending:
+                cost = estimate_tokens(lines[pid])
+                if chunk and (len(chunk) >= per_chunk or used + cost > input_budget):
+                    chunks.append(chunk)
+                    chunk, used = [], 0
+                chunk.append(pid)
+                used += cost
+            chunks.append(chunk)
+            print(f"\n📦 [Batch] Attempt {attempt + 1}: {len(pending)} products in {len(chunks)} chunk(s)")
+            metrics = get_llm_metrics()
+            
+            for index, ids in enumerate(chunks):
+                prompt = self._batch_prompt(trigger_event, state, [lines[pid] for pid in ids], attempt)
+                chunk_start = time.perf_counter()
+                # Only a reply that decides every product in the chunk is cached; retries
+                # skip the cache, so each one is a real call
+                raw = llm_call(prompt, system, fallback=None, namespace="decision", use_cache=not attempt,
+                               validate=lambda reply, ids=ids: len(self._batch_items(reply, ids)) == len(ids))
+                latency = (time.perf_counter() - chunk_start) * 1000
+                if raw is None:
+                    continue
+                if attempt and metrics is not None:
+                    metrics.record_retry("decision")
+                tokens = estimate_tokens(prompt + system + raw)
+                for pid, (item, action, confidence) in self._batch_items(raw, ids).items():
+                    params = item.get("parameters") if isinstance(item.get("parameters"), dict) else {}
+                    params.setdefault("platform", by_id[pid]["platform"])
+                    params["product_id"] = pid
+                    decided[pid] = {
+                        "decision": action, "parameters": params, "confidence_score": confidence,
+                        "reasoning": item.get("reasoning", ""),
+                        "timestamp": datetime.now().isoformat(), "trigger_event": trigger_event,
+                        "market_state": by_id[pid],
+                        "recursive_loop": {  # Batch cost amortized over the chunk
+                            "depth": 1, "depth_reason": "batch", "llm_calls": attempt + 1,
+                            "est_tokens": tokens // len(ids), "latency_ms": round(latency / len(ids), 1),
+                            "batch": {"chunk": index, "chunk_size": len(ids), "attempt": attempt + 1},
+                        },
+                    }
+            pending = [pid for pid in pending if pid not in decided]
+        
+        if pending:
+            print(f"⚠️ [Batch] {len(pending)} product(s) unresolved after {1 + BATCH_RETRIES} attempts -> HOLD")
+        for pid in pending:
+            decided[pid] = {"decision": "HOLD", "confidence_score": 0.0, "parse_failed": True,
+                            "parameters": {"platform": by_id[pid]["platform"], "product_id": pid},
+                            "reasoning": "No valid batch decision", "timestamp": datetime.now().isoformat(),
+                            "trigger_event": trigger_event, "market_state": by_id[pid]}
+        print(f"✅ [Batch] {len(by_id) - len(pending)}/{len(by_id)} products decided")
+        return [decided[pid] for pid in by_id]
+    
+    @staticmethod
+    def _batch_items(raw: str, ids: List[str]) -> Dict[str, tuple]:
+        """Valid per-product answers in a batch reply: product_id -> (item, action, confidence)."""
+        items = {}
+        for item in extract_json_array(raw):
+            pid = str(item.get("product_id"))
+            action = str(item.get("decision", "")).upper()
+            if pid not in ids or pid in items or action not in BATCH_ACTIONS:
+                continue
+            try:
+                confidence = float(item.get("confidence_score", 0) or 0)
+            except (TypeError, ValueError):
+                continue
+            items[pid] = (item, action, confidence)
+        return items
+    
+    def _batch_prompt(self, trigger_event: str, state: Dict[str, Any], lines: List[str], attempt: int) -> str:
+        retry_note = "\n注意：上一次的輸出無法解析。只輸出 JSON 陣列，每個產品恰好一個物件。\n" if attempt else ""
+        product_lines = "\n".join(lines)
+        return f"""
+[觸發事件]: {trigger_event}
+[整體市場數據]: {json.dumps(state, ensure_ascii=False, default=str)}
+[產品列表] (每行一個產品的 JSON):
+{product_lines}
+
+請逐一為每個產品決定行動，並先自行檢查風險 (利潤下降、品牌傷害、客戶流失)。風險過高時請選擇 HOLD。
+{retry_note}
+輸出格式 (純 JSON 陣列，每個產品一個物件，不要有其他文字):
+[
+    {{
+        "product_id": "產品ID (與輸入相同)",
+        "decision": "UPDATE_PRICE" | "MODIFY_COPY" | "HOLD",
+        "parameters": {{"new_price": 數字 (如果是價格調整), "content": "新文案內容 (如果是文案修改)"}},
+        "confidence_score": 0.0-1.0,
+        "reasoning": "一句話理由"
+    }}
+]
+"""
+    
+    def _personas(self, settings: Dict[str, Any], k: int) -> List[Dict[str, Any]]:
+        """K persona overrides from strategy_parameters["personas"] (or the defaults), cycled if needed."""
+        pool = [p for p in settings.get("personas") or DEFAULT_PERSONAS if isinstance(p, dict)] or DEFAULT_PERSONAS
+        personas = []
+        for i in range(max(1, k)):
+            persona = dict(pool[i % len(pool)])
+            persona.setdefault("name", f"persona_{i % len(pool) + 1}")
+            if i >= len(pool):
+                # Repeat personas get a different temperature (and so a different cache key)
+                persona["temperature"] = round(min(1.5, persona.get("temperature", 0.7) + 0.1 * (i // len(pool))), 2)
+                persona["name"] += f"#{i // len(pool) + 1}"
+            personas.append(persona)
+        return personas
+    
+    def _perceive(self) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[Dict]]:
+        """
+        Shared preamble: kill switch, config reload, market state, arbitration.
+        
+        Returns (settings, state, None) to proceed, or (None, state, verdict)
+        when the loop must not run (verdict None on halt, PASS on veto).
+        """
+        if kill_switch_active("halt"):
+            print("🛑 [KILL SWITCH] Halt flag is set. No decision taken.")
+            return None, None, None
+        
         # Reload config to get latest RSI mutations
         self.config = self._load_config()
         settings = self.config.get('strategy_parameters', {}).copy()
@@ -333,20 +824,19 @@ JSON 輸出格式：
         if not is_approved:
             print("🚫 [VETO] Arbitration rejected the action. Financial risk outweighs market opportunity.")
             # Return a PASS decision to skip expensive thinking
-            return {
+            return None, state, {
                 "decision": "PASS", 
                 "reasoning": "Vetoed by Iron Triangle Logic (Financial Risk > Market Opp)",
                 "confidence_score": 1.0 # Certain veto
             }
         
-        print(f"\n🧠 [Deep Thinking] Initiating 3-Step Recursive Loop...")
-        
-        # ═══════════════════════════════════════════════════════════
-        # STEP 1: PROPOSAL (The Draft Plan)
-        # ═══════════════════════════════════════════════════════════
+        return settings, state, None
+    
+    def _proposer_messages(self, settings: Dict[str, Any], state: Dict[str, Any],
+                           trigger_event: str) -> Tuple[str, str]:
+        """Step 1 (system, prompt) for the given strategy settings."""
         # [ULTRA UPGRADE] Read Long-term Memory
         # This injects past wisdom into decision-making
-        # ═══════════════════════════════════════════════════════════
         wisdom = self._read_long_term_memory(max_chars=1500)
         
         proposer_system = f"""
@@ -368,38 +858,33 @@ JSON 輸出格式：
 
 請給出你的初步行動計畫。說明你的理由，並解釋如何應用過往智慧。
 可選行動：UPDATE_PRICE, MODIFY_COPY, HOLD
+
+最後，請在回答末尾附上計畫摘要 (純 JSON)：
+{{
+    "decision": "UPDATE_PRICE" | "MODIFY_COPY" | "HOLD",
+    "parameters": {{"platform": "gumroad" | "shopify", "product_id": "...", "new_price": 數字, "content": "..."}},
+    "confidence_score": 0.0-1.0,
+    "reasoning": "一句話理由"
+}}
 """
         
-        plan_v1 = call_llm_api(proposer_prompt, proposer_system)
-        print(f"\n💡 [Step 1: Proposal] Draft Generated")
-        print(f"   Preview: {plan_v1[:150].replace(chr(10), ' ')}...")
-        
-        # ═══════════════════════════════════════════════════════════
-        # STEP 2: CRITIC (The Devil's Advocate)
-        # ═══════════════════════════════════════════════════════════
-        critic_system = """
-你是一個嚴厲的風險控制專家與惡毒的批評家。
-你的任務是找出計畫中的漏洞、風險和邏輯錯誤。
-不要給面子，直接指出為什麼這個計畫可能會失敗或導致虧損。
-考慮：品牌傷害、利潤下降、客戶流失、執行風險等。
-"""
-        
-        critic_prompt = f"""
+        return proposer_system, proposer_prompt
+    
+    def _critic_prompt(self, plan_v1: str, earlier: List[str] = (), scored: bool = False) -> str:
+        """Step 2 prompt; `earlier` critiques are shown so later rounds look for new risks."""
+        history = "\n\n".join(f"[第 {i} 輪批評]:\n{c}" for i, c in enumerate(earlier, 1))
+        return f"""
 請審查以下行動計畫：
 
 {plan_v1}
-
+{history}
 請列出 3 個潛在的致命風險或邏輯漏洞，以及每個風險的嚴重程度 (1-10)。
+{"請只列出前幾輪批評沒有提到的新風險。" if earlier else ""}
+{'最後附上整體風險評分 (純 JSON)：{"risk_score": 1-10}' if scored else ""}
 """
-        
-        critique = call_llm_api(critic_prompt, critic_system)
-        print(f"\n⚖️ [Step 2: Critic] Risks Identified")
-        print(f"   Preview: {critique[:150].replace(chr(10), ' ')}...")
-        
-        # ═══════════════════════════════════════════════════════════
-        # STEP 3: SYNTHESIS (The Final Arbiter)
-        # ═══════════════════════════════════════════════════════════
-        finalizer_system = f"""
+    
+    def _finalizer_system(self, settings: Dict[str, Any]) -> str:
+        return f"""
 你是一個完美主義的戰略家，也是最終決策者。
 你需要綜合初始計畫與批評意見，生成一個「修正後」的最終決策。
 
@@ -413,8 +898,9 @@ JSON 輸出格式：
 
 你必須輸出純 JSON 格式，不要有其他文字。
 """
-        
-        finalizer_prompt = f"""
+    
+    def _finalizer_prompt(self, plan_v1: str, critique: str) -> str:
+        return f"""
 [初始計畫]:
 {plan_v1}
 
@@ -437,13 +923,9 @@ JSON 輸出格式：
     "risks_mitigated": ["風險1的緩解方式", "風險2的緩解方式"]
 }}
 """
-        
-        final_decision_raw = call_llm_api(finalizer_prompt, finalizer_system)
-        print(f"\n🎯 [Step 3: Synthesis] Final Decision Generated")
-        
-        # ═══════════════════════════════════════════════════════════
-        # PARSE FINAL JSON
-        # ═══════════════════════════════════════════════════════════
+    
+    def _parse_final(self, final_decision_raw: str) -> Optional[Dict]:
+        """Parse the synthesis JSON (None if missing or malformed)."""
         try:
             # Clean markdown artifacts
             json_str = final_decision_raw.replace("```json", "").replace("```", "").strip()
@@ -454,24 +936,7 @@ JSON 輸出格式：
             
             if start >= 0 and end > start:
                 json_str = json_str[start:end]
-                decision = json.loads(json_str)
-                
-                # Add metadata
-                decision["timestamp"] = datetime.now().isoformat()
-                decision["trigger_event"] = trigger_event
-                decision["market_state"] = state
-                decision["recursive_loop"] = {
-                    "proposal_length": len(plan_v1),
-                    "critique_length": len(critique),
-                    "steps_completed": 3
-                }
-                
-                print(f"\n✅ [FINAL DECISION]")
-                print(f"   Action: {decision.get('decision')}")
-                print(f"   Confidence: {decision.get('confidence_score', 0):.0%}")
-                print(f"   Reasoning: {decision.get('reasoning', 'N/A')[:100]}...")
-                
-                return decision
+                return json.loads(json_str)
             else:
                 print("❌ No valid JSON found in final response")
                 return None
@@ -484,12 +949,79 @@ JSON 輸出格式：
             print(f"❌ Unexpected error: {e}")
             return None
     
-    def log_decision(self, decision: Dict, log_path: str = "data/decision_log.jsonl"):
-        """Log decision for future RLVR training."""
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(decision, ensure_ascii=False, default=str) + "\n")
-        print(f"📝 Decision logged to {log_path}")
+    def _choose_depth(self, trigger_event: str, plan: Optional[Dict[str, Any]],
+                      state: Dict[str, Any]) -> Tuple[int, str, Optional[Dict[str, Any]]]:
+        """
+        Decide how many critic rounds the Step 1 proposal needs.
+        
+        Returns (critic_rounds, reason, risk simulation); 0 rounds means the
+        proposal is final and Steps 2-3 are skipped.
+        """
+        cfg = {**DEPTH_DEFAULTS, **self.config.get("reasoning_depth", {})}
+        
+        # Doing nothing needs no critique, however much is at stake
+        action = str(plan.get("decision", "")).upper() if plan is not None else ""
+        if action in ("HOLD", "PASS"):
+            return 0, "proposal_is_hold", None
+        if (trigger_event in cfg["high_value_triggers"]
+                or state.get("recent_revenue_24h", 0) >= cfg["high_value_revenue_24h"]):
+            return 1 + int(cfg["extra_critic_rounds"]), "high_value_escalation", None
+        if plan is None:
+            return 1, "unstructured_proposal", None
+        
+        try:
+            confidence = float(plan.get("confidence_score", 0) or 0)
+        except (TypeError, ValueError):
+            confidence = 0.0
+        if confidence < cfg["early_exit_confidence"] or action not in SIMULATED_ACTIONS:
+            return 1, "full_loop", None
+        
+        # The proposal and HOLD on the same simulated futures (paired comparison)
+        hypothesis = SIMULATED_ACTIONS[action]
+        simulation = self.risk.simulate_actions([hypothesis, "HOLD"], {
+            "cvr": state.get("conversion_rate", 0.01) or 0.01,
+            "daily_revenue": state.get("recent_revenue_24h", 0),
+        })
+        versus_hold = simulation["vs"][hypothesis]["HOLD"]
+        risk = {**simulation["actions"][hypothesis], "paths": simulation["paths"],
+                "delta_vs_hold": versus_hold["delta"], "p_beats_hold": versus_hold["p_beats"]}
+        if risk["p_beats_hold"] < cfg["min_p_beats_hold"]:
+            return 1, "no_better_than_hold", risk
+        if risk["risk_of_ruin"] <= cfg["max_risk_of_ruin"]:
+            return 0, "confident_low_risk", risk
+        return 1, "risk_too_high", risk
+    
+    def _finalize(self, decision: Dict[str, Any], trigger_event: str, state: Dict[str, Any],
+                  plan_v1: str, critiques: List[str], calls: List[int], loop_start: float,
+                  depth_reason: str) -> Dict[str, Any]:
+        """Attach run metadata (including depth and cost) to a parsed decision."""
+        decision["timestamp"] = datetime.now().isoformat()
+        decision["trigger_event"] = trigger_event
+        decision["market_state"] = state
+        decision["recursive_loop"] = {
+            "proposal_length": len(plan_v1),
+            "critique_length": sum(len(c) for c in critiques),
+            "critic_rounds": len(critiques),
+            "steps_completed": len(calls),
+            "depth": len(calls),
+            "depth_reason": depth_reason,
+            "llm_calls": len(calls),
+            "est_tokens": sum(calls),
+            "latency_ms": round((time.perf_counter() - loop_start) * 1000, 1),
+        }
+        
+        print(f"\n✅ [FINAL DECISION]")
+        print(f"   Action: {decision.get('decision')}")
+        print(f"   Confidence: {decision.get('confidence_score', 0):.0%}")
+        print(f"   Reasoning: {decision.get('reasoning', 'N/A')[:100]}...")
+        
+        return decision
+    
+    def log_decision(self, decision: Dict):
+        """Log decision for future RLVR training (event store, decisions table)."""
+        store = get_event_store()
+        store.log_decision(decision)
+        print(f"📝 Decision logged to {store.path}")
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -500,15 +1032,17 @@ if __name__ == "__main__":
     engine = ECOMDecisionEngine()
     
     # Default trigger event
-    trigger = "daily_review"
-    if len(sys.argv) > 1:
-        trigger = sys.argv[1]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    trigger = args[0] if args else "daily_review"
     
     print("\n" + "=" * 60)
     print("YEDAN AGI - ECOM Decision Engine")
     print("=" * 60)
     
-    decision = engine.analyze_and_decide(trigger_event=trigger)
+    if "--parallel" in sys.argv:
+        decision = asyncio.run(engine.analyze_and_decide_async(trigger_event=trigger))
+    else:
+        decision = engine.analyze_and_decide(trigger_event=trigger)
     
     if decision:
         print("\n" + "=" * 60)
@@ -11,6 +11,7 @@ import os
 import sys
 import io
 import json
+import asyncio
 from datetime import datetime
 from typing import Optional, Dict, Any
 
@@ -24,6 +25,21 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from modules_ecom import bridge_shopify, bridge_gumroad
 from core.decision_engine import ECOMDecisionEngine
+from core.shared_state import kill_switch_active
+from core.price_surface import get_price_surface
+
+# "serial": adaptive-depth critic loop; "parallel": K concurrent proposals (DECISION_PROPOSALS)
+DECISION_MODE = os.getenv("DECISION_MODE", "serial")
+
+# UPDATE_PRICE: take the price change from the price-response surface (the LLM's
+# new_price is only used when the current price is unknown). The change is applied
+# to the product's reference price (its price when first seen here), never to the
+# last price set, so repeated updates do not compound.
+PRICE_FROM_SURFACE = os.getenv("PRICE_FROM_SURFACE", "false").lower() == "true"
+PRICE_MAX_RISK_OF_RUIN = float(os.getenv("PRICE_MAX_RISK_OF_RUIN", "0.05"))
+PRICE_MAX_TOTAL_CHANGE = float(os.getenv("PRICE_MAX_TOTAL_CHANGE", "0.20"))  # Cap vs the reference price
+PRICE_ANCHORS_PATH = os.getenv("PRICE_ANCHORS_PATH", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "price_anchors.json"))
 
 
 class ECOMExecutor:
@@ -67,7 +83,13 @@ class ECOMExecutor:
         # Route to handler
         success = False
         
-        if action_type in ["UPDATE_PRICE", "ADJUST_PRICE"]:
+        if kill_switch_active("halt"):
+            print("   🛑 KILL SWITCH (halt) is set - action blocked")
+            
+        elif action_type in ["UPDATE_PRICE", "ADJUST_PRICE"] and kill_switch_active("pause_pricing"):
+            print("   🛑 KILL SWITCH (pause_pricing) is set - price change blocked")
+            
+        elif action_type in ["UPDATE_PRICE", "ADJUST_PRICE"]:
             success = self._handle_price_update(params)
             
         elif action_type in ["MODIFY_COPY", "UPDATE_COPY", "OPTIMIZE_COPY"]:
@@ -94,6 +116,57 @@ class ECOMExecutor:
         """Extract platform from params, default to gumroad."""
         return params.get("platform", "gumroad").lower()
     
+    def _current_price(self, platform: str, product_id: str, params: Dict) -> Optional[float]:
+        """Current price from the decision, else from the platform (None if unknown)."""
+        try:
+            if params.get("current_price"):
+                return float(params["current_price"])
+            if platform == "gumroad":
+                product = bridge_gumroad.get_product_details(product_id)
+                return product["price"] / 100 if product else None  # Cents
+            if platform == "shopify":
+                product = bridge_shopify.get_product_details(product_id)
+                return float(product["variants"][0]["price"]) if product else None
+        except (KeyError, IndexError, TypeError, ValueError):
+            pass
+        return None
+    
+    def _reference_price(self, platform: str, product_id: str, current: float) -> float:
+        """The product's reference price: recorded from the current price the first time it is seen."""
+        try:
+            with open(PRICE_ANCHORS_PATH, "r", encoding="utf-8") as f:
+                anchors = json.load(f)
+        except (OSError, ValueError):
+            anchors = {}
+        key = f"{platform}:{product_id}"
+        if key not in anchors:
+            anchors[key] = current
+            os.makedirs(os.path.dirname(PRICE_ANCHORS_PATH) or ".", exist_ok=True)
+            with open(PRICE_ANCHORS_PATH, "w", encoding="utf-8") as f:
+                json.dump(anchors, f, indent=2)
+        return float(anchors[key])
+    
+    def _surface_price(self, platform: str, product_id: str, params: Dict) -> Optional[float]:
+        """New price = reference price moved by the surface's expected-revenue-optimal change (capped)."""
+        current = self._current_price(platform, product_id, params)
+        if not current:
+            print("   ⚠️ Current price unknown - using the proposed price")
+            return None
+        reference = self._reference_price(platform, product_id, current)
+        regime = {}
+        for key in ("elasticity", "volatility"):
+            try:
+                regime[key] = float(params[key]) if params.get(key) is not None else None
+            except (TypeError, ValueError):
+                regime[key] = None
+        best = get_price_surface().optimum(max_risk_of_ruin=PRICE_MAX_RISK_OF_RUIN, **regime)
+        change = min(max(best["price_change"], -PRICE_MAX_TOTAL_CHANGE), PRICE_MAX_TOTAL_CHANGE)
+        new_price = round(reference * (1 + change), 2)
+        print(f"   📐 Price surface: {change:+.0%} of ${reference} (E {best['expected_impact']:+.1%}, "
+              f"p10..p90 {best['band'][0]:+.1%}..{best['band'][1]:+.1%}, ruin {best['risk_of_ruin']:.1%}) "
+              f"-> ${current} to ${new_price}")
+        return new_price
+    
     def _handle_price_update(self, params: Dict) -> bool:
         """Handle price update action."""
         platform = self._get_platform(params)
@@ -104,6 +177,9 @@ class ECOMExecutor:
             print("   ❌ Missing product_id")
             return False
         
+        if PRICE_FROM_SURFACE:
+            new_price = self._surface_price(platform, product_id, params) or new_price
+        
         if not new_price:
             print("   ❌ Missing new_price")
             return False
@@ -160,19 +236,12 @@ class ECOMExecutor:
             print(f"   ❌ Unsupported platform: {platform}")
             return False
     
-    def run_cycle(self, trigger_event: str = "daily_optimization_check") -> bool:
-        """
-        [ULTRA UPGRADE] AGI cycle with Confidence Safety Valve.
-        
-        Truth #6: AI must know when NOT to act.
-        If confidence < 80%, action is aborted. Better to do nothing than do wrong.
-        
-        Cycle: Perceive → Think (3-step) → Validate Confidence → Act
-        """
-        
+    def _confidence_threshold(self) -> tuple:
+        """(threshold, risk mode) from config.json strategy_parameters.risk_tolerance."""
         # [DYNAMIC CONFIDENCE] Read from config
         # Load config to check risk tolerance
         current_threshold = 0.80 # Default
+        risk = "default"
         try:
             config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
             if os.path.exists(config_path):
@@ -190,6 +259,20 @@ class ECOMExecutor:
         except Exception as e:
             print(f"⚠️ Error reading config for threshold: {e}")
 
+        return current_threshold, risk
+    
+    def run_cycle(self, trigger_event: str = "daily_optimization_check") -> bool:
+        """
+        [ULTRA UPGRADE] AGI cycle with Confidence Safety Valve.
+        
+        Truth #6: AI must know when NOT to act.
+        If confidence < 80%, action is aborted. Better to do nothing than do wrong.
+        
+        Cycle: Perceive → Think (3-step) → Validate Confidence → Act
+        """
+        
+        current_threshold, risk_mode = self._confidence_threshold()
+
         # CONFIDENCE_THRESHOLD = 0.80 (OLD)
         CONFIDENCE_THRESHOLD = current_threshold
         
@@ -197,16 +280,23 @@ class ECOMExecutor:
         print("🤖 [YEDAN AGI] Starting Autonomous ECOM Cycle")
         print(f"   Trigger: {trigger_event}")
         print(f"   Time: {datetime.now().isoformat()}")
-        print(f"   Confidence Threshold: {CONFIDENCE_THRESHOLD:.0%} (Risk Mode: {params.get('risk_tolerance', 'default')})")
+        print(f"   Confidence Threshold: {CONFIDENCE_THRESHOLD:.0%} (Risk Mode: {risk_mode})")
         print("=" * 60)
         
-        # 1. THINK - Run 3-step recursive critic loop
-        decision = self.engine.analyze_and_decide(trigger_event=trigger_event)
+        # 1. THINK - Run 3-step recursive critic loop (or the parallel multi-proposal mode)
+        if DECISION_MODE == "parallel":
+            decision = asyncio.run(self.engine.analyze_and_decide_async(trigger_event=trigger_event))
+        else:
+            decision = self.engine.analyze_and_decide(trigger_event=trigger_event)
         
         if not decision:
             print("\n⚠️ Brain returned silence (No valid JSON). Sleeping.")
             return False
         
+        # Every run goes to the decision log (depth / latency / token estimates included)
+        if "recursive_loop" in decision:
+            self.engine.log_decision(decision)
+        
         # 2. EXTRACT DECISION METADATA
         action_type = decision.get("decision", "HOLD").upper()
         confidence = float(decision.get("confidence_score", 0.0))
@@ -280,6 +370,50 @@ class ECOMExecutor:
         
         return success
     
+    def run_catalog_cycle(self, products: Optional[list] = None,
+                          trigger_event: str = "catalog_optimization") -> Dict[str, Any]:
+        """
+        Per-product cycle: one batched engine pass over the catalog, then the
+        same confidence safety valve per product. products=None -> every product sold.
+        """
+        threshold, risk_mode = self._confidence_threshold()
+        print("\n" + "=" * 60)
+        print("🤖 [YEDAN AGI] Starting Catalog ECOM Cycle")
+        print(f"   Trigger: {trigger_event}")
+        print(f"   Confidence Threshold: {threshold:.0%} (Risk Mode: {risk_mode})")
+        print("=" * 60)
+        
+        decisions = self.engine.analyze_and_decide_batch(products, trigger_event=trigger_event)
+        summary = {"products": len(decisions), "executed": 0, "held": 0, "blocked_by_safety": 0,
+                   "failed": 0, "parse_failed": 0}
+        for decision in decisions:
+            if "recursive_loop" in decision:
+                self.engine.log_decision(decision)
+            action_type = decision.get("decision", "HOLD").upper()
+            confidence = float(decision.get("confidence_score", 0.0))
+            if decision.get("parse_failed"):
+                summary["parse_failed"] += 1
+            if action_type in ["PASS", "HOLD"]:
+                summary["held"] += 1
+            elif confidence < threshold:
+                summary["blocked_by_safety"] += 1
+                self.action_log.append({
+                    "timestamp": datetime.now().isoformat(),
+                    "action": action_type,
+                    "params": decision.get("parameters", {}),
+                    "executed": False,
+                    "confidence": confidence,
+                    "blocked_by_safety": True,
+                    "reason": f"Confidence {confidence:.0%} below threshold {threshold:.0%}"
+                })
+            elif self.execute_decision(decision):
+                summary["executed"] += 1
+            else:
+                summary["failed"] += 1
+        
+        print(f"\n🏁 [CATALOG CYCLE COMPLETE] {json.dumps(summary)}")
+        return summary
+    
     def get_action_history(self) -> list:
         """Return action history for analysis."""
         return self.action_log
@@ -310,10 +444,9 @@ def main():
     print("YEDAN AGI - ECOM Autonomous Executor")
     print("=" * 60)
     
-    # Get trigger event from args
-    trigger = "daily_optimization_check"
-    if len(sys.argv) > 1:
-        trigger = sys.argv[1]
+    # Get trigger event from args (--catalog: one batched decision per product)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    trigger = args[0] if args else "daily_optimization_check"
     
     # Safety notice
     print("\n🔒 SAFETY NOTICE:")
@@ -326,7 +459,11 @@ def main():
     
     # Run the cycle
     executor = ECOMExecutor()
-    success = executor.run_cycle(trigger_event=trigger)
+    if "--catalog" in sys.argv:
+        summary = executor.run_catalog_cycle(trigger_event=args[0] if args else "catalog_optimization")
+        success = summary["failed"] == 0
+    else:
+        success = executor.run_cycle(trigger_event=trigger)
     
     # Print history
     print("\n📜 Action History:")
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Event Store (Operational Memory)
+One embedded SQLite (WAL) database for the operational logs that used to
+be separate append files:
+
+    decisions     <- data/decision_log.jsonl  (ECOMDecisionEngine.log_decision)
+    interactions  <- logs/interactions.jsonl  (modules.utils.log_interaction)
+    evolutions    <- config.json evolution_log (RSIEvolver.apply_mutation)
+    sales         <- mirrored from the sales ledger (sync_sales)
+
+Tables are typed and indexed on timestamp, platform, product and decision
+type. Writes are buffered and flushed with executemany() in batches;
+readers get range scans and grouped aggregations instead of parsing JSONL
+line by line.
+
+Decision, interaction and evolution timestamps are stored in UTC; mirrored
+sales keep the ledger's clock (local wall time). Query bounds follow the
+table's clock: aware bounds are converted to it, naive bounds are taken as
+UTC, or as local time for sales.
+
+Schema adapted from the v1300 AGIMemory store (_archive/v1300/agi_memory.py).
+"""
+
+import os
+import sys
+import io
+import json
+import atexit
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Tuple
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import SalesLedger, to_micros, micros_to_datetime
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_PATH = os.getenv("EVENT_STORE_PATH", os.path.join(ROOT_DIR, "data", "events.sqlite"))
+
+# Legacy append files imported on first use (and tailed while old writers remain)
+LEGACY_DECISION_LOG = os.path.join(ROOT_DIR, "data", "decision_log.jsonl")
+LEGACY_INTERACTION_LOG = os.path.join(ROOT_DIR, "logs", "interactions.jsonl")
+LEGACY_CONFIG = os.path.join(ROOT_DIR, "config.json")
+
+# Buffered rows are flushed when either limit is reached (and at exit)
+BATCH_ROWS = int(os.getenv("EVENT_STORE_BATCH_ROWS", "64"))
+FLUSH_SECONDS = float(os.getenv("EVENT_STORE_FLUSH_SECONDS", "1.0"))
+
+HOUR_US = 3600 * 1_000_000
+DAY_US = 24 * HOUR_US
+BUCKETS = {"hour": HOUR_US, "day": DAY_US}
+
+# table -> (column DDL, indexed filter columns, JSON columns)
+TABLES: Dict[str, Tuple[Dict[str, str], List[str], List[str]]] = {
+    "decisions": ({
+        "id": "INTEGER PRIMARY KEY",
+        "ts": "INTEGER NOT NULL",
+        "decision_type": "TEXT",
+        "platform": "TEXT",
+        "product": "TEXT",
+        "trigger_event": "TEXT",
+        "confidence": "REAL",
+        "payload": "TEXT",
+        "depth": "INTEGER",          # LLM steps the decision loop ran (adaptive depth)
+        "llm_calls": "INTEGER",
+        "est_tokens": "INTEGER",
+        "latency_ms": "REAL",
+        "ttft_ms": "REAL",            # Streamed synthesis: first token / decision object closed
+        "time_to_decision_ms": "REAL",
+    }, ["decision_type", "platform", "product"], ["payload"]),
+    "interactions": ({
+        "id": "INTEGER PRIMARY KEY",
+        "ts": "INTEGER NOT NULL",
+        "platform": "TEXT",
+        "post_id": "TEXT",
+        "response_length": "INTEGER",
+        "meta": "TEXT",
+    }, ["platform"], ["meta"]),
+    "evolutions": ({
+        "id": "INTEGER PRIMARY KEY",
+        "ts": "INTEGER NOT NULL",
+        "revenue": "REAL",
+        "trend": "TEXT",
+        "old_params": "TEXT",
+        "new_params": "TEXT",
+        "reasoning": "TEXT",
+    }, [], ["old_params", "new_params"]),
+    "sales": ({
+        "seq": "INTEGER PRIMARY KEY",
+        "ts": "INTEGER NOT NULL",
+        "platform": "TEXT",
+        "event_type": "TEXT",
+        "order_id": "TEXT",
+        "product": "TEXT",
+        "amount": "REAL",
+        "currency": "TEXT",
+    }, ["platform", "product"], []),
+}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _utc_micros(value: Any, local: bool) -> int:
+    """
+    Epoch microseconds in UTC (now if value is None). Aware values are
+    converted; naive ones are local wall-clock time when `local` (what
+    datetime.now().isoformat() wrote) and already UTC otherwise.
+    """
+    if value is None:
+        value = datetime.now(timezone.utc)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return to_micros(value)
+    if isinstance(value, datetime) and (value.tzinfo is not None or local):
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return to_micros(value)
+
+
+class EventStore:
+    """
+    SQLite WAL store for operational events.
+
+    Write path: log_decision / log_interaction / log_evolution -> buffer -> flush()
+    Read path:  query(table, start, end, **filters) / aggregate(...) / count(...)
+    """
+
+    def __init__(self, path: str = STORE_PATH, batch_rows: int = BATCH_ROWS,
+                 flush_seconds: float = FLUSH_SECONDS):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self._lock = threading.RLock()
+        self._pending: Dict[str, List[Tuple]] = {}
+        self._pending_rows = 0
+        self._insert_sql = {
+            table: "INSERT OR IGNORE INTO {} ({}) VALUES ({})".format(
+                table, ", ".join(c for c in cols if c != "id"),
+                ", ".join("?" for c in cols if c != "id"))
+            for table, (cols, _, _) in TABLES.items()
+        }
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_db()
+        atexit.register(self.flush)
+
+    def _init_db(self):
+        c = self.conn
+        for table, (cols, filters, _) in TABLES.items():
+            ddl = ", ".join(f"{name} {kind}" for name, kind in cols.items())
+            c.execute(f"CREATE TABLE IF NOT EXISTS {table} ({ddl})")
+            # Columns added after a store was created
+            existing = {row[1] for row in c.execute(f"PRAGMA table_info({table})")}
+            for name, kind in cols.items():
+                if name not in existing:
+                    c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+            c.execute(f"CREATE INDEX IF NOT EXISTS {table}_ts ON {table} (ts)")
+            for col in filters:
+                c.execute(f"CREATE INDEX IF NOT EXISTS {table}_{col}_ts ON {table} ({col}, ts)")
+
+        # Bookkeeping (import offsets, sync watermarks)
+        c.execute('''CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )''')
+        c.commit()
+
+    # ═══════════════════════════════════════════════════════════
+    # WRITE PATH
+    # ═══════════════════════════════════════════════════════════
+
+    def _append(self, table: str, values: Tuple):
+        with self._lock:
+            if not self._pending_rows:
+                # Bound staleness for other processes even if no more rows arrive
+                timer = threading.Timer(self.flush_seconds, self.flush)
+                timer.daemon = True
+                timer.start()
+            self._pending.setdefault(table, []).append(values)
+            self._pending_rows += 1
+            if self._pending_rows >= self.batch_rows:
+                self.flush()
+
+    def flush(self):
+        """Write buffered rows, one executemany() per table, in one transaction."""
+        with self._lock:
+            if not self._pending_rows:
+                return
+            try:
+                with self.conn:
+                    for table, rows in self._pending.items():
+                        self.conn.executemany(self._insert_sql[table], rows)
+            except sqlite3.ProgrammingError:
+                return  # Connection already closed (interpreter exit)
+            self._pending = {}
+            self._pending_rows = 0
+
+    def log_decision(self, decision: Dict[str, Any]):
+        params = decision.get("parameters") or {}
+        loop = decision.get("recursive_loop") or {}
+        self._append("decisions", (
+            _utc_micros(decision.get("timestamp"), local=True),
+            decision.get("decision"),
+            params.get("platform"),
+            params.get("product_id") or params.get("product_name") or params.get("product"),
+            decision.get("trigger_event"),
+            float(decision.get("confidence_score", 0) or 0),
+            _dumps(decision),
+            loop.get("depth", loop.get("steps_completed")),
+            loop.get("llm_calls"),
+            loop.get("est_tokens"),
+            loop.get("latency_ms"),
+            loop.get("ttft_ms"),
+            loop.get("time_to_decision_ms"),
+        ))
+
+    def log_interaction(self, platform: str, post_id: str, response_length: int,
+                        meta: Optional[Dict[str, Any]] = None, timestamp: Any = None):
+        self._append("interactions", (
+            _utc_micros(timestamp, local=False),
+            platform, str(post_id), int(response_length), _dumps(meta or {}),
+        ))
+
+    def log_evolution(self, entry: Dict[str, Any]):
+        trigger = entry.get("trigger") or {}
+        self._append("evolutions", (
+            _utc_micros(entry.get("timestamp"), local=True),
+            float(trigger.get("revenue", 0) or 0),
+            trigger.get("trend"),
+            _dumps(entry.get("old_params") or {}),
+            _dumps(entry.get("new_params") or {}),
+            entry.get("reasoning"),
+        ))
+
+    def sync_sales(self, ledger: SalesLedger) -> int:
+        """Mirror ledger rows written since the last sync (keyed by ledger seq)."""
+        with self._lock:
+            self.flush()
+            last_ts = self._get_meta("sales_watermark_ts")
+            data = ledger.scan(start=micros_to_datetime(int(last_ts)) if last_ts else None,
+                               columns=["seq", "timestamp", "platform", "event_type",
+                                        "order_id", "product_name", "amount", "currency"])
+            if len(data["seq"]) == 0:
+                return 0
+            rows = list(zip(data["seq"].tolist(), data["timestamp"].tolist(),
+                            data["platform"].tolist(), data["event_type"].tolist(),
+                            data["order_id"].tolist(), data["product_name"].tolist(),
+                            data["amount"].tolist(), data["currency"].tolist()))
+            before = self.conn.total_changes
+            with self.conn:
+                self.conn.executemany(self._insert_sql["sales"], rows)
+                added = self.conn.total_changes - before
+                self._set_meta("sales_watermark_ts", str(int(data["timestamp"].max())))
+            return added
+
+    # ═══════════════════════════════════════════════════════════
+    # READ PATH
+    # ═══════════════════════════════════════════════════════════
+
+    def _where(self, table: str, start: Any, end: Any,
+               filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        if table not in TABLES:
+            raise KeyError(f"Unknown event table: {table}")
+        cols = TABLES[table][0]
+        bound = to_micros if table == "sales" else (lambda value: _utc_micros(value, local=False))
+        clauses, args = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            args.append(bound(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            args.append(bound(end))
+        for col, value in filters.items():
+            if value is None:
+                continue
+            if col not in cols:
+                raise KeyError(f"Unknown column for {table}: {col}")
+            clauses.append(f"{col} = ?")
+            args.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def query(self, table: str, start: Any = None, end: Any = None,
+              limit: Optional[int] = None, newest_first: bool = False,
+              **filters) -> List[Dict[str, Any]]:
+        """
+        Range scan over [start, end) with equality filters, e.g.
+        query("decisions", start=week_ago, decision_type="ADJUST_PRICE")
+        """
+        where, args = self._where(table, start, end, filters)
+        sql = f"SELECT * FROM {table}{where} ORDER BY ts {'DESC' if newest_first else 'ASC'}"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        json_cols = TABLES[table][2]
+        with self._lock:
+            self.flush()
+            rows = self.conn.execute(sql, args).fetchall()
+
+        out = []
+        for row in rows:
+            rec = dict(row)
+            rec["timestamp"] = micros_to_datetime(rec.pop("ts")).isoformat()
+            for col in json_cols:
+                if rec.get(col):
+                    rec[col] = json.loads(rec[col])
+            out.append(rec)
+        return out
+
+    def aggregate(self, table: str, group_by: Optional[str] = None, bucket: Optional[str] = None,
+                  value: Optional[str] = None, start: Any = None, end: Any = None,
+                  **filters) -> List[Dict[str, Any]]:
+        """
+        Grouped counts (and sum/avg of `value`) over [start, end).
+        group_by: any column (e.g. platform, decision_type); bucket: "hour" / "day"
+        """
+        cols = TABLES.get(table, ({},))[0]
+        for col in (group_by, value):
+            if col is not None and col not in cols:
+                raise KeyError(f"Unknown column for {table}: {col}")
+        if bucket is not None and bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {list(BUCKETS)}")
+
+        where, args = self._where(table, start, end, filters)
+        keys = []
+        if bucket:
+            keys.append(f"(ts / {BUCKETS[bucket]}) * {BUCKETS[bucket]} AS bucket")
+        if group_by:
+            keys.append(group_by)
+        measures = ["COUNT(*) AS count"]
+        if value:
+            measures += [f"SUM({value}) AS sum", f"AVG({value}) AS avg"]
+        group = ", ".join(k.split(" AS ")[-1] for k in keys)
+        sql = f"SELECT {', '.join(keys + measures)} FROM {table}{where}"
+        if group:
+            sql += f" GROUP BY {group} ORDER BY {group}"
+
+        with self._lock:
+            self.flush()
+            rows = [dict(r) for r in self.conn.execute(sql, args).fetchall()]
+        for rec in rows:
+            if "bucket" in rec:
+                rec["bucket"] = micros_to_datetime(rec["bucket"]).isoformat()
+        return rows
+
+    def count(self, table: str, start: Any = None, end: Any = None, **filters) -> int:
+        return self.aggregate(table, start=start, end=end, **filters)[0]["count"]
+
+    # ═══════════════════════════════════════════════════════════
+    # LEGACY IMPORT / EXPORT
+    # ═══════════════════════════════════════════════════════════
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _import_jsonl(self, path: str, table: str) -> int:
+        """Import lines appended since the last import (byte offset in meta)."""
+        if not os.path.exists(path):
+            return 0
+        key = f"import:{os.path.abspath(path)}"
+        offset = int(self._get_meta(key) or 0)
+        if offset > os.path.getsize(path):
+            offset = 0  # File was rotated
+        imported = 0
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Partial line still being written
+                offset += len(raw)
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    continue
+                if table == "decisions":
+                    self.log_decision(rec)
+                else:
+                    self.log_interaction(rec.get("platform"), rec.get("post_id", ""),
+                                         rec.get("response_length", 0), rec.get("meta"),
+                                         timestamp=rec.get("timestamp"))
+                imported += 1
+        with self._lock:
+            self.flush()
+            with self.conn:
+                self._set_meta(key, str(offset))
+        return imported
+
+    def import_legacy(self, decision_log: str = LEGACY_DECISION_LOG,
+                      interaction_log: str = LEGACY_INTERACTION_LOG,
+                      config_path: str = LEGACY_CONFIG) -> Dict[str, int]:
+        """Idempotently import the JSONL logs and config.json evolution_log."""
+        counts = {"decisions": self._import_jsonl(decision_log, "decisions"),
+                  "interactions": self._import_jsonl(interaction_log, "interactions"),
+                  "evolutions": 0}
+        if os.path.exists(config_path):
+            try:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f).get("evolution_log", [])
+            except (OSError, ValueError):
+                entries = []
+            last_ts = int(self._get_meta("import:evolution_log") or 0)
+            for entry in entries:
+                if isinstance(entry, dict) and to_micros(entry.get("timestamp") or 0) > last_ts:
+                    self.log_evolution(entry)
+                    last_ts = to_micros(entry["timestamp"])
+                    counts["evolutions"] += 1
+            with self._lock:
+                self.flush()
+                with self.conn:
+                    self._set_meta("import:evolution_log", str(last_ts))
+        return counts
+
+    def export_jsonl(self, table: str, path: str) -> int:
+        """Write a table back out as JSONL (RLVR training exports)."""
+        rows = self.query(table)
+        with open(path, 'w', encoding='utf-8') as f:
+            for rec in rows:
+                if table == "decisions":
+                    rec = rec["payload"]
+                f.write(_dumps(rec) + "\n")
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self.conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_store: Optional[EventStore] = None
+
+
+def get_event_store() -> EventStore:
+    """Process-wide store; pulls in any legacy JSONL lines on first use."""
+    global _default_store
+    if _default_store is None:
+        store = EventStore()
+        try:
+            imported = store.import_legacy()
+            if any(imported.values()):
+                print(f"📥 [EVENT STORE] Imported legacy logs: {imported}")
+        except Exception as e:
+            print(f"⚠️ [EVENT STORE] Legacy import failed: {e}")
+        _default_store = store
+    return _default_store
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    store = get_event_store()
+
+    if "--sync-sales" in sys.argv:
+        from core.sales_ledger import get_ledger
+        print(f"🔄 Mirrored {store.sync_sales(get_ledger())} ledger rows")
+
+    elif "--export" in sys.argv:
+        # python core/event_store.py --export decisions data/decision_log.jsonl
+        i = sys.argv.index("--export")
+        table, path = sys.argv[i + 1], sys.argv[i + 2]
+        print(f"📤 Exported {store.export_jsonl(table, path)} {table} rows to {path}")
+
+    else:
+        print("=" * 60)
+        print("YEDAN AGI - Event Store")
+        print("=" * 60)
+        print(f"Path: {store.path}")
+        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
+        for table in TABLES:
+            print(f"{table:>13}: {store.count(table)} rows ({store.count(table, start=week_ago)} in 7d)")
+        for row in store.aggregate("decisions", group_by="decision_type"):
+            print(f"   {row['decision_type']}: {row['count']}")
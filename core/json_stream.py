@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Incremental JSON Extractor
+Pulls JSON objects out of a streamed LLM response as the text arrives.
+
+    extractor = JSONStreamExtractor()
+    for chunk in stream:
+        for obj in extractor.feed(chunk):
+            ...  # Emitted the moment the object's closing brace arrives
+
+- <think>...</think> blocks are skipped (tags may be split across chunks)
+- braces inside JSON strings (and escaped quotes) are handled
+- markdown fences and prose around the object are ignored
+- a balanced {...} that is not valid JSON is dropped and scanning resumes
+  just after its opening brace, so a nested valid object can still be found
+"""
+
+import json
+from typing import Any, Dict, List
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+class JSONStreamExtractor:
+    """Feed text chunks; get back each complete top-level JSON object once."""
+
+    def __init__(self, skip_think: bool = True):
+        self.skip_think = skip_think
+        self.text = ""
+        self.objects: List[Dict[str, Any]] = []
+        self._pos = 0          # Next character to scan
+        self._in_think = False
+        self._start = -1       # Opening brace of the object being scanned
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk; returns the objects completed by it (usually zero or one)."""
+        self.text += chunk
+        found = []
+        text, i = self.text, self._pos
+        while i < len(text):
+            if self._depth == 0:
+                if self._in_think:
+                    end = text.find(THINK_CLOSE, i)
+                    if end < 0:
+                        i = max(i, len(text) - len(THINK_CLOSE) + 1)  # Keep a partial closing tag
+                        break
+                    self._in_think = False
+                    i = end + len(THINK_CLOSE)
+                    continue
+                ch = text[i]
+                if self.skip_think and ch == "<":
+                    head = text[i:i + len(THINK_OPEN)]
+                    if head == THINK_OPEN:
+                        self._in_think = True
+                        i += len(THINK_OPEN)
+                        continue
+                    if THINK_OPEN.startswith(head):
+                        break  # Could still become <think>: wait for more text
+                elif ch == "{":
+                    self._start, self._depth = i, 1
+                    self._in_string = self._escape = False
+                i += 1
+                continue
+
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = json.loads(text[self._start:i + 1])
+                    except json.JSONDecodeError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        found.append(obj)
+                    else:
+                        i = self._start  # Rescan from just after the bad opening brace
+            i += 1
+        self._pos = i
+        self.objects.extend(found)
+        return found
+
+    @property
+    def first(self):
+        return self.objects[0] if self.objects else None
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - KPI Materializer (Running Aggregates)
+Keeps sales KPIs up to date as each webhook event is logged, so readers
+get O(1) snapshots instead of scanning the ledger.
+
+Maintains:
+- Totals (orders, revenue, last order)
+- Per-platform and per-product totals
+- Per-hour buckets (retained HOURLY_RETENTION_DAYS) and per-day buckets,
+  both broken down by platform
+- Sliding 24h / 7d windows backed by time-bucketed ring buffers
+
+State is persisted to data/kpi_snapshot.json together with the ledger
+sequence watermark. On restart only rows after the watermark are replayed.
+"""
+
+import os
+import sys
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import SalesLedger, get_ledger, to_micros, micros_to_datetime, CSV_COLUMNS, SCHEMA
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+SNAPSHOT_PATH = os.getenv("KPI_SNAPSHOT_PATH",
+                          os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "kpi_snapshot.json"))
+
+# Hourly buckets older than this are dropped (daily buckets are kept forever)
+HOURLY_RETENTION_DAYS = int(os.getenv("KPI_HOURLY_RETENTION_DAYS", "35"))
+
+# Persist the snapshot every N applied events or every N seconds
+SNAPSHOT_EVERY_EVENTS = 50
+SNAPSHOT_EVERY_SECONDS = 60
+
+# Columns needed to fold rows into the aggregates
+FOLD_COLUMNS = ["seq", "timestamp", "platform", "product_name", "amount"]
+
+HOUR_US = 3600 * 1_000_000
+DAY_US = 24 * HOUR_US
+
+
+class RingWindow:
+    """
+    Sliding time window over fixed-width buckets.
+
+    Bucket i of the ring holds the bucket id it was last written for, so
+    stale slots are recognised (and reset) without a background sweeper.
+    Reading a window sums at most `slots` buckets, independent of history.
+    """
+
+    def __init__(self, span_us: int, bucket_us: int):
+        self.bucket_us = bucket_us
+        self.slots = span_us // bucket_us
+        self.stamps = np.full(self.slots, -1, dtype=np.int64)
+        self.orders = np.zeros(self.slots, dtype=np.int64)
+        self.revenue = np.zeros(self.slots, dtype=np.float64)
+
+    def add(self, ts_us: int, orders: int, revenue: float):
+        bucket = ts_us // self.bucket_us
+        newest = int(self.stamps.max())
+        if bucket <= newest - self.slots:
+            return  # Older than the whole window
+        slot = bucket % self.slots
+        if self.stamps[slot] != bucket:
+            if self.stamps[slot] > bucket:
+                return
+            self.stamps[slot] = bucket
+            self.orders[slot] = 0
+            self.revenue[slot] = 0.0
+        self.orders[slot] += orders
+        self.revenue[slot] += revenue
+
+    def add_many(self, ts_us: np.ndarray, amounts: np.ndarray):
+        if len(ts_us) == 0:
+            return
+        buckets = ts_us // self.bucket_us
+        floor = max(int(self.stamps.max()), int(buckets.max())) - self.slots
+        keep = buckets > floor
+        ids, inverse = np.unique(buckets[keep], return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(ids))
+        sums = np.bincount(inverse, weights=amounts[keep], minlength=len(ids))
+        for bucket, n, rev in zip(ids.tolist(), counts.tolist(), sums.tolist()):
+            self.add(bucket * self.bucket_us, n, rev)
+
+    def total(self, now_us: int) -> Dict[str, float]:
+        now_bucket = now_us // self.bucket_us
+        live = (self.stamps > now_bucket - self.slots) & (self.stamps <= now_bucket)
+        return {"orders": int(self.orders[live].sum()), "revenue": float(self.revenue[live].sum())}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"stamps": self.stamps.tolist(), "orders": self.orders.tolist(),
+                "revenue": self.revenue.tolist()}
+
+    def load(self, data: Dict[str, Any]):
+        if len(data.get("stamps", [])) != self.slots:
+            return
+        self.stamps = np.array(data["stamps"], dtype=np.int64)
+        self.orders = np.array(data["orders"], dtype=np.int64)
+        self.revenue = np.array(data["revenue"], dtype=np.float64)
+
+
+class KPIMaterializer:
+    """
+    Incrementally maintained sales KPIs.
+
+    Write path: apply(row) from log_event, apply_columns() for replays
+    Read path:  snapshot() / window(start, end, platform)
+    """
+
+    def __init__(self, ledger: Optional[SalesLedger] = None, snapshot_path: str = SNAPSHOT_PATH,
+                 rollups=None):
+        self.ledger = ledger or get_ledger()
+        self.snapshot_path = snapshot_path
+        self.rollups = rollups
+        self._lock = threading.RLock()
+        self._dirty = 0
+        self._last_save = time.time()
+        self._reset()
+
+    def _reset(self):
+        self.orders = 0
+        self.revenue = 0.0
+        self.platforms: Dict[str, List[float]] = {}   # platform -> [orders, revenue]
+        self.products: Dict[str, List[float]] = {}    # product  -> [orders, revenue]
+        self.hourly: Dict[int, Dict[str, List[float]]] = {}  # hour id -> platform -> [orders, revenue]
+        self.daily: Dict[int, Dict[str, List[float]]] = {}   # day id  -> platform -> [orders, revenue]
+        self.window_24h = RingWindow(DAY_US, 5 * 60 * 1_000_000)
+        self.window_7d = RingWindow(7 * DAY_US, HOUR_US)
+        self.last_order: Optional[Dict[str, Any]] = None
+        self.watermark_seq = 0
+        self.watermark_ts = 0
+
+    # ═══════════════════════════════════════════════════════════
+    # WRITE PATH
+    # ═══════════════════════════════════════════════════════════
+
+    @staticmethod
+    def _bump(table: Dict, key, orders: int, revenue: float):
+        cell = table.get(key)
+        if cell is None:
+            table[key] = [orders, revenue]
+        else:
+            cell[0] += orders
+            cell[1] += revenue
+
+    def apply(self, row: Dict[str, Any]):
+        """Fold one ledger row (as returned by SalesLedger.append) into the KPIs."""
+        with self._lock:
+            if row.get("seq", 0) and row["seq"] <= self.watermark_seq:
+                return  # Already counted (replay overlap)
+            ts = to_micros(row["timestamp"])
+            amount = float(row.get("amount", 0) or 0)
+            platform = row.get("platform", "")
+
+            self.orders += 1
+            self.revenue += amount
+            self._bump(self.platforms, platform, 1, amount)
+            self._bump(self.products, row.get("product_name", ""), 1, amount)
+            new_hour = (ts // HOUR_US) not in self.hourly
+            self._bump(self.hourly.setdefault(ts // HOUR_US, {}), platform, 1, amount)
+            self._bump(self.daily.setdefault(ts // DAY_US, {}), platform, 1, amount)
+            self.window_24h.add(ts, 1, amount)
+            self.window_7d.add(ts, 1, amount)
+
+            if ts >= self.watermark_ts:
+                self.last_order = {c: row.get(c) for c in CSV_COLUMNS}
+                self.last_order["timestamp"] = micros_to_datetime(ts).isoformat()
+            self.watermark_seq = max(self.watermark_seq, int(row.get("seq", 0) or 0))
+            self.watermark_ts = max(self.watermark_ts, ts)
+            if new_hour:
+                self._prune_hourly()
+            self._dirty += 1
+
+    def apply_columns(self, data: Dict[str, np.ndarray], dedupe: bool = True):
+        """Vectorised fold of ledger columns (rebuild / catch-up)."""
+        with self._lock:
+            if dedupe:
+                keep = data["seq"] > self.watermark_seq
+                data = {c: v[keep] for c, v in data.items()}
+            n = len(data["seq"])
+            if n == 0:
+                return
+            ts, amount = data["timestamp"], data["amount"]
+
+            self.orders += n
+            self.revenue += float(amount.sum())
+            self._fold(self.platforms, data["platform"], amount)
+            self._fold(self.products, data["product_name"], amount)
+            self._fold_buckets(self.hourly, ts // HOUR_US, data["platform"], amount)
+            self._fold_buckets(self.daily, ts // DAY_US, data["platform"], amount)
+            self.window_24h.add_many(ts, amount)
+            self.window_7d.add_many(ts, amount)
+
+            last = int(np.argmax(data["seq"]))
+            if int(ts[last]) >= self.watermark_ts:
+                self.last_order = {c: data[c][last].item() for c in CSV_COLUMNS if c in data}
+                self.last_order["timestamp"] = micros_to_datetime(ts[last]).isoformat()
+            self.watermark_seq = max(self.watermark_seq, int(data["seq"].max()))
+            self.watermark_ts = max(self.watermark_ts, int(ts.max()))
+            self._prune_hourly()
+            self._dirty += n
+
+    def _fold(self, table: Dict, keys: np.ndarray, amount: np.ndarray):
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(uniq))
+        sums = np.bincount(inverse, weights=amount, minlength=len(uniq))
+        for key, n, rev in zip(uniq.tolist(), counts.tolist(), sums.tolist()):
+            self._bump(table, key, n, rev)
+
+    def _fold_buckets(self, table: Dict, buckets: np.ndarray, platforms: np.ndarray, amount: np.ndarray):
+        plat_ids, plat_inv = np.unique(platforms, return_inverse=True)
+        combo = buckets * len(plat_ids) + plat_inv
+        uniq, inverse = np.unique(combo, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(uniq))
+        sums = np.bincount(inverse, weights=amount, minlength=len(uniq))
+        for key, n, rev in zip(uniq.tolist(), counts.tolist(), sums.tolist()):
+            bucket, plat = divmod(key, len(plat_ids))
+            self._bump(table.setdefault(bucket, {}), plat_ids[plat].item(), n, rev)
+
+    def _prune_hourly(self):
+        horizon = (self.watermark_ts - HOURLY_RETENTION_DAYS * DAY_US) // HOUR_US
+        for hour in [h for h in self.hourly if h < horizon]:
+            del self.hourly[hour]
+
+    def rebuild(self):
+        """Full rebuild from the ledger (first start / corrupted snapshot)."""
+        with self._lock:
+            self._reset()
+            self._fold_archived()
+            # One day partition at a time, projecting only the folded columns,
+            # so memory stays bounded by the largest day rather than the history
+            for part in self.ledger.partitions() or [None]:
+                day = datetime.strptime(part[3:], "%Y-%m-%d") if part else None
+                self.apply_columns(self.ledger.scan(
+                    start=day, end=day + timedelta(days=1) if day else None,
+                    columns=FOLD_COLUMNS), dedupe=False)
+            # Hot rows can sit in a day that has no sealed partition yet
+            self.apply_columns(self.ledger.scan(
+                start=micros_to_datetime(self.watermark_ts) if self.watermark_ts else None,
+                columns=FOLD_COLUMNS))
+            last = self.ledger.tail(1)
+            self.last_order = last[0] if last else None
+
+    def _fold_archived(self):
+        """Raw partitions moved to data/archive are represented by daily rollups."""
+        rollups = self.rollups
+        if rollups is None:
+            from core.rollups import ARCHIVE_DIR, get_rollups
+            if not os.path.isdir(os.path.join(ARCHIVE_DIR, "ledger")):
+                return
+            rollups = get_rollups(self.ledger)
+        parts = self.ledger.partitions()
+        if not parts:
+            return
+        for row in rollups.rows("day", end=datetime.strptime(parts[0][3:], "%Y-%m-%d")):
+            n, rev = int(row["orders"]), float(row["revenue"])
+            self.orders += n
+            self.revenue += rev
+            self._bump(self.platforms, row["platform"], n, rev)
+            self._bump(self.products, row["product"], n, rev)
+            self._bump(self.daily.setdefault(row["bucket"] // DAY_US, {}), row["platform"], n, rev)
+
+    def refresh(self):
+        """Replay ledger rows written after the watermark (other processes' appends)."""
+        with self._lock:
+            start = micros_to_datetime(self.watermark_ts) if self.watermark_ts else None
+            self.apply_columns(self.ledger.scan(start=start, columns=list(SCHEMA)))
+
+    # ═══════════════════════════════════════════════════════════
+    # SNAPSHOT / RESTORE
+    # ═══════════════════════════════════════════════════════════
+
+    def save(self):
+        with self._lock:
+            state = {
+                "version": 1,
+                "saved_at": datetime.now().isoformat(),
+                "watermark_seq": self.watermark_seq,
+                "watermark_ts": self.watermark_ts,
+                "orders": self.orders,
+                "revenue": self.revenue,
+                "platforms": self.platforms,
+                "products": self.products,
+                "hourly": {str(k): v for k, v in self.hourly.items()},
+                "daily": {str(k): v for k, v in self.daily.items()},
+                "window_24h": self.window_24h.to_dict(),
+                "window_7d": self.window_7d.to_dict(),
+                "last_order": self.last_order,
+            }
+            tmp = self.snapshot_path + ".tmp"
+            os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.snapshot_path)
+            self._dirty = 0
+            self._last_save = time.time()
+
+    def maybe_save(self):
+        """Save if enough events or time have accumulated since the last save."""
+        if self._dirty >= SNAPSHOT_EVERY_EVENTS or \
+                (self._dirty and time.time() - self._last_save >= SNAPSHOT_EVERY_SECONDS):
+            self.save()
+
+    def restore(self) -> bool:
+        """Load the snapshot file. Returns False if missing or unreadable."""
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ [KPI] Snapshot unreadable, rebuilding: {e}")
+            return False
+
+        with self._lock:
+            self._reset()
+            self.watermark_seq = state.get("watermark_seq", 0)
+            self.watermark_ts = state.get("watermark_ts", 0)
+            self.orders = state.get("orders", 0)
+            self.revenue = state.get("revenue", 0.0)
+            self.platforms = state.get("platforms", {})
+            self.products = state.get("products", {})
+            self.hourly = {int(k): v for k, v in state.get("hourly", {}).items()}
+            self.daily = {int(k): v for k, v in state.get("daily", {}).items()}
+            self.window_24h.load(state.get("window_24h", {}))
+            self.window_7d.load(state.get("window_7d", {}))
+            self.last_order = state.get("last_order")
+            self._dirty = 0
+        return True
+
+    # ═══════════════════════════════════════════════════════════
+    # READ PATH
+    # ═══════════════════════════════════════════════════════════
+
+    def snapshot(self, include_products: bool = False) -> Dict[str, Any]:
+        """Current KPIs. Cost is independent of history size."""
+        now = to_micros(datetime.now())
+        with self._lock:
+            snap = {
+                "total_orders": self.orders,
+                "total_revenue": round(self.revenue, 2),
+                "window_24h": self.window_24h.total(now),
+                "window_7d": self.window_7d.total(now),
+                "platforms": {p: {"orders": int(v[0]), "revenue": round(v[1], 2)}
+                              for p, v in self.platforms.items()},
+                "last_order": dict(self.last_order) if self.last_order else None,
+                "watermark_seq": self.watermark_seq,
+            }
+            if include_products:
+                snap["products"] = {p: {"orders": int(v[0]), "revenue": round(v[1], 2)}
+                                    for p, v in self.products.items()}
+        return snap
+
+    def window(self, start: Any = None, end: Any = None,
+               platform: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Aggregate over [start, end) from the hourly buckets (hour resolution).
+        Falls back to daily buckets when start is older than the hourly retention.
+        """
+        with self._lock:
+            hi = to_micros(end) if end is not None else self.watermark_ts + 1
+            lo = to_micros(start) if start is not None else 0
+            horizon = (self.watermark_ts - HOURLY_RETENTION_DAYS * DAY_US)
+            if lo >= horizon and self.hourly:
+                table, width = self.hourly, HOUR_US
+            else:
+                table, width = self.daily, DAY_US
+            first, last = lo // width, (hi - 1) // width
+
+            orders, revenue = 0, 0.0
+            platforms: Dict[str, Dict[str, float]] = {}
+            keys = range(first, last + 1) if last - first < len(table) else \
+                sorted(k for k in table if first <= k <= last)
+            for key in keys:
+                bucket = table.get(key)
+                if not bucket:
+                    continue
+                for plat, (n, rev) in bucket.items():
+                    if platform and plat.lower() != platform.lower():
+                        continue
+                    orders += int(n)
+                    revenue += rev
+                    agg = platforms.setdefault(plat, {"orders": 0, "revenue": 0.0})
+                    agg["orders"] += int(n)
+                    agg["revenue"] += rev
+
+        return {
+            "from": micros_to_datetime(lo).isoformat() if start is not None else None,
+            "to": micros_to_datetime(hi).isoformat() if end is not None else None,
+            "orders": orders,
+            "revenue": round(revenue, 2),
+            "platforms": {p: {"orders": v["orders"], "revenue": round(v["revenue"], 2)}
+                          for p, v in platforms.items()},
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_materializer: Optional[KPIMaterializer] = None
+
+
+def get_materializer(ledger: Optional[SalesLedger] = None) -> KPIMaterializer:
+    """Process-wide materializer: restore snapshot, then replay the ledger tail."""
+    global _default_materializer
+    if _default_materializer is None:
+        kpis = KPIMaterializer(ledger)
+        if kpis.restore():
+            kpis.refresh()
+        else:
+            kpis.rebuild()
+            kpis.save()
+        _default_materializer = kpis
+    return _default_materializer
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    kpis = get_materializer()
+
+    if "--rebuild" in sys.argv:
+        kpis.rebuild()
+        kpis.save()
+        print(f"🔄 Rebuilt KPIs from ledger (watermark seq {kpis.watermark_seq})")
+
+    print(json.dumps(kpis.snapshot(include_products="--products" in sys.argv),
+                     indent=2, ensure_ascii=False))
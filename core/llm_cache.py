@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - LLM Response Cache
+Content-addressed cache in front of the LLM gateway (core/llm_gateway.py).
+
+    key = sha256(provider, model, system prompt, normalized prompt, temperature, json mode, namespace)
+
+Two tiers:
+- memory: per-process LRU (OrderedDict)
+- disk:   SQLite (WAL), shared by every process and surviving restarts
+
+Entries expire per namespace (decision, rsi, newsletter, ...); a TTL of 0
+disables caching for that namespace. Only successful completions are
+stored, never caller fallbacks, and callers can pass a validator so a
+reply they reject (unparseable, incomplete) is not replayed either. Repeated decision cycles on an unchanged
+market state resolve every step from the cache without spending tokens.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(ROOT_DIR, "data", "llm_cache.sqlite"))
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+
+# Seconds an entry stays valid, per namespace ("default" for the rest)
+NAMESPACE_TTLS: Dict[str, float] = {
+    "default": 3600,
+    "decision": 6 * 3600,       # Critic loop: market state + config are in the prompt
+    "rsi": 3600,
+    "consolidator": 24 * 3600,
+    "newsletter": 24 * 3600,
+    "digest_gen": 24 * 3600,
+}
+NAMESPACE_TTLS.update(json.loads(os.getenv("LLM_CACHE_TTLS", "{}")))
+
+
+def normalize_prompt(text: str) -> str:
+    """Whitespace-insensitive form: strip every line, drop blank lines."""
+    return "\n".join(line.strip() for line in (text or "").splitlines() if line.strip())
+
+
+def cache_key(provider: str, model: str, system_prompt: str, prompt: str,
+              temperature: Optional[float] = None, json_mode: bool = False, namespace: str = "default") -> str:
+    payload = json.dumps([provider, model, normalize_prompt(system_prompt), normalize_prompt(prompt),
+                          temperature, bool(json_mode), namespace], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Memory LRU over a SQLite table.
+
+    get(namespace, key) -> response or None
+    put(namespace, key, response)
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, memory_entries: int = MEMORY_ENTRIES,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.ttls = dict(NAMESPACE_TTLS if ttls is None else ttls)
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires, response)
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        self.conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                created REAL NOT NULL,
+                expires REAL NOT NULL,
+                response TEXT NOT NULL
+            )''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires)")
+            self.conn.commit()
+
+    def ttl(self, namespace: str) -> float:
+        return float(self.ttls.get(namespace, self.ttls.get("default", 0)))
+
+    def _count(self, namespace: str, field: str):
+        ns = self._stats.setdefault(namespace, {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0})
+        ns[field] += 1
+
+    def _remember(self, key: str, expires: float, response: str):
+        self._memory[key] = (expires, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        if self.ttl(namespace) <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._count(namespace, "memory_hits")
+                    return entry[1]
+                del self._memory[key]
+
+            if self.conn is not None:
+                row = self.conn.execute("SELECT expires, response FROM responses WHERE key = ? AND expires > ?",
+                                        (key, now)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self._count(namespace, "disk_hits")
+                    return row[1]
+
+            self._count(namespace, "misses")
+            return None
+
+    def put(self, namespace: str, key: str, response: str):
+        ttl = self.ttl(namespace)
+        if ttl <= 0 or response is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, now + ttl, response)
+            self._count(namespace, "stores")
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                                      (key, namespace, now, now + ttl, response))
+
+    def purge(self) -> int:
+        """Drop expired entries from both tiers; returns disk rows removed."""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (expires, _) in self._memory.items() if expires <= now]:
+                del self._memory[key]
+            if self.conn is None:
+                return 0
+            with self.conn:
+                return self.conn.execute("DELETE FROM responses WHERE expires <= ?", (now,)).rowcount
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock:
+            self._memory.clear()
+            if self.conn is not None:
+                with self.conn:
+                    if namespace is None:
+                        self.conn.execute("DELETE FROM responses")
+                    else:
+                        self.conn.execute("DELETE FROM responses WHERE namespace = ?", (namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per namespace since this process started."""
+        with self._lock:
+            namespaces = {ns: dict(counts) for ns, counts in self._stats.items()}
+        for counts in namespaces.values():
+            lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+            counts["hit_rate"] = round((lookups - counts["misses"]) / lookups, 4) if lookups else 0.0
+        disk_entries = 0
+        if self.conn is not None:
+            with self._lock:
+                disk_entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"memory_entries": len(self._memory), "disk_entries": disk_entries, "namespaces": namespaces}
+
+    def close(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Process-wide cache, or None when LLM_CACHE_ENABLED=0."""
+    global _default_cache
+    if _default_cache is None and CACHE_ENABLED:
+        _default_cache = LLMCache()
+    return _default_cache
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    cache = LLMCache()
+
+    print("=" * 60)
+    print("YEDAN AGI - LLM Response Cache")
+    print("=" * 60)
+    if "--purge" in sys.argv:
+        print(f"🧹 Purged {cache.purge()} expired entries")
+    if "--clear" in sys.argv:
+        cache.clear()
+        print("🗑️ Cache cleared")
+    print(f"📦 Entries on disk: {cache.stats()['disk_entries']} ({CACHE_PATH})")
+    for namespace in sorted(cache.ttls):
+        print(f"   {namespace:<14} TTL {cache.ttl(namespace) / 3600:.1f}h")
@@ -0,0 +1,1269 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - LLM Gateway
+One place where the system talks to language models.
+
+    get_gateway().complete(prompt, system_prompt)          # sync
+    await get_gateway().acomplete(prompt, system_prompt)   # async
+    get_gateway().stream(prompt, system_prompt)            # text chunks as they arrive
+    call_llm_api(prompt, system_prompt, fallback="{}")     # never raises
+    call_llm_json(prompt, system_prompt)                   # streamed, stops at the first JSON object
+
+Provider clients are created lazily, once per process (once per event loop
+for async clients), and reused: no per-call import / configure / model
+construction, and HTTP keep-alive pools survive across the decision
+engine's proposal -> critic -> synthesis calls.
+
+Completions are cached per namespace (core/llm_cache.py): repeated
+prompts on an unchanged state cost no tokens. Replies a caller's
+`validate` rejects, and streams without an accepted object, are not
+cached. Every call's tokens, cost
+and latency are recorded per namespace (core/llm_metrics.py).
+
+Calls that don't pin a provider are routed: the default provider first,
+LLM_FALLBACK_PROVIDER when it fails (or its circuit breaker is open) and,
+hedged, when it is slower than its own p95 latency; the first valid answer
+wins and the loser is cancelled. `with deadline(seconds):` bounds every
+call made inside the block, including hedges.
+
+Identical complete() / acomplete() requests that overlap in time share one
+provider call (single flight), across threads and asyncio tasks.
+
+Streaming callers that only need a JSON answer (decision synthesis, RSI
+mutations) use first_json(): <think> blocks are skipped, the object is
+returned as soon as its closing brace arrives (core/json_stream.py) and
+the rest of the response is never read. Each call reports time-to-first-
+token and time-to-decision.
+
+Providers:
+- gemini:   google-generativeai, GEMINI_API_KEY
+- deepseek: OpenAI-compatible API, DEEPSEEK_API_KEY
+- standin:  deterministic local stand-in (LLM_PROVIDER=standin, core/llm_standin.py)
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import asyncio
+import threading
+import functools
+import contextvars
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Iterator, AsyncIterator, Tuple, List
+
+from dotenv import load_dotenv
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llm_cache import LLMCache, cache_key, get_llm_cache
+from core.llm_metrics import LLMMetrics, get_llm_metrics
+from core.json_stream import JSONStreamExtractor
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env.reactor"))
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+DEFAULT_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-001")
+DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-reasoner")
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "16"))
+
+# Requests per minute per provider (0 = unlimited); override with LLM_RPM='{"gemini": 15}'
+PROVIDER_RPM: Dict[str, float] = {"gemini": 60, "deepseek": 60}
+PROVIDER_RPM.update(json.loads(os.getenv("LLM_RPM", "{}")))
+
+# Routing for calls that don't pin a provider ("" = default provider only)
+FALLBACK_PROVIDER = os.getenv("LLM_FALLBACK_PROVIDER", "deepseek")
+HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))  # 0 = fail over, never hedge
+HEDGE_MIN_SAMPLES = 20      # Measured latencies before the quantile is trusted
+HEDGE_DEFAULT_MS = 10_000   # Hedge delay until then
+HEDGE_FLOOR_MS = 250
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))  # Consecutive failures that open it (0 = off)
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "1") == "1"
+
+
+# (context window, max output) in tokens; used to size batched prompts
+MODEL_LIMITS: Dict[str, tuple] = {
+    "gemini-2.0-flash-001": (1_048_576, 8_192),
+    "deepseek-reasoner": (65_536, 8_192),
+    "deepseek-chat": (65_536, 8_192),
+}
+DEFAULT_MODEL_LIMITS = (32_768, 4_096)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough count without a tokenizer: ~4 ASCII chars per token, ~1 token per CJK/other char."""
+    if text.isascii():
+        return len(text) // 4
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return ascii_chars // 4 + (len(text) - ascii_chars)
+
+
+class LLMError(Exception):
+    """A provider call failed."""
+
+
+class LLMUnavailable(LLMError):
+    """Provider not configured (missing key / SDK): callers should use their fallback."""
+
+
+class CircuitOpen(LLMError):
+    """The provider failed repeatedly and is skipped until its breaker resets."""
+
+
+class LLMTimeout(LLMError):
+    """The caller's deadline passed before an answer arrived."""
+
+
+def _usable_key(value: Optional[str]) -> Optional[str]:
+    """Treat missing and placeholder keys the same way."""
+    if not value or "your_" in value or "placeholder" in value.lower():
+        return None
+    return value
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads and coroutines: `rpm` requests per
+    minute, bursting up to `burst`. Callers reserve a slot, then wait.
+    """
+
+    def __init__(self, rpm: float, burst: Optional[int] = None):
+        self.rate = rpm / 60.0
+        self.capacity = float(burst or max(1, int(rpm // 6)))  # ~10s worth of requests
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROVIDERS
+# ═══════════════════════════════════════════════════════════════
+
+class LLMProvider:
+    """
+    Base provider: subclasses implement _connect() / _aconnect() (called
+    once) and _complete() / _acomplete(). Providers without _stream() /
+    _astream() yield the whole completion as a single chunk.
+    """
+
+    name = "base"
+    default_model = ""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> client
+        self.connects = 0
+
+    def available(self) -> bool:
+        return True
+
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not self.available():
+                        raise LLMUnavailable(f"{self.name} is not configured")
+                    self._client = self._connect()
+                    self.connects += 1
+        return self._client
+
+    def async_client(self):
+        # Async HTTP pools are bound to the loop they were created on
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            with self._lock:
+                client = self._async_clients.get(loop)
+                if client is None:
+                    if not self.available():
+                        raise LLMUnavailable(f"{self.name} is not configured")
+                    client = self._async_clients[loop] = self._aconnect()
+                    self.connects += 1
+        return client
+
+    def complete(self, prompt: str, system_prompt: str = "", model: Optional[str] = None,
+                 json_mode: bool = False, temperature: Optional[float] = None) -> str:
+        return self._complete(self.client(), prompt, system_prompt, model or self.default_model,
+                              json_mode, temperature)
+
+    async def acomplete(self, prompt: str, system_prompt: str = "", model: Optional[str] = None,
+                        json_mode: bool = False, temperature: Optional[float] = None) -> str:
+        return await self._acomplete(self.async_client(), prompt, system_prompt,
+                                     model or self.default_model, json_mode, temperature)
+
+    def stream(self, prompt: str, system_prompt: str = "", model: Optional[str] = None,
+               json_mode: bool = False, temperature: Optional[float] = None) -> Iterator[str]:
+        return self._stream(self.client(), prompt, system_prompt, model or self.default_model,
+                            json_mode, temperature)
+
+    def astream(self, prompt: str, system_prompt: str = "", model: Optional[str] = None,
+                json_mode: bool = False, temperature: Optional[float] = None) -> AsyncIterator[str]:
+        return self._astream(self.async_client(), prompt, system_prompt, model or self.default_model,
+                             json_mode, temperature)
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def _aconnect(self):
+        return self.client()  # Thread-safe SDKs can share the sync client
+
+    def _complete(self, client, prompt, system_prompt, model, json_mode, temperature) -> str:
+        raise NotImplementedError
+
+    async def _acomplete(self, client, prompt, system_prompt, model, json_mode, temperature) -> str:
+        return await asyncio.to_thread(self._complete, client, prompt, system_prompt, model,
+                                       json_mode, temperature)
+
+    def _stream(self, client, prompt, system_prompt, model, json_mode, temperature) -> Iterator[str]:
+        yield self._complete(client, prompt, system_prompt, model, json_mode, temperature)
+
+    async def _astream(self, client, prompt, system_prompt, model, json_mode, temperature) -> AsyncIterator[str]:
+        yield await self._acomplete(client, prompt, system_prompt, model, json_mode, temperature)
+
+
+class GeminiProvider(LLMProvider):
+    """google-generativeai: configure() once, one GenerativeModel per model name."""
+
+    name = "gemini"
+    default_model = GEMINI_MODEL
+
+    def __init__(self, api_key: Optional[str] = None):
+        super().__init__()
+        self.api_key = _usable_key(api_key or os.getenv("GEMINI_API_KEY"))
+        self._models: Dict[str, Any] = {}
+
+    def available(self) -> bool:
+        return self.api_key is not None
+
+    def _connect(self):
+        try:
+            import google.generativeai as genai
+        except ImportError as e:
+            raise LLMUnavailable(f"google-generativeai not installed: {e}")
+        genai.configure(api_key=self.api_key)
+        return genai
+
+    def _model(self, genai, model: str):
+        handle = self._models.get(model)
+        if handle is None:
+            with self._lock:
+                handle = self._models.setdefault(model, genai.GenerativeModel(model))
+        return handle
+
+    def _prompt(self, prompt: str, system_prompt: str) -> str:
+        return f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+
+    def _config(self, json_mode: bool, temperature: Optional[float]):
+        config = {"response_mime_type": "application/json"} if json_mode else {}
+        if temperature is not None:
+            config["temperature"] = temperature
+        return config or None
+
+    def _complete(self, genai, prompt, system_prompt, model, json_mode, temperature) -> str:
+        response = self._model(genai, model).generate_content(
+            self._prompt(prompt, system_prompt), generation_config=self._config(json_mode, temperature))
+        return response.text
+
+    async def _acomplete(self, genai, prompt, system_prompt, model, json_mode, temperature) -> str:
+        response = await self._model(genai, model).generate_content_async(
+            self._prompt(prompt, system_prompt), generation_config=self._config(json_mode, temperature))
+        return response.text
+
+    def _stream(self, genai, prompt, system_prompt, model, json_mode, temperature) -> Iterator[str]:
+        response = self._model(genai, model).generate_content(
+            self._prompt(prompt, system_prompt), generation_config=self._config(json_mode, temperature),
+            stream=True)
+        for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+
+    async def _astream(self, genai, prompt, system_prompt, model, json_mode, temperature) -> AsyncIterator[str]:
+        response = await self._model(genai, model).generate_content_async(
+            self._prompt(prompt, system_prompt), generation_config=self._config(json_mode, temperature),
+            stream=True)
+        async for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """OpenAI SDK clients (DeepSeek by default), each with a keep-alive connection pool."""
+
+    name = "deepseek"
+    default_model = DEEPSEEK_MODEL
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = DEEPSEEK_BASE_URL,
+                 name: str = "deepseek", default_model: str = DEEPSEEK_MODEL,
+                 api_key_env: str = "DEEPSEEK_API_KEY"):
+        super().__init__()
+        self.name = name
+        self.default_model = default_model
+        self.base_url = base_url
+        self.api_key = _usable_key(api_key or os.getenv(api_key_env))
+
+    def available(self) -> bool:
+        return self.api_key is not None
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                            max_keepalive_connections=LLM_MAX_CONNECTIONS)
+
+    def _connect(self):
+        try:
+            import httpx
+            from openai import OpenAI
+        except ImportError as e:
+            raise LLMUnavailable(f"openai SDK not installed: {e}")
+        return OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=LLM_TIMEOUT_SECONDS,
+                      http_client=httpx.Client(limits=self._limits(), timeout=LLM_TIMEOUT_SECONDS))
+
+    def _aconnect(self):
+        try:
+            import httpx
+            from openai import AsyncOpenAI
+        except ImportError as e:
+            raise LLMUnavailable(f"openai SDK not installed: {e}")
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=LLM_TIMEOUT_SECONDS,
+                           http_client=httpx.AsyncClient(limits=self._limits(), timeout=LLM_TIMEOUT_SECONDS))
+
+    def _messages(self, prompt: str, system_prompt: str):
+        messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        return messages + [{"role": "user", "content": prompt}]
+
+    def _options(self, json_mode: bool, temperature: Optional[float]) -> Dict[str, Any]:
+        options = {"response_format": {"type": "json_object"}} if json_mode else {}
+        if temperature is not None:
+            options["temperature"] = temperature
+        return options
+
+    def _complete(self, client, prompt, system_prompt, model, json_mode, temperature) -> str:
+        response = client.chat.completions.create(
+            model=model, messages=self._messages(prompt, system_prompt),
+            **self._options(json_mode, temperature))
+        return response.choices[0].message.content
+
+    async def _acomplete(self, client, prompt, system_prompt, model, json_mode, temperature) -> str:
+        response = await client.chat.completions.create(
+            model=model, messages=self._messages(prompt, system_prompt),
+            **self._options(json_mode, temperature))
+        return response.choices[0].message.content
+
+    def _stream(self, client, prompt, system_prompt, model, json_mode, temperature) -> Iterator[str]:
+        # Closing the stream (caller stopped early) releases the pooled connection
+        with client.chat.completions.create(
+                model=model, messages=self._messages(prompt, system_prompt), stream=True,
+                **self._options(json_mode, temperature)) as response:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def _astream(self, client, prompt, system_prompt, model, json_mode, temperature) -> AsyncIterator[str]:
+        response = await client.chat.completions.create(
+            model=model, messages=self._messages(prompt, system_prompt), stream=True,
+            **self._options(json_mode, temperature))
+        async with response:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+
+class CircuitBreaker:
+    """
+    Closed until `failures` consecutive failures, then open: calls are
+    refused for `reset_seconds`, after which a single probe is let through
+    (half-open). The probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self._probing = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.consecutive, self.opened_at, self._probing = 0, None, False
+
+    def failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self.failures and (self._probing or self.consecutive >= self.failures):
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """An admitted call ended without an outcome (cancelled, provider unavailable): free the probe slot."""
+        with self._lock:
+            self._probing = False
+
+
+# ═══════════════════════════════════════════════════════════════
+# DEADLINES
+# ═══════════════════════════════════════════════════════════════
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """
+    Every gateway call inside the block (and in tasks / hedges it spawns)
+    must answer before `seconds` from now, or raises LLMTimeout. Nested
+    deadlines keep the earlier one; None or <= 0 adds no limit.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(outer, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None without one)."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def with_deadline(seconds: Optional[float]):
+    """Decorator form of deadline() for sync and async functions."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with deadline(seconds):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with deadline(seconds):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLE FLIGHT
+# ═══════════════════════════════════════════════════════════════
+
+class _Abandoned(Exception):
+    """The leading call was cancelled: a waiting caller takes over."""
+
+
+class SingleFlight:
+    """
+    One in-flight call per key. The first caller (the leader) makes it;
+    callers arriving before it lands, in any thread or event loop, wait for
+    and share its answer or error.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Any, Future] = {}
+
+    def _join(self, key) -> Tuple[Future, bool]:
+        """(the key's flight, True if the caller leads it)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Future()
+            flight.leader = threading.get_ident()
+            return flight, True
+
+    def _land(self, key, flight: Future, result=None, error: Optional[BaseException] = None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if error is None:
+            flight.set_result(result)
+        else:
+            flight.set_exception(error)
+
+    def run(self, key, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(fn() or the in-flight call's result, True if shared)"""
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                break
+            if flight.leader == threading.get_ident():
+                return fn(), False  # Led by a task of this thread's own loop: waiting would deadlock
+            left = remaining()
+            try:
+                return flight.result(timeout=None if left is None else max(0.0, left)), True
+            except _Abandoned:
+                continue
+            except FutureTimeout:
+                raise LLMTimeout("Deadline exceeded waiting for an identical in-flight call")
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(key, flight, error=e if isinstance(e, Exception) else _Abandoned())
+            raise
+        self._land(key, flight, result)
+        return result, False
+
+    async def arun(self, key, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Async run(): `fn` returns a coroutine. A cancelled waiter leaves the flight alone."""
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(flight)), remaining()), True
+            except _Abandoned:
+                continue
+            except asyncio.TimeoutError:
+                raise LLMTimeout("Deadline exceeded waiting for an identical in-flight call")
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._land(key, flight, error=e if isinstance(e, Exception) else _Abandoned())
+            raise
+        self._land(key, flight, result)
+        return result, False
+
+
+_route_pool: Optional[ThreadPoolExecutor] = None
+_route_pool_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    """Threads for sync calls that may be hedged or abandoned at a deadline."""
+    global _route_pool
+    if _route_pool is None:
+        with _route_pool_lock:
+            if _route_pool is None:
+                _route_pool = ThreadPoolExecutor(max_workers=2 * LLM_MAX_CONNECTIONS,
+                                                 thread_name_prefix="llm-route")
+    return _route_pool
+
+
+def _route_error(errors: List[LLMError]) -> LLMError:
+    """The error to report when every route failed: a real failure over "not configured"."""
+    real = [e for e in errors if not isinstance(e, LLMUnavailable)]
+    return (real or errors or [LLMUnavailable("No LLM provider")])[0]
+
+
+# ═══════════════════════════════════════════════════════════════
+# GATEWAY
+# ═══════════════════════════════════════════════════════════════
+
+class LLMGateway:
+    """
+    Provider registry with sync and async entry points, an optional response
+    cache and metrics, and a circuit breaker per provider. Calls that pin
+    neither provider nor model are routed to `fallback` on failure and hedged
+    to it when slow; identical overlapping completions share one call.
+    """
+
+    def __init__(self, default_provider: str = DEFAULT_PROVIDER, cache: Optional[LLMCache] = None,
+                 metrics: Optional[LLMMetrics] = None, fallback: Optional[str] = None,
+                 single_flight: bool = SINGLE_FLIGHT):
+        self.default_provider = default_provider
+        self.fallback = fallback
+        self.cache = cache
+        self.metrics = metrics
+        self.flights = SingleFlight() if single_flight else None
+        self.providers: Dict[str, LLMProvider] = {}
+        self.limiters: Dict[str, RateLimiter] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def register(self, provider: LLMProvider, name: Optional[str] = None,
+                 rpm: Optional[float] = None) -> LLMProvider:
+        name = name or provider.name
+        self.providers[name] = provider
+        self.breakers[name] = CircuitBreaker()
+        rpm = PROVIDER_RPM.get(name, 0) if rpm is None else rpm
+        if rpm:
+            self.limiters[name] = RateLimiter(rpm)
+        else:
+            self.limiters.pop(name, None)
+        return provider
+
+    def provider(self, name: Optional[str] = None) -> LLMProvider:
+        name = name or self.default_provider
+        if name not in self.providers:
+            raise LLMUnavailable(f"Unknown LLM provider: {name}")
+        return self.providers[name]
+
+    def available(self, name: Optional[str] = None) -> bool:
+        try:
+            return self.provider(name).available()
+        except LLMUnavailable:
+            return False
+
+    # ── Routing ────────────────────────────────────────────────
+
+    def route(self, provider: Optional[str] = None, model: Optional[str] = None) -> List[str]:
+        """Provider names to try: a pinned provider (or model) alone, else the default then the fallback."""
+        if provider is not None or model is not None:
+            return [provider or self.default_provider]
+        names = [self.default_provider]
+        if self.fallback and self.fallback != self.default_provider and self.available(self.fallback):
+            names.append(self.fallback)
+        return names
+
+    def hedge_delay(self, name: str) -> Optional[float]:
+        """Seconds `name` gets before the next route is hedged in: its measured p95 (None = never hedge)."""
+        if HEDGE_QUANTILE <= 0:
+            return None
+        measured = None
+        if self.metrics is not None and name in self.providers:
+            measured = self.metrics.latency_quantile(self.providers[name].name, HEDGE_QUANTILE, HEDGE_MIN_SAMPLES)
+        return max(HEDGE_FLOOR_MS, HEDGE_DEFAULT_MS if measured is None else measured) / 1000
+
+    def _admit(self, name: str):
+        """Refuse a call up front once the deadline has passed or while the provider's circuit is open."""
+        left = remaining()
+        if left is not None and left <= 0:
+            raise LLMTimeout(f"{name}: deadline exceeded")
+        breaker = self.breakers.get(name)
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpen(f"{name}: circuit open")
+
+    def _outcome(self, name: str, ok: Optional[bool]):
+        """Report an admitted call to the provider's breaker; None = ended without an outcome."""
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            return
+        if ok is None:
+            breaker.release()
+        elif ok:
+            breaker.success()
+        else:
+            breaker.failure()
+
+    def _race(self, names: List[str], attempt: Callable[[str, Optional[threading.Event]], Any],
+              valid: Callable[[Any], bool]) -> Tuple[Any, int]:
+        """
+        Run attempt(name, cancel) on names[0]. The next name starts as soon as
+        everything running has failed (or answered invalidly), or hedged once
+        names[0] has taken longer than its hedge delay. The first valid answer
+        wins and `cancel` is set for the others; without one, an invalid
+        answer beats an error. Returns (answer, attempts started).
+
+        Sync provider calls run on a shared pool only when they can be hedged
+        or a deadline applies; otherwise in the calling thread.
+        """
+        if len(names) == 1 and remaining() is None:
+            return attempt(names[0], None), 1
+        delay = self.hedge_delay(names[0]) if len(names) > 1 else None
+        hedge_at = None if delay is None else time.monotonic() + delay
+        cancel = threading.Event()
+        pending: Dict[Any, str] = {}
+        errors: List[LLMError] = []
+        invalid, started = None, 0
+        while True:
+            if started < len(names) and (not pending or (hedge_at is not None and time.monotonic() >= hedge_at)):
+                context = contextvars.copy_context()  # Deadline and metrics span follow the call
+                pending[_pool().submit(context.run, attempt, names[started], cancel)] = names[started]
+                started += 1
+            if not pending:
+                break
+            timeout = remaining()
+            if timeout is not None and timeout <= 0:
+                cancel.set()
+                raise LLMTimeout(f"Deadline exceeded waiting for {', '.join(pending.values())}")
+            if started < len(names) and hedge_at is not None:
+                until_hedge = max(0.0, hedge_at - time.monotonic())
+                timeout = until_hedge if timeout is None else min(timeout, until_hedge)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                try:
+                    answer = future.result()
+                except LLMError as e:
+                    errors.append(e)
+                    continue
+                if valid(answer):
+                    cancel.set()
+                    return answer, started
+                invalid = answer if invalid is None else invalid
+        if invalid is not None:
+            return invalid, started
+        raise _route_error(errors)
+
+    async def _arace(self, names: List[str], attempt: Callable[[str], Any],
+                     valid: Callable[[Any], bool]) -> Tuple[Any, int]:
+        """Async _race(): the losers are cancelled tasks, which closes their streams."""
+        if len(names) == 1 and remaining() is None:
+            return await attempt(names[0]), 1
+        delay = self.hedge_delay(names[0]) if len(names) > 1 else None
+        hedge_at = None if delay is None else time.monotonic() + delay
+        pending: Dict[asyncio.Task, str] = {}
+        errors: List[LLMError] = []
+        invalid, started = None, 0
+        try:
+            while True:
+                if started < len(names) and (not pending or (hedge_at is not None and time.monotonic() >= hedge_at)):
+                    pending[asyncio.ensure_future(attempt(names[started]))] = names[started]
+                    started += 1
+                if not pending:
+                    break
+                timeout = remaining()
+                if timeout is not None and timeout <= 0:
+                    raise LLMTimeout(f"Deadline exceeded waiting for {', '.join(pending.values())}")
+                if started < len(names) and hedge_at is not None:
+                    until_hedge = max(0.0, hedge_at - time.monotonic())
+                    timeout = until_hedge if timeout is None else min(timeout, until_hedge)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del pending[task]
+                    try:
+                        answer = task.result()
+                    except LLMError as e:
+                        errors.append(e)
+                        continue
+                    if valid(answer):
+                        return answer, started
+                    invalid = answer if invalid is None else invalid
+        finally:
+            for task in pending:
+                task.cancel()
+        if invalid is not None:
+            return invalid, started
+        raise _route_error(errors)
+
+    # ── Calls ──────────────────────────────────────────────────
+
+    def _cache_key(self, backend: LLMProvider, namespace, prompt, system_prompt, model, json_mode, temperature):
+        if self.cache is None:
+            return None
+        return cache_key(backend.name, model or backend.default_model, system_prompt, prompt,
+                         temperature, json_mode, namespace)
+
+    def _lookup(self, backend: LLMProvider, namespace, prompt, system_prompt, model, json_mode, temperature):
+        """(cache key or None, cached response or None)"""
+        started = time.perf_counter()
+        key = self._cache_key(backend, namespace, prompt, system_prompt, model, json_mode, temperature)
+        cached = self.cache.get(namespace, key) if key is not None else None
+        if cached is not None:
+            self._record(backend, model, namespace, prompt, system_prompt, started, cached, "cached")
+        return key, cached
+
+    def _record(self, backend: LLMProvider, model, namespace, prompt, system_prompt, started,
+                response: Optional[str] = None, status: str = "ok", ttft: Optional[float] = None):
+        if self.metrics is None:
+            return
+        self.metrics.record(namespace, backend.name, model or backend.default_model,
+                            estimate_tokens(system_prompt + prompt), estimate_tokens(response or ""),
+                            (time.perf_counter() - started) * 1000, status,
+                            None if ttft is None else round((ttft - started) * 1000, 2))
+
+    def complete(self, prompt: str, system_prompt: str = "", provider: Optional[str] = None,
+                 model: Optional[str] = None, json_mode: bool = False,
+                 temperature: Optional[float] = None, namespace: str = "default",
+                 validate: Optional[Callable[[str], bool]] = None, use_cache: bool = True) -> str:
+        """
+        Raises LLMUnavailable if no provider is configured, LLMError if every
+        route failed, LLMTimeout past the deadline. Identical requests within
+        the namespace TTL are answered from the cache; with `validate`, only
+        replies it accepts are cached. use_cache=False (e.g. a retry after
+        an unusable reply) neither reads nor writes the cache.
+        """
+        return self._race(self.route(provider, model), lambda name, cancel: self._complete(
+            name, prompt, system_prompt, model, json_mode, temperature, namespace, validate, use_cache),
+            lambda answer: True)[0]
+
+    def _flight_key(self, backend: LLMProvider, namespace, prompt, system_prompt, model, json_mode, temperature):
+        return (namespace, backend.name, model or backend.default_model, system_prompt, prompt,
+                temperature, json_mode)
+
+    def _complete(self, name, prompt, system_prompt, model, json_mode, temperature, namespace,
+                  validate=None, use_cache=True) -> str:
+        backend = self.provider(name)
+        key, cached = (self._lookup(backend, namespace, prompt, system_prompt, model, json_mode, temperature)
+                       if use_cache else (None, None))
+        if cached is not None:
+            return cached
+        call = lambda: self._call(name, backend, key, prompt, system_prompt, model, json_mode,
+                                  temperature, namespace, validate)
+        if self.flights is None:
+            return call()
+        started = time.perf_counter()
+        response, shared = self.flights.run(
+            self._flight_key(backend, namespace, prompt, system_prompt, model, json_mode, temperature), call)
+        if shared:
+            self._record(backend, model, namespace, prompt, system_prompt, started, response, "coalesced")
+        return response
+
+    def _call(self, name, backend, key, prompt, system_prompt, model, json_mode, temperature, namespace,
+              validate=None) -> str:
+        self._admit(name)
+        ok = None  # Stays None unless the provider answered or really failed
+        try:
+            limiter = self.limiters.get(name)
+            if limiter is not None:
+                limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = backend.complete(prompt, system_prompt, model, json_mode, temperature)
+            except Exception as e:
+                if not isinstance(e, LLMUnavailable):  # Nothing was sent, nothing is billed
+                    self._record(backend, model, namespace, prompt, system_prompt, started, status="error")
+                    ok = False
+                if isinstance(e, LLMError):
+                    raise
+                raise LLMError(f"{backend.name}: {e}") from e
+            ok = True
+        finally:
+            self._outcome(name, ok)
+        self._record(backend, model, namespace, prompt, system_prompt, started, response)
+        if key is not None and (validate is None or validate(response)):
+            self.cache.put(namespace, key, response)
+        return response
+
+    async def acomplete(self, prompt: str, system_prompt: str = "", provider: Optional[str] = None,
+                        model: Optional[str] = None, json_mode: bool = False,
+                        temperature: Optional[float] = None, namespace: str = "default",
+                        validate: Optional[Callable[[str], bool]] = None, use_cache: bool = True) -> str:
+        answer, _ = await self._arace(self.route(provider, model), lambda name: self._acomplete(
+            name, prompt, system_prompt, model, json_mode, temperature, namespace, validate, use_cache),
+            lambda answer: True)
+        return answer
+
+    async def _acomplete(self, name, prompt, system_prompt, model, json_mode, temperature, namespace,
+                         validate=None, use_cache=True) -> str:
+        backend = self.provider(name)
+        key, cached = (self._lookup(backend, namespace, prompt, system_prompt, model, json_mode, temperature)
+                       if use_cache else (None, None))
+        if cached is not None:
+            return cached
+        call = lambda: self._acall(name, backend, key, prompt, system_prompt, model, json_mode,
+                                   temperature, namespace, validate)
+        if self.flights is None:
+            return await call()
+        started = time.perf_counter()
+        response, shared = await self.flights.arun(
+            self._flight_key(backend, namespace, prompt, system_prompt, model, json_mode, temperature), call)
+        if shared:
+            self._record(backend, model, namespace, prompt, system_prompt, started, response, "coalesced")
+        return response
+
+    async def _acall(self, name, backend, key, prompt, system_prompt, model, json_mode, temperature,
+                     namespace, validate=None) -> str:
+        self._admit(name)
+        ok = None  # A hedge that loses the race is cancelled without an outcome
+        try:
+            limiter = self.limiters.get(name)
+            if limiter is not None:
+                await limiter.aacquire()
+            started = time.perf_counter()
+            try:
+                response = await backend.acomplete(prompt, system_prompt, model, json_mode, temperature)
+            except asyncio.CancelledError:
+                self._record(backend, model, namespace, prompt, system_prompt, started, status="cancelled")
+                raise
+            except Exception as e:
+                if not isinstance(e, LLMUnavailable):  # Nothing was sent, nothing is billed
+                    self._record(backend, model, namespace, prompt, system_prompt, started, status="error")
+                    ok = False
+                if isinstance(e, LLMError):
+                    raise
+                raise LLMError(f"{backend.name}: {e}") from e
+            ok = True
+        finally:
+            self._outcome(name, ok)
+        self._record(backend, model, namespace, prompt, system_prompt, started, response)
+        if key is not None and (validate is None or validate(response)):
+            self.cache.put(namespace, key, response)
+        return response
+
+    def stream(self, prompt: str, system_prompt: str = "", provider: Optional[str] = None,
+               model: Optional[str] = None, json_mode: bool = False,
+               temperature: Optional[float] = None, namespace: str = "default") -> Iterator[str]:
+        """
+        Text chunks as the provider produces them (one provider, no routing).
+        A cache hit is one chunk; a stream read to the end is cached like complete().
+        """
+        name = provider or self.default_provider
+        backend = self.provider(name)
+        key, cached = self._lookup(backend, namespace, prompt, system_prompt, model, json_mode, temperature)
+        if cached is not None:
+            return iter([cached])
+        return self._stream(backend, name, key, namespace, prompt, system_prompt, model,
+                            json_mode, temperature)
+
+    def _stream(self, backend, name, key, namespace, prompt, system_prompt, model,
+                json_mode, temperature, cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        self._admit(name)
+        limiter = self.limiters.get(name)
+        if limiter is not None:
+            try:
+                limiter.acquire()
+            except BaseException:
+                self._outcome(name, None)
+                raise
+        started, ttft, status, failed = time.perf_counter(), None, "error", False
+        pieces, chunks = [], None
+        try:
+            # Inside the try: creating the stream connects, which can fail or find no API key
+            chunks = backend.stream(prompt, system_prompt, model, json_mode, temperature)
+            for piece in chunks:
+                ttft = ttft or time.perf_counter()
+                pieces.append(piece)
+                yield piece
+            status = "ok"
+        except GeneratorExit:
+            # The caller had what it needed, or another route answered first
+            status = "cancelled" if cancel is not None and cancel.is_set() else "ok"
+            raise
+        except LLMUnavailable:
+            status = "unavailable"  # Nothing was sent, nothing is billed
+            raise
+        except LLMError:
+            failed = True
+            raise
+        except Exception as e:
+            failed = True
+            raise LLMError(f"{backend.name}: {e}") from e
+        finally:
+            if chunks is not None:
+                chunks.close()  # Also when the caller stops early: releases the connection now
+            if status != "unavailable":
+                self._record(backend, model, namespace, prompt, system_prompt, started, "".join(pieces),
+                             status, ttft)
+            self._outcome(name, True if status == "ok" else False if failed else None)
+        if key is not None:
+            self.cache.put(namespace, key, "".join(pieces))
+
+    def astream(self, prompt: str, system_prompt: str = "", provider: Optional[str] = None,
+                model: Optional[str] = None, json_mode: bool = False,
+                temperature: Optional[float] = None, namespace: str = "default") -> AsyncIterator[str]:
+        name = provider or self.default_provider
+        backend = self.provider(name)
+        key, cached = self._lookup(backend, namespace, prompt, system_prompt, model, json_mode, temperature)
+        return self._astream(backend, name, key, cached, namespace, prompt, system_prompt, model,
+                             json_mode, temperature)
+
+    async def _astream(self, backend, name, key, cached, namespace, prompt, system_prompt, model,
+                       json_mode, temperature) -> AsyncIterator[str]:
+        if cached is not None:
+            yield cached
+            return
+        self._admit(name)
+        limiter = self.limiters.get(name)
+        if limiter is not None:
+            try:
+                await limiter.aacquire()
+            except BaseException:
+                self._outcome(name, None)
+                raise
+        started, ttft, status, failed = time.perf_counter(), None, "error", False
+        pieces, chunks = [], None
+        try:
+            chunks = backend.astream(prompt, system_prompt, model, json_mode, temperature)
+            async for piece in chunks:
+                ttft = ttft or time.perf_counter()
+                pieces.append(piece)
+                yield piece
+            status = "ok"
+        except GeneratorExit:
+            status = "ok"
+            raise
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except LLMUnavailable:
+            status = "unavailable"  # Nothing was sent, nothing is billed
+            raise
+        except LLMError:
+            failed = True
+            raise
+        except Exception as e:
+            failed = True
+            raise LLMError(f"{backend.name}: {e}") from e
+        finally:
+            if chunks is not None:
+                await chunks.aclose()
+            if status != "unavailable":
+                self._record(backend, model, namespace, prompt, system_prompt, started, "".join(pieces),
+                             status, ttft)
+            self._outcome(name, True if status == "ok" else False if failed else None)
+        if key is not None:
+            self.cache.put(namespace, key, "".join(pieces))
+
+    def first_json(self, prompt: str, system_prompt: str = "", provider: Optional[str] = None,
+                   model: Optional[str] = None, json_mode: bool = False,
+                   temperature: Optional[float] = None, namespace: str = "default",
+                   predicate: Optional[Callable[[Dict], bool]] = None) -> Tuple[Optional[Dict], str, Dict[str, Any]]:
+        """
+        Stream until the first JSON object accepted by `predicate` closes, then
+        stop reading. Returns (object or None, text received, metrics). Routed
+        like complete(): a reply without an object makes way for the next route.
+
+        metrics: ttft_ms, time_to_decision_ms (None without an object),
+        total_ms, chunks, cached, stopped_early, provider, attempts
+        """
+        (found, text, metrics), attempts = self._race(
+            self.route(provider, model),
+            lambda name, cancel: self._first_json(name, cancel, prompt, system_prompt, model, json_mode,
+                                                  temperature, namespace, predicate),
+            lambda answer: answer[0] is not None)
+        metrics["attempts"] = attempts
+        return found, text, metrics
+
+    def _first_json(self, name, cancel, prompt, system_prompt, model, json_mode, temperature,
+                    namespace, predicate):
+        backend = self.provider(name)
+        key, cached = self._lookup(backend, namespace, prompt, system_prompt, model, json_mode, temperature)
+        watch = _StreamWatch(predicate, cached is not None)
+        if cached is not None:
+            watch.feed(cached)
+        else:
+            chunks = self._stream(backend, name, None, namespace, prompt, system_prompt, model,
+                                  json_mode, temperature, cancel)
+            try:
+                for piece in chunks:
+                    if watch.feed(piece) or (cancel is not None and cancel.is_set()):
+                        break
+                else:
+                    watch.exhausted = True
+            finally:
+                chunks.close()
+        return self._first_json_result(watch, key, namespace, name)
+
+    async def afirst_json(self, prompt: str, system_prompt: str = "", provider: Optional[str] = None,
+                          model: Optional[str] = None, json_mode: bool = False,
+                          temperature: Optional[float] = None, namespace: str = "default",
+                          predicate: Optional[Callable[[Dict], bool]] = None) -> Tuple[Optional[Dict], str, Dict[str, Any]]:
+        (found, text, metrics), attempts = await self._arace(
+            self.route(provider, model),
+            lambda name: self._afirst_json(name, prompt, system_prompt, model, json_mode, temperature,
+                                           namespace, predicate),
+            lambda answer: answer[0] is not None)
+        metrics["attempts"] = attempts
+        return found, text, metrics
+
+    async def _afirst_json(self, name, prompt, system_prompt, model, json_mode, temperature,
+                           namespace, predicate):
+        backend = self.provider(name)
+        key, cached = self._lookup(backend, namespace, prompt, system_prompt, model, json_mode, temperature)
+        watch = _StreamWatch(predicate, cached is not None)
+        if cached is not None:
+            watch.feed(cached)
+        else:
+            chunks = self._astream(backend, name, None, None, namespace, prompt, system_prompt, model,
+                                   json_mode, temperature)
+            try:
+                async for piece in chunks:
+                    if watch.feed(piece):
+                        break
+                else:
+                    watch.exhausted = True
+            finally:
+                await chunks.aclose()
+        return self._first_json_result(watch, key, namespace, name)
+
+    def _first_json_result(self, watch: "_StreamWatch", key, namespace, name):
+        # A reply cut off after its object replays the same object on a cache hit; one
+        # without an accepted object is not cached, so the next call asks again
+        if key is not None and not watch.cached and watch.found is not None:
+            self.cache.put(namespace, key, watch.extractor.text)
+        return watch.found, watch.extractor.text, {**watch.metrics(), "provider": name}
+
+
+class _StreamWatch:
+    """Timing and extraction state for one first_json() call."""
+
+    def __init__(self, predicate: Optional[Callable[[Dict], bool]], cached: bool):
+        self.predicate = predicate
+        self.cached = cached
+        self.extractor = JSONStreamExtractor()
+        self.found: Optional[Dict] = None
+        self.exhausted = False
+        self.chunks = 0
+        self.t0 = time.perf_counter()
+        self.ttft = None
+        self.ttd = None
+
+    def _ms(self) -> float:
+        return round((time.perf_counter() - self.t0) * 1000, 2)
+
+    def feed(self, piece: str) -> bool:
+        """True once the wanted object is complete."""
+        if self.ttft is None:
+            self.ttft = self._ms()
+        self.chunks += 1
+        for obj in self.extractor.feed(piece):
+            if self.predicate is None or self.predicate(obj):
+                self.found, self.ttd = obj, self._ms()
+                return True
+        return False
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"ttft_ms": self.ttft, "time_to_decision_ms": self.ttd, "total_ms": self._ms(),
+                "chunks": self.chunks, "cached": self.cached,
+                "stopped_early": self.found is not None and not self.exhausted and not self.cached}
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide gateway with the standard providers registered (clients connect on first use)."""
+    global _default_gateway
+    if _default_gateway is None:
+        with _gateway_lock:
+            if _default_gateway is None:
+                gateway = LLMGateway(cache=get_llm_cache(), metrics=get_llm_metrics(),
+                                     fallback=FALLBACK_PROVIDER or None)
+                gateway.register(GeminiProvider())
+                gateway.register(OpenAICompatibleProvider())
+                if gateway.default_provider == "standin":
+                    # Offline runs / load tests: core/llm_standin.py answers for every provider
+                    from core.llm_standin import install_standin
+                    install_standin(gateway)
+                _default_gateway = gateway
+    return _default_gateway
+
+
+def model_limits(provider: Optional[str] = None, model: Optional[str] = None) -> tuple:
+    """(context window, max output tokens) for `model`, or the provider's default model."""
+    if model is None:
+        try:
+            model = get_gateway().provider(provider).default_model
+        except LLMUnavailable:
+            return DEFAULT_MODEL_LIMITS
+    return MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMITS)
+
+
+def call_llm_api(prompt: str, system_prompt: str = "", fallback: Optional[str] = "{}",
+                 provider: Optional[str] = None, model: Optional[str] = None,
+                 namespace: str = "default", temperature: Optional[float] = None,
+                 strict: bool = False, validate: Optional[Callable[[str], bool]] = None,
+                 use_cache: bool = True) -> str:
+    """
+    Sync completion that never raises: prints the error and returns `fallback`.
+    strict=True: `fallback` only stands in for an unconfigured provider;
+    failures of configured providers (every route) raise LLMError.
+    `validate` and `use_cache` as in LLMGateway.complete.
+    """
+    try:
+        return get_gateway().complete(prompt, system_prompt, provider=provider, model=model,
+                                      namespace=namespace, temperature=temperature, validate=validate,
+                                      use_cache=use_cache)
+    except LLMError as e:
+        if strict and not isinstance(e, LLMUnavailable):
+            raise
+        print(f"⚠️ LLM API Error: {e}")
+        return fallback
+
+
+def call_llm_json(prompt: str, system_prompt: str = "", fallback: str = "{}",
+                  predicate: Optional[Callable[[Dict], bool]] = None, provider: Optional[str] = None,
+                  model: Optional[str] = None, namespace: str = "default",
+                  temperature: Optional[float] = None,
+                  strict: bool = False) -> Tuple[Optional[Dict], str, Dict[str, Any]]:
+    """
+    Streamed first_json() that never raises: on error the object is extracted
+    from `fallback` instead and metrics are empty. `strict` as in call_llm_api.
+    """
+    try:
+        return get_gateway().first_json(prompt, system_prompt, provider=provider, model=model,
+                                        namespace=namespace, temperature=temperature, predicate=predicate)
+    except LLMError as e:
+        if strict and not isinstance(e, LLMUnavailable):
+            raise
+        print(f"⚠️ LLM API Error: {e}")
+        extractor = JSONStreamExtractor()
+        found = [obj for obj in extractor.feed(fallback) if predicate is None or predicate(obj)]
+        return (found[0] if found else None), fallback, {}
+
+
+async def acall_llm_api(prompt: str, system_prompt: str = "", fallback: Optional[str] = "{}",
+                        provider: Optional[str] = None, model: Optional[str] = None,
+                        namespace: str = "default", temperature: Optional[float] = None,
+                        strict: bool = False, validate: Optional[Callable[[str], bool]] = None,
+                        use_cache: bool = True) -> str:
+    """Async counterpart of call_llm_api."""
+    try:
+        return await get_gateway().acomplete(prompt, system_prompt, provider=provider, model=model,
+                                             namespace=namespace, temperature=temperature, validate=validate,
+                                             use_cache=use_cache)
+    except LLMError as e:
+        if strict and not isinstance(e, LLMUnavailable):
+            raise
+        print(f"⚠️ LLM API Error: {e}")
+        return fallback
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    gateway = get_gateway()
+
+    print("=" * 60)
+    print("YEDAN AGI - LLM Gateway")
+    print("=" * 60)
+    for name, backend in gateway.providers.items():
+        marker = "✅" if backend.available() else "⚪"
+        role = " (default)" if name == gateway.default_provider else " (fallback)" if name == gateway.fallback else ""
+        print(f"   {marker} {name}{role}: {backend.default_model} | circuit {gateway.breakers[name].state}")
+    if len(sys.argv) > 1 and not sys.argv[1].startswith("--"):
+        print(call_llm_api(" ".join(sys.argv[1:]), fallback="(no provider available)"))
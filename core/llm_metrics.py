@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - LLM Metrics
+Per-call token, cost and latency accounting for every request that goes
+through the LLM gateway (core/llm_gateway.py), per namespace (decision,
+rsi, consolidator, reddit, ...), provider and model.
+
+    get_llm_metrics().rolling("decision")          # recent per-call averages
+    get_llm_metrics().span_average("decision_cycle")
+    get_llm_metrics().prometheus()                 # text exposition format
+
+Counters: calls by status (ok / error / cached / coalesced / cancelled),
+retries, prompt and completion tokens (estimated), cost in USD
+(MODEL_PRICES) and a latency histogram. Recent latencies per provider set
+the gateway's hedge delay. Spans group the calls of one logical unit of
+work, e.g. a whole decision cycle, so callers can price "one more
+deep-thinking pass".
+
+Export:
+- JSONL (data/llm_metrics.jsonl): one line per call and per span; a new
+  process seeds its rolling windows from the tail of this file
+- Prometheus: GET /metrics on LLM_METRICS_PORT (when set)
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import atexit
+import asyncio
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, List, Tuple
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_PATH = os.getenv("LLM_METRICS_PATH", os.path.join(ROOT_DIR, "data", "llm_metrics.jsonl"))
+METRICS_ENABLED = os.getenv("LLM_METRICS_ENABLED", "1") != "0"
+METRICS_PORT = int(os.getenv("LLM_METRICS_PORT", "0"))  # 0 = no HTTP endpoint
+ROLLING_WINDOW = int(os.getenv("LLM_METRICS_WINDOW", "200"))
+FLUSH_RECORDS = 64
+FLUSH_SECONDS = 1.0
+SEED_BYTES = 512 * 1024  # Tail of the export read to seed rolling windows
+
+# USD per 1M tokens (input, output); override with LLM_PRICES='{"model": [in, out]}'
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.0-flash-001": (0.10, 0.40),
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19),
+    "standin-1": (0.0, 0.0),
+}
+MODEL_PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+DEFAULT_PRICE = (0.50, 1.50)
+
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, DEFAULT_PRICE)
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+class _Span:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.tokens = 0
+        self.cost = 0.0
+        self.started = time.perf_counter()
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("llm_span", default=None)
+
+
+class LLMMetrics:
+    """
+    Thread-safe registry. Counters live for the process (Prometheus
+    semantics); rolling windows hold the last ROLLING_WINDOW calls / spans.
+    """
+
+    def __init__(self, path: Optional[str] = METRICS_PATH, window: int = ROLLING_WINDOW):
+        self.path = path
+        self.window = window
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._retries: Dict[str, int] = {}
+        self._recent: Dict[str, deque] = {}  # namespace -> (cost, latency_ms, tokens)
+        self._spans: Dict[str, deque] = {}   # span name -> (cost, latency_ms, calls, tokens)
+        self._latency: Dict[str, deque] = {}  # provider -> latency_ms of successful calls
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._seed()
+            atexit.register(self.flush)
+
+    # ── Recording ──────────────────────────────────────────────
+
+    def record(self, namespace: str, provider: str, model: str, prompt_tokens: int,
+               completion_tokens: int, latency_ms: float, status: str = "ok",
+               ttft_ms: Optional[float] = None):
+        """
+        One gateway call. Cached answers, and coalesced ones (a share of an
+        identical call already in flight), count as calls but cost nothing;
+        cancelled ones (a hedged request that lost) are billed but are not
+        latency samples.
+        """
+        billable = status not in ("cached", "coalesced")
+        cost = estimate_cost(model, prompt_tokens, completion_tokens) if billable else 0.0
+        with self._lock:
+            series = self._series.get((namespace, provider, model))
+            if series is None:
+                series = self._series[(namespace, provider, model)] = {
+                    "ok": 0, "error": 0, "cached": 0, "coalesced": 0, "cancelled": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                    "cost_usd": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                    "latency_sum": 0.0, "latency_count": 0}
+            series[status] = series.get(status, 0) + 1
+            if billable:
+                series["prompt_tokens"] += prompt_tokens
+                series["completion_tokens"] += completion_tokens
+                series["cost_usd"] += cost
+                series["latency_sum"] += latency_ms
+                series["latency_count"] += 1
+                series["buckets"][_bucket(latency_ms)] += 1
+            if status == "ok":
+                self._recent.setdefault(namespace, deque(maxlen=self.window)).append(
+                    (cost, latency_ms, prompt_tokens + completion_tokens))
+                self._latency.setdefault(provider, deque(maxlen=self.window)).append(latency_ms)
+            span = _current_span.get()
+            if span is not None:
+                span.calls += 1
+                if billable:
+                    span.tokens += prompt_tokens + completion_tokens
+                    span.cost += cost
+            self._export({"type": "call", "ts": round(time.time(), 3), "namespace": namespace,
+                          "provider": provider, "model": model, "status": status,
+                          "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "latency_ms": round(latency_ms, 2), "ttft_ms": ttft_ms,
+                          "cost_usd": round(cost, 8), "span": span.name if span else None})
+
+    def record_retry(self, namespace: str, count: int = 1):
+        with self._lock:
+            self._retries[namespace] = self._retries.get(namespace, 0) + count
+            self._export({"type": "retry", "ts": round(time.time(), 3), "namespace": namespace, "count": count})
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Attribute every call inside the block (including tasks it spawns) to
+        one span. Spans that made no call at all (halted, vetoed) are dropped.
+        """
+        span = _Span(name)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+            if span.calls:
+                latency_ms = (time.perf_counter() - span.started) * 1000
+                with self._lock:
+                    self._spans.setdefault(name, deque(maxlen=self.window)).append(
+                        (span.cost, latency_ms, span.calls, span.tokens))
+                    self._export({"type": "span", "ts": round(time.time(), 3), "span": name,
+                                  "calls": span.calls, "tokens": span.tokens,
+                                  "cost_usd": round(span.cost, 8), "latency_ms": round(latency_ms, 2)})
+
+    # ── Reading ────────────────────────────────────────────────
+
+    def rolling(self, namespace: str) -> Optional[Dict[str, float]]:
+        """Averages over the namespace's recent successful calls (None before the first)."""
+        with self._lock:
+            rows = list(self._recent.get(namespace, ()))
+        if not rows:
+            return None
+        n = len(rows)
+        return {"samples": n, "avg_cost_usd": sum(r[0] for r in rows) / n,
+                "avg_latency_ms": sum(r[1] for r in rows) / n, "avg_tokens": sum(r[2] for r in rows) / n}
+
+    def span_average(self, name: str) -> Optional[Dict[str, float]]:
+        """Averages over the most recent spans called `name` (None before the first)."""
+        with self._lock:
+            rows = list(self._spans.get(name, ()))
+        if not rows:
+            return None
+        n = len(rows)
+        return {"samples": n, "avg_cost_usd": sum(r[0] for r in rows) / n,
+                "avg_latency_ms": sum(r[1] for r in rows) / n, "avg_calls": sum(r[2] for r in rows) / n,
+                "avg_tokens": sum(r[3] for r in rows) / n}
+
+    def latency_quantile(self, provider: str, q: float = 0.95, min_samples: int = 1) -> Optional[float]:
+        """Latency (ms) under which a fraction `q` of the provider's recent successful calls finished."""
+        with self._lock:
+            rows = sorted(self._latency.get(provider, ()))
+        if len(rows) < max(1, min_samples):
+            return None
+        return rows[min(len(rows) - 1, int(q * len(rows)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters per namespace (summed over providers / models)."""
+        fields = ("ok", "error", "cached", "coalesced", "cancelled", "prompt_tokens", "completion_tokens", "cost_usd",
+                  "latency_sum", "latency_count")
+        out: Dict[str, Any] = {}
+        with self._lock:
+            for (namespace, _, _), series in self._series.items():
+                ns = out.setdefault(namespace, dict.fromkeys(fields, 0))
+                for key in fields:
+                    ns[key] += series[key]
+            for namespace, count in self._retries.items():
+                out.setdefault(namespace, dict.fromkeys(fields, 0))["retries"] = count
+        for ns in out.values():
+            ns.setdefault("retries", 0)
+            ns["avg_latency_ms"] = ns.pop("latency_sum") / ns["latency_count"] if ns["latency_count"] else 0.0
+            del ns["latency_count"]
+        return out
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+
+        def header(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            series = sorted(self._series.items())
+            retries = sorted(self._retries.items())
+            spans = {name: list(rows) for name, rows in sorted(self._spans.items())}
+
+        header("yedan_llm_calls_total", "counter", "LLM gateway calls by outcome")
+        for (ns, provider, model), s in series:
+            for status in ("ok", "error", "cached", "coalesced", "cancelled"):
+                lines.append(f'yedan_llm_calls_total{{{_labels(ns, provider, model)},status="{status}"}} {s[status]}')
+        for metric, key, help_text in (
+                ("yedan_llm_prompt_tokens_total", "prompt_tokens", "Estimated prompt tokens sent"),
+                ("yedan_llm_completion_tokens_total", "completion_tokens", "Estimated completion tokens received"),
+                ("yedan_llm_cost_usd_total", "cost_usd", "Estimated spend in USD")):
+            header(metric, "counter", help_text)
+            for (ns, provider, model), s in series:
+                lines.append(f"{metric}{{{_labels(ns, provider, model)}}} {_num(s[key])}")
+
+        header("yedan_llm_retries_total", "counter", "Caller-level retries of failed or unparseable replies")
+        for ns, count in retries:
+            lines.append(f'yedan_llm_retries_total{{namespace="{_escape(ns)}"}} {count}')
+
+        header("yedan_llm_latency_ms", "histogram", "LLM call latency (cached / coalesced excluded)")
+        for (ns, provider, model), s in series:
+            labels, cumulative = _labels(ns, provider, model), 0
+            for le, count in zip((*LATENCY_BUCKETS_MS, "+Inf"), s["buckets"]):
+                cumulative += count
+                lines.append(f'yedan_llm_latency_ms_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"yedan_llm_latency_ms_sum{{{labels}}} {_num(s['latency_sum'])}")
+            lines.append(f"yedan_llm_latency_ms_count{{{labels}}} {s['latency_count']}")
+
+        header("yedan_llm_span_cost_usd_avg", "gauge", "Rolling average LLM spend per span")
+        for name, rows in spans.items():
+            lines.append(f'yedan_llm_span_cost_usd_avg{{span="{_escape(name)}"}} {_num(sum(r[0] for r in rows) / len(rows))}')
+        header("yedan_llm_span_latency_ms_avg", "gauge", "Rolling average wall time per span")
+        for name, rows in spans.items():
+            lines.append(f'yedan_llm_span_latency_ms_avg{{span="{_escape(name)}"}} {_num(sum(r[1] for r in rows) / len(rows))}')
+        return "\n".join(lines) + "\n"
+
+    # ── Export ─────────────────────────────────────────────────
+
+    def _export(self, record: Dict[str, Any]):
+        """Buffer a JSONL line (caller holds the lock)."""
+        if not self.path:
+            return
+        self._pending.append(json.dumps(record, ensure_ascii=False))
+        if len(self._pending) >= FLUSH_RECORDS or time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+            self._write()
+
+    def _write(self):
+        pending, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if pending:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(pending) + "\n")
+            except OSError:
+                pass  # Export is best effort; the in-memory counters stay intact
+
+    def flush(self):
+        with self._lock:
+            if self.path:
+                self._write()
+
+    def _seed(self):
+        """Fill the rolling windows from the tail of an existing export."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                start = max(0, f.tell() - SEED_BYTES)
+                f.seek(start)
+                tail = f.read().decode("utf-8", errors="ignore").splitlines()[1 if start else 0:]
+        except OSError:
+            return
+        for line in tail:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if rec.get("type") == "call" and rec.get("status") == "ok":
+                self._recent.setdefault(rec["namespace"], deque(maxlen=self.window)).append(
+                    (rec["cost_usd"], rec["latency_ms"], rec["prompt_tokens"] + rec["completion_tokens"]))
+                self._latency.setdefault(rec["provider"], deque(maxlen=self.window)).append(rec["latency_ms"])
+            elif rec.get("type") == "span":
+                self._spans.setdefault(rec["span"], deque(maxlen=self.window)).append(
+                    (rec["cost_usd"], rec["latency_ms"], rec["calls"], rec["tokens"]))
+
+
+def _bucket(latency_ms: float) -> int:
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(namespace: str, provider: str, model: str) -> str:
+    return f'namespace="{_escape(namespace)}",provider="{_escape(provider)}",model="{_escape(model)}"'
+
+
+def _num(value: float) -> str:
+    return f"{value:.10g}"
+
+
+def metered(name: str):
+    """Decorator: run the (sync or async) function inside get_llm_metrics().span(name)."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                metrics = get_llm_metrics()
+                if metrics is None:
+                    return await fn(*args, **kwargs)
+                with metrics.span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics = get_llm_metrics()
+            if metrics is None:
+                return fn(*args, **kwargs)
+            with metrics.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROMETHEUS ENDPOINT
+# ═══════════════════════════════════════════════════════════════
+
+def start_metrics_server(metrics: LLMMetrics, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="llm-metrics", daemon=True).start()
+    return server
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_metrics: Optional[LLMMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> Optional[LLMMetrics]:
+    """Process-wide registry (None when LLM_METRICS_ENABLED=0); starts /metrics if LLM_METRICS_PORT is set."""
+    global _default_metrics
+    if _default_metrics is None and METRICS_ENABLED:
+        with _metrics_lock:
+            if _default_metrics is None:
+                metrics = LLMMetrics()
+                if METRICS_PORT:
+                    try:
+                        start_metrics_server(metrics, METRICS_PORT)
+                    except OSError as e:
+                        print(f"⚠️ [LLM Metrics] /metrics not started on port {METRICS_PORT}: {e}")
+                _default_metrics = metrics
+    return _default_metrics
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    # Rebuild counters from the export (all processes that wrote to it)
+    metrics = LLMMetrics(path=None)
+    if os.path.exists(METRICS_PATH):
+        with open(METRICS_PATH, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if rec.get("type") == "call":
+                    metrics.record(rec["namespace"], rec["provider"], rec["model"], rec["prompt_tokens"],
+                                   rec["completion_tokens"], rec["latency_ms"], rec["status"])
+                elif rec.get("type") == "retry":
+                    metrics.record_retry(rec["namespace"], rec.get("count", 1))
+                elif rec.get("type") == "span":
+                    metrics._spans.setdefault(rec["span"], deque(maxlen=metrics.window)).append(
+                        (rec["cost_usd"], rec["latency_ms"], rec["calls"], rec["tokens"]))
+
+    if "--prometheus" in sys.argv:
+        print(metrics.prometheus(), end="")
+        sys.exit(0)
+
+    print("=" * 60)
+    print("YEDAN AGI - LLM Metrics")
+    print("=" * 60)
+    print(f"📄 Export: {METRICS_PATH}")
+    for namespace, ns in sorted(metrics.snapshot().items()):
+        print(f"   {namespace:<14} {ns['ok']:>6} ok {ns['error']:>4} err {ns['cached']:>5} cached "
+              f"{ns['retries']:>3} retries | {ns['prompt_tokens'] + ns['completion_tokens']:>9,} tok | "
+              f"${ns['cost_usd']:.4f} | avg {ns['avg_latency_ms']:.0f}ms")
+    for name in sorted(metrics._spans):
+        avg = metrics.span_average(name)
+        print(f"   span {name:<14} {avg['samples']} recent | ${avg['avg_cost_usd']:.4f} | "
+              f"{avg['avg_calls']:.1f} calls | {avg['avg_latency_ms']:.0f}ms")
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Local LLM Stand-In
+Deterministic, offline replacement for the real providers, for tests and
+load benchmarks of the decision pipeline (run_cycle, RSI, consolidator).
+
+    install_standin(latency_ms=300, tokens_per_second=80)   # in-process
+    LLM_PROVIDER=standin python run_roi_loop.py              # same, via env
+    python core/llm_standin.py --serve --port 8089           # OpenAI-compatible HTTP
+
+Replies are a pure function of (seed, model, temperature, system prompt,
+prompt) and match what each caller parses:
+- proposal / synthesis: <think> block + decision JSON, replayed from a
+  recorded decision log (LLM_STANDIN_SOURCE) or generated
+- critic: risk bullets (plus {"risk_score": n} when asked for one)
+- batch: one decision per product in the prompt's product list
+- RSI mutation: strategy_parameters JSON
+- anything else: Markdown bullets (consolidator insights)
+
+Latency (first token, lognormal jitter), throughput (tokens/s while
+streaming) and the injected error rate come from a separate seeded
+sequence, so a run is reproducible call-for-call.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, List, Tuple, Iterator, AsyncIterator, Iterable
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llm_gateway import LLMGateway, LLMProvider, LLMError, estimate_tokens
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+STANDIN_LATENCY_MS = float(os.getenv("LLM_STANDIN_LATENCY_MS", "0"))   # Median time to first token
+STANDIN_JITTER = float(os.getenv("LLM_STANDIN_JITTER", "0"))           # Lognormal sigma on that latency
+STANDIN_TPS = float(os.getenv("LLM_STANDIN_TPS", "0"))                 # Output tokens/s (0 = instant)
+STANDIN_ERROR_RATE = float(os.getenv("LLM_STANDIN_ERROR_RATE", "0"))
+STANDIN_SEED = int(os.getenv("LLM_STANDIN_SEED", "7"))
+# "" = generate decisions, "events" = event store decisions, or a decision_log.jsonl path
+STANDIN_SOURCE = os.getenv("LLM_STANDIN_SOURCE", "")
+
+CHUNK_CHARS = 16  # Streamed piece size
+RESPONSE_KEYS = ("decision", "parameters", "confidence_score", "reasoning", "risks_mitigated")
+ACTIONS = ("UPDATE_PRICE", "MODIFY_COPY", "HOLD")
+
+
+def load_corpus(source: Optional[str] = STANDIN_SOURCE) -> List[Dict[str, Any]]:
+    """Recorded decisions (response fields only) to replay; [] means generate."""
+    if not source:
+        return []
+    if source == "events":
+        from core.event_store import get_event_store
+        records = [row["payload"] for row in get_event_store().query("decisions")]
+    else:
+        records = []
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return [{k: r[k] for k in RESPONSE_KEYS if k in r}
+            for r in records if isinstance(r, dict) and r.get("decision")]
+
+
+# ═══════════════════════════════════════════════════════════════
+# REPLY GENERATION
+# ═══════════════════════════════════════════════════════════════
+
+def _kind(prompt: str, system_prompt: str) -> str:
+    if "[產品列表]" in prompt:
+        return "batch"
+    if "risk_score" in prompt:
+        return "scored_critique"
+    if "批評家" in system_prompt:
+        return "critique"
+    if "strategy_mode" in prompt and "price_step" in prompt:
+        return "mutation"
+    if '"decision"' in prompt:
+        return "decision"
+    return "text"
+
+
+def _generate_decision(rng: random.Random) -> Dict[str, Any]:
+    action = rng.choice(ACTIONS)
+    params: Dict[str, Any] = {"platform": rng.choice(("gumroad", "shopify")),
+                              "product_id": f"standin-{rng.randint(1, 50)}"}
+    if action == "UPDATE_PRICE":
+        params["new_price"] = round(rng.uniform(5, 99), 2)
+    elif action == "MODIFY_COPY":
+        params["target"] = "description"
+        params["content"] = f"Limited offer #{rng.randint(100, 999)}: lifetime updates included."
+    return {
+        "decision": action,
+        "parameters": params,
+        "confidence_score": round(rng.uniform(0.5, 0.98), 2),
+        "reasoning": f"Stand-in reasoning #{rng.randint(1000, 9999)}",
+        "risks_mitigated": ["Change is small and reversible"],
+    }
+
+
+def _products(prompt: str) -> List[str]:
+    """product_id of each JSON line under [產品列表]."""
+    ids = []
+    for line in prompt.split("[產品列表]", 1)[1].splitlines()[1:]:
+        if not line.strip():
+            break
+        try:
+            ids.append(str(json.loads(line)["product_id"]))
+        except (json.JSONDecodeError, KeyError, TypeError):
+            continue
+    return ids
+
+
+class StandInProvider(LLMProvider):
+    """
+    Gateway provider with a simulated latency / throughput / error profile.
+    `calls` and `errors` count requests (completions and streams alike).
+    """
+
+    name = "standin"
+    default_model = "standin-1"
+
+    def __init__(self, corpus: Optional[List[Dict[str, Any]]] = None,
+                 latency_ms: float = STANDIN_LATENCY_MS, jitter: float = STANDIN_JITTER,
+                 tokens_per_second: float = STANDIN_TPS, error_rate: float = STANDIN_ERROR_RATE,
+                 seed: int = STANDIN_SEED):
+        super().__init__()
+        self.corpus = load_corpus() if corpus is None else corpus
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.seed = seed
+        self._timing_rng = random.Random(seed)
+        self._timing_lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def _connect(self):
+        return self  # Nothing to connect to
+
+    def _aconnect(self):
+        return self
+
+    def respond(self, prompt: str, system_prompt: str = "", model: Optional[str] = None,
+                temperature: Optional[float] = None) -> str:
+        """The reply text, without any simulated delay."""
+        digest = hashlib.sha256(json.dumps([self.seed, model or self.default_model, temperature,
+                                            system_prompt, prompt], ensure_ascii=False).encode("utf-8"))
+        rng = random.Random(int.from_bytes(digest.digest()[:8], "big"))
+        kind = _kind(prompt, system_prompt)
+
+        if kind == "batch":
+            items = []
+            for pid in _products(prompt):
+                item = _generate_decision(rng)
+                item["parameters"].pop("product_id")
+                items.append({"product_id": pid, **item})
+            return json.dumps(items, ensure_ascii=False, indent=2)
+        if kind in ("critique", "scored_critique"):
+            risks = "\n".join(f"- 風險 {i + 1}: 假設 #{rng.randint(100, 999)} 缺乏數據支持"
+                              for i in range(rng.randint(2, 4)))
+            return risks + (f'\n\n{{"risk_score": {rng.randint(1, 9)}}}' if kind == "scored_critique" else "")
+        if kind == "mutation":
+            return "```json\n" + json.dumps({
+                "strategy_mode": rng.choice(("profit_maximization", "volume_growth",
+                                             "market_penetration", "premium_positioning")),
+                "tone": rng.choice(("urgent and exclusive", "friendly and educational",
+                                    "professional and persuasive")),
+                "risk_tolerance": rng.choice(("low", "medium", "high")),
+                "price_step": round(rng.uniform(0.01, 0.2), 2),
+                "reasoning": f"Stand-in mutation #{rng.randint(1000, 9999)}",
+            }, ensure_ascii=False, indent=4) + "\n```"
+        if kind == "decision":
+            decision = dict(rng.choice(self.corpus)) if self.corpus else _generate_decision(rng)
+            steps = "\n".join(f"{i + 1}. 評估選項 {rng.choice('ABC')} (#{rng.randint(100, 999)})"
+                              for i in range(rng.randint(3, 6)))
+            return (f"<think>\n{steps}\n</think>\n```json\n"
+                    f"{json.dumps(decision, ensure_ascii=False, indent=4)}\n```")
+        return "\n".join(f"- **Insight**: Pattern #{rng.randint(100, 999)} holds on "
+                         f"{rng.choice(('Gumroad', 'Shopify'))}." for _ in range(rng.randint(2, 4)))
+
+    def _timing(self, text: str) -> Tuple[float, Optional[List[Tuple[str, float]]]]:
+        """(seconds to first token, [(piece, seconds before it)]); pieces is None for an injected error."""
+        with self._timing_lock:
+            self.calls += 1
+            ttft = self.latency_ms / 1000.0
+            if self.jitter:
+                ttft *= self._timing_rng.lognormvariate(0.0, self.jitter)
+            if self._timing_rng.random() < self.error_rate:
+                self.errors += 1
+                return ttft, None
+        rate = self.tokens_per_second
+        pieces = [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)] or [""]
+        return ttft, [(piece, estimate_tokens(piece) / rate if rate else 0.0) for piece in pieces]
+
+    def _failure(self) -> LLMError:
+        return LLMError(f"{self.name}: injected error ({self.errors}/{self.calls} calls)")
+
+    def _complete(self, client, prompt, system_prompt, model, json_mode, temperature) -> str:
+        text = self.respond(prompt, system_prompt, model, temperature)
+        ttft, pieces = self._timing(text)
+        time.sleep(ttft)
+        if pieces is None:
+            raise self._failure()
+        time.sleep(sum(delay for _, delay in pieces))
+        return text
+
+    async def _acomplete(self, client, prompt, system_prompt, model, json_mode, temperature) -> str:
+        text = self.respond(prompt, system_prompt, model, temperature)
+        ttft, pieces = self._timing(text)
+        await asyncio.sleep(ttft)
+        if pieces is None:
+            raise self._failure()
+        await asyncio.sleep(sum(delay for _, delay in pieces))
+        return text
+
+    def _stream(self, client, prompt, system_prompt, model, json_mode, temperature) -> Iterator[str]:
+        ttft, pieces = self._timing(self.respond(prompt, system_prompt, model, temperature))
+        time.sleep(ttft)
+        if pieces is None:
+            raise self._failure()
+        for piece, delay in pieces:
+            if delay:
+                time.sleep(delay)
+            yield piece
+
+    async def _astream(self, client, prompt, system_prompt, model, json_mode, temperature) -> AsyncIterator[str]:
+        ttft, pieces = self._timing(self.respond(prompt, system_prompt, model, temperature))
+        await asyncio.sleep(ttft)
+        if pieces is None:
+            raise self._failure()
+        for piece, delay in pieces:
+            await asyncio.sleep(delay)
+            yield piece
+
+
+def install_standin(gateway: Optional[LLMGateway] = None, names: Iterable[str] = ("gemini", "deepseek"),
+                    **options) -> StandInProvider:
+    """
+    Register a StandInProvider as "standin" and in place of `names` (callers
+    that ask for a provider explicitly stay offline too), unthrottled, and
+    make it the default. Options are StandInProvider's keyword arguments.
+    """
+    if gateway is None:
+        from core.llm_gateway import get_gateway
+        gateway = get_gateway()
+    provider = StandInProvider(**options)
+    for name in ("standin", *names):
+        gateway.register(provider, name=name, rpm=0)
+    gateway.default_provider = "standin"
+    return provider
+
+
+# ═══════════════════════════════════════════════════════════════
+# HTTP SERVER (OpenAI-compatible chat completions)
+# ═══════════════════════════════════════════════════════════════
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """POST /v1/chat/completions (plain or SSE stream), GET /v1/models, GET /health"""
+
+    provider: StandInProvider = None
+    protocol_version = "HTTP/1.0"  # Close after each response: SSE needs no chunked encoding
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._send_json(200, {"status": "ok", "calls": self.provider.calls, "errors": self.provider.errors})
+        elif self.path.rstrip("/") in ("/v1/models", "/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": self.provider.default_model, "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+        messages = body.get("messages") or []
+        system_prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") != "system")
+        model = body.get("model") or self.provider.default_model
+        temperature = body.get("temperature")
+        completion_id = f"chatcmpl-standin-{self.provider.calls}"
+        created = int(time.time())
+
+        try:
+            if not body.get("stream"):
+                text = self.provider.complete(prompt, system_prompt, model, temperature=temperature)
+                self._send_json(200, {
+                    "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": estimate_tokens(system_prompt + prompt),
+                              "completion_tokens": estimate_tokens(text)},
+                })
+                return
+            pieces = self.provider.stream(prompt, system_prompt, model, temperature=temperature)
+            first = next(pieces, "")  # Injected errors surface here, before any header is sent
+        except LLMError as e:
+            self._send_json(503, {"error": {"message": str(e), "type": "standin_error"}})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(delta: Dict[str, Any], finish: Optional[str] = None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            event({"role": "assistant", "content": first})
+            for piece in pieces:
+                event({"content": piece})
+            event({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client stopped reading (e.g. first_json found its object)
+        finally:
+            pieces.close()
+
+
+def start_server(provider: Optional[StandInProvider] = None, host: str = "127.0.0.1",
+                 port: int = 0) -> ThreadingHTTPServer:
+    """
+    Serve `provider` from a daemon thread (port 0 = any free port). Point an
+    OpenAICompatibleProvider at `server.url`; stop with server.shutdown().
+    """
+    handler = type("StandInHandler", (StandInHandler,), {"provider": provider or StandInProvider()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.url = f"http://{host}:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, name="llm-standin", daemon=True).start()
+    return server
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="YEDAN AGI - Local LLM Stand-In")
+    parser.add_argument("prompt", nargs="*", help="Print the stand-in reply to this prompt")
+    parser.add_argument("--serve", action="store_true", help="Run the OpenAI-compatible HTTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=STANDIN_LATENCY_MS)
+    parser.add_argument("--jitter", type=float, default=STANDIN_JITTER)
+    parser.add_argument("--tps", type=float, default=STANDIN_TPS)
+    parser.add_argument("--error-rate", type=float, default=STANDIN_ERROR_RATE)
+    parser.add_argument("--seed", type=int, default=STANDIN_SEED)
+    parser.add_argument("--source", default=STANDIN_SOURCE,
+                        help='decision_log.jsonl path, "events", or empty to generate')
+    args = parser.parse_args()
+
+    provider = StandInProvider(corpus=load_corpus(args.source), latency_ms=args.latency_ms,
+                               jitter=args.jitter, tokens_per_second=args.tps,
+                               error_rate=args.error_rate, seed=args.seed)
+
+    print("=" * 60)
+    print("YEDAN AGI - Local LLM Stand-In")
+    print("=" * 60)
+    print(f"   Latency: {args.latency_ms:.0f}ms (jitter {args.jitter}) | {args.tps or '∞'} tok/s | "
+          f"errors {args.error_rate:.1%} | seed {args.seed}")
+    print(f"   Decisions: {f'replaying {len(provider.corpus)} recorded' if provider.corpus else 'generated'}")
+    if args.serve:
+        server = ThreadingHTTPServer((args.host, args.port),
+                                     type("StandInHandler", (StandInHandler,), {"provider": provider}))
+        print(f"🛰️ Serving on http://{args.host}:{args.port}/v1")
+        print(f"   DEEPSEEK_BASE_URL=http://{args.host}:{args.port}/v1 DEEPSEEK_API_KEY=standin LLM_PROVIDER=deepseek")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Stopped")
+    elif args.prompt:
+        print(provider.respond(" ".join(args.prompt)))
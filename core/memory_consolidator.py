@@ -6,17 +6,17 @@ Implements memory consolidation like human sleep.
 Truth #1: Forget the noise, remember the wisdom.
 
 Process:
-1. READ short-term memory (sales_history.csv)
+1. READ short-term memory (sales rollups)
 2. EXTRACT business wisdom via LLM
 3. WRITE to long-term memory (knowledge_base.md)
-4. ARCHIVE raw data (optional)
+4. ARCHIVE raw data past the retention window
 """
 
 import os
 import sys
 import io
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
 # Fix Windows console encoding
@@ -26,6 +26,11 @@ if sys.platform == 'win32' and __name__ == "__main__":
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from core.sales_ledger import get_ledger
+from core.event_store import get_event_store
+from core.rollups import get_rollups
+from core.llm_gateway import call_llm_api as llm_call
+
 # ═══════════════════════════════════════════════════════════════
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════════════
@@ -39,20 +44,8 @@ MIN_TRANSACTIONS_FOR_CONSOLIDATION = 10
 
 def call_llm_api(prompt: str, system_prompt: str) -> str:
     """Call LLM for wisdom extraction."""
-    try:
-        import google.generativeai as genai
-        from agi_config import config
-        
-        genai.configure(api_key=config.GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.0-flash-001')
-        
-        full_prompt = f"{system_prompt}\n\n{prompt}"
-        response = model.generate_content(full_prompt)
-        return response.text
-        
-    except Exception as e:
-        print(f"⚠️ LLM API Error: {e}")
-        return "- Unable to extract insights at this time."
+    return llm_call(prompt, system_prompt, fallback="- Unable to extract insights at this time.",
+                    namespace="consolidator")
 
 
 class MemoryConsolidator:
@@ -89,17 +82,16 @@ class MemoryConsolidator:
         # ═══════════════════════════════════════════════════════════
         # 1. READ SHORT-TERM MEMORY
         # ═══════════════════════════════════════════════════════════
-        if not os.path.exists(DATA_PATH):
-            print("\n   ⚠️ No short-term memory found (sales_history.csv missing)")
-            return False
-        
         try:
-            df = pd.read_csv(DATA_PATH)
+            # Pre-aggregated rollups: the whole history is a few hundred rows
+            ledger = get_ledger(DATA_PATH)
+            rollups = get_rollups(ledger)
+            totals = rollups.totals()
         except Exception as e:
-            print(f"\n   ❌ Error reading CSV: {e}")
+            print(f"\n   ❌ Error reading ledger: {e}")
             return False
         
-        transaction_count = len(df)
+        transaction_count = int(totals["orders"])
         print(f"\n📊 [Memory Scan] Found {transaction_count} transactions")
         
         # Check minimum threshold
@@ -113,36 +105,39 @@ class MemoryConsolidator:
         print("\n📈 [Preparing Summary]")
         
         # Financial metrics
-        if 'amount' in df.columns:
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0)
-            total_revenue = float(df['amount'].sum())
-            avg_order = total_revenue / transaction_count if transaction_count > 0 else 0
-            max_order = float(df['amount'].max())
-            min_order = float(df['amount'].min())
-        else:
-            total_revenue = avg_order = max_order = min_order = 0
+        total_revenue = float(totals["revenue"])
+        avg_order = total_revenue / transaction_count if transaction_count > 0 else 0
+        max_order = float(totals["max_amount"] or 0)
+        min_order = float(totals["min_amount"] or 0)
         
         # Platform breakdown
-        if 'platform' in df.columns:
-            platform_stats = df['platform'].value_counts().to_dict()
-            top_platform = df['platform'].mode()[0] if not df['platform'].empty else "Unknown"
-        else:
-            platform_stats = {}
-            top_platform = "Unknown"
+        platform_stats = {r["platform"]: r["orders"]
+                          for r in rollups.range(grain="day", group_by="platform", by_bucket=False)}
+        top_platform = max(platform_stats, key=platform_stats.get) if platform_stats else "Unknown"
         
-        # Time analysis
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-            # Day of week analysis
-            df['day_of_week'] = df['timestamp'].dt.day_name()
-            day_stats = df['day_of_week'].value_counts().to_dict()
-            best_day = df['day_of_week'].mode()[0] if not df['day_of_week'].isna().all() else "Unknown"
-        else:
-            day_stats = {}
-            best_day = "Unknown"
+        # Time analysis (day of week, from daily rollups)
+        days = rollups.range(grain="day")
+        day_stats: dict = {}
+        for r in days:
+            day = datetime.fromisoformat(r["bucket"]).strftime("%A")
+            day_stats[day] = day_stats.get(day, 0) + r["orders"]
+        day_stats = dict(sorted(day_stats.items(), key=lambda kv: -kv[1]))
+        best_day = next(iter(day_stats), "Unknown")
         
         # Sample recent transactions
-        sample_data = df.tail(10).to_string() if len(df) > 0 else "No data"
+        sample_data = pd.DataFrame(ledger.tail(10)).to_string() if transaction_count > 0 else "No data"
+        
+        # Decisions taken over the same period (indexed aggregate, no JSONL parsing):
+        # from the first rollup day (ledger clock, local) up to now, in UTC
+        period_start = min((r["bucket"] for r in days), default=None)
+        try:
+            decision_stats = {r["decision_type"]: r["count"] for r in get_event_store().aggregate(
+                "decisions", group_by="decision_type",
+                start=datetime.fromisoformat(period_start).astimezone(timezone.utc) if period_start else None,
+                end=datetime.now(timezone.utc))}
+        except Exception as e:
+            print(f"   ⚠️ Decision history unavailable: {e}")
+            decision_stats = {}
         
         print(f"   💰 Total Revenue: ${total_revenue:.2f}")
         print(f"   📦 Avg Order: ${avg_order:.2f}")
@@ -177,6 +172,9 @@ class MemoryConsolidator:
 [Recent Transactions Sample]:
 {sample_data}
 
+[Decisions Taken (by type)]:
+{decision_stats or "No decisions logged"}
+
 [Task]:
 Analyze this data and extract 2-4 "Immutable Business Laws" that will guide future decisions.
 Focus on:
@@ -234,17 +232,16 @@ If data is insufficient, say so."""
         print("-" * 40)
         
         # ═══════════════════════════════════════════════════════════
-        # 5. ARCHIVE RAW DATA (Optional - commented for safety)
+        # 5. ARCHIVE RAW DATA
         # ═══════════════════════════════════════════════════════════
-        # Uncomment these lines when ready to enable automatic archiving
-        
-        # archive_filename = f"sales_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        # archive_path = os.path.join(ARCHIVE_DIR, archive_filename)
-        # df.to_csv(archive_path, index=False)
-        # 
-        # # Clear main CSV (keep only header)
-        # df.iloc[0:0].to_csv(DATA_PATH, index=False)
-        # print(f"\n🗑️ [Archiving] Raw data moved to {archive_filename}")
+        # Raw partitions past the retention window move to data/archive/ledger;
+        # their aggregates stay queryable in the daily rollups
+        try:
+            archived = rollups.archive_raw(dest=os.path.join(ARCHIVE_DIR, "ledger"))
+            if archived:
+                print(f"\n🗄️ [Archiving] {len(archived)} raw partitions moved to {ARCHIVE_DIR}")
+        except Exception as e:
+            print(f"\n   ⚠️ Archiving skipped: {e}")
         
         print("\n🏁 [DEEP SLEEP COMPLETE] Memory consolidation finished.")
         return True
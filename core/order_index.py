@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Order Index (Webhook Idempotency)
+Persistent (platform, order_id) index so retried webhook deliveries are
+acknowledged without writing the sale twice.
+
+Lookup path (all on the webhook event loop):
+    pending map  -> ids claimed but not yet committed by the ingest writer
+    Bloom filter -> "definitely new" answered from memory (most new orders)
+    SQLite       -> primary-key point lookup only when the Bloom says "maybe"
+
+Claims are persisted by commit(rows) on the writer thread, after the rows
+are in the ledger. Each pending claim carries a future that resolves True
+on commit and False on release, so a retry that arrives while the first
+delivery is still queued can wait for its outcome instead of being
+acknowledged as a duplicate of a row that may never be written. The index is derived data: rebuild(ledger) recreates it,
+and catch_up(ledger) re-indexes rows written after the last commit (crash
+between ledger append and index commit).
+"""
+
+import os
+import sys
+import io
+import math
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+
+import numpy as np
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import SalesLedger, get_ledger, micros_to_datetime
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+INDEX_PATH = os.getenv("ORDER_INDEX_PATH",
+                       os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "order_index.sqlite"))
+
+# Bloom filter in front of SQLite (set ORDER_INDEX_BLOOM=0 to disable)
+USE_BLOOM = os.getenv("ORDER_INDEX_BLOOM", "1") == "1"
+BLOOM_CAPACITY = int(os.getenv("ORDER_INDEX_BLOOM_CAPACITY", "1000000"))
+BLOOM_ERROR_RATE = 0.01
+
+# Ledger columns needed to (re)build the index
+INDEX_COLUMNS = ["seq", "timestamp", "platform", "order_id"]
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over a NumPy bit array.
+    k positions per key by double hashing one 128-bit BLAKE2b digest.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.bits_count = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits_count / capacity * math.log(2)))
+        self.bits = np.zeros((self.bits_count + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits_count for i in range(self.hashes)]
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def _key(platform: str, order_id: str) -> str:
+    return f"{platform.lower()}\x1f{order_id}"
+
+
+class OrderIndex:
+    """
+    SQLite-backed unique index of ingested orders.
+
+    claim(platform, order_id)   -> True for a first delivery, False if pending or committed
+    pending(platform, order_id) -> future of an uncommitted claim (None if not pending)
+    commit(rows)                -> persist claimed rows (after the ledger write)
+    release(rows)               -> give back claims whose write failed
+    """
+
+    def __init__(self, path: str = INDEX_PATH, use_bloom: bool = USE_BLOOM,
+                 bloom_capacity: int = BLOOM_CAPACITY):
+        self.path = path
+        self._lock = threading.RLock()        # pending map, Bloom, read connection
+        self._write_lock = threading.RLock()  # write connection
+        self._pending: Dict[str, Future] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        # Separate connections so WAL lets lookups proceed during a commit
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS orders (
+                platform TEXT NOT NULL,
+                order_id TEXT NOT NULL,
+                seq INTEGER,
+                ts INTEGER,
+                PRIMARY KEY (platform, order_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS orders_ts ON orders (ts)")
+        self.conn.commit()
+        self._read_conn = sqlite3.connect(path, check_same_thread=False)
+
+        self.bloom: Optional[BloomFilter] = None
+        if use_bloom:
+            self.bloom = BloomFilter(max(bloom_capacity, 2 * self.count()))
+            for platform, order_id in self.conn.execute("SELECT platform, order_id FROM orders"):
+                self.bloom.add(_key(platform, order_id))
+
+    # ═══════════════════════════════════════════════════════════
+    # HOT PATH
+    # ═══════════════════════════════════════════════════════════
+
+    def seen(self, platform: str, order_id: str) -> bool:
+        """True if the order was already claimed or committed."""
+        key = _key(platform, order_id)
+        with self._lock:
+            if key in self._pending:
+                return True
+            if self.bloom is not None and key not in self.bloom:
+                return False
+            row = self._read_conn.execute(
+                "SELECT 1 FROM orders WHERE platform = ? AND order_id = ?",
+                (platform.lower(), order_id)).fetchone()
+            return row is not None
+
+    def claim(self, platform: str, order_id: str) -> bool:
+        """
+        Reserve an order id. Returns False for a duplicate delivery.
+        Orders without an id cannot be deduplicated and are always accepted.
+        """
+        if not order_id:
+            return True
+        with self._lock:
+            if self.seen(platform, order_id):
+                return False
+            key = _key(platform, order_id)
+            self._pending[key] = Future()
+            if self.bloom is not None:
+                self.bloom.add(key)
+            return True
+
+    def pending(self, platform: str, order_id: str) -> Optional[Future]:
+        """The claim of an order that is not committed yet (resolves True on commit, False on release)."""
+        with self._lock:
+            return self._pending.get(_key(platform, order_id))
+
+    def release(self, rows: Iterable[Dict[str, Any]]):
+        """Drop claims for rows that never reached the ledger."""
+        with self._lock:
+            claims = [self._pending.pop(_key(row["platform"], row["order_id"]), None) for row in rows]
+        for claim in claims:
+            if claim is not None:
+                claim.set_result(False)
+
+    # ═══════════════════════════════════════════════════════════
+    # PERSISTENCE
+    # ═══════════════════════════════════════════════════════════
+
+    def commit(self, rows: Iterable[Dict[str, Any]]):
+        """Persist ledger rows (with seq) and clear their pending claims."""
+        records = [(r["platform"].lower(), r["order_id"], r.get("seq"), r.get("timestamp"))
+                   for r in rows if r.get("order_id")]
+        self._insert(records)
+        with self._lock:
+            claims = [self._pending.pop(_key(platform, order_id), None) for platform, order_id, _, _ in records]
+        for claim in claims:
+            if claim is not None:
+                claim.set_result(True)
+
+    def _insert(self, records: List[Tuple]):
+        if not records:
+            return
+        with self._write_lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO orders (platform, order_id, seq, ts) VALUES (?, ?, ?, ?)",
+                records)
+            self.conn.commit()
+        with self._lock:
+            if self.bloom is not None:
+                for platform, order_id, _, _ in records:
+                    self.bloom.add(_key(platform, order_id))
+
+    def _index_columns(self, data: Dict[str, np.ndarray]) -> int:
+        keep = data["order_id"] != ""
+        records = list(zip(np.char.lower(data["platform"][keep]).tolist(),
+                           data["order_id"][keep].tolist(),
+                           data["seq"][keep].tolist(),
+                           data["timestamp"][keep].tolist()))
+        before = self.conn.total_changes
+        self._insert(records)
+        return self.conn.total_changes - before
+
+    def rebuild(self, ledger: SalesLedger) -> int:
+        """Recreate the index from the ledger, one day partition at a time."""
+        with self._lock, self._write_lock:
+            self.conn.execute("DELETE FROM orders")
+            self.conn.commit()
+            if self.bloom is not None:
+                self.bloom.bits[:] = 0
+            total = 0
+            for part in ledger.partitions():
+                day = datetime.strptime(part[3:], "%Y-%m-%d")
+                total += self._index_columns(ledger.scan(
+                    start=day, end=day + timedelta(days=1), columns=INDEX_COLUMNS))
+            # Hot rows may sit in a day without a sealed partition yet
+            return total + self.catch_up(ledger)
+
+    def catch_up(self, ledger: SalesLedger) -> int:
+        """Index ledger rows newer than the last committed timestamp."""
+        with self._write_lock:
+            last_ts = self.conn.execute("SELECT MAX(ts) FROM orders").fetchone()[0]
+            start = micros_to_datetime(last_ts) if last_ts is not None else None
+            return self._index_columns(ledger.scan(start=start, columns=INDEX_COLUMNS))
+
+    def count(self) -> int:
+        with self._write_lock:
+            return self.conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def close(self):
+        with self._lock, self._write_lock:
+            self._read_conn.close()
+            self.conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_index: Optional[OrderIndex] = None
+
+
+def get_order_index(ledger: Optional[SalesLedger] = None) -> OrderIndex:
+    """Process-wide index: built from the ledger on first use, else caught up."""
+    global _default_index
+    if _default_index is None:
+        ledger = ledger or get_ledger()
+        index = OrderIndex()
+        if index.count() == 0:
+            built = index.rebuild(ledger)
+            if built:
+                print(f"🔑 [ORDER INDEX] Indexed {built} orders from the ledger")
+        else:
+            index.catch_up(ledger)
+        _default_index = index
+    return _default_index
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    ledger = get_ledger()
+    index = get_order_index(ledger)
+
+    if "--rebuild" in sys.argv:
+        print(f"🔄 Rebuilt order index: {index.rebuild(ledger)} orders")
+
+    print(f"Index: {index.path}")
+    print(f"Orders: {index.count()}")
+    print(f"Bloom: {'on' if index.bloom is not None else 'off'}")
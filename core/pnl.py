@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - P&L Engine
+Vectorized profit & loss over arbitrary windows:
+
+    revenue - transaction fees - ad spend - prorated fixed costs = net profit
+    ROAS = revenue / ad spend
+
+Fees are a join of categorical platform codes against a fee table
+(code -> percent / fixed arrays, from data/marketing_spend.json). Because
+fees are linear, transactions are first folded per platform with
+np.bincount, so 10M rows cost two passes over the amount column.
+
+Windows read per-platform revenue/orders from the sales rollups (hourly
+inside the retention, daily beyond), so archived history is covered too.
+"""
+
+import os
+import sys
+import io
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+import pandas as pd
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import to_micros
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+MARKETING_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "data", "marketing_spend.json")
+
+DEFAULT_PLATFORM = "gumroad"  # Unknown platforms are charged like Gumroad
+DEFAULT_FEE = {"percent": 0.10, "fixed": 0.30}
+ESTIMATED_DAILY_AD_SPEND = 5.0  # Assumed when marketing_spend.json has no ad entries at all
+DAYS_PER_MONTH = 30
+
+
+def load_marketing_data(path: str = MARKETING_DATA_PATH) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_fee_rates(path: str = MARKETING_DATA_PATH) -> Dict[str, Dict[str, float]]:
+    """platform (lowercase) -> {percent, fixed}, from marketing_spend.json"""
+    return load_marketing_data(path).get("platform_fees", {})
+
+
+class FeeTable:
+    """
+    Platform fee schedule as aligned arrays.
+
+    Platform names map to integer codes; percent[code] / fixed[code] give
+    the rate. The last code is the fallback for platforms not in the table.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, Dict[str, float]]] = None):
+        rates = {k.lower(): v for k, v in (rates or {}).items()}
+        fallback = rates.get(DEFAULT_PLATFORM, DEFAULT_FEE)
+        self.platforms: List[str] = sorted(rates)
+        self.index = {p: i for i, p in enumerate(self.platforms)}
+        self.percent = np.array([float(rates[p].get("percent", 0.0)) for p in self.platforms]
+                                + [float(fallback.get("percent", 0.0))])
+        self.fixed = np.array([float(rates[p].get("fixed", 0.0)) for p in self.platforms]
+                              + [float(fallback.get("fixed", 0.0))])
+
+    @property
+    def fallback_code(self) -> int:
+        return len(self.platforms)
+
+    def lookup(self, labels: Any) -> np.ndarray:
+        """Codes for a handful of distinct labels (case-insensitive)."""
+        return np.array([self.index.get(str(p).lower(), self.fallback_code) for p in labels],
+                        dtype=np.int64)
+
+    def encode(self, platforms: Any):
+        """
+        Factorize a platform column.
+
+        Returns (labels, label_codes, inverse): distinct labels, their fee
+        table codes, and each row's index into labels. pandas Categoricals
+        are used as-is; other inputs go through pd.factorize.
+        """
+        if isinstance(platforms, pd.Series) and isinstance(platforms.dtype, pd.CategoricalDtype):
+            platforms = platforms.array
+        if isinstance(platforms, pd.Categorical):
+            labels, inverse = np.asarray(platforms.categories, dtype=object), platforms.codes
+        else:
+            inverse, labels = pd.factorize(np.asarray(platforms, dtype=object))
+            labels = np.asarray(labels, dtype=object)
+        # Missing values (code -1) fall through to an extra fallback label
+        labels = np.append(labels, "")
+        inverse = np.where(inverse < 0, len(labels) - 1, inverse)
+        return labels, self.lookup(labels), inverse
+
+    def fees(self, codes: np.ndarray, revenue: Any, orders: Any = 1) -> np.ndarray:
+        """Fee per row: revenue * percent + orders * fixed."""
+        return np.asarray(revenue, dtype=float) * self.percent[codes] + np.asarray(orders) * self.fixed[codes]
+
+
+# ═══════════════════════════════════════════════════════════════
+# P&L ENGINE
+# ═══════════════════════════════════════════════════════════════
+
+class PnLEngine:
+    """
+    P&L statements over transaction arrays or time windows.
+
+    statement(platforms, amounts, orders, start, end) - from raw or per-platform arrays
+    window(start, end)                               - from the sales rollups
+    """
+
+    def __init__(self, ledger=None, rollups=None, marketing_path: str = MARKETING_DATA_PATH):
+        self.ledger = ledger
+        self.rollups = rollups
+        self.marketing_path = marketing_path
+        self._mtime = None
+        self.reload()
+
+    def reload(self):
+        """(Re)read fees, ad spend and fixed costs from marketing_spend.json."""
+        try:
+            self._mtime = os.path.getmtime(self.marketing_path)
+        except OSError:
+            self._mtime = None
+        data = load_marketing_data(self.marketing_path)
+        self.fee_table = FeeTable(data.get("platform_fees") or {DEFAULT_PLATFORM: DEFAULT_FEE})
+
+        entries = data.get("daily_ad_spend", [])
+        self.has_ad_data = bool(entries)
+        frame = pd.DataFrame(entries, columns=["date", "spend"])
+        self.ad_dates = pd.to_datetime(frame["date"], format="%Y-%m-%d", errors="coerce").to_numpy("datetime64[us]")
+        self.ad_spend_values = pd.to_numeric(frame["spend"], errors="coerce").fillna(0.0).to_numpy(float)
+
+        self.monthly_fixed = float(sum(float(v) for v in data.get("monthly_fixed_costs", {}).values()))
+
+    def _maybe_reload(self):
+        try:
+            mtime = os.path.getmtime(self.marketing_path)
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.reload()
+
+    # ═══════════════════════════════════════════════════════════
+    # COST COMPONENTS
+    # ═══════════════════════════════════════════════════════════
+
+    def ad_spend(self, start: Any = None, end: Any = None, days: Optional[float] = None) -> float:
+        """
+        Ad spend dated within [start, end). Entries with unparseable dates
+        are always included (conservative). With no ad entries at all,
+        ESTIMATED_DAILY_AD_SPEND per day is assumed.
+        """
+        if not self.has_ad_data:
+            return ESTIMATED_DAILY_AD_SPEND * (days if days is not None else self._days(start, end))
+        dates = self.ad_dates.astype("int64")
+        keep = np.ones(len(dates), dtype=bool)
+        if start is not None:
+            keep &= dates >= to_micros(start)
+        if end is not None:
+            keep &= dates < to_micros(end)
+        keep |= np.isnat(self.ad_dates)
+        return float(self.ad_spend_values[keep].sum())
+
+    def fixed_costs(self, days: float) -> float:
+        return self.monthly_fixed / DAYS_PER_MONTH * days
+
+    @staticmethod
+    def _days(start: Any, end: Any) -> float:
+        if start is None:
+            return 0.0
+        end_us = to_micros(end) if end is not None else to_micros(datetime.now())
+        return max(0.0, (end_us - to_micros(start)) / (86400 * 1_000_000))
+
+    # ═══════════════════════════════════════════════════════════
+    # STATEMENTS
+    # ═══════════════════════════════════════════════════════════
+
+    def statement(self, platforms: Any, amounts: Any, orders: Any = None,
+                  start: Any = None, end: Any = None, days: Optional[float] = None) -> Dict[str, Any]:
+        """
+        P&L for a set of transactions.
+
+        Args:
+            platforms: platform per row (array, Series or Categorical)
+            amounts: revenue per row
+            orders: orders per row when rows are pre-aggregated (default 1 each)
+            start, end: window for ad spend; days defaults to its length
+        """
+        self._maybe_reload()
+        days = days if days is not None else self._days(start, end)
+        amounts = np.asarray(amounts, dtype=float)
+        labels, codes, inverse = self.fee_table.encode(platforms)
+
+        # Fold per platform first: fees are linear in revenue and orders
+        revenue = np.bincount(inverse, weights=amounts, minlength=len(labels))
+        if orders is None:
+            counts = np.bincount(inverse, minlength=len(labels))
+        else:
+            counts = np.bincount(inverse, weights=np.asarray(orders, dtype=float), minlength=len(labels))
+        fees = self.fee_table.fees(codes, revenue, counts)
+
+        by_platform = {
+            str(labels[i]): {"revenue": round(float(revenue[i]), 2), "orders": int(counts[i]),
+                             "tx_costs": round(float(fees[i]), 2)}
+            for i in np.flatnonzero(counts)
+        }
+        return self._summarize(float(revenue.sum()), int(counts.sum()), float(fees.sum()),
+                               start, end, days, by_platform)
+
+    def window(self, start: Any = None, end: Any = None, days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        P&L over [start, end) from the sales rollups. `days` is shorthand
+        for start = now - days.
+        """
+        if days is not None and start is None:
+            start = datetime.now() - timedelta(days=days)
+        rollups = self._rollups()
+        rollups.update()
+        rows = rollups.range(start, end, group_by="platform", by_bucket=False)
+        return self.statement([r["platform"] for r in rows], [r["revenue"] for r in rows],
+                              orders=[r["orders"] for r in rows], start=start, end=end, days=days)
+
+    def _rollups(self):
+        if self.rollups is None:
+            from core.rollups import get_rollups
+            self.rollups = get_rollups(self.ledger)
+        return self.rollups
+
+    def _summarize(self, revenue: float, orders: int, tx_costs: float, start: Any, end: Any,
+                   days: float, by_platform: Dict[str, Any]) -> Dict[str, Any]:
+        ad_spend = self.ad_spend(start, end, days)
+        fixed = self.fixed_costs(days)
+        total = tx_costs + ad_spend + fixed
+        net = revenue - total
+        return {
+            "revenue": round(revenue, 2),
+            "orders": orders,
+            "tx_costs": round(tx_costs, 2),
+            "ad_spend": round(ad_spend, 2),
+            "ad_spend_estimated": not self.has_ad_data,
+            "fixed_costs": round(fixed, 2),
+            "total_costs": round(total, 2),
+            "net_profit": round(net, 2),
+            "margin": round(net / revenue, 4) if revenue > 0 else 0.0,
+            "roas": round(revenue / ad_spend, 2) if ad_spend > 0 else None,
+            "days": round(days, 2),
+            "by_platform": by_platform,
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_pnl: Optional[PnLEngine] = None
+
+
+def get_pnl(ledger=None) -> PnLEngine:
+    """Process-wide P&L engine (fee/ad data reloaded when the JSON changes)."""
+    global _default_pnl
+    if _default_pnl is None:
+        _default_pnl = PnLEngine(ledger)
+    return _default_pnl
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    days = int(sys.argv[sys.argv.index("--days") + 1]) if "--days" in sys.argv else 7
+    pnl = get_pnl().window(days=days)
+
+    print("=" * 60)
+    print(f"YEDAN AGI - P&L (last {days} days)")
+    print("=" * 60)
+    print(f"   💰 Revenue:        ${pnl['revenue']:.2f} ({pnl['orders']} orders)")
+    print(f"   📋 Transaction Fees: ${pnl['tx_costs']:.2f}")
+    print(f"   📢 Ad Spend{' (estimated)' if pnl['ad_spend_estimated'] else ''}: ${pnl['ad_spend']:.2f}")
+    print(f"   🏢 Fixed Costs:    ${pnl['fixed_costs']:.2f}")
+    print(f"   📈 Net Profit:     ${pnl['net_profit']:.2f} (margin {pnl['margin'] * 100:.1f}%)")
+    if pnl["roas"] is not None:
+        print(f"   🎯 ROAS:           {pnl['roas']:.2f}x")
+    for platform, row in pnl["by_platform"].items():
+        print(f"      {platform:>10}: ${row['revenue']:.2f} / {row['orders']} orders / fees ${row['tx_costs']:.2f}")
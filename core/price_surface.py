@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Price-Response Surface
+Sweeps the CORTEX price hypothesis over a grid of price changes x
+elasticity priors x volatility regimes and keeps, per cell, the revenue
+impact statistics: expected impact (with its 95% half-width), P(win),
+risk of ruin and the p10 / p90 band. For any regime the surface gives the
+expected-revenue-optimal price change and its risk band, so a price
+update can be read off it instead of guessed.
+
+Every cell reuses the same seeded shocks (common random numbers), so
+neighbouring cells differ by the model, not by sampling noise, and the
+surface does not depend on how the grid is split. Cells are computed in
+a process pool, one (elasticity, volatility) pair per task, written
+straight into one shared-memory result array.
+
+    get_price_surface().optimum(elasticity=1.5, volatility=0.2)
+    python core/price_surface.py --workers 4 --runs 200000
+"""
+
+import os
+import sys
+import io
+import math
+import time
+import secrets
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.risk_simulator import CortexRiskSimulator, ELASTICITY, DEFAULT_VOLATILITY, RUIN_THRESHOLD
+from core.shm_ledger import attach_segment, create_segment
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+PRICE_CHANGES = tuple(round(c, 2) for c in np.arange(-0.30, 0.301, 0.05))  # -30% .. +30%
+ELASTICITY_PRIORS = ((0.8, 0.3), ELASTICITY, (2.5, 0.8))                   # (mean, std): inelastic .. elastic
+VOLATILITIES = (0.1, DEFAULT_VOLATILITY, 0.4)                               # Calm / normal / turbulent market
+SURFACE_RUNS = int(os.getenv("PRICE_SURFACE_RUNS", "20000"))  # Paths per cell
+SURFACE_SEED = int(os.getenv("PRICE_SURFACE_SEED", "0"))
+SURFACE_WORKERS = int(os.getenv("PRICE_SURFACE_WORKERS", "0"))  # 0 = one per CPU (up to one per task)
+SHM_PREFIX = "yps_"
+
+# Per-cell statistics, in the last axis of the result array
+SURFACE_METRICS = ("expected_impact", "impact_ci95", "win_probability", "risk_of_ruin", "p10", "p90")
+
+
+def _fill_cell(out: np.ndarray, changes: Sequence[float], elasticity: Tuple[float, float],
+               volatility: float, runs: int, seed: int, sampler: str) -> None:
+    """Statistics of every price change for one (elasticity, volatility) cell into out[change, metric]."""
+    shocks = CortexRiskSimulator(runs=runs, seed=seed, sampler=sampler).draw_shocks(["UPDATE_PRICE"], runs)
+    for k, change in enumerate(changes):
+        impacts = CortexRiskSimulator.price_impacts(shocks, volatility, change, elasticity)
+        mean = impacts.mean(dtype=np.float64)
+        p10, p90 = np.percentile(impacts, (10, 90))
+        out[k] = (mean, 1.96 * impacts.std(dtype=np.float64) / math.sqrt(runs),
+                  np.count_nonzero(impacts > 0) / runs, np.count_nonzero(impacts < RUIN_THRESHOLD) / runs, p10, p90)
+
+
+def _sweep_task(name: str, shape: Tuple[int, ...], i: int, j: int, changes: Sequence[float],
+                elasticity: Tuple[float, float], volatility: float, runs: int, seed: int, sampler: str) -> None:
+    """Pool worker: fill cell (i, j) of the owner's shared result array."""
+    segment = attach_segment(name)
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=segment.buf)
+        _fill_cell(values[i, j], changes, elasticity, volatility, runs, seed, sampler)
+        del values
+    finally:
+        segment.close()
+
+
+class PriceSurface:
+    """
+    Revenue-impact statistics over price change x elasticity prior x
+    volatility: values[elasticity, volatility, change, metric].
+    """
+
+    def __init__(self, changes: Sequence[float], elasticities: Sequence[Tuple[float, float]],
+                 volatilities: Sequence[float], values: np.ndarray, runs: int, seed: int, sampler: str = "random"):
+        self.changes = np.asarray(changes, dtype=np.float64)
+        self.elasticities = [tuple(e) for e in elasticities]
+        self.volatilities = np.asarray(volatilities, dtype=np.float64)
+        self.values = values
+        self.runs, self.seed, self.sampler = runs, seed, sampler
+
+    @classmethod
+    def sweep(cls, changes: Sequence[float] = PRICE_CHANGES,
+              elasticities: Sequence[Tuple[float, float]] = ELASTICITY_PRIORS,
+              volatilities: Sequence[float] = VOLATILITIES, runs: int = SURFACE_RUNS, seed: int = SURFACE_SEED,
+              workers: int = SURFACE_WORKERS, sampler: str = "random") -> "PriceSurface":
+        """
+        Evaluate the grid. With more than one worker the (elasticity,
+        volatility) tasks go to a spawn-context process pool that writes
+        into a shared-memory block owned (and unlinked) by this process;
+        otherwise the cells are filled in-process.
+        """
+        changes = [float(c) for c in changes]
+        elasticities = [tuple(map(float, e)) for e in elasticities]
+        volatilities = [float(v) for v in volatilities]
+        shape = (len(elasticities), len(volatilities), len(changes), len(SURFACE_METRICS))
+        tasks = [(i, j) for i in range(shape[0]) for j in range(shape[1])]
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+        if workers <= 1:
+            values = np.empty(shape)
+            for i, j in tasks:
+                _fill_cell(values[i, j], changes, elasticities[i], volatilities[j], runs, seed, sampler)
+            return cls(changes, elasticities, volatilities, values, runs, seed, sampler)
+
+        segment = create_segment(SHM_PREFIX + secrets.token_hex(4), int(np.prod(shape)) * 8)
+        try:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+                futures = [pool.submit(_sweep_task, segment.name, shape, i, j, changes, elasticities[i],
+                                       volatilities[j], runs, seed, sampler) for i, j in tasks]
+                for future in futures:
+                    future.result()
+            values = np.ndarray(shape, dtype=np.float64, buffer=segment.buf).copy()
+        finally:
+            segment.close()
+            segment.unlink()
+        return cls(changes, elasticities, volatilities, values, runs, seed, sampler)
+
+    def metric(self, name: str) -> np.ndarray:
+        """One statistic over the grid: [elasticity, volatility, change]."""
+        return self.values[..., SURFACE_METRICS.index(name)]
+
+    def _regime(self, elasticity: Optional[float], volatility: Optional[float]) -> Tuple[int, int]:
+        """Nearest grid cell to an elasticity mean and a volatility (defaults: the simulator's)."""
+        means = np.array([e[0] for e in self.elasticities])
+        i = int(np.abs(means - (ELASTICITY[0] if elasticity is None else elasticity)).argmin())
+        j = int(np.abs(self.volatilities - (DEFAULT_VOLATILITY if volatility is None else volatility)).argmin())
+        return i, j
+
+    def optimum(self, elasticity: Optional[float] = None, volatility: Optional[float] = None,
+                max_risk_of_ruin: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Expected-revenue-optimal price change for a regime, with its risk
+        band. With max_risk_of_ruin, only changes under that limit compete
+        (the least risky change if none is).
+
+        Returns:
+            Dict: {'price_change', 'expected_impact', 'impact_ci95', 'win_probability',
+                   'risk_of_ruin', 'band': (p10, p90), 'elasticity': (mean, std), 'volatility'}
+        """
+        i, j = self._regime(elasticity, volatility)
+        cell = self.values[i, j]
+        ruin = cell[:, SURFACE_METRICS.index("risk_of_ruin")]
+        allowed = ruin <= max_risk_of_ruin if max_risk_of_ruin is not None else np.ones(len(ruin), dtype=bool)
+        if not allowed.any():
+            allowed = ruin == ruin.min()
+        expected = np.where(allowed, cell[:, SURFACE_METRICS.index("expected_impact")], -np.inf)
+        k = int(expected.argmax())
+        stats = dict(zip(SURFACE_METRICS, map(float, cell[k])))
+        return {
+            "price_change": float(self.changes[k]),
+            "expected_impact": stats["expected_impact"],
+            "impact_ci95": stats["impact_ci95"],
+            "win_probability": stats["win_probability"],
+            "risk_of_ruin": stats["risk_of_ruin"],
+            "band": (stats["p10"], stats["p90"]),
+            "elasticity": self.elasticities[i],
+            "volatility": float(self.volatilities[j]),
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_surfaces: Dict[tuple, PriceSurface] = {}
+
+
+def get_price_surface(changes: Sequence[float] = PRICE_CHANGES,
+                      elasticities: Sequence[Tuple[float, float]] = ELASTICITY_PRIORS,
+                      volatilities: Sequence[float] = VOLATILITIES, runs: int = SURFACE_RUNS,
+                      seed: int = SURFACE_SEED, workers: int = SURFACE_WORKERS) -> PriceSurface:
+    """Process-wide surface per grid: swept on first use, then served from memory."""
+    key = (tuple(map(float, changes)), tuple(tuple(map(float, e)) for e in elasticities),
+           tuple(map(float, volatilities)), int(runs), int(seed))
+    surface = _surfaces.get(key)
+    if surface is None:
+        surface = _surfaces[key] = PriceSurface.sweep(changes, elasticities, volatilities, runs, seed, workers)
+    return surface
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Price-response surface sweep")
+    parser.add_argument("--runs", type=int, default=SURFACE_RUNS)
+    parser.add_argument("--workers", type=int, default=SURFACE_WORKERS)
+    parser.add_argument("--seed", type=int, default=SURFACE_SEED)
+    parser.add_argument("--sampler", choices=["random", "sobol", "halton"], default="random")
+    parser.add_argument("--max-risk-of-ruin", type=float, default=None)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    surface = PriceSurface.sweep(runs=args.runs, seed=args.seed, workers=args.workers, sampler=args.sampler)
+    cells = surface.values.shape[0] * surface.values.shape[1] * surface.values.shape[2]
+
+    print("=" * 60)
+    print("YEDAN AGI - Price-Response Surface")
+    print(f"{cells} cells x {args.runs:,} paths in {time.perf_counter() - t0:.2f}s")
+    print("=" * 60)
+    for elasticity in surface.elasticities:
+        for volatility in surface.volatilities:
+            best = surface.optimum(elasticity[0], volatility, args.max_risk_of_ruin)
+            print(f"   elasticity N{elasticity} vol {volatility:.2f}: change {best['price_change']:+.0%} | "
+                  f"E {best['expected_impact']:+.2%} ± {best['impact_ci95']:.2%} | "
+                  f"p10..p90 {best['band'][0]:+.1%}..{best['band'][1]:+.1%} | ruin {best['risk_of_ruin']:.1%}")
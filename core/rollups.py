@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Sales Rollups (Long-horizon Analytics)
+Pre-aggregated hourly and daily sales tables, per platform and product:
+orders, revenue, platform fees, min/max order (AOV = revenue / orders).
+
+    ledger (raw rows) --update()--> sales_hourly  (kept ROLLUP_HOURLY_RETENTION_DAYS)
+                                    sales_daily   (kept forever)
+
+Rollups live in the event store database (data/events.sqlite) and are
+maintained incrementally from a ledger seq watermark. Once rolled up, raw
+ledger partitions older than LEDGER_RAW_RETENTION_DAYS can be moved to
+data/archive/ledger by archive_raw(); month-long range queries then read
+a few hundred rollup rows instead of millions of raw events.
+"""
+
+import os
+import sys
+import io
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import SalesLedger, get_ledger, to_micros, micros_to_datetime
+from core.event_store import STORE_PATH
+from core.pnl import FeeTable, load_fee_rates
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+
+# Hourly rollups are downsampled away after this; daily rollups are kept forever
+HOURLY_RETENTION_DAYS = int(os.getenv("ROLLUP_HOURLY_RETENTION_DAYS", "90"))
+# Raw ledger partitions older than this are moved to data/archive/ledger
+RAW_RETENTION_DAYS = int(os.getenv("LEDGER_RAW_RETENTION_DAYS", "180"))
+
+HOUR_US = 3600 * 1_000_000
+DAY_US = 24 * HOUR_US
+GRAINS = {"hour": ("sales_hourly", HOUR_US), "day": ("sales_daily", DAY_US)}
+ROLLUP_COLUMNS = ["seq", "timestamp", "platform", "product_name", "amount"]
+
+
+class SalesRollups:
+    """
+    Incrementally maintained hourly/daily sales rollups.
+
+    Write path: update() (after ledger appends), prune_hourly(), archive_raw()
+    Read path:  range(start, end, grain, group_by) / totals(start, end)
+    """
+
+    def __init__(self, ledger: Optional[SalesLedger] = None, path: str = STORE_PATH,
+                 fee_rates: Optional[Dict[str, Dict[str, float]]] = None):
+        self.ledger = ledger or get_ledger()
+        self.fee_table = FeeTable(fee_rates if fee_rates is not None else load_fee_rates())
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for table, _ in GRAINS.values():
+            self.conn.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+                bucket INTEGER NOT NULL,
+                platform TEXT NOT NULL,
+                product TEXT NOT NULL,
+                orders INTEGER NOT NULL,
+                revenue REAL NOT NULL,
+                fees REAL NOT NULL,
+                min_amount REAL,
+                max_amount REAL,
+                PRIMARY KEY (bucket, platform, product)
+            ) WITHOUT ROWID''')
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_platform ON {table} (platform, bucket)")
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_product ON {table} (product, bucket)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    # ═══════════════════════════════════════════════════════════
+    # WATERMARK
+    # ═══════════════════════════════════════════════════════════
+
+    def _get_meta(self, key: str, default: int = 0) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else default
+
+    def _set_meta(self, key: str, value: int):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def watermark(self) -> Dict[str, int]:
+        return {"seq": self._get_meta("rollup_watermark_seq"),
+                "ts": self._get_meta("rollup_watermark_ts")}
+
+    # ═══════════════════════════════════════════════════════════
+    # WRITE PATH
+    # ═══════════════════════════════════════════════════════════
+
+    def _fold(self, data: Dict[str, np.ndarray]) -> int:
+        """Upsert one chunk of raw ledger columns into both grains."""
+        n = len(data["seq"])
+        if n == 0:
+            return 0
+        amount = data["amount"]
+        plat_ids, plat_inv = np.unique(data["platform"], return_inverse=True)
+        prod_ids, prod_inv = np.unique(data["product_name"], return_inverse=True)
+        fee = self.fee_table.fees(self.fee_table.lookup(plat_ids)[plat_inv], amount)
+
+        for table, width in GRAINS.values():
+            bucket_ids, bucket_inv = np.unique(data["timestamp"] // width, return_inverse=True)
+            combo = (bucket_inv * len(plat_ids) + plat_inv) * len(prod_ids) + prod_inv
+            keys, inverse = np.unique(combo, return_inverse=True)
+            orders = np.bincount(inverse)
+            revenue = np.bincount(inverse, weights=amount)
+            fees = np.bincount(inverse, weights=fee)
+            grouped = amount[np.argsort(inverse, kind="stable")]
+            starts = np.r_[0, np.cumsum(orders)[:-1]]
+            lows = np.minimum.reduceat(grouped, starts)
+            highs = np.maximum.reduceat(grouped, starts)
+
+            rest, prod = np.divmod(keys, len(prod_ids))
+            bucket, plat = np.divmod(rest, len(plat_ids))
+            self.conn.executemany(f'''
+                INSERT INTO {table} (bucket, platform, product, orders, revenue, fees, min_amount, max_amount)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (bucket, platform, product) DO UPDATE SET
+                    orders = orders + excluded.orders,
+                    revenue = revenue + excluded.revenue,
+                    fees = fees + excluded.fees,
+                    min_amount = MIN(min_amount, excluded.min_amount),
+                    max_amount = MAX(max_amount, excluded.max_amount)
+            ''', zip((bucket_ids[bucket] * width).tolist(), plat_ids[plat].tolist(),
+                     prod_ids[prod].tolist(), orders.tolist(), revenue.tolist(), fees.tolist(),
+                     lows.tolist(), highs.tolist()))
+        return n
+
+    def update(self) -> int:
+        """Roll up ledger rows written since the watermark. Returns rows folded."""
+        with self._lock:
+            mark = self.watermark
+            base_seq = mark["seq"]  # Rows may be appended out of time order; filter on the starting seq
+            start = micros_to_datetime(mark["ts"]) if mark["ts"] else None
+            # One day partition at a time keeps memory bounded on first run
+            days = [datetime.strptime(p[3:], "%Y-%m-%d") for p in self.ledger.partitions(start=start)]
+            ranges = [(max(d, start) if start else d, d + timedelta(days=1)) for d in days]
+            ranges.append((ranges[-1][1] if ranges else start, None))  # Hot rows past the last partition
+
+            folded = 0
+            with self.conn:
+                for lo, hi in ranges:
+                    data = self.ledger.scan(start=lo, end=hi, columns=ROLLUP_COLUMNS)
+                    keep = data["seq"] > base_seq
+                    data = {c: v[keep] for c, v in data.items()}
+                    if len(data["seq"]) == 0:
+                        continue
+                    folded += self._fold(data)
+                    mark["seq"] = max(mark["seq"], int(data["seq"].max()))
+                    mark["ts"] = max(mark["ts"], int(data["timestamp"].max()))
+                self._set_meta("rollup_watermark_seq", mark["seq"])
+                self._set_meta("rollup_watermark_ts", mark["ts"])
+            if folded:
+                self.prune_hourly()
+            return folded
+
+    def prune_hourly(self, retention_days: int = HOURLY_RETENTION_DAYS) -> int:
+        """Downsample: drop hourly rows older than the retention (daily rows remain)."""
+        horizon = self.watermark["ts"] - retention_days * DAY_US
+        with self._lock, self.conn:
+            return self.conn.execute("DELETE FROM sales_hourly WHERE bucket < ?", (horizon,)).rowcount
+
+    def archive_raw(self, retention_days: int = RAW_RETENTION_DAYS,
+                    dest: str = os.path.join(ARCHIVE_DIR, "ledger")) -> List[str]:
+        """
+        Move raw ledger partitions older than the retention window to
+        data/archive/ledger. Only partitions already covered by the rollup
+        watermark are moved.
+        """
+        with self._lock:
+            self.update()
+            cutoff = datetime.now() - timedelta(days=retention_days)
+            covered = micros_to_datetime(self.watermark["ts"]) if self.watermark["ts"] else None
+            if covered is None:
+                return []
+            return self.ledger.archive(before=min(cutoff, covered), dest=dest)
+
+    # ═══════════════════════════════════════════════════════════
+    # READ PATH
+    # ═══════════════════════════════════════════════════════════
+
+    def _pick_grain(self, start: Any) -> str:
+        if start is None:
+            return "day"
+        horizon = self.watermark["ts"] - HOURLY_RETENTION_DAYS * DAY_US
+        return "hour" if to_micros(start) >= horizon else "day"
+
+    def range(self, start: Any = None, end: Any = None, grain: Optional[str] = None,
+              group_by: Optional[Any] = None, by_bucket: bool = True,
+              platform: Optional[str] = None, product: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rollup rows over [start, end).
+
+        Args:
+            grain: "hour" / "day" (default: hour inside the hourly retention, else day)
+            group_by: None, "platform", "product" or ("platform", "product")
+            by_bucket: False collapses the time axis (one row per group)
+        """
+        grain = grain or self._pick_grain(start)
+        if grain not in GRAINS:
+            raise ValueError(f"grain must be one of {list(GRAINS)}")
+        groups = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        if any(g not in ("platform", "product") for g in groups):
+            raise ValueError("group_by must be None, 'platform', 'product' or both")
+        table, width = GRAINS[grain]
+
+        clauses, args = [], []
+        if start is not None:
+            clauses.append("bucket >= ?")
+            args.append((to_micros(start) // width) * width)
+        if end is not None:
+            clauses.append("bucket < ?")
+            args.append(to_micros(end))
+        if platform:
+            clauses.append("platform = ? COLLATE NOCASE")
+            args.append(platform)
+        if product:
+            clauses.append("product = ?")
+            args.append(product)
+        keys = (["bucket"] if by_bucket else []) + groups
+        measures = ["SUM(orders) AS orders", "SUM(revenue) AS revenue", "SUM(fees) AS fees",
+                    "MIN(min_amount) AS min_amount", "MAX(max_amount) AS max_amount"]
+        sql = f"SELECT {', '.join(keys + measures)} FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if keys:
+            sql += f" GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}"
+
+        with self._lock:
+            rows = [dict(r) for r in self.conn.execute(sql, args).fetchall()]
+        out = []
+        for rec in rows:
+            if not rec["orders"]:
+                continue
+            if "bucket" in rec:
+                rec["bucket"] = micros_to_datetime(rec["bucket"]).isoformat()
+            rec["revenue"] = round(rec["revenue"], 2)
+            rec["fees"] = round(rec["fees"], 2)
+            rec["aov"] = round(rec["revenue"] / rec["orders"], 2)
+            out.append(rec)
+        return out
+
+    def rows(self, grain: str = "day", start: Any = None, end: Any = None) -> List[Dict[str, Any]]:
+        """Raw rollup rows (bucket in epoch microseconds), for re-seeding other aggregates."""
+        table, width = GRAINS[grain]
+        lo = (to_micros(start) // width) * width if start is not None else 0
+        hi = to_micros(end) if end is not None else 2 ** 62
+        with self._lock:
+            return [dict(r) for r in self.conn.execute(
+                f"SELECT * FROM {table} WHERE bucket >= ? AND bucket < ? ORDER BY bucket", (lo, hi))]
+
+    def totals(self, start: Any = None, end: Any = None, platform: Optional[str] = None) -> Dict[str, Any]:
+        rows = self.range(start, end, group_by=None, by_bucket=False, platform=platform)
+        return rows[0] if rows else {"orders": 0, "revenue": 0.0, "fees": 0.0, "aov": 0.0,
+                                     "min_amount": None, "max_amount": None}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_rollups: Optional[SalesRollups] = None
+
+
+def get_rollups(ledger: Optional[SalesLedger] = None) -> SalesRollups:
+    """Process-wide rollups, caught up with the ledger."""
+    global _default_rollups
+    if _default_rollups is None:
+        _default_rollups = SalesRollups(ledger)
+    _default_rollups.update()
+    return _default_rollups
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    rollups = get_rollups()
+
+    if "--archive" in sys.argv:
+        moved = rollups.archive_raw()
+        print(f"🗄️ Archived {len(moved)} raw partitions to {os.path.join(ARCHIVE_DIR, 'ledger')}")
+
+    print("=" * 60)
+    print("YEDAN AGI - Sales Rollups")
+    print("=" * 60)
+    print(f"Watermark: {rollups.watermark}")
+    for row in rollups.range(group_by="platform", by_bucket=False):
+        print(f"   {row['platform']:>10}: {row['orders']} orders, ${row['revenue']:.2f} "
+              f"(fees ${row['fees']:.2f}, AOV ${row['aov']:.2f})")
+    month = rollups.range(start=datetime.now() - timedelta(days=30), grain="day")
+    print(f"Last 30 days: {sum(r['orders'] for r in month)} orders over {len(month)} active days")
@@ -2,6 +2,12 @@
 import random
 from typing import Dict, Any, Tuple
 
+from core.llm_metrics import get_llm_metrics
+
+# Measured System 2 cycles needed before they replace the configured prior
+MIN_COST_SAMPLES = 5
+
+
 class MetaCognitiveRouter:
     """
     [SOFAI Architecture] Meta-Cognitive Router
@@ -19,7 +25,19 @@ class MetaCognitiveRouter:
         self.config = config
         self.CONFIDENCE_THRESHOLD = 0.85  # System 1 must be this sure to bypass System 2
         self.COST_THRESHOLD_USD = 50.0    # If risk is below this $, always use Fast Lane
-        self.API_COST_SYSTEM_2 = 0.50     # Est. cost of a deep thinking cycle
+        self.API_COST_SYSTEM_2_PRIOR = 0.50  # Est. cost of a deep thinking cycle until measured
+    
+    @property
+    def API_COST_SYSTEM_2(self) -> float:
+        """
+        Rolling average LLM spend of a decision cycle (the "decision_cycle"
+        span in core/llm_metrics.py); the prior until MIN_COST_SAMPLES exist.
+        """
+        metrics = get_llm_metrics()
+        measured = metrics.span_average("decision_cycle") if metrics is not None else None
+        if measured and measured["samples"] >= MIN_COST_SAMPLES:
+            return measured["avg_cost_usd"]
+        return self.API_COST_SYSTEM_2_PRIOR
         
     def _system_1_fast_predict(self, context: Dict[str, Any]) -> Tuple[str, float]:
         """
@@ -55,12 +73,13 @@ class MetaCognitiveRouter:
         
         # Assumption: System 2 can optimize the outcome by +10% relative to System 1
         expected_gain = potential_revenue * profit_margin * 0.10
+        cost = self.API_COST_SYSTEM_2
         
-        if expected_gain < self.API_COST_SYSTEM_2:
-            print(f"📉 [MC2] VOI Analysis: Gain (${expected_gain:.2f}) < Cost (${self.API_COST_SYSTEM_2}). Skip thinking.")
+        if expected_gain < cost:
+            print(f"📉 [MC2] VOI Analysis: Gain (${expected_gain:.2f}) < Cost (${cost:.4f}). Skip thinking.")
             return False
             
-        print(f"📈 [MC2] VOI Analysis: Gain (${expected_gain:.2f}) > Cost (${self.API_COST_SYSTEM_2}). Worth thinking.")
+        print(f"📈 [MC2] VOI Analysis: Gain (${expected_gain:.2f}) > Cost (${cost:.4f}). Worth thinking.")
         return True
 
     def route_decision(self, context: Dict[str, Any]) -> str:
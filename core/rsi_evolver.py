@@ -4,7 +4,7 @@ YEDAN AGI - RSI Evolver (Recursive Self-Improvement)
 The Metacognition Module that manages the brain.
 
 RLVR Implementation:
-- Reward: Revenue from sales_history.csv
+- Reward: Revenue from the sales ledger (core/sales_ledger.py)
 - Action: Modify config.json (system_prompt, strategy_parameters)
 - Learning: Track evolution_log for pattern analysis
 
@@ -30,31 +30,26 @@ if sys.platform == 'win32' and __name__ == "__main__":
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from core.sales_ledger import get_ledger
+from core.kpi_materializer import get_materializer
+from core.event_store import get_event_store
+from core.pnl import get_pnl
+from core.llm_gateway import call_llm_json as llm_json
+
 # ═══════════════════════════════════════════════════════════════
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════════════
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
 DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sales_history.csv")
 BACKUP_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "evolution_backups")
-MARKETING_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "marketing_spend.json")
 
 
-def call_llm_api(prompt: str, system_prompt: str) -> str:
-    """Call LLM for evolution reasoning."""
-    try:
-        import google.generativeai as genai
-        from agi_config import config
-        
-        genai.configure(api_key=config.GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.0-flash-001')
-        
-        full_prompt = f"{system_prompt}\n\n{prompt}"
-        response = model.generate_content(full_prompt)
-        return response.text
-        
-    except Exception as e:
-        print(f"⚠️ LLM API Error: {e}")
-        return "{}"
+def call_llm_json(prompt: str, system_prompt: str):
+    """
+    Call LLM for evolution reasoning, streamed: (first JSON object or None,
+    raw text, metrics). <think> blocks are skipped.
+    """
+    return llm_json(prompt, system_prompt, fallback="{}", namespace="rsi")
 
 
 class RSI_Evolver:
@@ -137,80 +132,33 @@ class RSI_Evolver:
         - Marketing/Ad spend (from marketing_spend.json)
         - Monthly fixed costs (prorated)
         
+        The arithmetic lives in core/pnl.py (vectorized fee-table join).
+        
         Returns:
             Dict with tx_costs, ad_spend, fixed_costs, total_costs
         """
         print("\n💵 [Calculating Real Costs]...")
         
-        # Load marketing data
-        marketing_data = self._load_json(MARKETING_DATA_PATH)
-        fees_config = marketing_data.get("platform_fees", {
-            "gumroad": {"percent": 0.10, "fixed": 0.30}
-        })
-        
-        # ═══════════════════════════════════════════════════════════
-        # 1. TRANSACTION COSTS (Platform Fees)
-        # ═══════════════════════════════════════════════════════════
-        total_tx_cost = 0.0
-        
-        if not revenue_df.empty:
-            for _, row in revenue_df.iterrows():
-                platform = str(row.get('platform', 'gumroad')).lower()
-                amount = float(row.get('amount', 0))
-                
-                # Get fee rate for platform (default to gumroad)
-                rate = fees_config.get(platform, fees_config.get('gumroad', {"percent": 0.10, "fixed": 0.30}))
-                
-                # Calculate: (amount * percent) + fixed fee
-                tx_cost = (amount * rate.get('percent', 0.10)) + rate.get('fixed', 0.30)
-                total_tx_cost += tx_cost
-        
-        print(f"   📋 Transaction Fees: ${total_tx_cost:.2f}")
-        
-        # ═══════════════════════════════════════════════════════════
-        # 2. MARKETING SPEND (Ad Costs)
-        # ═══════════════════════════════════════════════════════════
-        ad_spend_total = 0.0
-        daily_spends = marketing_data.get("daily_ad_spend", [])
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        for entry in daily_spends:
-            try:
-                entry_date = datetime.strptime(entry.get('date', ''), '%Y-%m-%d')
-                if entry_date >= cutoff_date:
-                    ad_spend_total += float(entry.get('spend', 0))
-            except (ValueError, TypeError):
-                # If date parsing fails, include anyway (conservative)
-                ad_spend_total += float(entry.get('spend', 0))
-        
-        # Default: assume $5/day if no data
-        if ad_spend_total == 0 and not daily_spends:
-            ad_spend_total = 5.0 * days
-            print(f"   📢 Ad Spend (estimated): ${ad_spend_total:.2f}")
-        else:
-            print(f"   📢 Ad Spend: ${ad_spend_total:.2f}")
-        
-        # ═══════════════════════════════════════════════════════════
-        # 3. FIXED COSTS (Prorated)
-        # ═══════════════════════════════════════════════════════════
-        monthly_fixed = marketing_data.get("monthly_fixed_costs", {})
-        total_monthly = sum(monthly_fixed.values())
-        prorated_fixed = (total_monthly / 30) * days
-        
-        print(f"   🏢 Fixed Costs (prorated): ${prorated_fixed:.2f}")
+        # Rows may be pre-aggregated per platform (KPI windows)
+        orders = revenue_df['orders'] if 'orders' in revenue_df else None
+        pnl = get_pnl().statement(revenue_df.get('platform', pd.Series(dtype=object)),
+                                  revenue_df.get('amount', pd.Series(dtype=float)),
+                                  orders=orders,
+                                  start=datetime.now() - timedelta(days=days), days=days)
         
-        # ═══════════════════════════════════════════════════════════
-        # TOTAL
-        # ═══════════════════════════════════════════════════════════
-        total_costs = total_tx_cost + ad_spend_total + prorated_fixed
-        print(f"   💸 Total Costs: ${total_costs:.2f}")
+        print(f"   📋 Transaction Fees: ${pnl['tx_costs']:.2f}")
+        if pnl['ad_spend_estimated']:
+            print(f"   📢 Ad Spend (estimated): ${pnl['ad_spend']:.2f}")
+        else:
+            print(f"   📢 Ad Spend: ${pnl['ad_spend']:.2f}")
+        print(f"   🏢 Fixed Costs (prorated): ${pnl['fixed_costs']:.2f}")
+        print(f"   💸 Total Costs: ${pnl['total_costs']:.2f}")
         
         return {
-            "tx_costs": round(total_tx_cost, 2),
-            "ad_spend": round(ad_spend_total, 2),
-            "fixed_costs": round(prorated_fixed, 2),
-            "total_costs": round(total_costs, 2)
+            "tx_costs": pnl['tx_costs'],
+            "ad_spend": pnl['ad_spend'],
+            "fixed_costs": pnl['fixed_costs'],
+            "total_costs": pnl['total_costs']
         }
     
     def calculate_novelty_score(self, current_strategy: Dict[str, Any]) -> float:
@@ -269,44 +217,30 @@ class RSI_Evolver:
         
         print(f"\n📊 [RSI] Evaluating {days}-day performance (Anti-Gaming + Novelty)...")
         
-        if not os.path.exists(DATA_PATH):
-            print("   ⚠️ No sales data found")
-            return {
-                "health_score": 0,
-                "revenue": 0,
-                "profit": 0,
-                "margin": 0,
-                "order_count": 0,
-                "trend": "unknown",
-                "data_available": False,
-                "alerts": ["no_data"]
-            }
-        
         try:
-            df = pd.read_csv(DATA_PATH)
-            
-            if df.empty:
-                # Initialize empty df with correct columns for downstream logic
-                df = pd.DataFrame(columns=['timestamp', 'amount', 'platform'])
-                # Do NOT return early. We need to check for ad spend (Burn Rate).
-            
-            # Convert timestamps and amounts
-            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0)
+            # Windows come from the KPI materializer's hourly buckets
+            now = datetime.now()
+            kpis = get_materializer(get_ledger(DATA_PATH))
+            kpis.refresh()
             
             # Calculate time periods
-            now = datetime.now()
             cutoff_current = now - timedelta(days=days)
             cutoff_previous = cutoff_current - timedelta(days=days)
             
             # Current period
-            current = df[df['timestamp'] > cutoff_current]
-            current_revenue = float(current['amount'].sum())
-            current_orders = len(current)
+            current_window = kpis.window(start=cutoff_current)
+            current_revenue = float(current_window['revenue'])
+            current_orders = current_window['orders']
+            
+            # Per-platform totals for fee calculation (one row per platform)
+            current = pd.DataFrame(
+                [{'platform': p, 'amount': v['revenue'], 'orders': v['orders']}
+                 for p, v in current_window['platforms'].items()],
+                columns=['platform', 'amount', 'orders']
+            )
             
             # Previous period (for comparison)
-            previous = df[(df['timestamp'] > cutoff_previous) & (df['timestamp'] <= cutoff_current)]
-            previous_revenue = float(previous['amount'].sum())
+            previous_revenue = float(kpis.window(start=cutoff_previous, end=cutoff_current)['revenue'])
             
             alerts = []
             
@@ -558,9 +492,16 @@ Consider: premium_positioning or profit_maximization mode.
         
         system_prompt = "你是一個 Profit-First Optimization Engine。你的目標是淨利潤，不是營收。只回傳 JSON。"
         
-        response = call_llm_api(mutation_prompt, system_prompt)
+        # Streamed: parameters are used the moment the JSON object closes
+        new_params, response, stream = call_llm_json(mutation_prompt, system_prompt)
+        if stream.get("time_to_decision_ms") is not None:
+            print(f"   ⏱️ First token {stream['ttft_ms']:.0f}ms | mutation {stream['time_to_decision_ms']:.0f}ms")
         
         try:
+            if new_params is not None:
+                self._print_mutation(new_params)
+                return new_params
+            
             # Extract JSON from response
             if "```json" in response:
                 json_str = response.split("```json")[-1].split("```")[0].strip()
@@ -573,11 +514,7 @@ Consider: premium_positioning or profit_maximization mode.
                 json_str = response[start:end] if start >= 0 else response
             
             new_params = json.loads(json_str)
-            print(f"   🦋 New parameters generated:")
-            print(f"      Mode: {new_params.get('strategy_mode', 'unchanged')}")
-            print(f"      Tone: {new_params.get('tone', 'unchanged')}")
-            print(f"      Reasoning: {new_params.get('reasoning', 'N/A')[:100]}...")
-            
+            self._print_mutation(new_params)
             return new_params
             
         except json.JSONDecodeError as e:
@@ -585,6 +522,12 @@ Consider: premium_positioning or profit_maximization mode.
             print(f"   Raw response: {response[:200]}...")
             return None
     
+    def _print_mutation(self, new_params: Dict):
+        print(f"   🦋 New parameters generated:")
+        print(f"      Mode: {new_params.get('strategy_mode', 'unchanged')}")
+        print(f"      Tone: {new_params.get('tone', 'unchanged')}")
+        print(f"      Reasoning: {new_params.get('reasoning', 'N/A')[:100]}...")
+    
     def apply_mutation(self, new_params: Dict, performance: Dict) -> bool:
         """
         Apply mutation to config.json (The actual self-modification).
@@ -621,9 +564,10 @@ Consider: premium_positioning or profit_maximization mode.
         }
         self.config["evolution_log"].append(log_entry)
         
-        # Keep only last 20 evolution logs
+        # Keep only last 20 evolution logs in config; full history goes to the event store
         if len(self.config["evolution_log"]) > 20:
             self.config["evolution_log"] = self.config["evolution_log"][-20:]
+        get_event_store().log_evolution(log_entry)
         
         # Save
         self._save_config(self.config)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Sales Bootstrap (Empirical Market Scenarios)
+Market scenarios for the CORTEX risk simulator resampled from the store's
+own daily history, instead of Gaussian noise of a guessed volatility:
+
+    daily revenue / orders (sales rollups, last BOOTSTRAP_HISTORY_DAYS complete days)
+      -> block-bootstrap index matrix [paths, horizon]
+      -> per path: horizon revenue / (horizon x mean daily revenue) - 1
+
+Paths are built from blocks of BOOTSTRAP_BLOCK_DAYS consecutive days, which
+keeps short-run autocorrelation. Each block starts on the weekday of the
+position it fills, which keeps weekday seasonality. Resampling real days
+keeps the fat tails and the zero-sale days. Orders (conversion at steady
+traffic) use the same index matrix, so both series move together.
+
+Daily series, index matrices and scenarios are cached per data version
+(rollup watermark seq + current day): a simulation reads no CSV or ledger
+rows, and the cache is rebuilt only after new sales are rolled up.
+
+    SalesBootstrap().scenarios()["revenue"]     (one deviation per cached path)
+    python core/sales_bootstrap.py --horizon 1
+"""
+
+import os
+import sys
+import io
+import argparse
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import to_micros
+from core.rollups import SalesRollups, get_rollups, DAY_US
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+HISTORY_DAYS = int(os.getenv("BOOTSTRAP_HISTORY_DAYS", "180"))  # Complete days resampled (up to today)
+HORIZON_DAYS = int(os.getenv("BOOTSTRAP_HORIZON_DAYS", "7"))    # Days a simulated outcome covers
+BLOCK_DAYS = int(os.getenv("BOOTSTRAP_BLOCK_DAYS", "3"))        # Consecutive days kept together
+BOOTSTRAP_PATHS = 1 << 16   # Rows per cached index matrix; simulations cycle through them
+BOOTSTRAP_SEED = 0          # Fixed: the cached matrix is shared by every simulator
+MIN_HISTORY_DAYS = 28       # Fewer days since the first sale: too little to resample
+
+
+def weekday(day_us: Any) -> Any:
+    """Monday = 0 for epoch-microsecond day buckets (1970-01-01 was a Thursday)."""
+    return (day_us // DAY_US + 3) % 7
+
+
+class SalesBootstrap:
+    """Block bootstrap of daily revenue and orders from the sales rollups."""
+
+    def __init__(self, rollups: Optional[SalesRollups] = None, history_days: int = HISTORY_DAYS,
+                 horizon: int = HORIZON_DAYS, block: int = BLOCK_DAYS, paths: int = BOOTSTRAP_PATHS,
+                 seed: int = BOOTSTRAP_SEED, now: Optional[datetime] = None):
+        self.rollups = rollups
+        self.history_days, self.horizon, self.paths, self.seed = history_days, horizon, paths, seed
+        self.block = max(1, min(block, 7))  # Every weekday must have block starts
+        self.now = now
+        self.version = None
+        self.revenue = self.orders = np.zeros(0)
+        self.first_day = 0
+        self._cache: Dict[tuple, Dict[str, np.ndarray]] = {}
+
+    @property
+    def available(self) -> bool:
+        return len(self.revenue) >= MIN_HISTORY_DAYS
+
+    def refresh(self) -> bool:
+        """Catch the rollups up and reload the daily series if the data version moved. True = usable."""
+        if self.rollups is None:
+            rollups = get_rollups()  # Updates on access
+        else:
+            rollups = self.rollups
+            rollups.update()
+        today = (to_micros(self.now or datetime.now()) // DAY_US) * DAY_US
+        version = (rollups.watermark["seq"], today)
+        if version == self.version:
+            return self.available
+
+        start = today - self.history_days * DAY_US
+        rows = rollups.rows("day", start=start, end=today)
+        days = np.array([r["bucket"] for r in rows], dtype=np.int64)
+        offsets = (days - start) // DAY_US
+        revenue = np.bincount(offsets, weights=[r["revenue"] for r in rows], minlength=self.history_days)
+        orders = np.bincount(offsets, weights=[r["orders"] for r in rows], minlength=self.history_days)
+        # History starts at the first sale; later empty days are real zero-sale days
+        first = int(offsets.min()) if len(offsets) else self.history_days
+        self.revenue, self.orders = revenue[first:], orders[first:]
+        self.first_day = start + first * DAY_US
+        self.version = version
+        self._cache.clear()  # Matrices of older versions
+        return self.available
+
+    def indices(self) -> np.ndarray:
+        """[paths, horizon] day indices into the series, cached for the current version."""
+        return self._scenarios()["indices"]
+
+    def scenarios(self) -> Dict[str, np.ndarray]:
+        """Per cached path: relative deviation of horizon revenue and orders from their daily mean."""
+        cached = self._scenarios()
+        return {"revenue": cached["revenue"], "orders": cached["orders"]}
+
+    def _scenarios(self) -> Dict[str, np.ndarray]:
+        if not self.available:
+            raise ValueError(f"Need {MIN_HISTORY_DAYS}+ days of sales history, have {len(self.revenue)}")
+        key = (self.version, self.paths, self.horizon, self.block, self.seed)
+        cached = self._cache.get(key)
+        if cached is None:
+            rng = np.random.default_rng(self.seed)
+            n_days = len(self.revenue)
+            day_index = np.arange(n_days)
+            weekdays = weekday(self.first_day + day_index * DAY_US)
+            start_weekday = weekday(self.version[1])  # The horizon starts today
+            blocks = -(-self.horizon // self.block)
+            indices = np.empty((self.paths, blocks * self.block), dtype=np.int32)
+            for b in range(blocks):
+                starts = np.flatnonzero((weekdays == (start_weekday + b * self.block) % 7)
+                                        & (day_index + self.block <= n_days))
+                chosen = starts[rng.integers(0, len(starts), self.paths)]
+                indices[:, b * self.block:(b + 1) * self.block] = chosen[:, None] + np.arange(self.block)
+            indices = indices[:, :self.horizon]
+            cached = self._cache[key] = {
+                "indices": indices,
+                "revenue": (self.revenue[indices].sum(axis=1) / (self.horizon * self.revenue.mean()) - 1)
+                .astype(np.float32),
+                "orders": (self.orders[indices].sum(axis=1) / (self.horizon * max(self.orders.mean(), 1e-12)) - 1)
+                .astype(np.float32),
+            }
+        return cached
+
+    def draw(self, n: int, offset: int) -> np.ndarray:
+        """Revenue deviations of n cached paths from `offset` on (wrapping around)."""
+        revenue = self.scenarios()["revenue"]
+        return revenue[(offset + np.arange(n)) % len(revenue)]
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_bootstrap: Optional[SalesBootstrap] = None
+
+
+def get_sales_bootstrap() -> SalesBootstrap:
+    """Process-wide bootstrap over the default rollups, refreshed on access."""
+    global _default_bootstrap
+    if _default_bootstrap is None:
+        _default_bootstrap = SalesBootstrap()
+    _default_bootstrap.refresh()
+    return _default_bootstrap
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sales history bootstrap")
+    parser.add_argument("--horizon", type=int, default=HORIZON_DAYS)
+    parser.add_argument("--block", type=int, default=BLOCK_DAYS)
+    parser.add_argument("--history-days", type=int, default=HISTORY_DAYS)
+    args = parser.parse_args()
+
+    bootstrap = SalesBootstrap(history_days=args.history_days, horizon=args.horizon, block=args.block)
+    print("=" * 60)
+    print("YEDAN AGI - Sales Bootstrap")
+    print("=" * 60)
+    if not bootstrap.refresh():
+        print(f"   Not enough history: {len(bootstrap.revenue)} days (need {MIN_HISTORY_DAYS})")
+        sys.exit(1)
+    revenue = bootstrap.scenarios()["revenue"]
+    mean, std = float(revenue.mean()), float(revenue.std())
+    kurtosis = float(((revenue - mean) ** 4).mean() / std ** 4 - 3) if std > 0 else 0.0
+    print(f"   {len(bootstrap.revenue)} days | mean ${bootstrap.revenue.mean():.2f}/day | "
+          f"{bootstrap.paths:,} paths of {bootstrap.horizon} days in blocks of {bootstrap.block}")
+    print(f"   Horizon revenue deviation: sd {std:.1%} | p5 {np.percentile(revenue, 5):+.1%} | "
+          f"p95 {np.percentile(revenue, 95):+.1%} | excess kurtosis {kurtosis:.2f}")
+    by_day = [bootstrap.revenue[weekday(bootstrap.first_day + np.arange(len(bootstrap.revenue)) * DAY_US) == d]
+              for d in range(7)]
+    print("   Weekday mean: " + " ".join(f"{name} ${day.mean():.0f}" for name, day in
+                                          zip(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"), by_day)))
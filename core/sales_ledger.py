@@ -0,0 +1,725 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Sales Ledger (Columnar Long-term Memory)
+Time-partitioned, typed columnar storage for commerce events.
+
+Replaces full re-reads of sales_history.csv. Readers only touch the
+partitions inside the requested time range and only load the columns
+they project.
+
+Layout:
+    data/ledger/
+        _manifest.json                          # sealed sequence + generation
+        _hot.csv                                # append buffer (unsealed rows)
+        dt=2026-01-06/seg-000000000001-000000000412.npz
+        dt=2026-01-07/...
+
+Each segment is an uncompressed NumPy .npz archive holding one typed array
+per column. Rows are sealed from the hot buffer into segments when the
+buffer fills up or when the day rolls over.
+
+Single writer (the webhook server), many readers. Manifest updates (seal,
+bulk load, compaction, archiving) hold an exclusive lock on _manifest.lock,
+so maintenance run from another process (the memory consolidator's
+archive_raw) cannot race the writer's seals. Readers take an
+optimistic snapshot: they read the manifest, the segments and the hot
+buffer, then retry if the manifest generation changed. Sealed rows beyond
+the manifest's sealed_seq are ignored (their seal has not been published).
+"""
+
+import os
+import sys
+import io
+import csv
+import json
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Iterable
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+LEDGER_DIR = os.getenv("LEDGER_DIR", os.path.join(DATA_DIR, "ledger"))
+LEGACY_CSV_PATH = os.path.join(DATA_DIR, "sales_history.csv")
+
+# Rows kept in the hot buffer before they are sealed into a segment
+SEAL_ROWS = int(os.getenv("LEDGER_SEAL_ROWS", "1024"))
+
+# Optimistic read attempts before scan() gives up on a ledger that keeps changing
+SCAN_RETRIES = 5
+
+# Mirror every append to sales_history.csv (legacy tools, spreadsheets)
+CSV_EXPORT = os.getenv("SALES_CSV_EXPORT", "0") == "1"
+
+# Column name -> storage dtype. Strings are stored as fixed-width unicode.
+SCHEMA = {
+    "seq": "int64",
+    "timestamp": "int64",       # microseconds since epoch (naive local time)
+    "platform": "U",
+    "event_type": "U",
+    "order_id": "U",
+    "product_name": "U",
+    "amount": "float64",
+    "currency": "U",
+    "customer_email": "U",
+}
+
+# Column order of the legacy sales_history.csv
+CSV_COLUMNS = [
+    "timestamp", "platform", "event_type", "order_id",
+    "product_name", "amount", "currency", "customer_email"
+]
+
+MANIFEST_NAME = "_manifest.json"
+LOCK_NAME = "_manifest.lock"
+HOT_NAME = "_hot.csv"
+PARTITION_PREFIX = "dt="
+
+
+class LedgerReadConflict(RuntimeError):
+    """scan() could not get a consistent snapshot; the caller may retry."""
+
+
+def to_micros(value: Any) -> int:
+    """
+    Convert datetime / ISO string / datetime64 to epoch microseconds on the
+    ledger's clock (naive local time). Aware values are converted to local
+    time first; naive values are taken as local already.
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return int(np.datetime64(value, 'us').astype('int64'))
+
+
+def micros_to_datetime(value: int) -> datetime:
+    """Convert epoch microseconds back to a naive datetime."""
+    return datetime(1970, 1, 1) + timedelta(microseconds=int(value))
+
+
+def _parse_amount(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def make_row(platform: str, event_type: str, order_id: str, product_name: str,
+             amount: Any, currency: str, email: str,
+             timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+    """Normalise one commerce event into a ledger row (no seq yet)."""
+    return {
+        "timestamp": to_micros(timestamp or datetime.now()),
+        "platform": str(platform or ""),
+        "event_type": str(event_type or ""),
+        "order_id": str(order_id or ""),
+        "product_name": str(product_name or ""),
+        "amount": _parse_amount(amount),
+        "currency": str(currency or ""),
+        "customer_email": str(email or ""),
+    }
+
+
+def _fsync_dir(path: str):
+    """Make renames and new entries in a directory durable (no-op on Windows)."""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _partition_of(ts_us: int) -> str:
+    return PARTITION_PREFIX + micros_to_datetime(ts_us).strftime("%Y-%m-%d")
+
+
+class SalesLedger:
+    """
+    Columnar sales ledger.
+
+    Write path: append() -> hot buffer -> seal() -> per-day .npz segments
+    Read path:  scan(start, end, columns) -> Dict[column, np.ndarray]
+    """
+
+    def __init__(self, root: str = LEDGER_DIR, seal_rows: int = SEAL_ROWS,
+                 csv_export_path: Optional[str] = None):
+        self.root = root
+        self.seal_rows = seal_rows
+        self.csv_export_path = csv_export_path
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.hot_path = os.path.join(root, HOT_NAME)
+        self.lock_path = os.path.join(root, LOCK_NAME)
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+
+        os.makedirs(root, exist_ok=True)
+
+        manifest = self._read_manifest()
+        hot_rows = self._read_hot(manifest["sealed_seq"])
+        self._hot_count = len(hot_rows)
+        self._hot_partition = _partition_of(hot_rows[0]["timestamp"]) if hot_rows else None
+        last_hot_seq = hot_rows[-1]["seq"] if hot_rows else 0
+        self._next_seq = max(manifest["sealed_seq"], last_hot_seq) + 1
+
+    # ═══════════════════════════════════════════════════════════
+    # MANIFEST & HOT BUFFER
+    # ═══════════════════════════════════════════════════════════
+
+    def _read_manifest(self) -> Dict[str, int]:
+        if not os.path.exists(self.manifest_path):
+            return {"version": 1, "generation": 0, "sealed_seq": 0}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"version": 1, "generation": 0, "sealed_seq": 0}
+
+    @contextmanager
+    def _exclusive(self):
+        """
+        Exclusive across threads and processes, around manifest
+        read-modify-writes and segment moves. Re-entrant within a thread.
+        """
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self.lock_path, 'a+b') as f:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    if fcntl:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                    else:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _write_manifest(self, manifest: Dict[str, int]):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_path)
+        _fsync_dir(self.root)
+
+    def _read_hot(self, sealed_seq: int) -> List[Dict[str, Any]]:
+        """Read unsealed rows (bounded by seal_rows, so this stays cheap)."""
+        if not os.path.exists(self.hot_path):
+            return []
+        rows = []
+        with open(self.hot_path, 'r', newline='', encoding='utf-8') as f:
+            for rec in csv.reader(f):
+                if len(rec) != len(SCHEMA):
+                    continue  # torn write at the tail
+                try:
+                    row = {
+                        "seq": int(rec[0]),
+                        "timestamp": int(rec[1]),
+                        "platform": rec[2],
+                        "event_type": rec[3],
+                        "order_id": rec[4],
+                        "product_name": rec[5],
+                        "amount": float(rec[6]),
+                        "currency": rec[7],
+                        "customer_email": rec[8],
+                    }
+                except ValueError:
+                    continue
+                if row["seq"] > sealed_seq:
+                    rows.append(row)
+        return rows
+
+    # ═══════════════════════════════════════════════════════════
+    # WRITE PATH
+    # ═══════════════════════════════════════════════════════════
+
+    def append(self, platform: str, event_type: str, order_id: str,
+               product_name: str, amount: Any, currency: str, email: str,
+               timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+        """Append one commerce event. Returns the stored row."""
+        row = make_row(platform, event_type, order_id, product_name,
+                       amount, currency, email, timestamp)
+        self.append_rows([row])
+        return row
+
+    def append_rows(self, rows: Iterable[Dict[str, Any]], sync: bool = False) -> int:
+        """
+        Append already-normalised rows (timestamp in epoch microseconds).
+        With sync=True the hot buffer is fsync'ed before returning. Each row
+        gets its seq as it is written: if this raises (a mid-batch seal, the
+        fsync, the CSV export), the rows that have a seq are in the ledger.
+        """
+        written = []
+        with self._lock:
+            f = open(self.hot_path, 'a', newline='', encoding='utf-8')
+            try:
+                for row in rows:
+                    partition = _partition_of(row["timestamp"])
+                    if self._hot_partition and partition != self._hot_partition:
+                        # Day rolled over: seal yesterday before writing today
+                        f.close()
+                        self.seal()
+                        f = open(self.hot_path, 'a', newline='', encoding='utf-8')
+                    csv.writer(f).writerow([
+                        self._next_seq, row["timestamp"], row["platform"], row["event_type"],
+                        row["order_id"], row["product_name"], repr(float(row["amount"])),
+                        row["currency"], row["customer_email"]
+                    ])
+                    row["seq"] = self._next_seq
+                    self._next_seq += 1
+                    self._hot_count += 1
+                    self._hot_partition = partition
+                    written.append(row)
+                    if self._hot_count >= self.seal_rows:
+                        f.close()
+                        self.seal()
+                        f = open(self.hot_path, 'a', newline='', encoding='utf-8')
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                f.close()
+
+            if self.csv_export_path and written:
+                self._export_rows(written, self.csv_export_path)
+        return len(written)
+
+    def sync(self):
+        """fsync the hot buffer (rows appended with sync=False)."""
+        with self._lock:
+            if not os.path.exists(self.hot_path):
+                return
+            with open(self.hot_path, 'a', encoding='utf-8') as f:
+                os.fsync(f.fileno())
+
+    def write_columns(self, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Bulk-load column arrays straight into sealed segments (imports,
+        benchmarks). Timestamps are epoch microseconds; missing string
+        columns are stored empty.
+        """
+        n = len(columns["timestamp"])
+        if n == 0:
+            return 0
+        with self._exclusive():
+            self.seal()
+            order = np.argsort(columns["timestamp"], kind="stable")
+            data = {}
+            for name, dtype in SCHEMA.items():
+                if name == "seq":
+                    continue
+                if name in columns:
+                    data[name] = np.asarray(columns[name])[order]
+                else:
+                    data[name] = np.zeros(n, dtype=dtype) if dtype != "U" else np.full(n, "", dtype="U1")
+            data["timestamp"] = data["timestamp"].astype("int64")
+            data["amount"] = data["amount"].astype("float64")
+            data["seq"] = np.arange(self._next_seq, self._next_seq + n, dtype=np.int64)
+
+            days = data["timestamp"] // (24 * 3600 * 1_000_000)
+            bounds = np.flatnonzero(np.diff(days)) + 1
+            for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, n]):
+                self._write_segment(_partition_of(int(data["timestamp"][lo])),
+                                    {c: v[lo:hi] for c, v in data.items()})
+
+            self._next_seq += n
+            manifest = self._read_manifest()
+            manifest["sealed_seq"] = self._next_seq - 1
+            manifest["generation"] = manifest.get("generation", 0) + 1
+            self._write_manifest(manifest)
+        return n
+
+    def seal(self) -> int:
+        """Move hot rows into columnar segments. Returns rows sealed."""
+        with self._exclusive():
+            manifest = self._read_manifest()
+            rows = self._read_hot(manifest["sealed_seq"])
+            if not rows:
+                self._truncate_hot()
+                return 0
+
+            by_partition: Dict[str, List[Dict[str, Any]]] = {}
+            for row in rows:
+                by_partition.setdefault(_partition_of(row["timestamp"]), []).append(row)
+
+            for partition, part_rows in by_partition.items():
+                self._write_segment(partition, {
+                    name: np.array([r[name] for r in part_rows],
+                                   dtype=None if dtype == "U" else dtype)
+                    for name, dtype in SCHEMA.items()
+                })
+
+            # Segments and manifest are fsync'ed before the hot rows are dropped:
+            # rows acknowledged as durable must survive a power failure after the seal
+            manifest["sealed_seq"] = rows[-1]["seq"]
+            manifest["generation"] = manifest.get("generation", 0) + 1
+            self._write_manifest(manifest)
+            self._truncate_hot()
+            return len(rows)
+
+    def _truncate_hot(self):
+        tmp = self.hot_path + ".tmp"
+        open(tmp, 'w').close()
+        os.replace(tmp, self.hot_path)
+        self._hot_count = 0
+        self._hot_partition = None
+
+    def _write_segment(self, partition: str, columns: Dict[str, np.ndarray]) -> str:
+        part_dir = os.path.join(self.root, partition)
+        new_dir = not os.path.isdir(part_dir)
+        os.makedirs(part_dir, exist_ok=True)
+        if new_dir:
+            _fsync_dir(self.root)
+        seqs = columns["seq"]
+        name = f"seg-{int(seqs.min()):012d}-{int(seqs.max()):012d}.npz"
+        tmp = os.path.join(part_dir, name + ".tmp")
+        with open(tmp, 'wb') as f:
+            np.savez(f, **columns)
+            f.flush()
+            os.fsync(f.fileno())
+        path = os.path.join(part_dir, name)
+        os.replace(tmp, path)
+        _fsync_dir(part_dir)
+        return path
+
+    def compact(self, partition: Optional[str] = None) -> int:
+        """Merge small segments of a partition (or all partitions) into one."""
+        merged = 0
+        with self._exclusive():
+            for part in ([partition] if partition else self.partitions()):
+                segs = self._segments(part, superseded=True)
+                if len(segs) < 2:
+                    continue
+                live = self._segments(part)
+                keep = self._write_segment(part, self._load_segments(live, list(SCHEMA))) \
+                    if len(live) > 1 else live[0]
+                for seg in segs:
+                    if os.path.abspath(seg) != os.path.abspath(keep):
+                        os.remove(seg)
+                merged += len(segs)
+            if merged:
+                # Readers that listed the removed inputs retry on the new generation
+                manifest = self._read_manifest()
+                manifest["generation"] = manifest.get("generation", 0) + 1
+                self._write_manifest(manifest)
+        return merged
+
+    def archive(self, before: Any, dest: str) -> List[str]:
+        """
+        Move sealed day partitions older than `before` under `dest` (same
+        layout). Readers stop seeing them; aggregates must come from rollups.
+        """
+        cutoff = PARTITION_PREFIX + micros_to_datetime(to_micros(before)).strftime("%Y-%m-%d")
+        moved = []
+        with self._exclusive():
+            # From the hot buffer on disk: the writer may be another process
+            manifest = self._read_manifest()
+            hot_parts = {_partition_of(r["timestamp"]) for r in self._read_hot(manifest["sealed_seq"])}
+            for part in self.partitions():
+                if part >= cutoff or part in hot_parts:
+                    continue
+                target = os.path.join(dest, part)
+                os.makedirs(target, exist_ok=True)
+                for seg in self._segments(part, superseded=True):
+                    shutil.move(seg, os.path.join(target, os.path.basename(seg)))
+                shutil.rmtree(os.path.join(self.root, part), ignore_errors=True)
+                moved.append(part)
+            if moved:
+                manifest = self._read_manifest()
+                manifest["generation"] = manifest.get("generation", 0) + 1
+                self._write_manifest(manifest)
+        return moved
+
+    # ═══════════════════════════════════════════════════════════
+    # READ PATH
+    # ═══════════════════════════════════════════════════════════
+
+    def partitions(self, start: Any = None, end: Any = None) -> List[str]:
+        """List day partitions overlapping [start, end)."""
+        if not os.path.isdir(self.root):
+            return []
+        start_day = micros_to_datetime(to_micros(start)).strftime("%Y-%m-%d") if start is not None else None
+        end_day = micros_to_datetime(to_micros(end) - 1).strftime("%Y-%m-%d") if end is not None else None
+
+        parts = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.startswith(PARTITION_PREFIX):
+                continue
+            day = name[len(PARTITION_PREFIX):]
+            if start_day and day < start_day:
+                continue
+            if end_day and day > end_day:
+                continue
+            parts.append(name)
+        return parts
+
+    def _segments(self, partition: str, superseded: bool = False) -> List[str]:
+        """
+        Segment paths of a partition in seq order. compact() writes the merged
+        segment before removing its inputs, so segments whose seq span another
+        segment covers are skipped unless `superseded` is set.
+        """
+        part_dir = os.path.join(self.root, partition)
+        if not os.path.isdir(part_dir):
+            return []
+        names = [n for n in sorted(os.listdir(part_dir)) if n.startswith("seg-") and n.endswith(".npz")]
+        if not superseded:
+            spans = {n: tuple(int(x) for x in n[4:-4].split("-")) for n in names}
+            names = [n for n in names if not any(
+                o != n and spans[o][0] <= spans[n][0] and spans[n][1] <= spans[o][1] for o in names)]
+        return [os.path.join(part_dir, n) for n in names]
+
+    @staticmethod
+    def _empty(columns: List[str]) -> Dict[str, np.ndarray]:
+        return {c: np.array([], dtype="U1" if SCHEMA[c] == "U" else SCHEMA[c]) for c in columns}
+
+    def _load_segments(self, paths: List[str], columns: List[str]) -> Dict[str, np.ndarray]:
+        parts: Dict[str, List[np.ndarray]] = {c: [] for c in columns}
+        for path in paths:
+            with np.load(path, allow_pickle=False) as seg:
+                for c in columns:
+                    parts[c].append(seg[c])
+        if not paths:
+            return self._empty(columns)
+        return {c: np.concatenate(v) for c, v in parts.items()}
+
+    def scan(self, start: Any = None, end: Any = None,
+             columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Read rows with start <= timestamp < end.
+
+        Args:
+            start: Inclusive lower bound (datetime / ISO string), None = unbounded
+            end: Exclusive upper bound, None = unbounded
+            columns: Columns to project (default: all)
+
+        Returns:
+            Dict of column name -> numpy array, ordered by seq
+        """
+        columns = list(columns or SCHEMA)
+        unknown = [c for c in columns if c not in SCHEMA]
+        if unknown:
+            raise KeyError(f"Unknown ledger columns: {unknown}")
+
+        # Timestamp is always needed to apply the range predicate, seq to fence off
+        # segments sealed after the manifest was read
+        load_cols = columns + [c for c in ("timestamp", "seq") if c not in columns]
+        lo = to_micros(start) if start is not None else None
+        hi = to_micros(end) if end is not None else None
+
+        # Optimistic read: retry if a seal, compaction or archive happened while we were reading
+        for attempt in range(SCAN_RETRIES):
+            manifest = self._read_manifest()
+            try:
+                paths = [p for part in self.partitions(start, end) for p in self._segments(part)]
+                sealed = self._load_segments(paths, load_cols)
+                hot = self._read_hot(manifest["sealed_seq"])
+            except FileNotFoundError:
+                time.sleep(0.001 * (attempt + 1))  # A segment moved under us
+                continue
+            if self._read_manifest().get("generation") == manifest.get("generation"):
+                break
+            time.sleep(0.001 * (attempt + 1))
+        else:
+            raise LedgerReadConflict(f"Ledger kept changing during {SCAN_RETRIES} read attempts")
+
+        # A segment written ahead of its manifest update still has its rows in the hot buffer
+        visible = sealed["seq"] <= manifest["sealed_seq"]
+        if not visible.all():
+            sealed = {c: v[visible] for c, v in sealed.items()}
+
+        if hot:
+            hot_cols = {c: np.array([r[c] for r in hot], dtype=None if SCHEMA[c] == "U" else SCHEMA[c])
+                        for c in load_cols}
+            data = {c: np.concatenate([sealed[c], hot_cols[c]]) for c in load_cols}
+        else:
+            data = sealed
+
+        if lo is not None or hi is not None:
+            ts = data["timestamp"]
+            mask = np.ones(len(ts), dtype=bool)
+            if lo is not None:
+                mask &= ts >= lo
+            if hi is not None:
+                mask &= ts < hi
+            data = {c: v[mask] for c, v in data.items()}
+
+        return {c: data[c] for c in columns}
+
+    def to_frame(self, start: Any = None, end: Any = None,
+                 columns: Optional[List[str]] = None):
+        """scan() as a pandas DataFrame with a datetime64 timestamp column."""
+        import pandas as pd
+
+        data = self.scan(start, end, columns or CSV_COLUMNS)
+        if "timestamp" in data:
+            data["timestamp"] = data["timestamp"].astype("datetime64[us]")
+        return pd.DataFrame(data)
+
+    def count(self, start: Any = None, end: Any = None) -> int:
+        return len(self.scan(start, end, ["seq"])["seq"])
+
+    def tail(self, n: int = 1, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Return the last n rows as dicts, reading only the newest partitions."""
+        columns = list(columns or CSV_COLUMNS)
+        manifest = self._read_manifest()
+        hot = self._read_hot(manifest["sealed_seq"])
+        rows = [{c: r[c] for c in columns} for r in hot[-n:]]
+
+        for part in reversed(self.partitions()):
+            if len(rows) >= n:
+                break
+            data = self._load_segments(self._segments(part), columns)
+            need = n - len(rows)
+            size = len(next(iter(data.values()))) if data else 0
+            older = [{c: data[c][i].item() for c in columns} for i in range(max(0, size - need), size)]
+            rows = older + rows
+
+        for r in rows:
+            if "timestamp" in r:
+                r["timestamp"] = micros_to_datetime(r["timestamp"]).isoformat()
+        return rows[-n:]
+
+    # ═══════════════════════════════════════════════════════════
+    # CSV IMPORT / EXPORT
+    # ═══════════════════════════════════════════════════════════
+
+    def import_csv(self, path: str = LEGACY_CSV_PATH) -> int:
+        """Load a legacy sales_history.csv into the ledger."""
+        if not os.path.exists(path):
+            return 0
+        rows = []
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            for rec in csv.DictReader(f):
+                try:
+                    ts = to_micros(rec.get("timestamp") or "")
+                except ValueError:
+                    continue
+                rows.append({
+                    "timestamp": ts,
+                    "platform": rec.get("platform", "") or "",
+                    "event_type": rec.get("event_type", "") or "",
+                    "order_id": rec.get("order_id", "") or "",
+                    "product_name": rec.get("product_name", "") or "",
+                    "amount": _parse_amount(rec.get("amount")),
+                    "currency": rec.get("currency", "") or "",
+                    "customer_email": rec.get("customer_email", "") or "",
+                })
+        rows.sort(key=lambda r: r["timestamp"])
+        self.append_rows(rows)
+        self.seal()
+        return len(rows)
+
+    def export_csv(self, path: str = LEGACY_CSV_PATH, start: Any = None, end: Any = None) -> int:
+        """Write the ledger (or a time range of it) as sales_history.csv."""
+        data = self.scan(start, end, CSV_COLUMNS)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for i in range(len(data["timestamp"])):
+                writer.writerow([
+                    micros_to_datetime(data["timestamp"][i]).isoformat(),
+                    *(data[c][i] for c in CSV_COLUMNS[1:])
+                ])
+        return len(data["timestamp"])
+
+    @staticmethod
+    def _export_rows(rows: List[Dict[str, Any]], path: str):
+        new_file = not os.path.exists(path)
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(CSV_COLUMNS)
+            for r in rows:
+                writer.writerow([micros_to_datetime(r["timestamp"]).isoformat(),
+                                 *(r[c] for c in CSV_COLUMNS[1:])])
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_ledger: Optional[SalesLedger] = None
+
+
+def get_ledger(legacy_csv: str = LEGACY_CSV_PATH) -> SalesLedger:
+    """
+    Process-wide ledger. On first use, an empty ledger is seeded from the
+    legacy sales_history.csv so existing history is not lost.
+    """
+    global _default_ledger
+    if _default_ledger is None:
+        ledger = SalesLedger(csv_export_path=legacy_csv if CSV_EXPORT else None)
+        if not os.path.exists(ledger.manifest_path):
+            imported = ledger.import_csv(legacy_csv) if legacy_csv else 0
+            if imported:
+                print(f"📥 [LEDGER] Imported {imported} rows from {os.path.basename(legacy_csv)}")
+            ledger._write_manifest(ledger._read_manifest())
+        _default_ledger = ledger
+    return _default_ledger
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    ledger = get_ledger()
+
+    if "--import" in sys.argv:
+        path = sys.argv[sys.argv.index("--import") + 1] if len(sys.argv) > sys.argv.index("--import") + 1 else LEGACY_CSV_PATH
+        print(f"📥 Imported {ledger.import_csv(path)} rows")
+
+    elif "--export-csv" in sys.argv:
+        print(f"📤 Exported {ledger.export_csv()} rows to {LEGACY_CSV_PATH}")
+
+    elif "--compact" in sys.argv:
+        ledger.seal()
+        print(f"🗜️ Compacted {ledger.compact()} segments")
+
+    else:
+        print("=" * 60)
+        print("YEDAN AGI - Sales Ledger")
+        print("=" * 60)
+        print(f"Root: {ledger.root}")
+        print(f"Partitions: {len(ledger.partitions())}")
+        print(f"Rows: {ledger.count()}")
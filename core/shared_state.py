@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Shared State Bridge
+Zero-parse, multi-process view of the latest KPIs, strategy parameters and
+kill-switch flags, in a memory-mapped file with a fixed binary layout.
+
+    webhook server (single writer) --publish()--> data/shared_state.bin
+    run_roi_loop / decision engine / guardian / dashboards --read()--> SharedState
+
+The writer republishes on a timer (SHARED_STATE_REFRESH_SECONDS) as well
+as after every commit, so a quiet store neither looks stale nor keeps
+serving 24h / 7d windows that stopped decaying at the last sale.
+
+Consistency is seqlock-style: the writer bumps a sequence counter to odd,
+writes the body, then bumps it to even. Readers copy the body between two
+reads of the counter and retry if it was odd or changed. Readers never
+lock, never block the writer and never parse JSON.
+
+Same idea as the archived market_oracle.RegimeBridge, with a versioned
+layout so old readers detect a changed struct instead of misreading it.
+"""
+
+import os
+import sys
+import io
+import json
+import mmap
+import time
+import struct
+import threading
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Callable
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "shared_state.bin"))
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+
+# Readers treat state older than this as stale (writer down)
+STALE_SECONDS = float(os.getenv("SHARED_STATE_STALE_SECONDS", "300"))
+# Writer republishes KPIs this often even without new sales (keeps windows decaying)
+REFRESH_SECONDS = float(os.getenv("SHARED_STATE_REFRESH_SECONDS", "60"))
+READ_RETRIES = 1000
+
+# Kill-switch flags (bitfield)
+FLAGS = {
+    "halt": 1 << 0,           # Stop all autonomous actions
+    "pause_pricing": 1 << 1,  # No price changes
+    "pause_ads": 1 << 2,      # No ad spend changes
+    "pause_posting": 1 << 3,  # No social posting
+}
+
+MAGIC = b"YDSS"
+LAYOUT_VERSION = 2
+MAX_PLATFORMS = 8
+NAME_BYTES = 16
+PRODUCT_BYTES = 64
+
+# Keys of the last order, the same from the bridge and from KPIMaterializer.snapshot()
+LAST_ORDER_FIELDS = ("timestamp", "platform", "product_name", "amount")
+
+# Header: magic, layout version, body size, seqlock counter (odd = write in progress)
+HEADER = struct.Struct("<4sHHQ")
+SEQ = struct.Struct("<Q")
+SEQ_OFFSET = 8
+
+# Body: (name, struct format) in layout order. Append-only; bump LAYOUT_VERSION on change.
+FIELDS = [
+    ("updated_us", "q"),
+    ("writer_pid", "q"),
+    # KPIs
+    ("total_orders", "q"),
+    ("total_revenue", "d"),
+    ("orders_24h", "q"),
+    ("revenue_24h", "d"),
+    ("orders_7d", "q"),
+    ("revenue_7d", "d"),
+    ("last_order_us", "q"),
+    ("last_order_amount", "d"),
+    ("watermark_seq", "q"),
+    ("platform_count", "q"),
+    *[(f"platform_{i}", f"{NAME_BYTES}s") for i in range(MAX_PLATFORMS)],
+    *[(f"platform_{i}_orders", "q") for i in range(MAX_PLATFORMS)],
+    *[(f"platform_{i}_revenue", "d") for i in range(MAX_PLATFORMS)],
+    # Strategy parameters (config.json)
+    ("strategy_mode", f"{NAME_BYTES}s"),
+    ("tone", f"{NAME_BYTES}s"),
+    ("risk_tolerance", f"{NAME_BYTES}s"),
+    ("price_step", "d"),
+    ("evolution_count", "q"),
+    # Kill switch
+    ("kill_flags", "Q"),
+    ("kill_set_us", "q"),
+    ("kill_reason", "64s"),
+    # Last order (v2)
+    ("last_order_platform", f"{NAME_BYTES}s"),
+    ("last_order_product", f"{PRODUCT_BYTES}s"),
+]
+BODY = struct.Struct("<" + "".join(fmt for _, fmt in FIELDS))
+BODY_OFFSET = HEADER.size
+FILE_SIZE = BODY_OFFSET + BODY.size
+
+FORMATS = dict(FIELDS)
+
+_RawState = namedtuple("_RawState", [name for name, _ in FIELDS])
+
+
+def _now_us() -> int:
+    return int(time.time() * 1_000_000)
+
+
+def _encode(value: Any, size: int) -> bytes:
+    """UTF-8, truncated to `size` bytes on a character boundary."""
+    return str(value or "").encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _decode(value: bytes) -> str:
+    return value.rstrip(b"\0").decode("utf-8", errors="replace")
+
+
+class SharedState(_RawState):
+    """One consistent read of the bridge. Fields are plain attributes."""
+
+    __slots__ = ()
+
+    @property
+    def age_seconds(self) -> float:
+        return (_now_us() - self.updated_us) / 1_000_000 if self.updated_us else float("inf")
+
+    @property
+    def is_stale(self) -> bool:
+        return self.age_seconds > STALE_SECONDS
+
+    def flag(self, name: str) -> bool:
+        return bool(self.kill_flags & FLAGS[name])
+
+    @property
+    def reason(self) -> str:
+        return _decode(self.kill_reason)
+
+    @property
+    def active_flags(self) -> List[str]:
+        return [name for name, bit in FLAGS.items() if self.kill_flags & bit]
+
+    @property
+    def platforms(self) -> Dict[str, Dict[str, float]]:
+        return {_decode(getattr(self, f"platform_{i}")): {
+                    "orders": getattr(self, f"platform_{i}_orders"),
+                    "revenue": round(getattr(self, f"platform_{i}_revenue"), 2)}
+                for i in range(min(self.platform_count, MAX_PLATFORMS))}
+
+    @property
+    def strategy(self) -> Dict[str, Any]:
+        return {"strategy_mode": _decode(self.strategy_mode), "tone": _decode(self.tone),
+                "risk_tolerance": _decode(self.risk_tolerance), "price_step": self.price_step}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """KPI dict shaped like KPIMaterializer.snapshot() plus strategy / kill switch."""
+        return {
+            "updated_at": datetime.fromtimestamp(self.updated_us / 1_000_000).isoformat() if self.updated_us else None,
+            "total_orders": self.total_orders,
+            "total_revenue": round(self.total_revenue, 2),
+            "window_24h": {"orders": self.orders_24h, "revenue": round(self.revenue_24h, 2)},
+            "window_7d": {"orders": self.orders_7d, "revenue": round(self.revenue_7d, 2)},
+            "platforms": self.platforms,
+            "last_order": {"timestamp": datetime.fromtimestamp(self.last_order_us / 1_000_000).isoformat(),
+                           "platform": _decode(self.last_order_platform),
+                           "product_name": _decode(self.last_order_product),
+                           "amount": self.last_order_amount} if self.last_order_us else None,
+            "watermark_seq": self.watermark_seq,
+            "strategy_parameters": self.strategy,
+            "evolution_count": self.evolution_count,
+            "kill_switch": {"flags": self.active_flags, "reason": self.reason,
+                            "set_at": datetime.fromtimestamp(self.kill_set_us / 1_000_000).isoformat()
+                            if self.kill_set_us else None},
+        }
+
+
+def _map(path: str, write: bool) -> mmap.mmap:
+    with open(path, "r+b" if write else "rb") as f:
+        return mmap.mmap(f.fileno(), FILE_SIZE, access=mmap.ACCESS_WRITE if write else mmap.ACCESS_READ)
+
+
+# ═══════════════════════════════════════════════════════════════
+# WRITER (webhook server)
+# ═══════════════════════════════════════════════════════════════
+
+class SharedStateWriter:
+    """
+    Single writer of the bridge. Keeps the full field set in memory; each
+    publish overwrites the whole body under the seqlock.
+    """
+
+    def __init__(self, path: str = SHARED_STATE_PATH, config_path: str = CONFIG_PATH):
+        self.path = path
+        self.config_path = config_path
+        self._config_mtime = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        fresh = not os.path.exists(path) or os.path.getsize(path) != FILE_SIZE
+        if fresh:
+            # Replace rather than truncate: readers may still map the old file
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(b"\0" * FILE_SIZE)
+            os.replace(tmp, path)
+        self.mm = _map(path, write=True)
+        magic, version, size, seq = HEADER.unpack_from(self.mm, 0)
+        if fresh or magic != MAGIC or version != LAYOUT_VERSION or size != BODY.size:
+            self.mm[:] = b"\0" * FILE_SIZE
+            HEADER.pack_into(self.mm, 0, MAGIC, LAYOUT_VERSION, BODY.size, 0)
+            self.values = {name: (b"" if fmt.endswith("s") else 0) for name, fmt in FIELDS}
+        else:
+            # Restart: keep the last published state (notably kill-switch flags)
+            self.values = SharedStateReader(path).read()._asdict()
+        self.values["writer_pid"] = os.getpid()
+
+    def _write(self):
+        seq = SEQ.unpack_from(self.mm, SEQ_OFFSET)[0]
+        if seq & 1:
+            seq += 1  # A previous writer died mid-write
+        body = BODY.pack(*(self.values[name] for name, _ in FIELDS))
+        SEQ.pack_into(self.mm, SEQ_OFFSET, seq + 1)
+        self.mm[BODY_OFFSET:FILE_SIZE] = body
+        SEQ.pack_into(self.mm, SEQ_OFFSET, seq + 2)
+
+    def publish(self, **fields):
+        """Update any subset of fields and publish a new version."""
+        with self._lock:
+            for name, value in fields.items():
+                if name not in self.values:
+                    raise KeyError(f"Unknown shared state field: {name}")
+                fmt = FORMATS[name]
+                self.values[name] = _encode(value, int(fmt[:-1])) if fmt.endswith("s") else value
+            self.values["updated_us"] = _now_us()
+            self._write()
+
+    def publish_kpis(self, snap: Dict[str, Any]):
+        """Publish a KPIMaterializer.snapshot()."""
+        platforms = sorted(snap.get("platforms", {}).items(), key=lambda kv: -kv[1]["revenue"])[:MAX_PLATFORMS]
+        fields = {
+            "total_orders": int(snap["total_orders"]),
+            "total_revenue": float(snap["total_revenue"]),
+            "orders_24h": int(snap["window_24h"]["orders"]),
+            "revenue_24h": float(snap["window_24h"]["revenue"]),
+            "orders_7d": int(snap["window_7d"]["orders"]),
+            "revenue_7d": float(snap["window_7d"]["revenue"]),
+            "watermark_seq": int(snap.get("watermark_seq", 0)),
+            "platform_count": len(platforms),
+        }
+        last = snap.get("last_order")
+        if last:
+            fields["last_order_us"] = int(datetime.fromisoformat(last["timestamp"]).timestamp() * 1_000_000)
+            fields["last_order_amount"] = float(last.get("amount", 0.0))
+            fields["last_order_platform"] = last.get("platform", "")
+            fields["last_order_product"] = last.get("product_name", "")
+        for i in range(MAX_PLATFORMS):
+            name, v = platforms[i] if i < len(platforms) else ("", {"orders": 0, "revenue": 0.0})
+            fields[f"platform_{i}"] = name
+            fields[f"platform_{i}_orders"] = int(v["orders"])
+            fields[f"platform_{i}_revenue"] = float(v["revenue"])
+        self.publish(**fields)
+
+    def publish_strategy(self, force: bool = False) -> bool:
+        """Publish strategy parameters from config.json if it changed. Returns True if published."""
+        try:
+            mtime = os.path.getmtime(self.config_path)
+        except OSError:
+            return False
+        if mtime == self._config_mtime and not force:
+            return False
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self._config_mtime = mtime
+        params = config.get("strategy_parameters", {})
+        self.publish(strategy_mode=params.get("strategy_mode", ""), tone=params.get("tone", ""),
+                     risk_tolerance=params.get("risk_tolerance", ""),
+                     price_step=float(params.get("price_step", 0.0)),
+                     evolution_count=int(config.get("meta", {}).get("evolution_count", 0)))
+        return True
+
+    def set_kill_flags(self, flags: List[str], reason: str = ""):
+        """Replace the kill-switch flags (an empty list clears them)."""
+        unknown = [f for f in flags if f not in FLAGS]
+        if unknown:
+            raise KeyError(f"Unknown kill-switch flags: {unknown}")
+        bits = 0
+        for f in flags:
+            bits |= FLAGS[f]
+        self.publish(kill_flags=bits, kill_reason=reason, kill_set_us=_now_us() if bits else 0)
+
+    def start_refresh(self, snapshot: Callable[[], Dict[str, Any]], interval: float = REFRESH_SECONDS):
+        """Republish snapshot() (and config.json changes) every `interval` seconds from a daemon thread."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.publish_kpis(snapshot())
+                    self.publish_strategy()
+                except Exception as e:
+                    print(f"⚠️ [SharedState] Refresh failed: {e}")
+
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=run, name="shared-state-refresh", daemon=True)
+            self._refresher.start()
+
+    def close(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+        with self._lock:
+            self.mm.close()
+
+
+# ═══════════════════════════════════════════════════════════════
+# READER (every other process)
+# ═══════════════════════════════════════════════════════════════
+
+class SharedStateReader:
+    """Lock-free reader. Opens the file lazily, so it can start before the writer."""
+
+    def __init__(self, path: str = SHARED_STATE_PATH):
+        self.path = path
+        self.mm: Optional[mmap.mmap] = None
+
+    def _open(self) -> bool:
+        if self.mm is None:
+            try:
+                if os.path.getsize(self.path) != FILE_SIZE:
+                    return False
+                self.mm = _map(self.path, write=False)
+            except (OSError, ValueError):
+                return False
+        magic, version, size, _ = HEADER.unpack_from(self.mm, 0)
+        return magic == MAGIC and version == LAYOUT_VERSION and size == BODY.size
+
+    def read(self) -> Optional[SharedState]:
+        """Latest consistent state, or None if no writer has published this layout."""
+        if not self._open():
+            return None
+        for attempt in range(READ_RETRIES):
+            before = SEQ.unpack_from(self.mm, SEQ_OFFSET)[0]
+            if not before & 1:
+                body = self.mm[BODY_OFFSET:FILE_SIZE]
+                if SEQ.unpack_from(self.mm, SEQ_OFFSET)[0] == before:
+                    return SharedState(*BODY.unpack(body))
+            if attempt % 64 == 63:
+                time.sleep(0)  # Let a descheduled writer finish
+        raise TimeoutError("Shared state writer did not settle")
+
+    def read_fresh(self) -> Optional[SharedState]:
+        """read(), re-mapping once if the state looks stale (writer may have replaced the file)."""
+        state = self.read()
+        if state is None or state.is_stale:
+            self.close()
+            state = self.read()
+        return state
+
+    @property
+    def version(self) -> int:
+        """Seqlock counter (number of publishes x 2); cheap change detection."""
+        return SEQ.unpack_from(self.mm, SEQ_OFFSET)[0] if self._open() else 0
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE
+# ═══════════════════════════════════════════════════════════════
+
+_default_reader: Optional[SharedStateReader] = None
+
+
+def read_shared_state() -> Optional[SharedState]:
+    """Latest state from the process-wide reader (None if nothing published yet)."""
+    global _default_reader
+    if _default_reader is None:
+        _default_reader = SharedStateReader()
+    return _default_reader.read_fresh()
+
+
+def kill_switch_active(flag: str = "halt") -> bool:
+    """True if the given kill-switch flag (or halt) is set by the webhook process."""
+    state = read_shared_state()
+    return bool(state) and (state.flag(flag) or state.flag("halt"))
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    state = read_shared_state()
+
+    print("=" * 60)
+    print("YEDAN AGI - Shared State Bridge")
+    print("=" * 60)
+    if state is None:
+        print(f"⚠️ Nothing published at {SHARED_STATE_PATH} (is the webhook server running?)")
+    else:
+        view = state.to_dict()
+        print(f"Updated: {view['updated_at']} ({state.age_seconds:.1f}s ago"
+              f"{', STALE' if state.is_stale else ''}) by pid {state.writer_pid}")
+        print(f"💰 Revenue: ${view['total_revenue']:.2f} ({view['total_orders']} orders)")
+        print(f"   24h: {view['window_24h']} | 7d: {view['window_7d']}")
+        print(f"🧬 Strategy: {view['strategy_parameters']} (evolution #{view['evolution_count']})")
+        print(f"🛑 Kill switch: {view['kill_switch']['flags'] or 'clear'} {view['kill_switch']['reason']}")
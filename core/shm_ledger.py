@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Shared-Memory Ledger (Zero-copy Analytics Columns)
+Publishes sales ledger columns into named multiprocessing.shared_memory
+blocks so worker pools attach to one copy instead of loading N pandas frames.
+
+    owner:   SharedLedger.publish(ledger, start, end)  -> name
+    workers: attach_shared_ledger(name).column("amount")  (np.ndarray view, no copy)
+
+Layout:
+- one block per column (int64 timestamp, float64 amount, int32 codes)
+- string columns are dictionary-encoded: codes in shared memory, labels
+  in the manifest
+- the manifest block (`name`) is length-prefixed JSON: rows, dtypes,
+  segment names, dictionaries, ledger seq watermark
+
+Lifecycle: only the owner keeps the blocks registered with the resource
+tracker and unlinks them (close() / atexit, or the tracker if the owner
+dies). attach_segment() opens a block untracked (track=False on Python
+3.13+, unregistered right after attaching before that), so a worker
+exiting can't unlink the owner's data.
+"""
+
+import os
+import sys
+import io
+import json
+import atexit
+import struct
+import secrets
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+import pandas as pd
+
+# Fix Windows console encoding
+if sys.platform == 'win32' and __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import SalesLedger, SCHEMA, get_ledger, micros_to_datetime
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+SHM_COLUMNS = ["timestamp", "amount", "platform", "product_name"]
+SHM_PREFIX = "ydl_"  # POSIX shm names are short on macOS (31 chars)
+CODE_DTYPE = np.int32
+MANIFEST_VERSION = 1
+LENGTH = struct.Struct("<Q")
+
+
+_created = set()  # Blocks created by this process (inherited by fork children)
+
+
+def create_segment(name: str, size: int) -> shared_memory.SharedMemory:
+    """Create a block owned by this process (registered with the resource tracker)."""
+    segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _created.add(segment.name)
+    return segment
+
+
+def attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block without leaving it registered with the resource tracker."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    segment = shared_memory.SharedMemory(name=name)
+    # The owner and the children it spawned (which have no tracker pid of their own)
+    # share the owner's tracker, where the block is already registered once: only a
+    # process with a tracker of its own unregisters, or that tracker would unlink the block
+    if segment.name not in _created and resource_tracker._resource_tracker._pid is not None:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _dictionary_encode(values: np.ndarray, index: Dict[str, int], labels: List[str]) -> np.ndarray:
+    """Codes for one chunk, extending the shared dictionary in place."""
+    uniques, inverse = np.unique(values, return_inverse=True)
+    lut = np.empty(len(uniques), dtype=CODE_DTYPE)
+    for i, label in enumerate(uniques.tolist()):
+        code = index.get(label)
+        if code is None:
+            code = index[label] = len(labels)
+            labels.append(label)
+        lut[i] = code
+    return lut[inverse]
+
+
+class SharedLedgerView:
+    """
+    Read-only attachment to a published ledger. Arrays are views into
+    shared memory; keep the view alive while using them.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], segments: Dict[str, shared_memory.SharedMemory],
+                 manifest_segment: shared_memory.SharedMemory):
+        self.manifest = manifest
+        self.name = manifest["name"]
+        self.rows = manifest["rows"]
+        self._segments = segments
+        self._manifest_segment = manifest_segment
+        self.columns: Dict[str, np.ndarray] = {}
+        for col, meta in manifest["columns"].items():
+            arr = np.ndarray((self.rows,), dtype=meta["dtype"], buffer=segments[col].buf)
+            arr.flags.writeable = False
+            self.columns[col] = arr
+        self.dictionaries = {col: np.array(meta["dictionary"], dtype=object)
+                             for col, meta in manifest["columns"].items() if meta["dictionary"] is not None}
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedLedgerView":
+        manifest_segment = attach_segment(name)
+        size = LENGTH.unpack_from(manifest_segment.buf, 0)[0]
+        manifest = json.loads(bytes(manifest_segment.buf[LENGTH.size:LENGTH.size + size]))
+        if manifest.get("version") != MANIFEST_VERSION:
+            manifest_segment.close()
+            raise ValueError(f"Unsupported shared ledger manifest version: {manifest.get('version')}")
+        segments = {col: attach_segment(meta["segment"]) for col, meta in manifest["columns"].items()}
+        return cls(manifest, segments, manifest_segment)
+
+    def column(self, name: str) -> np.ndarray:
+        """Raw column (integer codes for dictionary-encoded strings)."""
+        return self.columns[name]
+
+    def labels(self, name: str) -> np.ndarray:
+        """Dictionary of a string column (code -> label)."""
+        return self.dictionaries[name]
+
+    def categorical(self, name: str) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.columns[name], categories=self.dictionaries[name], validate=False)
+
+    def decode(self, name: str) -> np.ndarray:
+        """Materialized string column (copies; prefer codes + labels)."""
+        return self.dictionaries[name][self.columns[name]]
+
+    def to_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """pandas frame; numeric columns and categorical codes stay backed by shared memory."""
+        frame = {}
+        for col in columns or list(self.columns):
+            if col in self.dictionaries:
+                frame[col] = self.categorical(col)
+            elif col == "timestamp":
+                frame[col] = self.columns[col].view("datetime64[us]")
+            else:
+                frame[col] = self.columns[col]
+        return pd.DataFrame(frame, copy=False)
+
+    def close(self):
+        """Detach (never unlinks: the owner does that)."""
+        self.columns.clear()
+        for seg in self._segments.values():
+            seg.close()
+        self._segments.clear()
+        if self._manifest_segment is not None:
+            self._manifest_segment.close()
+            self._manifest_segment = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedLedger(SharedLedgerView):
+    """Owner of a published ledger: creates the blocks, unlinks them on close()."""
+
+    @classmethod
+    def publish(cls, ledger: Optional[SalesLedger] = None, start: Any = None, end: Any = None,
+                columns: Optional[List[str]] = None, name: Optional[str] = None) -> "SharedLedger":
+        """
+        Copy ledger columns over [start, end) into shared memory, one day
+        partition at a time (peak private memory ~ one partition).
+        """
+        ledger = ledger or get_ledger()
+        columns = list(columns or SHM_COLUMNS)
+        unknown = [c for c in columns if c not in SCHEMA]
+        if unknown:
+            raise KeyError(f"Unknown ledger columns: {unknown}")
+        name = name or SHM_PREFIX + secrets.token_hex(4)
+
+        # Pass 1: row counts per chunk (timestamps only)
+        chunks = cls._chunks(ledger, start, end)
+        counts = [len(ledger.scan(lo, hi, ["timestamp"])["timestamp"]) for lo, hi in chunks]
+        rows = sum(counts)
+
+        segments: Dict[str, shared_memory.SharedMemory] = {}
+        try:
+            dtypes = {c: (CODE_DTYPE if SCHEMA[c] == "U" else np.dtype(SCHEMA[c])) for c in columns}
+            for i, col in enumerate(columns):
+                nbytes = max(1, rows * np.dtype(dtypes[col]).itemsize)
+                segments[col] = create_segment(f"{name}_c{i}", nbytes)
+            arrays = {c: np.ndarray((rows,), dtype=dtypes[c], buffer=segments[c].buf) for c in columns}
+
+            # Pass 2: fill, dictionary-encoding strings per chunk
+            dictionaries = {c: ([], {}) for c in columns if SCHEMA[c] == "U"}
+            offset, watermark = 0, 0
+            for (lo, hi), expected in zip(chunks, counts):
+                if expected == 0:
+                    continue
+                data = ledger.scan(lo, hi, columns + ["seq"])
+                n = min(expected, len(data["seq"]))  # Rows appended since pass 1 are left out
+                for col in columns:
+                    values = data[col][:n]
+                    if col in dictionaries:
+                        labels, index = dictionaries[col]
+                        values = _dictionary_encode(values, index, labels)
+                    arrays[col][offset:offset + n] = values
+                watermark = max(watermark, int(data["seq"][:n].max())) if n else watermark
+                offset += n
+            rows = offset
+
+            manifest = {
+                "version": MANIFEST_VERSION,
+                "name": name,
+                "rows": rows,
+                "owner_pid": os.getpid(),
+                "created": datetime.now().isoformat(),
+                "watermark_seq": watermark,
+                "columns": {c: {"segment": segments[c].name, "dtype": np.dtype(dtypes[c]).str,
+                                "dictionary": dictionaries[c][0] if c in dictionaries else None}
+                            for c in columns},
+            }
+            blob = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+            manifest_segment = create_segment(name, LENGTH.size + len(blob))
+            manifest_segment.buf[LENGTH.size:LENGTH.size + len(blob)] = blob
+            LENGTH.pack_into(manifest_segment.buf, 0, len(blob))
+        except BaseException:
+            for seg in segments.values():
+                seg.close()
+                seg.unlink()
+            raise
+
+        owner = cls(manifest, segments, manifest_segment)
+        atexit.register(owner.close)
+        return owner
+
+    @staticmethod
+    def _chunks(ledger: SalesLedger, start: Any, end: Any) -> List[tuple]:
+        days = [datetime.strptime(p[3:], "%Y-%m-%d") for p in ledger.partitions(start=start, end=end)]
+        lo_bound = pd.Timestamp(start).to_pydatetime() if start is not None else None
+        hi_bound = pd.Timestamp(end).to_pydatetime() if end is not None else None
+        chunks = [(max(d, lo_bound) if lo_bound else d,
+                   min(d + timedelta(days=1), hi_bound) if hi_bound else d + timedelta(days=1))
+                  for d in days]
+        # Hot rows past the last sealed partition
+        chunks.append((chunks[-1][1] if chunks else lo_bound, hi_bound))
+        return chunks
+
+    def close(self):
+        """Detach and unlink every block (idempotent)."""
+        segments = list(self._segments.values()) + ([self._manifest_segment] if self._manifest_segment else [])
+        super().close()
+        for seg in segments:
+            try:
+                seg.unlink()
+            except FileNotFoundError:
+                pass
+        atexit.unregister(self.close)
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED INSTANCE (per worker process)
+# ═══════════════════════════════════════════════════════════════
+
+_attached: Dict[str, SharedLedgerView] = {}
+
+
+def attach_shared_ledger(name: str) -> SharedLedgerView:
+    """
+    Process-wide attachment, reused across tasks. Use as a pool initializer:
+        ProcessPoolExecutor(initializer=attach_shared_ledger, initargs=(owner.name,))
+    """
+    view = _attached.get(name)
+    if view is None:
+        view = _attached[name] = SharedLedgerView.attach(name)
+    return view
+
+
+def detach_all():
+    for view in _attached.values():
+        view.close()
+    _attached.clear()
+
+
+atexit.register(detach_all)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI INTERFACE
+# ═══════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    import time
+
+    days = int(sys.argv[sys.argv.index("--days") + 1]) if "--days" in sys.argv else None
+    start = datetime.now() - timedelta(days=days) if days else None
+
+    t0 = time.perf_counter()
+    owner = SharedLedger.publish(start=start)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 60)
+    print("YEDAN AGI - Shared-Memory Ledger")
+    print("=" * 60)
+    print(f"Published {owner.rows:,} rows as '{owner.name}' in {elapsed:.2f}s "
+          f"(watermark seq {owner.manifest['watermark_seq']})")
+    for col, arr in owner.columns.items():
+        extra = f", {len(owner.dictionaries[col])} labels" if col in owner.dictionaries else ""
+        print(f"   {col:>14}: {arr.dtype} {arr.nbytes / 1e6:.1f} MB{extra}")
+    if owner.rows:
+        ts = owner.column("timestamp")
+        print(f"   range: {micros_to_datetime(int(ts.min()))} -> {micros_to_datetime(int(ts.max()))}")
+    owner.close()
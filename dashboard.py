@@ -6,7 +6,7 @@ Dimensions: Content Mining | Product Factory | Traffic | Revenue
 import os
 import json
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path=".env.reactor")
@@ -33,6 +33,7 @@ class ROIDashboard:
         self._check_factory()
         self._check_traffic()
         self._check_revenue()
+        self._check_profit()
         self._check_growth()
         self._check_design_analytics()
         
@@ -88,6 +89,13 @@ class ROIDashboard:
     def _check_traffic(self):
         """Check Camoufox/browser availability."""
         print("\n[3/5] TRAFFIC ENGINE (Camoufox)")
+        try:
+            from core.event_store import get_event_store
+            since = datetime.now(timezone.utc) - timedelta(hours=24)
+            self.metrics["traffic"]["replies_sent"] = get_event_store().count("interactions", start=since)
+            print(f"      Replies (24h): {self.metrics['traffic']['replies_sent']}")
+        except Exception as e:
+            print(f"      Replies (24h): unavailable ({e})")
         try:
             from camoufox.sync_api import Camoufox
             self.metrics["traffic"]["status"] = "OK"
@@ -135,6 +143,24 @@ class ROIDashboard:
             self.metrics["revenue"]["status"] = "OFFLINE"
             print(f"      Status: OFFLINE ({e})")
 
+    def _check_profit(self):
+        """7-day P&L from the sales ledger (fees, ad spend, fixed costs)."""
+        print("\n[4b/5] PROFIT & LOSS (7d)")
+        self.metrics["profit"] = {"status": "unknown", "net_profit": 0, "roas": None}
+        try:
+            from core.pnl import get_pnl
+            pnl = get_pnl().window(days=7)
+            self.metrics["profit"].update(
+                status="OK" if pnl["net_profit"] >= 0 else "ERROR",
+                revenue=pnl["revenue"], net_profit=pnl["net_profit"],
+                margin=pnl["margin"], roas=pnl["roas"])
+            roas = f"{pnl['roas']:.2f}x" if pnl["roas"] is not None else "n/a"
+            print(f"      Revenue: ${pnl['revenue']:.2f} | Costs: ${pnl['total_costs']:.2f} | "
+                  f"Net: ${pnl['net_profit']:.2f} | ROAS: {roas}")
+        except Exception as e:
+            self.metrics["profit"]["status"] = "OFFLINE"
+            print(f"      Status: OFFLINE ({e})")
+
     def _check_growth(self):
         """Check Systeme.io and Hotjar integration."""
         print("\n[5/5] GROWTH ENGINE (Systeme + Hotjar)")
@@ -218,7 +244,7 @@ class ROIDashboard:
         print("MULTI-DIMENSIONAL STATUS (ASCII)")
         print("="*60)
         
-        dimensions = ["mining", "factory", "traffic", "revenue", "growth", "design", "analytics"]
+        dimensions = ["mining", "factory", "traffic", "revenue", "profit", "growth", "design", "analytics"]
         status_symbols = {
             "OK": "[====]", "PARTIAL": "[==..]", "ERROR": "[!!!!]", 
             "OFFLINE": "[----]", "NOT_INSTALLED": "[.....", 
@@ -243,6 +269,8 @@ class ROIDashboard:
             print("  - [Action] Install/configure Camoufox")
         if self.metrics["revenue"]["total_value"] < 100:
             print("  - [Action] Add higher-value products")
+        if "profit" in self.metrics and self.metrics["profit"]["status"] == "ERROR":
+            print("  - [Action] 7-day net profit is negative - review ad spend and pricing")
         if "growth" in self.metrics and self.metrics["growth"]["status"] != "OK":
             print("  - [Action] Complete Growth Tool integration")
         if "analytics" in self.metrics and self.metrics["analytics"]["status"] != "OK":
@@ -10,6 +10,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 from modules.echo_analytics import EchoAnalytics
 from modules.config import Config
+from core.shared_state import read_shared_state
 
 DASHBOARD_PATH = "dashboard.html"
 
@@ -28,6 +29,15 @@ def generate_dashboard():
     except:
         n8n_data = {"connected": False, "workflows": 0}
 
+    # Ledger KPIs + kill switch from shared memory (published by the webhook server)
+    shared = read_shared_state()
+    if shared is not None and not shared.is_stale:
+        ledger_html = f"${shared.revenue_24h:.2f} / {shared.orders_24h}"
+        kill_html = (f"<span style='color: #ff0000'>{', '.join(shared.active_flags).upper()}</span>"
+                     if shared.kill_flags else "CLEAR")
+    else:
+        ledger_html, kill_html = "N/A", "UNKNOWN"
+
     n8n_status_html = f"<span style='color: #00ff00'>ONLINE ({n8n_data.get('workflows', 0)} Workflows)</span>" if n8n_data.get('connected') else "<span style='color: #ff0000'>OFFLINE</span>"
     
     html = f"""
@@ -70,6 +80,14 @@ def generate_dashboard():
                     <div class="metric-label">PayPal Balance</div>
                     <div class="metric-value">${data['paypal_balance']:.2f}</div>
                 </div>
+                <div class="metric-card">
+                    <div class="metric-label">Ledger 24h (Revenue / Orders)</div>
+                    <div class="metric-value" style="font-size: 1.5em">{ledger_html}</div>
+                </div>
+                <div class="metric-card">
+                    <div class="metric-label">Kill Switch</div>
+                    <div class="metric-value" style="font-size: 1.5em">{kill_html}</div>
+                </div>
                 <div class="metric-card">
                     <div class="metric-label">Cloud Brain (n8n)</div>
                     <div class="metric-value" style="font-size: 1.5em">{n8n_status_html}</div>
@@ -4,8 +4,11 @@ GUARDIAN KILL-SWITCH V2.0 (WEBHOOK EDITION)
 THE 10K CONSENSUS: "NEVER POLL".
 This script listens for Shopify 'orders/create' webhooks.
 """
+import os
+import sys
 import json
 import logging
+import urllib.request
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from collections import deque
 import time
@@ -18,8 +21,18 @@ except ImportError:
     class GuardianCore: 
         def check_buffer_breach(self, s, q, b): return False, "OK"
 
+# SHARED STATE (kill-switch flags published by the Commerce Nerve Center)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from core.shared_state import read_shared_state
+except ImportError:
+    def read_shared_state(): return None
+
 # CONFIG
-PORT = 8000
+PORT = int(os.getenv("GUARDIAN_PORT", "8001"))         # This listener
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8000"))  # Commerce Nerve Center (modules_ecom/webhook_server.py)
+CONTROL_URL = os.getenv("KILL_SWITCH_CONTROL_URL", f"http://localhost:{WEBHOOK_PORT}/control/kill-switch")
+CONTROL_TOKEN = os.getenv("CONTROL_API_TOKEN", "")
 ANOMALY_THRESHOLD = 5 
 TIME_WINDOW = 60
 SAFETY_BUFFER = 50
@@ -46,6 +59,11 @@ class WebhookHandler(BaseHTTPRequestHandler):
         1. Extract SKU from Line Items.
         2. Check for "Buffer Breach" (Real-time).
         """
+        state = read_shared_state()
+        if state is not None and state.flag("halt"):
+            print(f"🛑 HALT flag set ({state.reason}) - order not processed")
+            return
+        
         line_items = payload.get("line_items", [])
         for item in line_items:
             sku = item.get("sku")
@@ -64,8 +82,25 @@ class WebhookHandler(BaseHTTPRequestHandler):
                 
             if len(risk_counter) >= ANOMALY_THRESHOLD:
                 print("🚫 KILL SWITCH TRIGGERED: Too many requests!")
+                trip_kill_switch(f"{len(risk_counter)} orders in {TIME_WINDOW}s")
+
+
+def trip_kill_switch(reason):
+    """Raise the shared HALT flag via the webhook server (the bridge's only writer)."""
+    state = read_shared_state()
+    if state is not None and state.flag("halt"):
+        return
+    req = urllib.request.Request(
+        CONTROL_URL, data=json.dumps({"flags": ["halt"], "reason": f"guardian: {reason}"}).encode(),
+        headers={"Content-Type": "application/json", "X-Control-Token": CONTROL_TOKEN}, method="POST")
+    try:
+        urllib.request.urlopen(req, timeout=5)
+    except Exception as e:
+        logging.error(f"Could not raise HALT flag: {e}")
 
 def run_server():
+    if PORT == WEBHOOK_PORT:
+        sys.exit(f"GUARDIAN_PORT {PORT} is the webhook server's port; the HALT flag could never be raised")
     print(f"🛡️  Guardian V2.0 Listening on Port {PORT}...")
     server = HTTPServer(('localhost', PORT), WebhookHandler)
     server.serve_forever()
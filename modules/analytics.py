@@ -1,10 +1,9 @@
-import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-logger = logging.getLogger('analytics')
+from core.event_store import get_event_store
 
-LOG_FILE = "logs/interactions.jsonl"
+logger = logging.getLogger('analytics')
 
 class Analytics:
     def __init__(self):
@@ -12,9 +11,9 @@ class Analytics:
 
     def generate_daily_report(self):
         """
-        Parses the JSONL log and calculates simple metrics for the last 24h.
+        Aggregates the interactions table for the last 24h (indexed range query).
         """
-        now = datetime.utcnow()
+        now = datetime.now(timezone.utc)
         yesterday = now - timedelta(hours=24)
         
         metrics = {
@@ -24,26 +23,17 @@ class Analytics:
             "errors": 0
         }
         
-        try:
-            with open(LOG_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        record = json.loads(line)
-                        ts = datetime.fromisoformat(record["timestamp"])
-                        
-                        if ts > yesterday:
-                            metrics["total_interactions"] += 1
-                            if record["platform"] == "reddit":
-                                metrics["reddit_count"] += 1
-                            elif record["platform"] == "twitter":
-                                metrics["twitter_count"] += 1
-                                
-                    except (ValueError, KeyError):
-                        continue
-                        
-        except FileNotFoundError:
+        by_platform = get_event_store().aggregate("interactions", group_by="platform", start=yesterday)
+        if not by_platform:
             logger.warning("No interaction logs found.")
             return
+        
+        for row in by_platform:
+            metrics["total_interactions"] += row["count"]
+            if row["platform"] == "reddit":
+                metrics["reddit_count"] += row["count"]
+            elif row["platform"] == "twitter":
+                metrics["twitter_count"] += row["count"]
 
         report = f"""
         [DAILY REPORT]
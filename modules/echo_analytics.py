@@ -75,6 +75,15 @@ class EchoAnalytics:
             pass
         return 0.0
     
+    def get_pnl(self, days: int = 7) -> dict:
+        """Net profit / ROAS over the last `days` from the local sales ledger"""
+        try:
+            from core.pnl import get_pnl
+            return get_pnl().window(days=days)
+        except Exception as e:
+            print(f"[Echo] P&L unavailable: {e}")
+            return {}
+    
     def generate_daily_report(self) -> str:
         """Generate comprehensive daily ROI report"""
         now = datetime.now()
@@ -83,6 +92,7 @@ class EchoAnalytics:
         synapse = self.get_synapse_revenue(days=7)
         shopify = self.get_shopify_stats()
         paypal = self.get_paypal_balance()
+        pnl = self.get_pnl(days=7)
         
         # Calculate metrics
         revenue_data = synapse.get("revenue", [])
@@ -100,6 +110,7 @@ class EchoAnalytics:
 Today: ${today_rev.get('revenue', 0):.2f} ({today_rev.get('count', 0)} sales)
 Week: ${week_total:.2f} ({week_sales} sales)
 PayPal Balance: ${paypal:.2f}
+{self._format_pnl(pnl)}
 
 ━━━━━━━━━━━━━━━━━━━━━━
 🏪 *SHOPIFY*
@@ -125,6 +136,15 @@ Sigma (n8n): ⚠️ {self._check_n8n_status()}
 """
         return report
     
+    def _format_pnl(self, pnl: dict) -> str:
+        """P&L lines for the revenue section"""
+        if not pnl:
+            return "P&L (7d): unavailable"
+        roas = f"{pnl['roas']:.2f}x" if pnl.get("roas") is not None else "n/a"
+        return (f"P&L (7d): ${pnl['net_profit']:.2f} net "
+                f"(fees ${pnl['tx_costs']:.2f}, ads ${pnl['ad_spend']:.2f}, fixed ${pnl['fixed_costs']:.2f})\n"
+                f"ROAS: {roas} | Margin: {pnl['margin'] * 100:.1f}%")
+    
     def _check_n8n_status(self) -> str:
         """Check n8n workflow count"""
         try:
@@ -233,9 +253,12 @@ Sigma (n8n): ⚠️ {self._check_n8n_status()}
         synapse = self.get_synapse_revenue(days=1)
         today = synapse.get("revenue", [{}])[0]
         
+        pnl = self.get_pnl(days=1)
+        
         return {
             "today_revenue": today.get("revenue", 0),
             "today_sales": today.get("count", 0),
+            "today_net_profit": pnl.get("net_profit", 0),
             "paypal_balance": self.get_paypal_balance(),
             "timestamp": datetime.now().isoformat()
         }
@@ -33,19 +33,13 @@ class NeuralLinkV2:
             self.memory = None
             print(Fore.YELLOW + "[System]: MemoryCore offline (Missing dependencies).")
 
-        # API Client Check
-        self.api_key = os.getenv("DEEPSEEK_API_KEY")
-        # Detect placeholder keys
-        if self.api_key and "your_" not in self.api_key and "sk-placeholder" not in self.api_key:
-            try:
-                from openai import AsyncOpenAI
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url="https://api.deepseek.com")
-                print(Fore.GREEN + "[NEURAL-LINK V2.1] DeepSeek Cortex Connected." + Style.RESET_ALL)
-            except ImportError:
-                self.client = None
-                print(Fore.YELLOW + "[System Warning]: OpenAI library missing." + Style.RESET_ALL)
+        # API Client Check (pooled AsyncOpenAI client lives in core/llm_gateway.py)
+        from core.llm_gateway import get_gateway
+        self.gateway = get_gateway()
+        self.online = self.gateway.available("deepseek")
+        if self.online:
+            print(Fore.GREEN + "[NEURAL-LINK V2.1] DeepSeek Cortex Connected." + Style.RESET_ALL)
         else:
-            self.client = None
             print(Fore.RED + "[Warning]: DEEPSEEK_API_KEY not found or is placeholder. Running in SIMULATION MODE." + Style.RESET_ALL)
 
     async def process_signal(self, user_input: str, image_url: str = None) -> NeuralPayload:
@@ -56,7 +50,7 @@ class NeuralLinkV2:
             print(Fore.CYAN + f"[Input]: (Complex Unicode String Received)" + Style.RESET_ALL)
 
         # Simulation Mode (No API Key)
-        if not self.client:
+        if not self.online:
             await asyncio.sleep(1.5) # Simulate latency
             print(Fore.BLUE + "[Simulation]: DeepSeek R1 is reasoning..." + Style.RESET_ALL)
             
@@ -104,12 +98,8 @@ class NeuralLinkV2:
             Return JSON only. No markdown formatting.
             """
             
-            response = await self.client.chat.completions.create(
-                model="deepseek-reasoner",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            raw_json = response.choices[0].message.content
+            raw_json = await self.gateway.acomplete(prompt, provider="deepseek",
+                                                    model="deepseek-reasoner", json_mode=True)
             return NeuralPayload.model_validate_json(raw_json)
         except Exception as e:
             print(Fore.RED + f"[API Error]: {e}" + Style.RESET_ALL)
@@ -1,34 +1,22 @@
 import os
 import logging
 import random
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from core.llm_gateway import get_gateway, LLMError
+
 load_dotenv(dotenv_path=".env.reactor")
 
 logger = logging.getLogger('r1_reasoner')
 
 class DeepSeekReasoner:
     def __init__(self):
-        self.simulation_mode = False
-        api_key = os.getenv("DEEPSEEK_API_KEY")
-        
-        # Detect missing or placeholder keys
-        if not api_key or "your_" in api_key or "placeholder" in api_key.lower():
+        # Pooled DeepSeek client lives in the shared gateway (core/llm_gateway.py)
+        self.gateway = get_gateway()
+        self.model = os.getenv("DEEPSEEK_MODEL", "deepseek-reasoner")
+        self.simulation_mode = not self.gateway.available("deepseek")
+        if self.simulation_mode:
             logger.warning("DEEPSEEK_API_KEY missing or placeholder. Enabling SIMULATION MODE.")
-            self.simulation_mode = True
-            self.client = None
-        else:
-            try:
-                self.client = OpenAI(
-                    api_key=api_key,
-                    base_url="https://api.deepseek.com/v1" 
-                )
-                self.model = os.getenv("DEEPSEEK_MODEL", "deepseek-reasoner")
-            except Exception as e:
-                logger.error(f"Failed to init DeepSeek client: {e}")
-                self.simulation_mode = True
-                self.client = None
 
     def generate_response(self, user_problem, platform="reddit"):
         """
@@ -36,7 +24,7 @@ class DeepSeekReasoner:
         Falls back to simulation if API is unavailable.
         """
         # Simulation Mode - Return mock response
-        if self.simulation_mode or self.client is None:
+        if self.simulation_mode:
             return self._generate_mock_response(user_problem, platform)
         
         system_prompt = """You are a senior Shopify Data Architect and Developer.
@@ -64,17 +52,10 @@ CRITICAL: Do not include the disclosure footer yourself. The system will append
         """
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_msg}
-                ]
-            )
-            content = response.choices[0].message.content
-            return content
+            return self.gateway.complete(user_msg, system_prompt, provider="deepseek", model=self.model,
+                                         namespace=platform)
 
-        except Exception as e:
+        except LLMError as e:
             logger.error(f"DeepSeek generation failed: {e}")
             # Fallback to simulation on error
             return self._generate_mock_response(user_problem, platform)
@@ -83,19 +83,11 @@ def check_pause_flag():
 
 def log_interaction(platform, post_id, response_content, meta=None):
     """
-    Logs an interaction to the append-only JSONL file for analytics.
+    Logs an interaction to the event store (interactions table) for analytics.
     """
-    entry = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "platform": platform,
-        "post_id": post_id,
-        "response_length": len(response_content),
-        "meta": meta or {}
-    }
-    
     try:
-        with open("logs/interactions.jsonl", "a", encoding='utf-8') as f:
-            f.write(json.dumps(entry) + "\n")
+        from core.event_store import get_event_store
+        get_event_store().log_interaction(platform, post_id, len(response_content), meta)
     except Exception as e:
         logger.error(f"Failed to write interaction log: {e}")
 
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+YEDAN AGI - Ingest Writer (Group Commit)
+Moves sales-ledger writes off the webhook event loop.
+
+Handlers only enqueue rows. A dedicated writer thread drains the queue in
+batches, appends each batch to the ledger with a single file open, applies
+the configured durability policy and then folds the batch into the KPIs.
+submit() returns a future that resolves once the row's batch is committed
+(or fails with the write error), so a webhook is acknowledged only after
+its row is in the ledger.
+
+Durability policies (INGEST_DURABILITY):
+- batch:    fsync after every batch (group commit; default)
+- interval: fsync at most every INGEST_FSYNC_INTERVAL_MS
+- none:     leave flushing to the OS
+
+The queue is bounded. When the writer falls behind, submit() raises
+IngestOverloaded and the webhook answers 503 with Retry-After, so the
+payment platform retries later instead of the server buffering unbounded.
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import SalesLedger
+
+# ═══════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+DURABILITY_POLICIES = ("batch", "interval", "none")
+DURABILITY = os.getenv("INGEST_DURABILITY", "batch")
+FSYNC_INTERVAL_MS = int(os.getenv("INGEST_FSYNC_INTERVAL_MS", "50"))
+
+# Queued rows before webhooks are rejected with 503
+QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", "10000"))
+# Rows appended per group commit
+BATCH_MAX = int(os.getenv("INGEST_BATCH_MAX", "512"))
+# Retry-After (seconds) sent with 503 responses
+RETRY_AFTER_SECONDS = int(os.getenv("INGEST_RETRY_AFTER", "1"))
+
+_STOP = object()
+
+
+class IngestOverloaded(Exception):
+    """The ingest queue is full; the caller should retry later."""
+
+    def __init__(self, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__(f"Ingest queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class GroupCommitWriter:
+    """
+    Single writer thread in front of a SalesLedger.
+
+    submit(row)  -> bounded queue (non-blocking, may raise IngestOverloaded) -> Future
+    writer loop  -> ledger.append_rows(batch, sync=...) -> on_commit(written), futures resolved
+                                                         + on_error(unwritten, exc), futures failed
+    """
+
+    def __init__(self, ledger: SalesLedger,
+                 on_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 on_error: Optional[Callable[[List[Dict[str, Any]], Exception], None]] = None,
+                 durability: str = DURABILITY,
+                 fsync_interval_ms: int = FSYNC_INTERVAL_MS,
+                 max_queue: int = QUEUE_MAX,
+                 max_batch: int = BATCH_MAX):
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"durability must be one of {DURABILITY_POLICIES}, got {durability!r}")
+        self.ledger = ledger
+        self.on_commit = on_commit
+        self.on_error = on_error
+        self.durability = durability
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+        self.counters = {"enqueued": 0, "committed": 0, "batches": 0,
+                         "fsyncs": 0, "rejected": 0, "errors": 0}
+
+    # ═══════════════════════════════════════════════════════════
+    # PRODUCER SIDE (event loop)
+    # ═══════════════════════════════════════════════════════════
+
+    def start(self):
+        """Start the writer thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, row: Dict[str, Any]) -> Future:
+        """Enqueue one normalised ledger row. Never blocks; the future resolves once it is committed."""
+        if self._closed:
+            raise RuntimeError("Ingest writer is closed")
+        committed = Future()
+        try:
+            self._queue.put_nowait((row, committed))
+        except queue.Full:
+            self.counters["rejected"] += 1
+            raise IngestOverloaded()
+        self.counters["enqueued"] += 1
+        return committed
+
+    def flush(self):
+        """Block until every row submitted so far is committed."""
+        self._queue.join()
+
+    def close(self, timeout: float = 10.0):
+        """Drain the queue, make it durable and stop the thread (waits at most `timeout` seconds)."""
+        if self._thread is None or self._closed:
+            return
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        try:
+            # A full queue frees up as the writer drains it; a stuck writer must not hang shutdown
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print(f"⚠️ [INGEST] Writer did not drain in {timeout}s: {self._queue.qsize()} rows uncommitted")
+            return
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"durability": self.durability, "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize, **self.counters}
+
+    # ═══════════════════════════════════════════════════════════
+    # WRITER THREAD
+    # ═══════════════════════════════════════════════════════════
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.fsync_interval if self._unsynced else None)
+            except queue.Empty:
+                self._sync()  # Idle with unsynced rows (interval policy)
+                continue
+
+            batch, stop = [], first is _STOP
+            if not stop:
+                batch.append(first)
+            while not stop and len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._commit([row for row, _ in batch], [committed for _, committed in batch])
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                if self._unsynced:
+                    self._sync()
+                return
+
+    def _commit(self, batch: List[Dict[str, Any]], futures: List[Future]):
+        sync = self.durability == "batch" or (
+            self.durability == "interval" and time.monotonic() - self._last_sync >= self.fsync_interval)
+        try:
+            self.ledger.append_rows(batch, sync=sync)
+            error = None
+        except Exception as e:
+            error = e
+            self.counters["errors"] += 1
+
+        # Rows that got a seq reached the ledger before any failure: they are committed
+        # (a retry would write them twice); only the rest are failed and released
+        written = [row for row in batch if "seq" in row]
+        lost = len(batch) - len(written)
+        if error is not None:
+            print(f"❌ [INGEST] Write failed after {len(written)}/{len(batch)} rows: {error}")
+            if lost and self.on_error:  # Before the futures fail: a retried delivery must not look like a duplicate
+                try:
+                    self.on_error(batch[-lost:], error)
+                except Exception as hook_error:
+                    print(f"⚠️ [INGEST] on_error failed: {hook_error}")
+            for committed in futures[len(futures) - lost:]:
+                committed.set_exception(error)
+        if not written:
+            return
+
+        self.counters["committed"] += len(written)
+        self.counters["batches"] += 1
+        if sync and error is None:
+            self.counters["fsyncs"] += 1
+            self._last_sync = time.monotonic()
+            self._unsynced = False
+        else:
+            # Written but not known durable: the idle loop syncs again
+            self._unsynced = self.durability != "none"
+
+        if self.on_commit:
+            try:
+                self.on_commit(written)
+            except Exception as e:
+                print(f"⚠️ [INGEST] on_commit failed: {e}")
+        for row, committed in zip(written, futures):
+            committed.set_result(row)
+
+    def _sync(self):
+        try:
+            self.ledger.sync()
+            self.counters["fsyncs"] += 1
+        except OSError as e:
+            print(f"⚠️ [INGEST] fsync failed: {e}")
+        self._last_sync = time.monotonic()
+        self._unsynced = False
@@ -7,18 +7,46 @@ Supports:
 - Shopify Orders
 - Gumroad Sales
 
-Data is logged to sales_history.csv for RLVR training.
+Data is logged to the columnar sales ledger (core/sales_ledger.py) for
+RLVR training. sales_history.csv is only written when SALES_CSV_EXPORT=1.
+
+Handlers never touch the disk: events are queued to a group-commit writer
+thread (modules_ecom/ingest_writer.py) and the handler awaits the commit
+before acknowledging. When the queue is full, or the commit fails or
+takes longer than INGEST_ACK_TIMEOUT, the webhook answers 503 +
+Retry-After. Set INGEST_WRITER=0 to write inline.
+
+Retried deliveries (same platform + order id) are acknowledged as
+"duplicate" without a write, via the order index (core/order_index.py),
+once the original row is committed. A retry that arrives while the
+original is still queued waits for it: a commit answers "duplicate", a
+failed write lets the retry write the sale, and no outcome within
+INGEST_ACK_TIMEOUT answers 503.
+
+This process is the single writer of the shared state bridge
+(core/shared_state.py): KPIs after every commit and on a timer (so the
+rolling windows decay without sales), strategy parameters from
+config.json, and kill-switch flags set via POST /control/kill-switch.
 """
 
 import os
-import csv
+import sys
 import json
 import hmac
+import asyncio
 import hashlib
 from datetime import datetime
-from fastapi import FastAPI, Request, HTTPException, Header
+from fastapi import FastAPI, Request, HTTPException, Header, Query
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import get_ledger, make_row, to_micros, micros_to_datetime
+from core.kpi_materializer import get_materializer
+from core.order_index import get_order_index
+from core.shared_state import SharedStateWriter, FLAGS
+from modules_ecom.ingest_writer import GroupCommitWriter, IngestOverloaded, RETRY_AFTER_SECONDS
 
 # 初始化 FastAPI 應用
 app = FastAPI(title="YEDAN AGI Commerce Nerve Center")
@@ -28,29 +56,108 @@ SHOPIFY_SECRET = os.getenv("SHOPIFY_WEBHOOK_SECRET", "your_shopify_secret_here")
 GUMROAD_SECRET = os.getenv("GUMROAD_WEBHOOK_SECRET", "your_gumroad_secret_here")
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 DATA_FILE = os.path.join(DATA_DIR, "sales_history.csv")
+USE_INGEST_WRITER = os.getenv("INGEST_WRITER", "1") == "1"
+ACK_TIMEOUT = float(os.getenv("INGEST_ACK_TIMEOUT", "5"))  # Seconds a webhook waits for its commit
+CONTROL_TOKEN = os.getenv("CONTROL_API_TOKEN", "")
 
 # 確保數據儲存目錄存在
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# 初始化 CSV 文件 (如果不存在，寫入標題)
-if not os.path.exists(DATA_FILE):
-    with open(DATA_FILE, mode='w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        # 這些欄位是 AGI 計算 ROAS 和 PnL 的關鍵
-        writer.writerow([
-            "timestamp", "platform", "event_type", "order_id", 
-            "product_name", "amount", "currency", "customer_email"
-        ])
+# 長期記憶 (列式帳本)；首次啟動時會自動匯入舊的 CSV
+ledger = get_ledger(DATA_FILE)
+
+# 即時 KPI (增量聚合)；從快照恢復，只重播快照之後的帳本
+kpis = get_materializer(ledger)
+
+# 冪等索引 (platform, order_id)；重送的 webhook 不會重複入帳
+orders = get_order_index(ledger)
+
+# 共享狀態 (mmap)；其他行程零解析讀取 KPI / 策略參數 / 緊急停止旗標
+shared = SharedStateWriter()
+shared.publish_strategy(force=True)
+shared.publish_kpis(kpis.snapshot())
+shared.start_refresh(kpis.snapshot)
+
+
+def _fold_committed(rows):
+    """Runs on the writer thread once a batch is on disk"""
+    orders.commit(rows)
+    for row in rows:
+        kpis.apply(row)
+    kpis.maybe_save()
+    shared.publish_kpis(kpis.snapshot())
+    shared.publish_strategy()
+
+
+def _release_failed(rows, error):
+    """Rows that never reached the ledger: let the platform's retry through"""
+    orders.release(rows)
+
+
+# 寫入執行緒 (group commit)；handler 只負責排隊
+writer = GroupCommitWriter(ledger, on_commit=_fold_committed,
+                           on_error=_release_failed) if USE_INGEST_WRITER else None
+if writer:
+    writer.start()
 
 
 # --- 輔助函數 ---
-def log_event(platform: str, event_type: str, order_id: str, 
-              product_name: str, amount: str, currency: str, email: str):
+async def log_event(platform: str, event_type: str, order_id: str,
+                    product_name: str, amount: str, currency: str, email: str):
     """
-    將交易事件寫入長期記憶 (CSV)，供 RSI 引擎回測使用
+    將交易事件寫入長期記憶 (列式帳本)，供 RSI 引擎回測使用
+    Returns None for a duplicate of a committed delivery (nothing is written).
+    Raises 503 (Retry-After) if the ingest writer is backlogged, or if the
+    row (or the pending original it duplicates) is not committed within
+    ACK_TIMEOUT.
     """
+    timestamp = datetime.now()
+    row = make_row(platform, event_type, order_id, product_name,
+                   amount, currency, email, timestamp)
+    while not orders.claim(platform, row["order_id"]):
+        original = orders.pending(platform, row["order_id"])
+        if original is None:
+            if orders.seen(platform, row["order_id"]):
+                print(f"🔁 [AGI MEMORY] Duplicate {platform} delivery ignored: {order_id}")
+                return None
+            continue  # Released between the two lookups: claim it
+        try:
+            if await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(original)), ACK_TIMEOUT):
+                print(f"🔁 [AGI MEMORY] Duplicate {platform} delivery ignored: {order_id}")
+                return None
+            # The original's write failed and its claim was released: this delivery writes the sale
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Original delivery not committed yet, retry later",
+                                headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+    if writer:
+        try:
+            committed = writer.submit(row)
+        except IngestOverloaded as e:
+            orders.release([row])
+            raise HTTPException(status_code=503, detail="Ingest backlog, retry later",
+                                headers={"Retry-After": str(e.retry_after)})
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(committed)), ACK_TIMEOUT)
+        except Exception as e:
+            # A failed batch was released by the writer; a retry of a slow one waits for
+            # its commit and is acknowledged as a duplicate only once it is in the ledger
+            print(f"⚠️ [AGI MEMORY] {platform} sale {order_id} not committed: {e!r}")
+            raise HTTPException(status_code=503, detail="Ingest commit failed, retry later",
+                                headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    else:
+        try:
+            ledger.append_rows([row])
+        except Exception as e:
+            if "seq" not in row:
+                orders.release([row])
+                raise
+            # The row is in the ledger; the failure came after it (seal, CSV export)
+            print(f"⚠️ [AGI MEMORY] {platform} sale {order_id} written, then: {e!r}")
+        _fold_committed([row])
+    
     log_entry = [
-        datetime.now().isoformat(),
+        timestamp.isoformat(),
         platform,
         event_type,
         order_id,
@@ -60,10 +167,6 @@ def log_event(platform: str, event_type: str, order_id: str,
         email
     ]
     
-    with open(DATA_FILE, mode='a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(log_entry)
-    
     print(f"✅ [AGI MEMORY] Recorded {platform} sale: {amount} {currency} - {product_name}")
     return log_entry
 
@@ -85,39 +188,89 @@ async def verify_shopify_hmac(body: bytes, hmac_header: str) -> bool:
 
 # --- Endpoints (神經觸手) ---
 
+@app.on_event("shutdown")
+def persist_kpis():
+    """Drain the ingest queue, then flush the KPI snapshot so the next start only replays new rows"""
+    if writer:
+        writer.close()
+    kpis.save()
+    shared.close()
+
+
 @app.get("/")
 def health_check():
     """Health check endpoint"""
     return {
         "status": "active", 
         "system": "YEDAN AGI Commerce Nerve Center",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "ingest": writer.stats() if writer else {"durability": "inline"},
+        "kill_switch": [f for f, bit in FLAGS.items() if shared.values["kill_flags"] & bit]
     }
 
 
 @app.get("/stats")
 def get_stats():
-    """Get sales statistics"""
+    """Get sales statistics (served from in-memory KPI counters)"""
     try:
-        if not os.path.exists(DATA_FILE):
-            return {"total_sales": 0, "total_revenue": 0}
-        
-        with open(DATA_FILE, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-            
-        total_sales = len(rows)
-        total_revenue = sum(float(r.get("amount", 0) or 0) for r in rows)
+        snap = kpis.snapshot()
         
         return {
-            "total_sales": total_sales,
-            "total_revenue": total_revenue,
-            "last_sale": rows[-1] if rows else None
+            "total_sales": snap["total_orders"],
+            "total_revenue": snap["total_revenue"],
+            "last_sale": snap["last_order"],
+            "last_24h": snap["window_24h"],
+            "last_7d": snap["window_7d"],
+            "platforms": snap["platforms"]
         }
     except Exception as e:
         return {"error": str(e)}
 
 
+@app.get("/stats/window")
+def get_stats_window(
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+    platform: Optional[str] = None
+):
+    """
+    Sales statistics over [from, to) at hour resolution.
+    e.g. /stats/window?from=2026-01-01&to=2026-01-08&platform=shopify
+    """
+    try:
+        # Offsets are converted to the ledger's local clock
+        start_dt = micros_to_datetime(to_micros(start)) if start else None
+        end_dt = micros_to_datetime(to_micros(end)) if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="from/to must be ISO-8601 dates")
+    
+    if start_dt and end_dt and end_dt <= start_dt:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    
+    return kpis.window(start=start_dt, end=end_dt, platform=platform)
+
+
+class KillSwitchRequest(BaseModel):
+    flags: List[str] = []
+    reason: str = ""
+
+
+@app.post("/control/kill-switch")
+def set_kill_switch(body: KillSwitchRequest, x_control_token: Optional[str] = Header(None)):
+    """
+    Set (or clear, with flags=[]) the kill-switch flags every process reads
+    from the shared state bridge. Requires CONTROL_API_TOKEN.
+    """
+    if not CONTROL_TOKEN or not hmac.compare_digest(CONTROL_TOKEN, x_control_token or ""):
+        raise HTTPException(status_code=403, detail="Invalid control token")
+    try:
+        shared.set_kill_flags(body.flags, body.reason)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"🛑 [KILL SWITCH] flags={body.flags or 'cleared'} reason={body.reason}")
+    return {"status": "ok", "flags": body.flags, "reason": body.reason}
+
+
 @app.post("/webhook/shopify/orders/create")
 async def shopify_order_webhook(
     request: Request, 
@@ -150,10 +303,12 @@ async def shopify_order_webhook(
         product_name = line_items[0].get("name") if line_items else "Unknown Product"
 
         # 3. 寫入記憶
-        log_event("Shopify", "order_created", order_id, product_name, total_price, currency, email)
+        logged = await log_event("Shopify", "order_created", order_id, product_name, total_price, currency, email)
         
-        return {"status": "received", "order_id": order_id}
+        return {"status": "received" if logged else "duplicate", "order_id": order_id}
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"⚠️ Error parsing Shopify payload: {e}")
         return {"status": "error", "message": str(e)}
@@ -186,10 +341,12 @@ async def gumroad_sale_webhook(request: Request):
             order_id = payload.get("sale_id", str(datetime.now().timestamp()))
 
         # 寫入記憶
-        log_event("Gumroad", "sale", order_id, product_name, price, currency, email)
+        logged = await log_event("Gumroad", "sale", order_id, product_name, price, currency, email)
         
-        return {"status": "received", "order_id": order_id}
+        return {"status": "received" if logged else "duplicate", "order_id": order_id}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"⚠️ Error parsing Gumroad payload: {e}")
         return {"status": "error", "message": str(e)}
@@ -210,17 +367,19 @@ async def payhip_sale_webhook(request: Request):
         order_id = payload.get("order_id", str(datetime.now().timestamp()))
 
         # 寫入記憶
-        log_event("Payhip", "sale", order_id, product_name, price, currency, email)
+        logged = await log_event("Payhip", "sale", order_id, product_name, price, currency, email)
         
-        return {"status": "received", "order_id": order_id}
+        return {"status": "received" if logged else "duplicate", "order_id": order_id}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"⚠️ Error parsing Payhip payload: {e}")
         return {"status": "error", "message": str(e)}
 
 
 # --- 啟動指令 ---
-# uvicorn modules_ecom.webhook_server:app --reload --port 8000
+# uvicorn modules_ecom.webhook_server:app --reload --port 8000   (WEBHOOK_PORT when run directly)
 
 if __name__ == "__main__":
     import uvicorn
@@ -228,7 +387,8 @@ if __name__ == "__main__":
     print("Endpoints:")
     print("  GET  /              - Health check")
     print("  GET  /stats         - Sales statistics")
+    print("  GET  /stats/window  - Sales over ?from=&to=&platform=")
     print("  POST /webhook/shopify/orders/create")
     print("  POST /webhook/gumroad/sale")
     print("  POST /webhook/payhip/sale")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("WEBHOOK_PORT", "8000")))
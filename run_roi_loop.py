@@ -54,6 +54,7 @@ from modules.n8n_bridge import N8nBridge
 from modules.echo_analytics import EchoAnalytics
 from modules.market_scanner import MarketScanner
 from generate_digest_asset import generate_daily_digest
+from core.shared_state import read_shared_state
 
 logger = setup_logging('reactor')
 
@@ -98,6 +99,12 @@ class YEDAN_V2_Engine:
                     logger.info(f"   -> Today's Revenue: ${today.get('revenue', 0)} ({today.get('count', 0)} sales)")
             except Exception as e:
                 logger.warning(f"   -> [Warn] Synapse pulse failed: {e}")
+            
+            # 3. Local ledger KPIs (shared memory, published by the webhook server)
+            shared = read_shared_state()
+            if shared is not None and not shared.is_stale:
+                logger.info(f"   -> Ledger 24h: ${shared.revenue_24h:.2f} ({shared.orders_24h} sales) | "
+                            f"7d: ${shared.revenue_7d:.2f} ({shared.orders_7d} sales)")
 
         await asyncio.to_thread(_check)
 
@@ -216,6 +223,13 @@ class YEDAN_V2_Engine:
         
         while True:
             try:
+                # 0. Kill switch (set via the webhook server, read from shared memory)
+                shared = read_shared_state()
+                if shared is not None and shared.flag("halt"):
+                    logger.warning(f"🛑 [Kill Switch] HALT is set ({shared.reason}). Skipping cycle.")
+                    time.sleep(60)
+                    continue
+                
                 # 1. Execute Cycle
                 asyncio.run(self.execute_cycle())
                 
@@ -0,0 +1,138 @@
+"""
+YEDAN AGI - Offline LLM Pipeline Benchmark
+Cycles per minute of the LLM-driven loops against the local stand-in
+(core/llm_standin.py) under a chosen latency / throughput / error profile:
+
+- run_cycle:   ECOMExecutor.run_cycle (DECISION_MODE serial or parallel)
+- rsi:         RSI_Evolver.generate_mutation
+- consolidate: MemoryConsolidator.consolidate(force=True)
+
+Everything runs on a throwaway ledger, event store and config in a temp
+dir with the response cache off, so every cycle reaches the provider.
+Bridges stay in their default dry-run mode. --http sends the calls through
+the OpenAI-compatible stand-in server (needs the openai SDK).
+
+Usage:
+    python scripts/bench_llm_pipeline.py
+    python scripts/bench_llm_pipeline.py --cycles 2000
+    python scripts/bench_llm_pipeline.py --latency-ms 400 --jitter 0.5 --tps 60 --error-rate 0.02 --mode parallel
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add root directory to path
+sys.path.append(ROOT)
+
+
+def isolate(workdir: str, mode: str):
+    """Point every store at `workdir` before the core modules read their settings."""
+    os.environ.update(
+        LEDGER_DIR=os.path.join(workdir, "ledger"),
+        KPI_SNAPSHOT_PATH=os.path.join(workdir, "kpi_snapshot.json"),
+        ORDER_INDEX_PATH=os.path.join(workdir, "order_index.sqlite"),
+        EVENT_STORE_PATH=os.path.join(workdir, "events.sqlite"),
+        SHARED_STATE_PATH=os.path.join(workdir, "shared_state.bin"),
+        LLM_CACHE_ENABLED="0",
+        LLM_METRICS_PATH=os.path.join(workdir, "llm_metrics.jsonl"),
+        DECISION_MODE=mode,
+    )
+
+
+def run(name: str, fn, cycles: int, provider) -> None:
+    calls, errors = provider.calls, provider.errors
+    latencies, failures = [], 0
+    with open(os.devnull, "w", encoding="utf-8") as sink, contextlib.redirect_stdout(sink):
+        t0 = time.perf_counter()
+        for i in range(cycles):
+            start = time.perf_counter()
+            if not fn(i):
+                failures += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+        elapsed = time.perf_counter() - t0
+    p50, p95 = np.percentile(latencies, [50, 95])
+    print(f"   {name:>11}: {cycles / elapsed * 60:9,.0f} cycles/min | p50 {p50:7.1f}ms p95 {p95:7.1f}ms | "
+          f"{(provider.calls - calls) / cycles:4.1f} calls/cycle | "
+          f"{provider.errors - errors} injected errors | {failures} returned nothing/False")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline LLM pipeline benchmark")
+    parser.add_argument("--cycles", type=int, default=500)
+    parser.add_argument("--workloads", nargs="+", default=["run_cycle", "rsi", "consolidate"],
+                        choices=["run_cycle", "rsi", "consolidate"])
+    parser.add_argument("--mode", choices=["serial", "parallel"], default="serial")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--tps", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--source", default="", help='decision_log.jsonl path, "events", or empty to generate')
+    parser.add_argument("--rows", type=int, default=20_000, help="Synthetic ledger size")
+    parser.add_argument("--http", action="store_true", help="Go through the stand-in HTTP server")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="yedan_llm_bench_")
+    isolate(workdir, args.mode)
+    try:
+        from core import memory_consolidator, rsi_evolver
+        from core.llm_gateway import get_gateway, OpenAICompatibleProvider
+        from core.llm_standin import StandInProvider, install_standin, load_corpus, start_server
+        from core.ecom_executor import ECOMExecutor
+        from scripts.bench_stats import build_ledger
+
+        build_ledger(os.environ["LEDGER_DIR"], args.rows, days=90)
+        rsi_evolver.CONFIG_PATH = os.path.join(workdir, "config.json")
+        rsi_evolver.BACKUP_DIR = os.path.join(workdir, "evolution_backups")
+        memory_consolidator.KNOWLEDGE_PATH = os.path.join(workdir, "knowledge_base.md")
+        memory_consolidator.ARCHIVE_DIR = os.path.join(workdir, "archive")
+
+        options = dict(corpus=load_corpus(args.source), latency_ms=args.latency_ms, jitter=args.jitter,
+                       tokens_per_second=args.tps, error_rate=args.error_rate, seed=args.seed)
+        gateway = get_gateway()
+        if args.http:
+            provider = StandInProvider(**options)
+            server = start_server(provider)
+            client = OpenAICompatibleProvider(api_key="standin", base_url=server.url, name="standin",
+                                              default_model=provider.default_model)
+            for name in ("standin", "gemini", "deepseek"):
+                gateway.register(client, name=name, rpm=0)
+            gateway.default_provider = "standin"
+        else:
+            provider = install_standin(gateway, **options)
+
+        with open(os.devnull, "w", encoding="utf-8") as sink, contextlib.redirect_stdout(sink):
+            executor = ECOMExecutor()
+            evolver = rsi_evolver.RSI_Evolver()
+            performance = evolver.evaluate_performance(days=7)
+            consolidator = memory_consolidator.MemoryConsolidator()
+        workloads = {
+            # A distinct trigger per cycle varies the prompts, and so the stand-in's decisions
+            "run_cycle": lambda i: executor.run_cycle(f"bench_cycle_{i}"),
+            "rsi": lambda i: evolver.generate_mutation({**performance, "trend_pct": i}),
+            "consolidate": lambda i: consolidator.consolidate(force=True),
+        }
+
+        print("=" * 60)
+        print("YEDAN AGI - Offline LLM Pipeline Benchmark")
+        print(f"{args.cycles} cycles | {args.mode} | {'HTTP' if args.http else 'in-process'} stand-in | "
+              f"latency {args.latency_ms:.0f}ms (jitter {args.jitter}) | {args.tps or '∞'} tok/s | "
+              f"errors {args.error_rate:.1%}")
+        print("=" * 60)
+        for name in args.workloads:
+            run(name, workloads[name], args.cycles, provider)
+        if args.http:
+            server.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
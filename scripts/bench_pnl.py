@@ -0,0 +1,72 @@
+"""
+YEDAN AGI - P&L Benchmark
+Compares the legacy iterrows() fee loop from RSI_Evolver._calculate_real_costs
+with the vectorized P&L engine (core/pnl.py).
+
+Usage:
+    python scripts/bench_pnl.py                      # 10k, 1M, 10M transactions
+    python scripts/bench_pnl.py --rows 100000 --legacy-max 100000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Add root directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.pnl import PnLEngine, load_fee_rates
+
+PLATFORMS = ["Shopify", "Gumroad", "Payhip"]
+
+
+def legacy_fees(revenue_df: pd.DataFrame, fees_config: dict) -> float:
+    total = 0.0
+    for _, row in revenue_df.iterrows():
+        platform = str(row.get('platform', 'gumroad')).lower()
+        rate = fees_config.get(platform, fees_config.get('gumroad', {"percent": 0.10, "fixed": 0.30}))
+        total += float(row.get('amount', 0)) * rate.get('percent', 0.10) + rate.get('fixed', 0.30)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="P&L engine benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    engine = PnLEngine()
+    rng = np.random.default_rng(7)
+
+    print("=" * 60)
+    print("YEDAN AGI - P&L Benchmark")
+    print("=" * 60)
+    for n in args.rows:
+        platforms = pd.Categorical.from_codes(rng.integers(0, len(PLATFORMS), n), PLATFORMS)
+        amounts = np.round(rng.gamma(2.0, 12.0, n), 2)
+
+        t0 = time.perf_counter()
+        stmt = engine.statement(platforms, amounts, days=7)
+        vec_cat = time.perf_counter() - t0
+
+        strings = np.asarray(platforms, dtype=object)
+        t0 = time.perf_counter()
+        engine.statement(strings, amounts, days=7)
+        vec_str = time.perf_counter() - t0
+
+        print(f"\n📊 {n:,} transactions (fees ${stmt['tx_costs']:,.2f})")
+        print(f"   vectorized (categorical) {vec_cat * 1000:9.1f} ms")
+        print(f"   vectorized (strings)     {vec_str * 1000:9.1f} ms")
+        if n <= args.legacy_max:
+            frame = pd.DataFrame({"platform": strings, "amount": amounts})
+            t0 = time.perf_counter()
+            legacy = legacy_fees(frame, load_fee_rates())
+            print(f"   legacy iterrows          {(time.perf_counter() - t0) * 1000:9.1f} ms "
+                  f"(fees ${legacy:,.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+YEDAN AGI - Shared-Memory Ledger Benchmark
+Memory footprint of N analytics workers that each need the sales columns:
+
+- frame: every worker loads its own copy via ledger.to_frame()
+- shm:   workers attach to one SharedLedger (core/shm_ledger.py)
+
+Reports the summed PSS (proportional set size: shared pages are split
+between the processes mapping them) of the workers, plus the owner's
+shared blocks, from /proc/<pid>/smaps_rollup (Linux only).
+
+Usage:
+    python scripts/bench_shm_ledger.py
+    python scripts/bench_shm_ledger.py --rows 5000000 --workers 8
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Add root directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import SalesLedger
+from core.shm_ledger import SharedLedger, SHM_COLUMNS, attach_shared_ledger
+from scripts.bench_stats import build_ledger
+
+
+def pss_mb() -> float:
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def frame_task(root: str) -> tuple:
+    frame = SalesLedger(root).to_frame(columns=SHM_COLUMNS)
+    total = float(frame.groupby("platform")["amount"].sum().sum())
+    time.sleep(1.0)  # Keep every worker resident while PSS is sampled
+    return total, pss_mb()
+
+
+def shm_task(name: str) -> tuple:
+    view = attach_shared_ledger(name)
+    total = float(np.bincount(view.column("platform"), weights=view.column("amount")).sum())
+    time.sleep(1.0)
+    return total, pss_mb()
+
+
+def idle_pss(_) -> float:
+    time.sleep(0.5)
+    return pss_mb()
+
+
+def run(mode: str, arg: str, workers: int) -> tuple:
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+        baseline = sum(pool.map(idle_pss, range(workers)))  # Interpreter + imports only
+        t0 = time.perf_counter()
+        results = list(pool.map(frame_task if mode == "frame" else shm_task, [arg] * workers))
+        elapsed = time.perf_counter() - t0
+    return sum(r[1] for r in results) - baseline, elapsed, results[0][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory ledger benchmark")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="yedan_shm_")
+    try:
+        ledger = build_ledger(os.path.join(root, "ledger"), args.rows)
+        t0 = time.perf_counter()
+        owner = SharedLedger.publish(ledger)
+        publish = time.perf_counter() - t0
+        dataset_mb = sum(a.nbytes for a in owner.columns.values()) / 1e6
+
+        print("=" * 60)
+        print("YEDAN AGI - Shared-Memory Ledger Benchmark")
+        print(f"{owner.rows:,} rows | {args.workers} workers | shared columns {dataset_mb:.0f} MB "
+              f"(published in {publish:.2f}s)")
+        print("=" * 60)
+        for mode, arg in (("frame", ledger.root), ("shm", owner.name)):
+            extra, elapsed, total = run(mode, arg, args.workers)
+            print(f"   {mode:>5}: workers +{extra:8.0f} MB PSS | {elapsed:6.2f}s | revenue ${total:,.2f}")
+        owner.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
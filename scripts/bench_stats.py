@@ -0,0 +1,141 @@
+"""
+YEDAN AGI - /stats Benchmark
+Compares the legacy /stats implementation (csv.DictReader over the whole
+sales_history.csv per request) with the in-memory KPI store.
+
+For each history size it reports:
+- one-time startup cost (full rebuild from the ledger, snapshot restore)
+- p50 / p99 latency of /stats and /stats/window reads
+
+Usage:
+    python scripts/bench_stats.py                      # 10k, 1M, 10M rows
+    python scripts/bench_stats.py --rows 10000 100000 --legacy-max 100000
+"""
+import os
+import sys
+import csv
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add root directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sales_ledger import SalesLedger, to_micros
+from core.kpi_materializer import KPIMaterializer
+
+PLATFORMS = np.array(["Shopify", "Gumroad", "Payhip"])
+PRODUCTS = np.array([f"SKU-{i:03d}" for i in range(50)])
+
+
+def build_ledger(root: str, rows: int, days: int = 365, seed: int = 7) -> SalesLedger:
+    """Write `rows` synthetic orders spread over `days`, one day at a time."""
+    rng = np.random.default_rng(seed)
+    ledger = SalesLedger(root)
+    end = to_micros(datetime.now())
+    start = end - days * 24 * 3600 * 1_000_000
+    per_day = np.full(days, rows // days)
+    per_day[: rows % days] += 1
+    day_us = 24 * 3600 * 1_000_000
+    for d, n in enumerate(per_day):
+        if n == 0:
+            continue
+        ts = start + d * day_us + rng.integers(0, day_us, n)
+        ledger.write_columns({
+            "timestamp": ts,
+            "platform": PLATFORMS[rng.integers(0, len(PLATFORMS), n)],
+            "event_type": np.full(n, "sale"),
+            "order_id": np.char.add("o", (np.arange(n) + d * n).astype(str)),
+            "product_name": PRODUCTS[rng.integers(0, len(PRODUCTS), n)],
+            "amount": np.round(rng.gamma(2.0, 12.0, n), 2),
+            "currency": np.full(n, "USD"),
+        })
+    return ledger
+
+
+def legacy_stats(path: str) -> dict:
+    """The pre-ledger get_stats(): read every CSV row per request."""
+    with open(path, mode='r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    return {
+        "total_sales": len(rows),
+        "total_revenue": sum(float(r.get("amount", 0) or 0) for r in rows),
+        "last_sale": rows[-1] if rows else None
+    }
+
+
+def percentiles(fn, calls: int) -> tuple:
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def run(rows: int, calls: int, legacy_max: int):
+    root = tempfile.mkdtemp(prefix="yedan_bench_")
+    try:
+        t0 = time.perf_counter()
+        ledger = build_ledger(os.path.join(root, "ledger"), rows)
+        build_s = time.perf_counter() - t0
+
+        snapshot_path = os.path.join(root, "kpi_snapshot.json")
+        kpis = KPIMaterializer(ledger, snapshot_path)
+        t0 = time.perf_counter()
+        kpis.rebuild()
+        rebuild_s = time.perf_counter() - t0
+        kpis.save()
+
+        restored = KPIMaterializer(ledger, snapshot_path)
+        t0 = time.perf_counter()
+        restored.restore()
+        restored.refresh()
+        restore_s = time.perf_counter() - t0
+
+        now = datetime.now()
+        stats_p50, stats_p99 = percentiles(kpis.snapshot, calls)
+        win_p50, win_p99 = percentiles(
+            lambda: kpis.window(start=now - timedelta(days=7), platform="shopify"), calls)
+        month_p50, month_p99 = percentiles(
+            lambda: kpis.window(start=now - timedelta(days=180), end=now - timedelta(days=90)), calls)
+
+        print(f"\n📊 {rows:,} rows  (ledger build {build_s:.1f}s)")
+        print(f"   Startup   rebuild {rebuild_s*1000:9.1f} ms | snapshot restore {restore_s*1000:7.1f} ms")
+        print(f"   /stats                 p50 {stats_p50:8.3f} ms | p99 {stats_p99:8.3f} ms")
+        print(f"   /stats/window (7d)     p50 {win_p50:8.3f} ms | p99 {win_p99:8.3f} ms")
+        print(f"   /stats/window (90d)    p50 {month_p50:8.3f} ms | p99 {month_p99:8.3f} ms")
+
+        if rows <= legacy_max:
+            csv_path = os.path.join(root, "sales_history.csv")
+            ledger.export_csv(csv_path)
+            legacy_calls = max(3, min(calls, 2_000_000 // max(rows, 1)))
+            old_p50, old_p99 = percentiles(lambda: legacy_stats(csv_path), legacy_calls)
+            print(f"   legacy /stats (CSV)    p50 {old_p50:8.1f} ms | p99 {old_p99:8.1f} ms  ({legacy_calls} calls)")
+        else:
+            print(f"   legacy /stats (CSV)    skipped (> --legacy-max {legacy_max:,})")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /stats against history size")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--calls", type=int, default=2000, help="Reads per percentile sample")
+    parser.add_argument("--legacy-max", type=int, default=1_000_000,
+                        help="Largest history to run the legacy CSV reader against")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("YEDAN AGI - /stats Benchmark")
+    print("=" * 60)
+    for rows in args.rows:
+        run(rows, args.calls, args.legacy_max)
+
+
+if __name__ == "__main__":
+    main()
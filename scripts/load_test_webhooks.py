@@ -0,0 +1,133 @@
+"""
+YEDAN AGI - Webhook Load Test
+Measures sustained webhook throughput of the Commerce Nerve Center with
+inline ledger writes (the old behaviour) and with the group-commit writer
+under each durability policy.
+
+Each mode starts its own uvicorn server on a throwaway ledger
+(LEDGER_DIR, KPI_SNAPSHOT_PATH and ORDER_INDEX_PATH point into a temp dir),
+then hammers POST /webhook/payhip/sale from concurrent aiohttp clients.
+
+Usage:
+    python scripts/load_test_webhooks.py
+    python scripts/load_test_webhooks.py --modes inline group:batch --seconds 20 --concurrency 128
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import aiohttp
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(port: int, mode: str, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ,
+               LEDGER_DIR=os.path.join(workdir, "ledger"),
+               KPI_SNAPSHOT_PATH=os.path.join(workdir, "kpi_snapshot.json"),
+               ORDER_INDEX_PATH=os.path.join(workdir, "order_index.sqlite"),
+               PYTHONUNBUFFERED="1")
+    if mode == "inline":
+        env["INGEST_WRITER"] = "0"
+    else:
+        env["INGEST_WRITER"] = "1"
+        env["INGEST_DURABILITY"] = mode.split(":", 1)[1]
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "modules_ecom.webhook_server:app",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+async def hammer(base: str, seconds: float, concurrency: int) -> dict:
+    status = {}
+    latencies = []
+    deadline = time.monotonic() + seconds
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def client(cid: int):
+            n = 0
+            while time.monotonic() < deadline:
+                payload = {"product_name": "Load Test Pack", "amount": "9.99",
+                           "currency": "USD", "order_id": f"lt-{cid}-{n}"}
+                t0 = time.perf_counter()
+                try:
+                    async with session.post(f"{base}/webhook/payhip/sale", json=payload) as resp:
+                        await resp.read()
+                        code = resp.status
+                except aiohttp.ClientError:
+                    code = "error"
+                latencies.append((time.perf_counter() - t0) * 1000)
+                status[code] = status.get(code, 0) + 1
+                n += 1
+
+        t0 = time.monotonic()
+        await asyncio.gather(*(client(i) for i in range(concurrency)))
+        elapsed = time.monotonic() - t0
+
+    return {"elapsed": elapsed, "status": status,
+            "p50": float(np.percentile(latencies, 50)) if latencies else 0.0,
+            "p99": float(np.percentile(latencies, 99)) if latencies else 0.0}
+
+
+def run_mode(mode: str, port: int, seconds: float, concurrency: int):
+    workdir = tempfile.mkdtemp(prefix="yedan_load_")
+    server = start_server(port, mode, workdir)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_ready(base + "/"))
+        result = asyncio.run(hammer(base, seconds, concurrency))
+        health = asyncio.run(wait_ready(base + "/"))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    ok = result["status"].get(200, 0)
+    print(f"\n🚀 {mode}")
+    print(f"   sustained   {ok / result['elapsed']:8.0f} req/s accepted  "
+          f"(p50 {result['p50']:.1f} ms | p99 {result['p99']:.1f} ms)")
+    print(f"   responses   {result['status']}")
+    print(f"   ingest      {health.get('ingest')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook ingestion load test")
+    parser.add_argument("--modes", nargs="+",
+                        default=["inline", "group:none", "group:interval", "group:batch"],
+                        help="inline | group:<batch|interval|none>")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("YEDAN AGI - Webhook Load Test")
+    print(f"{args.concurrency} clients x {args.seconds:.0f}s per mode")
+    print("=" * 60)
+    for mode in args.modes:
+        run_mode(mode, args.port, args.seconds, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
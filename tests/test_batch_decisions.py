@@ -0,0 +1,126 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger
+from core.rollups import SalesRollups
+from core.decision_engine import ECOMDecisionEngine, extract_json_array
+from core.llm_gateway import LLMGateway, LLMProvider
+from core.llm_cache import LLMCache
+from core.llm_metrics import LLMMetrics
+
+STATE = {"conversion_rate": 0.02, "total_revenue": 900.0, "total_orders": 30, "data_available": True}
+
+
+class TestBatchDecisions(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ledger = SalesLedger(os.path.join(self.root, "ledger"))
+        now = datetime.now()
+        for i, (platform, product) in enumerate([("Gumroad", "Guide"), ("Gumroad", "Guide"),
+                                                 ("Shopify", "Pack"), ("Gumroad", "Course")]):
+            self.ledger.append(platform, "sale", f"o{i}", product, "20", "USD", "",
+                               timestamp=now - timedelta(days=10 * (i % 2)))
+        self.rollups = SalesRollups(self.ledger, path=os.path.join(self.root, "rollups.sqlite"))
+        self.rollups.update()
+        with mock.patch("core.decision_engine.get_materializer"):
+            self.engine = ECOMDecisionEngine(ledger=self.ledger)
+        self.engine._load_config = lambda: {"strategy_parameters": {"risk_tolerance": "medium"}}
+        self.engine._read_market_state = lambda: dict(STATE)
+        self.prompts = []
+
+    def tearDown(self):
+        self.rollups.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def fake_llm(self, prompt, system_prompt, fallback=None, namespace=None, **kwargs):
+        """Answers for every product line in the prompt; drops / garbles one on the first attempt"""
+        self.prompts.append(prompt)
+        ids = [json.loads(line)["product_id"] for line in prompt.splitlines() if line.startswith('{"product_id"')]
+        retry = "無法解析" in prompt
+        out = []
+        for pid in ids:
+            if pid == "sku-2" and not retry:
+                continue  # Missing from the answer
+            action = "EXPLODE" if pid == "sku-3" and not retry else "UPDATE_PRICE"
+            out.append({"product_id": pid, "decision": action, "parameters": {"new_price": 9.5},
+                        "confidence_score": 0.9, "reasoning": "batch"})
+        return "```json\n" + json.dumps(out) + "\n```"
+
+    def run_batch(self, products, llm=None):
+        with mock.patch("core.decision_engine.llm_call", side_effect=llm or self.fake_llm), \
+                mock.patch("core.decision_engine.get_rollups", return_value=self.rollups), \
+                mock.patch("core.decision_engine.kill_switch_active", return_value=False), \
+                mock.patch("core.decision_engine.BATCH_MAX_PRODUCTS", 2):
+            return self.engine.analyze_and_decide_batch(products)
+
+    def test_product_states_from_rollups(self):
+        with mock.patch("core.decision_engine.get_rollups", return_value=self.rollups):
+            states = {s["product_id"]: s for s in self.engine.product_states()}
+        self.assertEqual(set(states), {"Guide", "Pack", "Course"})
+        self.assertEqual((states["Guide"]["orders"], states["Guide"]["orders_7d"]), (2, 1))
+        self.assertEqual(states["Pack"]["platform"], "shopify")
+
+    def test_chunks_and_retries_only_failed_products(self):
+        products = [{"product_id": f"sku-{i}", "platform": "gumroad"} for i in range(5)]
+        decisions = self.run_batch(products)
+        self.assertEqual([d["parameters"]["product_id"] for d in decisions], [p["product_id"] for p in products])
+        self.assertTrue(all(d["decision"] == "UPDATE_PRICE" for d in decisions))
+        self.assertEqual(len(self.prompts), 4)  # 3 chunks of <= 2, then one retry chunk
+        self.assertIn("sku-2", self.prompts[-1])
+        self.assertNotIn("sku-0", self.prompts[-1])
+        retried = {d["parameters"]["product_id"]: d["recursive_loop"]["llm_calls"] for d in decisions}
+        self.assertEqual(retried, {"sku-0": 1, "sku-1": 1, "sku-2": 2, "sku-3": 2, "sku-4": 1})
+
+    def test_retries_bypass_the_cache(self):
+        test = self
+
+        class BatchProvider(LLMProvider):
+            name = "batch"
+
+            def _connect(self):
+                return object()
+
+            def _complete(self, client, prompt, system_prompt, model, json_mode, temperature):
+                return test.fake_llm(prompt, system_prompt)
+
+        cache = LLMCache(path=None)
+        gateway = LLMGateway(default_provider="batch", cache=cache)
+        gateway.register(BatchProvider())
+        metrics = LLMMetrics(path=None)
+        products = [{"product_id": f"sku-{i}", "platform": "gumroad"} for i in range(5)]
+        llm = lambda prompt, system, fallback=None, **kwargs: gateway.complete(prompt, system, **kwargs)
+        with mock.patch("core.decision_engine.get_llm_metrics", return_value=metrics):
+            first = self.run_batch(products, llm)
+            self.assertEqual(len(self.prompts), 4)
+            self.assertEqual(metrics.snapshot()["decision"]["retries"], 1)
+            # Only the chunks answered in full were cached; the failed one is asked again
+            second = self.run_batch(products, llm)
+        self.assertEqual(cache.stats()["namespaces"]["decision"]["stores"], 2)
+        self.assertEqual(len(self.prompts), 6)
+        self.assertEqual(metrics.snapshot()["decision"]["retries"], 2)
+        self.assertEqual([d["decision"] for d in second], [d["decision"] for d in first])
+
+    def test_unresolved_products_hold(self):
+        with mock.patch("core.decision_engine.BATCH_RETRIES", 0):
+            decisions = self.run_batch(["sku-2", "sku-9"])
+        held = [d for d in decisions if d.get("parse_failed")]
+        self.assertEqual([d["parameters"]["product_id"] for d in held], ["sku-2"])
+        self.assertEqual(held[0]["decision"], "HOLD")
+
+    def test_extract_json_array_salvages_truncated_output(self):
+        raw = '[{"product_id": "a", "decision": "HOLD"}, {"product_id": "b", "parameters": {"x": 1}}, {"product_id": "c", "dec'
+        self.assertEqual([i["product_id"] for i in extract_json_array(raw)], ["a", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
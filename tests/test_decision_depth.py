@@ -0,0 +1,101 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger
+from core.decision_engine import ECOMDecisionEngine, extract_json_object
+
+STATE = {"conversion_rate": 0.02, "total_revenue": 900.0, "total_orders": 30,
+         "recent_orders_24h": 2, "recent_revenue_24h": 40.0, "data_available": True}
+
+FINAL = json.dumps({"decision": "MODIFY_COPY", "parameters": {"platform": "gumroad"},
+                    "confidence_score": 0.8, "reasoning": "synthesized"})
+
+
+def proposal(decision, confidence):
+    return "<think>draft</think>\n" + json.dumps({"decision": decision, "parameters": {"platform": "gumroad"},
+                                                   "confidence_score": confidence, "reasoning": "draft"})
+
+
+class TestAdaptiveDepth(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        with mock.patch("core.decision_engine.get_materializer"):
+            self.engine = ECOMDecisionEngine(ledger=SalesLedger(os.path.join(self.root, "ledger")))
+        self.config = {"strategy_parameters": {"risk_tolerance": "medium"}}
+        self.engine._load_config = lambda: self.config
+        self.engine._read_market_state = lambda: dict(STATE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def run_loop(self, plan, trigger="daily_review"):
+        prompts = []
+
+        def fake_llm(prompt, system_prompt):
+            prompts.append(prompt)
+            if len(prompts) == 1:
+                return plan
+            return FINAL if "[批評意見]" in prompt else "- risk"
+
+        def fake_stream(prompt, system_prompt):
+            raw = fake_llm(prompt, system_prompt)
+            return extract_json_object(raw), raw, {"ttft_ms": 1.0, "time_to_decision_ms": 2.0}
+
+        with mock.patch("core.decision_engine.call_llm_api", side_effect=fake_llm), \
+                mock.patch("core.decision_engine.call_llm_json", side_effect=fake_stream), \
+                mock.patch("core.decision_engine.kill_switch_active", return_value=False):
+            decision = self.engine.analyze_and_decide(trigger)
+        return decision, prompts
+
+    def test_hold_proposal_exits_after_step_one(self):
+        decision, prompts = self.run_loop(proposal("HOLD", 0.4))
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(decision["decision"], "HOLD")
+        self.assertEqual(decision["recursive_loop"]["depth"], 1)
+        self.assertEqual(decision["recursive_loop"]["depth_reason"], "proposal_is_hold")
+
+    def test_confident_low_risk_exits_early(self):
+        decision, prompts = self.run_loop(proposal("MODIFY_COPY", 0.95))
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(decision["recursive_loop"]["depth_reason"], "confident_low_risk")
+        self.assertLess(decision["risk_simulation"]["risk_of_ruin"], 0.05)
+        self.assertGreater(decision["risk_simulation"]["p_beats_hold"], 0.5)
+
+    def test_proposal_that_rarely_beats_hold_is_criticized(self):
+        self.config["reasoning_depth"] = {"min_p_beats_hold": 0.9}  # Copy changes win ~69% of paired futures
+        decision, prompts = self.run_loop(proposal("MODIFY_COPY", 0.95))
+        self.assertEqual(len(prompts), 3)
+        self.assertEqual(decision["recursive_loop"]["depth_reason"], "no_better_than_hold")
+
+    def test_uncertain_proposal_runs_full_loop(self):
+        decision, prompts = self.run_loop(proposal("UPDATE_PRICE", 0.6))
+        self.assertEqual(len(prompts), 3)
+        self.assertEqual(decision["reasoning"], "synthesized")
+        self.assertEqual(decision["recursive_loop"]["depth"], 3)
+        self.assertGreater(decision["recursive_loop"]["est_tokens"], 0)
+        self.assertEqual(decision["recursive_loop"]["time_to_decision_ms"], 2.0)
+
+    def test_high_value_trigger_escalates(self):
+        self.config["reasoning_depth"] = {"high_value_triggers": ["launch_day"], "extra_critic_rounds": 2}
+        decision, prompts = self.run_loop(proposal("UPDATE_PRICE", 0.99), trigger="launch_day")
+        self.assertEqual(len(prompts), 5)  # Proposal + 3 critics + synthesis
+        self.assertEqual(decision["recursive_loop"]["critic_rounds"], 3)
+        self.assertIn("[第 2 輪批評]", prompts[3])
+
+        # A HOLD proposal still exits after Step 1
+        decision, prompts = self.run_loop(proposal("HOLD", 0.99), trigger="launch_day")
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(decision["recursive_loop"]["depth_reason"], "proposal_is_hold")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger
+from core.event_store import EventStore
+
+
+class TestEventStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = EventStore(os.path.join(self.root, "events.sqlite"), batch_rows=4)
+        self.now = datetime(2026, 3, 1, 12, 0)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _decision(self, kind, hours_ago, platform="gumroad"):
+        return {"decision": kind, "parameters": {"platform": platform, "product_id": "p1"},
+                "confidence_score": 0.8, "trigger_event": "daily_review",
+                "timestamp": (self.now - timedelta(hours=hours_ago)).replace(tzinfo=timezone.utc).isoformat()}
+
+    def test_range_query_with_filters(self):
+        """query() scans [start, end) and applies indexed equality filters"""
+        for h, kind in enumerate(["HOLD", "ADJUST_PRICE", "HOLD", "MODIFY_COPY", "HOLD"]):
+            self.store.log_decision(self._decision(kind, h))
+        rows = self.store.query("decisions", start=self.now - timedelta(hours=3),
+                                decision_type="HOLD")
+        self.assertEqual([r["timestamp"] for r in rows],
+                         [(self.now - timedelta(hours=2)).isoformat(), self.now.isoformat()])
+        self.assertEqual(rows[0]["payload"]["parameters"]["product_id"], "p1")
+
+    def test_aggregate_by_group_and_bucket(self):
+        for h in range(6):
+            self.store.log_interaction("reddit" if h % 3 else "twitter", f"t{h}", 100 * h,
+                                       timestamp=self.now - timedelta(hours=h))
+        by_platform = self.store.aggregate("interactions", group_by="platform", value="response_length")
+        self.assertEqual({r["platform"]: r["count"] for r in by_platform}, {"reddit": 4, "twitter": 2})
+        self.assertEqual({r["platform"]: r["sum"] for r in by_platform}["twitter"], 300)
+        self.assertEqual(len(self.store.aggregate("interactions", bucket="hour")), 6)
+        self.assertEqual(self.store.count("interactions", platform="twitter"), 2)
+
+    def test_timestamps_are_stored_in_utc(self):
+        """Naive decision times are local wall-clock, naive interaction times are UTC"""
+        self.store.log_decision({"decision": "HOLD", "timestamp": self.now.isoformat()})
+        self.store.log_decision({"decision": "HOLD", "timestamp": "2026-03-01T12:00:00+08:00"})
+        self.store.log_interaction("reddit", "t1", 10, timestamp=self.now)
+        utc = self.now.astimezone(timezone.utc).replace(tzinfo=None)
+        self.assertEqual([r["timestamp"] for r in self.store.query("decisions")],
+                         sorted([utc.isoformat(), "2026-03-01T04:00:00"]))
+        self.assertEqual(self.store.query("interactions")[0]["timestamp"], self.now.isoformat())
+
+        self.store.log_decision({"decision": "ADJUST_PRICE"})
+        self.store.log_interaction("reddit", "t2", 10)
+        recent = datetime.now(timezone.utc) - timedelta(minutes=1)
+        self.assertEqual(self.store.count("decisions", start=recent), 1)
+        self.assertEqual(self.store.count("interactions", start=recent), 1)
+
+    def test_decision_depth_columns(self):
+        """Adaptive-depth metadata lands in typed columns for latency / token averages"""
+        for depth, latency in [(1, 900.0), (1, 1100.0), (3, 4200.0)]:
+            rec = self._decision("HOLD", 0)
+            rec["recursive_loop"] = {"depth": depth, "llm_calls": depth, "est_tokens": 500 * depth,
+                                     "latency_ms": latency}
+            self.store.log_decision(rec)
+        by_depth = self.store.aggregate("decisions", group_by="depth", value="latency_ms")
+        self.assertEqual([(r["depth"], r["count"], r["avg"]) for r in by_depth],
+                         [(1, 2, 1000.0), (3, 1, 4200.0)])
+
+    def test_unknown_columns_rejected(self):
+        with self.assertRaises(KeyError):
+            self.store.query("decisions", owner="x")
+        with self.assertRaises(KeyError):
+            self.store.aggregate("sales; DROP TABLE sales", group_by="platform")
+
+    def test_legacy_import_is_incremental(self):
+        """JSONL lines are imported once; later appends are picked up by offset"""
+        log = os.path.join(self.root, "decision_log.jsonl")
+        with open(log, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._decision("HOLD", 1)) + "\n")
+        missing = os.path.join(self.root, "missing")
+        self.assertEqual(self.store.import_legacy(log, missing, missing)["decisions"], 1)
+        self.assertEqual(self.store.import_legacy(log, missing, missing)["decisions"], 0)
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self._decision("ADJUST_PRICE", 0)) + "\n")
+        self.assertEqual(self.store.import_legacy(log, missing, missing)["decisions"], 1)
+        self.assertEqual(self.store.count("decisions"), 2)
+
+    def test_sync_sales_from_ledger(self):
+        ledger = SalesLedger(os.path.join(self.root, "ledger"), seal_rows=4)
+        for i in range(6):
+            ledger.append("Shopify", "sale", f"o{i}", "Guide", "10", "USD", "",
+                          timestamp=self.now + timedelta(minutes=i))
+        self.assertEqual(self.store.sync_sales(ledger), 6)
+        ledger.append("Payhip", "sale", "o6", "Guide", "5", "USD", "",
+                      timestamp=self.now + timedelta(minutes=10))
+        self.assertEqual(self.store.sync_sales(ledger), 1)
+        totals = self.store.aggregate("sales", group_by="platform", value="amount")
+        self.assertEqual({r["platform"]: r["sum"] for r in totals}, {"Payhip": 5.0, "Shopify": 60.0})
+
+        # Sales are on the ledger's local clock: naive bounds are local, aware ones are converted
+        cutoff = self.now + timedelta(minutes=5)
+        self.assertEqual(self.store.count("sales", start=cutoff), 2)
+        self.assertEqual(self.store.count("sales", start=cutoff.astimezone(timezone.utc)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger, make_row
+from modules_ecom.ingest_writer import GroupCommitWriter, IngestOverloaded
+
+
+class TestGroupCommitWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ledger = SalesLedger(os.path.join(self.root, "ledger"), seal_rows=64)
+        self.committed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _row(self, i):
+        return make_row("Payhip", "sale", f"o{i}", "Guide", "5", "USD", "")
+
+    def test_batches_are_committed_in_order(self):
+        """Every submitted row lands in the ledger, in submit order"""
+        writer = GroupCommitWriter(self.ledger, on_commit=self.committed.extend,
+                                   durability="batch", max_batch=16)
+        writer.start()
+        for i in range(100):
+            writer.submit(self._row(i))
+        writer.close()
+
+        self.assertEqual(self.ledger.count(), 100)
+        self.assertEqual(self.ledger.scan(columns=["order_id"])["order_id"].tolist(),
+                         [f"o{i}" for i in range(100)])
+        self.assertEqual([r["seq"] for r in self.committed], list(range(1, 101)))
+        stats = writer.stats()
+        self.assertEqual(stats["committed"], 100)
+        self.assertLessEqual(stats["fsyncs"], stats["batches"])
+
+    def test_full_queue_rejects(self):
+        """A backlogged writer raises IngestOverloaded instead of buffering"""
+        gate = threading.Event()
+        writer = GroupCommitWriter(self.ledger, on_commit=lambda rows: gate.wait(5),
+                                   durability="none", max_queue=2, max_batch=1)
+        writer.start()
+        writer.submit(self._row(0))            # picked up, blocks in on_commit
+        while writer.stats()["queue_depth"]:
+            time.sleep(0.001)
+        writer.submit(self._row(1))
+        writer.submit(self._row(2))
+        with self.assertRaises(IngestOverloaded):
+            writer.submit(self._row(3))
+        gate.set()
+        writer.close()
+        self.assertEqual(self.ledger.count(), 3)
+        self.assertEqual(writer.stats()["rejected"], 1)
+
+    def test_futures_resolve_after_the_commit(self):
+        """A row is acknowledged only once its batch is in the ledger; a failed write fails it"""
+        released = []
+        writer = GroupCommitWriter(self.ledger, on_error=lambda rows, e: released.extend(rows),
+                                   durability="none")
+        writer.start()
+        committed = writer.submit(self._row(0))
+        self.assertEqual(committed.result(5)["order_id"], "o0")
+        self.assertEqual(self.ledger.count(), 1)
+
+        with mock.patch.object(self.ledger, "append_rows", side_effect=OSError("disk full")):
+            failed = writer.submit(self._row(1))
+            with self.assertRaises(OSError):
+                failed.result(5)
+        self.assertEqual([r["order_id"] for r in released], ["o1"])  # Released before the failure surfaced
+        writer.close()
+
+    def test_rows_written_before_a_failure_are_committed(self):
+        """A seal failing mid-batch fails (and releases) only the rows after it"""
+        ledger = SalesLedger(os.path.join(self.root, "small"), seal_rows=2)
+        released = []
+        writer = GroupCommitWriter(ledger, on_commit=self.committed.extend,
+                                   on_error=lambda rows, e: released.extend(rows), durability="none")
+        futures = [writer.submit(self._row(i)) for i in range(3)]  # One batch once started
+        with mock.patch.object(ledger, "seal", side_effect=OSError("disk full")):
+            writer.start()
+            writer.flush()
+        self.assertEqual([f.result(5)["order_id"] for f in futures[:2]], ["o0", "o1"])
+        with self.assertRaises(OSError):
+            futures[2].result(5)
+        self.assertEqual([r["order_id"] for r in self.committed], ["o0", "o1"])
+        self.assertEqual([r["order_id"] for r in released], ["o2"])
+        self.assertEqual(ledger.count(), 2)
+        writer.close()
+
+    def test_close_does_not_hang_on_a_full_queue(self):
+        gate = threading.Event()
+        writer = GroupCommitWriter(self.ledger, on_commit=lambda rows: gate.wait(5),
+                                   durability="none", max_queue=1, max_batch=1)
+        writer.start()
+        writer.submit(self._row(0))
+        while writer.stats()["queue_depth"]:
+            time.sleep(0.001)
+        writer.submit(self._row(1))  # Queue full behind a stuck commit
+        t0 = time.monotonic()
+        writer.close(timeout=0.1)
+        self.assertLess(time.monotonic() - t0, 1.0)
+        gate.set()
+
+    def test_interval_policy_syncs_when_idle(self):
+        """Unsynced rows are fsync'ed once the writer goes idle"""
+        writer = GroupCommitWriter(self.ledger, durability="interval", fsync_interval_ms=10_000)
+        writer.start()
+        writer.submit(self._row(0))
+        writer.flush()
+        writer.close()
+        self.assertEqual(writer.stats()["fsyncs"], 1)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            GroupCommitWriter(self.ledger, durability="sometimes")
+
+
+if __name__ == '__main__':
+    unittest.main()
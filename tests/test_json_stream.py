@@ -0,0 +1,50 @@
+import unittest
+import os
+import sys
+import json
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.json_stream import JSONStreamExtractor
+
+DECISION = {"decision": "ADJUST_PRICE", "parameters": {"note": "use {braces} and \"quotes\""},
+            "confidence_score": 0.8}
+REPLY = ("<think>Maybe {\"decision\": \"HOLD\"}? No.</think>\n```json\n"
+         + json.dumps(DECISION) + "\n```\nTrailing prose the caller never waits for.")
+
+
+def feed_in(text, size):
+    extractor, found = JSONStreamExtractor(), []
+    for i in range(0, len(text), size):
+        found += [(i, obj) for obj in extractor.feed(text[i:i + size])]
+    return found
+
+
+class TestJSONStreamExtractor(unittest.TestCase):
+
+    def test_any_chunking_yields_the_decision_once(self):
+        """Think tags, strings and braces split at every possible boundary"""
+        for size in (1, 2, 3, 7, 64, len(REPLY)):
+            found = feed_in(REPLY, size)
+            self.assertEqual([obj for _, obj in found], [DECISION], size)
+
+    def test_emitted_when_closing_brace_arrives(self):
+        close = REPLY.index("```\nTrailing")
+        (offset, _), = feed_in(REPLY, 1)
+        self.assertEqual(offset, close - 2)  # The "}" just before "\n```"
+
+    def test_invalid_object_is_skipped(self):
+        extractor = JSONStreamExtractor()
+        self.assertEqual(extractor.feed("{plan: {\"a\": 1} } then {\"b\": 2}"), [{"a": 1}, {"b": 2}])
+
+    def test_unterminated_think_hides_objects(self):
+        extractor = JSONStreamExtractor()
+        self.assertEqual(extractor.feed("<think>{\"a\": 1}"), [])
+        self.assertEqual(extractor.feed("</thi"), [])
+        self.assertEqual(extractor.feed("nk>{\"b\": 2}"), [{"b": 2}])
+        self.assertEqual(extractor.first, {"b": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger, to_micros
+from core.kpi_materializer import KPIMaterializer, RingWindow, HOUR_US, DAY_US
+
+
+class TestKPIMaterializer(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ledger = SalesLedger(os.path.join(self.root, "ledger"), seal_rows=8)
+        self.snapshot = os.path.join(self.root, "kpi_snapshot.json")
+        self.kpis = KPIMaterializer(self.ledger, self.snapshot)
+        self.now = datetime.now().replace(microsecond=0)
+        for i in range(20):
+            row = self.ledger.append("Shopify" if i % 4 else "Gumroad", "sale", f"o{i}",
+                                     f"SKU-{i % 3}", "10", "USD", "",
+                                     timestamp=self.now - timedelta(hours=6 * (19 - i)))
+            self.kpis.apply(row)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_incremental_matches_rebuild(self):
+        """apply() per event and a vectorised rebuild() agree"""
+        rebuilt = KPIMaterializer(self.ledger, self.snapshot)
+        rebuilt.rebuild()
+        self.assertEqual(self.kpis.snapshot(True), rebuilt.snapshot(True))
+
+    def test_snapshot_values(self):
+        """Totals, per-platform counts and sliding windows"""
+        snap = self.kpis.snapshot(include_products=True)
+        self.assertEqual(snap["total_orders"], 20)
+        self.assertEqual(snap["total_revenue"], 200.0)
+        self.assertEqual(snap["platforms"]["Gumroad"]["orders"], 5)
+        self.assertEqual(snap["products"]["SKU-0"]["orders"], 7)
+        self.assertEqual(snap["window_24h"]["orders"], 4)   # 0h, 6h, 12h, 18h ago
+        self.assertEqual(snap["window_7d"]["orders"], 20)
+        self.assertEqual(snap["last_order"]["order_id"], "o19")
+
+    def test_restore_replays_only_new_rows(self):
+        """A restart restores the snapshot and catches up from the watermark"""
+        self.kpis.save()
+        self.ledger.append("Payhip", "sale", "late", "SKU-9", "5", "USD", "")
+
+        restored = KPIMaterializer(self.ledger, self.snapshot)
+        self.assertTrue(restored.restore())
+        self.assertEqual(restored.snapshot()["total_orders"], 20)
+        restored.refresh()
+        self.assertEqual(restored.snapshot()["total_orders"], 21)
+        self.assertEqual(restored.snapshot()["last_order"]["order_id"], "late")
+
+    def test_window_by_platform(self):
+        """window() aggregates hourly buckets and filters by platform"""
+        w = self.kpis.window(start=self.now - timedelta(days=2), platform="shopify")
+        self.assertEqual(w["orders"], 7)    # 0h..48h ago, minus two Gumroad rows
+        self.assertEqual(list(w["platforms"]), ["Shopify"])
+
+    def test_ring_window_expires_old_buckets(self):
+        """Slots older than the span are ignored when read"""
+        ring = RingWindow(DAY_US, HOUR_US)
+        t0 = to_micros(datetime(2026, 1, 1))
+        ring.add(t0, 1, 5.0)
+        ring.add(t0 + 23 * HOUR_US, 1, 7.0)
+        self.assertEqual(ring.total(t0 + 23 * HOUR_US)["orders"], 2)
+        self.assertEqual(ring.total(t0 + 25 * HOUR_US), {"orders": 1, "revenue": 7.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.llm_cache import LLMCache, cache_key
+from core.llm_gateway import LLMGateway, LLMProvider
+
+
+class CountingProvider(LLMProvider):
+    name = "counting"
+    default_model = "count-1"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def _connect(self):
+        return object()
+
+    def _complete(self, client, prompt, system_prompt, model, json_mode, temperature):
+        self.calls += 1
+        return f"answer #{self.calls}"
+
+
+class TestLLMCache(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "llm_cache.sqlite")
+        self.cache = LLMCache(self.path, memory_entries=2, ttls={"default": 60, "decision": 60, "live": 0})
+        self.gateway = LLMGateway(default_provider="counting", cache=self.cache)
+        self.provider = self.gateway.register(CountingProvider())
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_key_normalizes_whitespace_only(self):
+        base = cache_key("p", "m", "sys", "line one\nline two")
+        self.assertEqual(base, cache_key("p", "m", "  sys\n", "\n  line one  \n\nline two\n"))
+        self.assertNotEqual(base, cache_key("p", "m", "sys", "line one\nline two", temperature=0.7))
+        self.assertNotEqual(base, cache_key("p", "m2", "sys", "line one\nline two"))
+        self.assertNotEqual(base, cache_key("p", "m", "sys", "line one\nline two", namespace="rsi"))
+
+    def test_rejected_replies_are_not_cached(self):
+        valid = lambda reply: reply.endswith("#2")
+        self.assertEqual(self.gateway.complete("plan", namespace="decision", validate=valid), "answer #1")
+        self.assertEqual(self.gateway.complete("plan", namespace="decision", validate=valid), "answer #2")
+        self.assertEqual(self.gateway.complete("plan", namespace="decision", validate=valid), "answer #2")
+        self.assertEqual(self.provider.calls, 2)
+        self.assertEqual(self.cache.stats()["namespaces"]["decision"]["stores"], 1)
+        # Namespaces do not share entries
+        self.assertEqual(self.gateway.complete("plan", namespace="default"), "answer #3")
+
+    def test_repeat_cycle_costs_nothing(self):
+        first = [self.gateway.complete(p, "sys", namespace="decision") for p in ("plan", "critic", "final")]
+        second = [self.gateway.complete(p, "sys", namespace="decision") for p in ("plan", "critic", "final")]
+        self.assertEqual(first, second)
+        self.assertEqual(self.provider.calls, 3)
+        stats = self.cache.stats()["namespaces"]["decision"]
+        self.assertEqual((stats["misses"], stats["stores"]), (3, 3))
+        self.assertEqual(stats["memory_hits"] + stats["disk_hits"], 3)
+        self.assertGreater(stats["disk_hits"], 0)  # LRU holds 2, third served from SQLite
+
+    def test_disk_tier_survives_restart_and_ttl(self):
+        answer = self.gateway.complete("plan", namespace="decision")
+        self.cache.close()
+        self.cache = LLMCache(self.path, ttls={"decision": 60})
+        self.gateway.cache = self.cache
+        self.assertEqual(self.gateway.complete("plan", namespace="decision"), answer)
+        self.assertEqual(self.provider.calls, 1)
+
+        self.gateway.complete("tick", namespace="live")  # TTL 0: never cached
+        self.gateway.complete("tick", namespace="live")
+        self.assertEqual(self.provider.calls, 3)
+
+        self.cache.ttls["decision"] = 0.05
+        self.gateway.complete("short", namespace="decision")
+        time.sleep(0.1)
+        self.assertEqual(self.cache.purge(), 1)  # "plan" is still fresh
+        self.assertIsNone(self.cache.get("decision", cache_key("counting", "count-1", "", "short",
+                                                              namespace="decision")))
+
+
+if __name__ == '__main__':
+    unittest.main()
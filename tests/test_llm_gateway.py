@@ -0,0 +1,309 @@
+import unittest
+import os
+import sys
+import time
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest import mock
+
+from core.llm_gateway import (LLMGateway, LLMProvider, LLMError, LLMUnavailable, LLMTimeout,
+                              CircuitBreaker, CircuitOpen, OpenAICompatibleProvider, RateLimiter,
+                              deadline)
+from core.llm_cache import LLMCache
+from core.llm_metrics import LLMMetrics
+
+
+class EchoProvider(LLMProvider):
+    """Counts client constructions; answers with the prompt it was sent"""
+
+    name = "echo"
+    default_model = "echo-1"
+
+    def _connect(self):
+        return object()
+
+    def _aconnect(self):
+        return object()
+
+    def _complete(self, client, prompt, system_prompt, model, json_mode, temperature):
+        if prompt == "boom":
+            raise RuntimeError("upstream 500")
+        return f"{model}:{system_prompt}:{prompt}"
+
+    async def _acomplete(self, client, prompt, system_prompt, model, json_mode, temperature):
+        return self._complete(client, prompt, system_prompt, model, json_mode, temperature)
+
+
+class StreamingProvider(EchoProvider):
+    """Streams a reasoning-model reply a few characters at a time; records how far it was read"""
+
+    name = "stream"
+    reply = "<think>weighing {options}</think>" + json.dumps({"decision": "HOLD"}) + " and then a long essay"
+
+    def __init__(self):
+        super().__init__()
+        self.sent = 0
+
+    def _stream(self, client, prompt, system_prompt, model, json_mode, temperature):
+        for i in range(0, len(self.reply), 4):
+            self.sent = i + 4
+            yield self.reply[i:i + 4]
+
+    async def _astream(self, client, prompt, system_prompt, model, json_mode, temperature):
+        for piece in self._stream(client, prompt, system_prompt, model, json_mode, temperature):
+            await asyncio.sleep(0)
+            yield piece
+
+
+class TestLLMGateway(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = LLMGateway(default_provider="echo")
+        self.echo = self.gateway.register(EchoProvider())
+
+    def test_client_initialised_once_across_threads(self):
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda i: self.gateway.complete(str(i), "sys"), range(64)))
+        self.assertEqual(results[5], "echo-1:sys:5")
+        self.assertEqual(self.echo.connects, 1)
+
+    def test_async_client_per_event_loop(self):
+        async def burst():
+            return await asyncio.gather(*(self.gateway.acomplete(str(i), model="m") for i in range(10)))
+
+        self.assertEqual(asyncio.run(burst())[3], "m::3")
+        asyncio.run(burst())  # A fresh loop (like asyncio.run per ROI cycle) gets its own client
+        self.assertEqual(self.echo.connects, 2)
+
+    def test_errors(self):
+        with self.assertRaises(LLMError):
+            self.gateway.complete("boom")
+        with self.assertRaises(LLMUnavailable):
+            self.gateway.complete("hi", provider="missing")
+        offline = self.gateway.register(OpenAICompatibleProvider(api_key="sk-placeholder"))
+        self.assertFalse(offline.available())
+        with self.assertRaises(LLMUnavailable):
+            self.gateway.complete("hi", provider="deepseek")
+
+    def test_per_provider_rate_limit(self):
+        self.gateway.limiters["echo"] = RateLimiter(600, burst=2)  # 10/s after two free calls
+
+        async def burst():
+            return await asyncio.gather(*(self.gateway.acomplete(str(i)) for i in range(5)))
+
+        t0 = time.perf_counter()
+        asyncio.run(burst())
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.28)  # 2 free, then 3 x 100ms
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = LLMGateway(default_provider="stream", cache=LLMCache(path=None))
+        self.backend = self.gateway.register(StreamingProvider())
+
+    def test_first_json_stops_reading_at_the_object(self):
+        obj, text, metrics = self.gateway.first_json("p", predicate=lambda o: "decision" in o)
+        self.assertEqual(obj, {"decision": "HOLD"})
+        self.assertTrue(text.startswith("<think>"))
+        self.assertLess(self.backend.sent, len(self.backend.reply))
+        self.assertTrue(metrics["stopped_early"])
+        self.assertLessEqual(metrics["ttft_ms"], metrics["time_to_decision_ms"])
+        self.assertGreater(metrics["chunks"], 1)
+
+        # The truncated reply is cached and replays the same object
+        again, _, metrics = self.gateway.first_json("p")
+        self.assertEqual(again, obj)
+        self.assertTrue(metrics["cached"])
+
+    def test_async_first_json(self):
+        obj, _, metrics = asyncio.run(self.gateway.afirst_json("p"))
+        self.assertEqual(obj, {"decision": "HOLD"})
+        self.assertEqual(metrics["chunks"], self.backend.sent // 4)
+
+    def test_full_stream_is_cached(self):
+        self.assertEqual("".join(self.gateway.stream("q")), self.backend.reply)
+        self.assertEqual(list(self.gateway.stream("q")), [self.backend.reply])
+
+    def test_non_streaming_provider_is_one_chunk(self):
+        self.gateway.register(EchoProvider())
+        self.assertEqual(list(self.gateway.stream("x", provider="echo")), ["echo-1::x"])
+        obj, text, metrics = self.gateway.first_json("no json", provider="echo")
+        self.assertIsNone(obj)
+        self.assertEqual(text, "echo-1::no json")
+        self.assertIsNone(metrics["time_to_decision_ms"])
+        with self.assertRaises(LLMError):
+            self.gateway.first_json("boom", provider="echo")
+
+
+class SlowProvider(EchoProvider):
+    """Answers a decision after `delay` seconds, or fails; counts calls"""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        super().__init__()
+        self.name, self.delay, self.fail, self.calls = name, delay, fail, 0
+
+    def _complete(self, client, prompt, system_prompt, model, json_mode, temperature):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream 503")
+        return f'{self.name}: {{"decision": "HOLD"}}'
+
+    async def _acomplete(self, client, prompt, system_prompt, model, json_mode, temperature):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream 503")
+        return f'{self.name}: {{"decision": "HOLD"}}'
+
+
+class TestRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = LLMMetrics(path=None)
+        self.gateway = LLMGateway(default_provider="primary", fallback="backup", metrics=self.metrics)
+        self.primary = self.gateway.register(SlowProvider("primary"))
+        self.backup = self.gateway.register(SlowProvider("backup"))
+
+    def test_failover_and_circuit_breaker(self):
+        self.primary.fail = True
+        self.gateway.breakers["primary"] = CircuitBreaker(failures=2, reset_seconds=0.2)
+        for _ in range(3):
+            self.assertTrue(self.gateway.complete("p").startswith("backup"))
+        self.assertEqual(self.primary.calls, 2)  # Open after two failures: the third skips it
+        self.assertEqual(self.gateway.breakers["primary"].state, "open")
+        with self.assertRaises(CircuitOpen):
+            self.gateway.complete("p", provider="primary")
+
+        time.sleep(0.25)
+        self.primary.fail = False  # Recovered: the half-open probe closes the circuit
+        self.assertTrue(self.gateway.complete("p").startswith("primary"))
+        self.assertEqual(self.gateway.breakers["primary"].state, "closed")
+
+        self.backup.fail = self.primary.fail = True
+        with self.assertRaises(LLMError):
+            self.gateway.complete("q")
+        self.assertEqual(self.gateway.route(provider="backup"), ["backup"])
+
+    def test_hedged_away_probe_frees_the_breaker(self):
+        breaker = self.gateway.breakers["primary"] = CircuitBreaker(failures=1, reset_seconds=0.05)
+        breaker.failure()
+        time.sleep(0.06)
+        self.primary.delay = 1.0
+        with mock.patch("core.llm_gateway.HEDGE_DEFAULT_MS", 50), mock.patch("core.llm_gateway.HEDGE_FLOOR_MS", 0):
+            # The half-open probe is slow, the backup answers first and the probe is cancelled
+            self.assertTrue(asyncio.run(self.gateway.acomplete("p")).startswith("backup"))
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.allow())  # A later call can still probe
+        breaker.release()
+
+        # A probe whose provider turns out unavailable leaves no outcome either
+        with mock.patch.object(self.primary, "_acomplete", side_effect=LLMUnavailable("no key")):
+            with self.assertRaises(LLMUnavailable):
+                asyncio.run(self.gateway.acomplete("q", provider="primary"))
+        self.assertTrue(breaker.allow())
+
+        breaker.release()
+
+        # Streams too, when opening the stream fails before the first chunk
+        with mock.patch.object(self.primary, "client", side_effect=LLMUnavailable("no key")):
+            with self.assertRaises(LLMUnavailable):
+                list(self.gateway.stream("r", provider="primary"))
+        self.assertTrue(breaker.allow())
+        breaker.release()
+        with mock.patch.object(self.primary, "async_client", side_effect=ConnectionError("refused")):
+            async def drain():
+                return [piece async for piece in self.gateway.astream("s", provider="primary")]
+            with self.assertRaises(LLMError):
+                asyncio.run(drain())
+        self.assertEqual(breaker.state, "open")  # A failed connect is the probe's outcome
+
+    def test_slow_primary_is_hedged(self):
+        self.primary.delay = 1.0
+        with mock.patch("core.llm_gateway.HEDGE_DEFAULT_MS", 50), mock.patch("core.llm_gateway.HEDGE_FLOOR_MS", 0):
+            t0 = time.perf_counter()
+            obj, _, stream = self.gateway.first_json("p")
+            self.assertLess(time.perf_counter() - t0, 0.5)
+            self.assertEqual((obj, stream["provider"], stream["attempts"]), ({"decision": "HOLD"}, "backup", 2))
+
+            t0 = time.perf_counter()
+            self.assertTrue(asyncio.run(self.gateway.acomplete("q")).startswith("backup"))
+            self.assertLess(time.perf_counter() - t0, 0.5)
+        self.assertEqual(self.metrics.snapshot()["default"]["cancelled"], 1)  # The async loser
+
+        # Once enough latencies are measured, the hedge waits for the primary's p95
+        for _ in range(20):
+            self.metrics.record("default", "primary", "echo-1", 1, 1, 2000.0)
+        self.assertAlmostEqual(self.gateway.hedge_delay("primary"), 2.0)
+
+    def test_deadline(self):
+        self.primary.delay = self.backup.delay = 1.0
+        t0 = time.perf_counter()
+        with deadline(0.1):
+            with self.assertRaises(LLMTimeout):
+                self.gateway.complete("p", provider="primary")
+
+            async def decide():
+                return await self.gateway.afirst_json("q")
+
+            with self.assertRaises(LLMTimeout):
+                asyncio.run(decide())
+        self.assertLess(time.perf_counter() - t0, 0.6)
+        self.assertEqual(self.gateway.complete("p", provider="backup")[:6], "backup")  # No deadline outside
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = LLMMetrics(path=None)
+        self.gateway = LLMGateway(default_provider="slow", metrics=self.metrics)
+        self.slow = self.gateway.register(SlowProvider("slow", delay=0.2))
+
+    def test_identical_requests_share_one_call(self):
+        self.gateway.limiters["slow"] = RateLimiter(60, burst=1)  # A second real call would wait a second
+
+        async def tasks():
+            return await asyncio.gather(*(self.gateway.acomplete("brief") for _ in range(8)))
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(8) as pool:
+            threads = [pool.submit(self.gateway.complete, "brief") for _ in range(8)]
+            answers = asyncio.run(tasks()) + [f.result() for f in threads]
+        self.assertLess(time.perf_counter() - t0, 0.8)
+        self.assertEqual(set(answers), {'slow: {"decision": "HOLD"}'})
+        self.assertEqual(self.slow.calls, 1)
+        self.assertEqual(self.metrics.snapshot()["default"]["coalesced"], 15)
+
+        self.gateway.complete("brief")  # Nothing in flight any more: a new call
+        self.assertEqual(self.slow.calls, 2)
+
+    def test_errors_fan_out_and_cancelled_leaders_hand_over(self):
+        self.slow.fail = True
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(self.gateway.complete, "x") for _ in range(4)]
+            errors = [f.exception() for f in futures]
+        self.assertTrue(all(isinstance(e, LLMError) for e in errors))
+        self.assertEqual(self.slow.calls, 1)
+
+        self.slow.fail = False
+
+        async def scenario():
+            leader = asyncio.ensure_future(self.gateway.acomplete("y"))
+            await asyncio.sleep(0.05)
+            follower = asyncio.ensure_future(self.gateway.acomplete("y"))
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            return await follower
+
+        self.assertTrue(asyncio.run(scenario()).startswith("slow"))
+        self.assertEqual(self.slow.calls, 3)  # The follower took over after the leader was cancelled
+
+
+if __name__ == '__main__':
+    unittest.main()
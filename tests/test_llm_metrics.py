@@ -0,0 +1,114 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import asyncio
+import tempfile
+import urllib.request
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.llm_metrics import LLMMetrics, estimate_cost, metered, start_metrics_server
+from core.llm_gateway import LLMGateway, LLMError, LLMUnavailable, OpenAICompatibleProvider
+from core.llm_cache import LLMCache
+from core.llm_standin import StandInProvider
+from core.router import MetaCognitiveRouter
+
+
+class TestLLMMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "llm_metrics.jsonl")
+        self.metrics = LLMMetrics(path=self.path)
+        self.gateway = LLMGateway(default_provider="standin", cache=LLMCache(path=None), metrics=self.metrics)
+        self.provider = self.gateway.register(StandInProvider(corpus=[]), rpm=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_gateway_calls_are_recorded_per_namespace(self):
+        self.gateway.complete("hello", namespace="rsi")
+        self.gateway.complete("hello", namespace="rsi")  # Cache hit
+        self.gateway.first_json('{"decision": ?}', namespace="decision")
+        self.provider.error_rate = 1.0
+        with self.assertRaises(LLMError):
+            self.gateway.complete("other", namespace="rsi")
+        self.metrics.record_retry("decision", 2)
+
+        snap = self.metrics.snapshot()
+        self.assertEqual((snap["rsi"]["ok"], snap["rsi"]["cached"], snap["rsi"]["error"]), (1, 1, 1))
+        self.assertEqual(snap["decision"]["ok"], 1)
+        self.assertEqual(snap["decision"]["retries"], 2)
+        self.assertGreater(snap["decision"]["completion_tokens"], 0)
+
+        text = self.metrics.prometheus()
+        self.assertIn('yedan_llm_calls_total{namespace="rsi",provider="standin",model="standin-1",status="cached"} 1', text)
+        self.assertIn('yedan_llm_latency_ms_bucket{namespace="rsi",provider="standin",model="standin-1",le="+Inf"} 2', text)
+        self.assertIn('yedan_llm_retries_total{namespace="decision"} 2', text)
+
+    def test_unavailable_provider_is_not_billed(self):
+        self.gateway.register(OpenAICompatibleProvider(api_key="sk-placeholder"))  # Not configured
+        with self.assertRaises(LLMUnavailable):
+            self.gateway.complete("hello", provider="deepseek", namespace="rsi")
+        with self.assertRaises(LLMUnavailable):
+            list(self.gateway.stream("hello", provider="deepseek", namespace="rsi"))
+        self.assertNotIn("rsi", self.metrics.snapshot())
+
+    def test_cost_uses_model_prices(self):
+        self.assertAlmostEqual(estimate_cost("deepseek-reasoner", 1_000_000, 1_000_000), 0.55 + 2.19)
+        self.metrics.record("decision", "deepseek", "deepseek-reasoner", 2000, 1000, 1500.0)
+        rolling = self.metrics.rolling("decision")
+        self.assertAlmostEqual(rolling["avg_cost_usd"], (2000 * 0.55 + 1000 * 2.19) / 1e6)
+        self.assertEqual(rolling["avg_latency_ms"], 1500.0)
+
+    def test_spans_follow_async_tasks_and_seed_new_processes(self):
+        @metered("decision_cycle")
+        async def cycle(i):
+            await asyncio.gather(*(self.gateway.acomplete(f"{i}-{k}") for k in range(3)))
+
+        with mock.patch("core.llm_metrics.get_llm_metrics", return_value=self.metrics):
+            for i in range(4):
+                asyncio.run(cycle(i))
+            with self.metrics.span("decision_cycle"):
+                pass  # No calls: not a sample
+        self.assertEqual(self.metrics.span_average("decision_cycle")["samples"], 4)
+        self.assertEqual(self.metrics.span_average("decision_cycle")["avg_calls"], 3)
+
+        self.metrics.flush()
+        with open(self.path, encoding="utf-8") as f:
+            kinds = [json.loads(line)["type"] for line in f]
+        self.assertEqual((kinds.count("call"), kinds.count("span")), (12, 4))
+        reborn = LLMMetrics(path=self.path)
+        self.assertEqual(reborn.span_average("decision_cycle")["samples"], 4)
+        self.assertEqual(reborn.rolling("default")["samples"], 12)
+
+    def test_router_reads_measured_cycle_cost(self):
+        router = MetaCognitiveRouter({})
+        with mock.patch("core.router.get_llm_metrics", return_value=self.metrics):
+            self.assertEqual(router.API_COST_SYSTEM_2, 0.50)  # Prior until enough samples
+            for _ in range(5):
+                with self.metrics.span("decision_cycle"):
+                    self.metrics.record("decision", "gemini", "gemini-2.0-flash-001", 4000, 1000, 900.0)
+            measured = (4000 * 0.10 + 1000 * 0.40) / 1e6
+            self.assertAlmostEqual(router.API_COST_SYSTEM_2, measured)
+            # $60 at stake: 10% of the 20% margin is $1.20, far above the measured cost
+            self.assertTrue(router._assess_value_of_information({"potential_revenue": 60.0}))
+
+    def test_metrics_endpoint(self):
+        self.metrics.record("rsi", "gemini", "gemini-2.0-flash-001", 10, 10, 5.0)
+        server = start_metrics_server(self.metrics, 0, host="127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=10) as resp:
+                body = resp.read().decode("utf-8")
+        finally:
+            server.shutdown()
+        self.assertIn("# TYPE yedan_llm_latency_ms histogram", body)
+
+
+if __name__ == '__main__':
+    unittest.main()
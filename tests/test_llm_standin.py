@@ -0,0 +1,148 @@
+import unittest
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import urllib.error
+import urllib.request
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger
+from core.llm_gateway import LLMGateway, LLMError
+from core.llm_standin import StandInProvider, install_standin, load_corpus, start_server
+from core.decision_engine import ECOMDecisionEngine, CRITIC_SYSTEM
+
+STATE = {"conversion_rate": 0.02, "total_revenue": 900.0, "total_orders": 30,
+         "recent_orders_24h": 2, "recent_revenue_24h": 40.0, "data_available": True}
+
+
+def post(url, payload):
+    request = urllib.request.Request(url + "/chat/completions", data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as resp:
+        return resp.read().decode("utf-8")
+
+
+class TestStandInProvider(unittest.TestCase):
+
+    def test_replies_are_deterministic_and_parseable(self):
+        a, b = StandInProvider(corpus=[], seed=1), StandInProvider(corpus=[], seed=1)
+        prompt = 'Reply with {"decision": ...}'
+        self.assertEqual(a.respond(prompt), b.respond(prompt))
+        self.assertNotEqual(a.respond(prompt), a.respond(prompt, temperature=1.0))
+
+        gateway = LLMGateway(default_provider="standin")
+        gateway.register(a)
+        decision, _, metrics = gateway.first_json(prompt)
+        self.assertIn(decision["decision"], ("UPDATE_PRICE", "MODIFY_COPY", "HOLD"))
+        self.assertTrue(0 <= decision["confidence_score"] <= 1)
+        self.assertTrue(metrics["stopped_early"])
+
+        self.assertFalse(a.respond("risks?", CRITIC_SYSTEM).lstrip().startswith("{"))
+        self.assertIn('"risk_score"', a.respond("risks? end with {\"risk_score\": 1-10}", CRITIC_SYSTEM))
+
+    def test_replays_recorded_decisions(self):
+        root = tempfile.mkdtemp()
+        try:
+            log = os.path.join(root, "decision_log.jsonl")
+            with open(log, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"decision": "HOLD", "parameters": {}, "confidence_score": 1.0,
+                                    "reasoning": "recorded", "market_state": {"x": 1}}) + "\n")
+                f.write("not json\n")
+            provider = StandInProvider(corpus=load_corpus(log))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        self.assertEqual(provider.corpus, [{"decision": "HOLD", "parameters": {}, "confidence_score": 1.0,
+                                            "reasoning": "recorded"}])
+        self.assertIn('"reasoning": "recorded"', provider.respond('{"decision": ...}'))
+
+    def test_latency_throughput_and_errors(self):
+        provider = StandInProvider(corpus=[], latency_ms=20, tokens_per_second=2000, error_rate=0.3, seed=3)
+        gateway = LLMGateway(default_provider="standin")
+        gateway.register(provider, rpm=0)
+        outcomes = []
+        for i in range(20):
+            t0 = time.perf_counter()
+            try:
+                text = gateway.complete(f"prompt {i}")
+                outcomes.append(True)
+                self.assertGreaterEqual(time.perf_counter() - t0, 0.02 + len(text) / 4 / 2000 * 0.9)
+            except LLMError:
+                outcomes.append(False)
+        self.assertEqual(provider.errors, outcomes.count(False))
+        self.assertTrue(0 < provider.errors < 20)
+
+        # The same seed injects the same failures
+        replay = StandInProvider(corpus=[], error_rate=0.3, seed=3)
+        gateway.register(replay, rpm=0)
+        again = []
+        for i in range(20):
+            try:
+                gateway.complete(f"prompt {i}")
+                again.append(True)
+            except LLMError:
+                again.append(False)
+        self.assertEqual(again, outcomes)
+
+
+class TestStandInPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_decision_loop_runs_offline(self):
+        gateway = LLMGateway(default_provider="gemini")
+        provider = install_standin(gateway, corpus=[])
+        with mock.patch("core.decision_engine.get_materializer"):
+            engine = ECOMDecisionEngine(ledger=SalesLedger(os.path.join(self.root, "ledger")))
+        engine._load_config = lambda: {"strategy_parameters": {"risk_tolerance": "medium"}}
+        engine._read_market_state = lambda: dict(STATE)
+        with mock.patch("core.llm_gateway._default_gateway", gateway), \
+                mock.patch("core.decision_engine.kill_switch_active", return_value=False):
+            decisions = [engine.analyze_and_decide(f"trigger_{i}") for i in range(5)]
+        self.assertTrue(all(d and d["decision"] in ("UPDATE_PRICE", "MODIFY_COPY", "HOLD") for d in decisions))
+        self.assertEqual(gateway.provider("deepseek"), provider)
+        self.assertGreaterEqual(provider.calls, 5)
+
+        # Configured providers failing means no decision, not the canned mock one
+        provider.error_rate = 1.0
+        with mock.patch("core.llm_gateway._default_gateway", gateway), \
+                mock.patch("core.decision_engine.kill_switch_active", return_value=False):
+            self.assertIsNone(engine.analyze_and_decide("trigger_down"))
+
+    def test_http_server(self):
+        server = start_server(StandInProvider(corpus=[], error_rate=0.0))
+        try:
+            prompt = {"messages": [{"role": "system", "content": "s"},
+                                   {"role": "user", "content": 'Reply with {"decision": ...}'}]}
+            reply = json.loads(post(server.url, prompt))
+            content = reply["choices"][0]["message"]["content"]
+            self.assertIn('"decision"', content)
+
+            events = [line[6:] for line in post(server.url, {**prompt, "stream": True}).splitlines()
+                      if line.startswith("data: ")]
+            self.assertEqual(events[-1], "[DONE]")
+            streamed = "".join(json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1])
+            self.assertEqual(streamed, content)
+        finally:
+            server.shutdown()
+
+        failing = start_server(StandInProvider(corpus=[], error_rate=1.0))
+        try:
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                post(failing.url, {"messages": [{"role": "user", "content": "hi"}], "stream": True})
+            self.assertEqual(ctx.exception.code, 503)
+        finally:
+            failing.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
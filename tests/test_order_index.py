@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger
+from core.order_index import OrderIndex, BloomFilter
+
+
+class TestOrderIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ledger = SalesLedger(os.path.join(self.root, "ledger"), seal_rows=4)
+        self.path = os.path.join(self.root, "order_index.sqlite")
+        self.index = OrderIndex(self.path, bloom_capacity=1000)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_duplicate_claim_is_rejected(self):
+        """A retried delivery is a duplicate before and after commit"""
+        self.assertTrue(self.index.claim("Shopify", "1001"))
+        self.assertFalse(self.index.claim("Shopify", "1001"))     # still pending
+        self.index.commit([self.ledger.append("Shopify", "sale", "1001", "P", "5", "USD", "")])
+        self.assertFalse(self.index.claim("shopify", "1001"))     # persisted
+        self.assertTrue(self.index.claim("Gumroad", "1001"))      # other platform
+
+    def test_index_survives_restart(self):
+        self.index.claim("Payhip", "a")
+        self.index.commit([self.ledger.append("Payhip", "sale", "a", "P", "5", "USD", "")])
+        self.index.close()
+
+        self.index = OrderIndex(self.path, bloom_capacity=1000)
+        self.assertTrue(self.index.seen("Payhip", "a"))
+        self.assertFalse(self.index.seen("Payhip", "b"))
+
+    def test_release_lets_retry_through(self):
+        """Claims of rows that failed to write are given back"""
+        self.index.claim("Gumroad", "x")
+        self.index.release([{"platform": "Gumroad", "order_id": "x"}])
+        self.assertTrue(self.index.claim("Gumroad", "x"))
+
+    def test_pending_claim_resolves_with_its_write(self):
+        """A retry can wait on the original claim: True once committed, False once released"""
+        self.index.claim("Shopify", "2001")
+        claim = self.index.pending("shopify", "2001")
+        self.assertFalse(claim.done())
+        self.index.commit([self.ledger.append("Shopify", "sale", "2001", "P", "5", "USD", "")])
+        self.assertTrue(claim.result(0))
+        self.assertIsNone(self.index.pending("Shopify", "2001"))  # Committed, not pending
+
+        self.index.claim("Shopify", "2002")
+        claim = self.index.pending("Shopify", "2002")
+        self.index.release([{"platform": "Shopify", "order_id": "2002"}])
+        self.assertFalse(claim.result(0))
+        self.assertIsNone(self.index.pending("Shopify", "2002"))
+
+    def test_rebuild_and_catch_up_from_ledger(self):
+        for i in range(10):
+            self.ledger.append("Shopify", "sale", f"o{i}", "P", "5", "USD", "")
+        self.assertEqual(self.index.rebuild(self.ledger), 10)
+        self.assertFalse(self.index.claim("Shopify", "o7"))
+
+        # Written to the ledger but never committed to the index (crash)
+        self.ledger.append("Shopify", "sale", "late", "P", "5", "USD", "")
+        self.assertEqual(self.index.catch_up(self.ledger), 1)
+        self.assertTrue(self.index.seen("Shopify", "late"))
+
+    def test_empty_order_id_is_never_deduplicated(self):
+        self.assertTrue(self.index.claim("Shopify", ""))
+        self.assertTrue(self.index.claim("Shopify", ""))
+
+    def test_bloom_has_no_false_negatives(self):
+        bloom = BloomFilter(500)
+        keys = [f"k{i}" for i in range(500)]
+        for k in keys:
+            bloom.add(k)
+        self.assertTrue(all(k in bloom for k in keys))
+        false_hits = sum(f"other{i}" in bloom for i in range(5000))
+        self.assertLess(false_hits, 150)    # ~1% target rate
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import json
+import time
+import asyncio
+import shutil
+import tempfile
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger
+from core.decision_engine import ECOMDecisionEngine
+
+STATE = {"conversion_rate": 0.02, "total_revenue": 900.0, "total_orders": 30,
+         "recent_orders_24h": 2, "recent_revenue_24h": 40.0, "data_available": True}
+LATENCY = 0.1
+
+
+class FakeLLM:
+    """Async stand-in: fixed latency, tracks in-flight calls"""
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = self.peak = 0
+
+    async def __call__(self, prompt, system_prompt, fallback=None, namespace=None, temperature=None, strict=False):
+        self.calls.append((prompt, temperature))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(LATENCY)
+        self.in_flight -= 1
+        if "[候選計畫 1" in prompt:
+            return json.dumps({"decision": "MODIFY_COPY", "parameters": {}, "confidence_score": 0.9,
+                               "reasoning": "synthesized"})
+        if "risk_score" in prompt:
+            # Critic: the aggressive persona's plan is the risky one
+            return '- risk\n{"risk_score": %d}' % (8 if "UPDATE_PRICE" in prompt.split("[觸發")[0] else 2)
+        action = "UPDATE_PRICE" if temperature and temperature >= 1.0 else "MODIFY_COPY"
+        return json.dumps({"decision": action, "confidence_score": 0.8, "reasoning": "draft"})
+
+
+class TestParallelDecisions(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        with mock.patch("core.decision_engine.get_materializer"):
+            self.engine = ECOMDecisionEngine(ledger=SalesLedger(os.path.join(self.root, "ledger")))
+        self.engine._load_config = lambda: {"strategy_parameters": {"risk_tolerance": "medium"}}
+        self.engine._read_market_state = lambda: dict(STATE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def run_async(self, **kwargs):
+        llm = FakeLLM()
+        with mock.patch("core.decision_engine.acall_llm_api", llm), \
+                mock.patch("core.decision_engine.kill_switch_active", return_value=False):
+            t0 = time.perf_counter()
+            decision = asyncio.run(self.engine.analyze_and_decide_async("daily_review", **kwargs))
+        return decision, llm, time.perf_counter() - t0
+
+    def test_fan_out_costs_one_serial_pass(self):
+        decision, llm, elapsed = self.run_async(k=5, concurrency=8)
+        self.assertEqual(len(llm.calls), 11)  # 5 proposals + 5 critiques + 1 synthesis
+        self.assertLess(elapsed, 5 * LATENCY)  # Three rounds, not eleven sequential calls
+        self.assertEqual({t for _, t in llm.calls[:5]}, {0.2, 0.7, 1.0, 0.3, 0.8})
+        self.assertEqual(decision["reasoning"], "synthesized")
+        self.assertEqual(decision["recursive_loop"]["proposals"], 5)
+        scores = decision["candidates"]
+        self.assertEqual(scores[-1]["persona"], "challenger")  # High critic risk sorts last
+        self.assertNotIn("UPDATE_PRICE", llm.calls[-1][0].split("[批評意見]")[0])
+
+    def test_concurrency_cap(self):
+        _, llm, elapsed = self.run_async(k=4, concurrency=2)
+        self.assertEqual(llm.peak, 2)
+        self.assertGreaterEqual(elapsed, 5 * LATENCY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger
+from core.rollups import SalesRollups
+from core.pnl import PnLEngine, FeeTable
+
+
+class TestPnLEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.marketing = os.path.join(self.root, "marketing_spend.json")
+        self._write_marketing([
+            {"date": (self.today - timedelta(days=2)).strftime("%Y-%m-%d"), "spend": 10.0},
+            {"date": (self.today - timedelta(days=20)).strftime("%Y-%m-%d"), "spend": 99.0},
+            {"date": "not-a-date", "spend": 1.0},
+        ])
+        self.pnl = PnLEngine(marketing_path=self.marketing)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write_marketing(self, ad_spend):
+        with open(self.marketing, "w", encoding="utf-8") as f:
+            json.dump({
+                "daily_ad_spend": ad_spend,
+                "platform_fees": {"gumroad": {"percent": 0.10, "fixed": 0.30},
+                                  "shopify": {"percent": 0.029, "fixed": 0.30}},
+                "monthly_fixed_costs": {"shopify_subscription": 30.0},
+            }, f)
+
+    def test_matches_row_by_row_fees(self):
+        """Vectorized fees equal the old per-row loop, unknown platforms fall back to gumroad"""
+        platforms = ["Gumroad", "Shopify", "etsy", "shopify"]
+        amounts = [10.0, 20.0, 5.0, 40.0]
+        expected = (10 * 0.10 + 0.30) + (20 * 0.029 + 0.30) + (5 * 0.10 + 0.30) + (40 * 0.029 + 0.30)
+        stmt = self.pnl.statement(platforms, amounts, start=self.today - timedelta(days=7), days=7)
+        self.assertEqual(stmt["tx_costs"], round(expected, 2))
+        self.assertEqual(stmt["ad_spend"], 11.0)  # 2 days ago + unparseable date
+        self.assertEqual(stmt["fixed_costs"], 7.0)
+        self.assertEqual(stmt["net_profit"], round(75.0 - expected - 11.0 - 7.0, 2))
+        self.assertEqual(stmt["by_platform"]["shopify"]["orders"], 1)
+
+    def test_preaggregated_rows_and_categoricals(self):
+        raw = self.pnl.statement(pd.Categorical(["Shopify"] * 3 + ["Gumroad"]), [10.0, 10.0, 10.0, 5.0], days=1)
+        agg = self.pnl.statement(["Shopify", "Gumroad"], [30.0, 5.0], orders=[3, 1], days=1)
+        self.assertEqual(raw["tx_costs"], agg["tx_costs"])
+        self.assertEqual(agg["orders"], 4)
+
+    def test_estimated_ad_spend_and_reload(self):
+        """No ad entries -> $5/day assumed; edits to the JSON are picked up"""
+        self._write_marketing([])
+        os.utime(self.marketing, (0, 0))
+        stmt = self.pnl.statement([], [], days=7)
+        self.assertTrue(stmt["ad_spend_estimated"])
+        self.assertEqual(stmt["ad_spend"], 35.0)
+        self.assertEqual(stmt["roas"], 0.0)
+
+    def test_window_from_rollups(self):
+        ledger = SalesLedger(os.path.join(self.root, "ledger"))
+        for d in range(10):
+            ledger.append("Shopify", "sale", f"o{d}", "Pack", "20", "USD", "",
+                          timestamp=self.today - timedelta(days=d, hours=-12))
+        rollups = SalesRollups(ledger, os.path.join(self.root, "events.sqlite"), fee_rates={})
+        pnl = PnLEngine(ledger, rollups, marketing_path=self.marketing)
+        stmt = pnl.window(start=self.today - timedelta(days=4), end=self.today + timedelta(days=1))
+        self.assertEqual(stmt["orders"], 5)
+        self.assertEqual(stmt["revenue"], 100.0)
+        self.assertEqual(stmt["tx_costs"], round(5 * (20 * 0.029 + 0.30), 2))
+        rollups.close()
+
+    def test_fee_table_codes(self):
+        table = FeeTable({"Shopify": {"percent": 0.029, "fixed": 0.30}})
+        codes = table.lookup(["shopify", "unknown"])
+        self.assertEqual(codes[1], table.fallback_code)
+        np.testing.assert_allclose(table.fees(codes, [100.0, 100.0]), [3.2, 10.3])
+
+
+if __name__ == '__main__':
+    unittest.main()
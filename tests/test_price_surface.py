@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.price_surface import PriceSurface, get_price_surface, SURFACE_METRICS
+from core.ecom_executor import ECOMExecutor
+
+
+class TestPriceSurface(unittest.TestCase):
+
+    def test_optimum_matches_the_closed_form(self):
+        # E[impact] = (1 + c)(1 - c * mean elasticity) - 1, maximal at c = (1 - e) / 2e
+        surface = PriceSurface.sweep(changes=np.round(np.arange(-0.3, 0.31, 0.01), 2), elasticities=[(1.5, 0.5)],
+                                     volatilities=[0.2], runs=50_000, workers=1)
+        best = surface.optimum()
+        self.assertAlmostEqual(best["price_change"], -1 / 6, delta=0.015)
+        self.assertAlmostEqual(best["expected_impact"], (5 / 6) * 1.25 - 1, delta=0.003)
+        self.assertLess(best["band"][0], best["expected_impact"])
+        self.assertGreater(best["band"][1], best["expected_impact"])
+
+        # Shared shocks: the surface is smooth, so its maximum is not sampling noise
+        expected = surface.metric("expected_impact")[0, 0]
+        closed_form = (1 + surface.changes) * (1 - surface.changes * 1.5) - 1
+        self.assertLess(np.abs(np.diff(expected - closed_form)).max(), 1e-3)
+
+    def test_regimes_and_risk_limit(self):
+        surface = get_price_surface(runs=20_000, workers=1)
+        self.assertIs(surface, get_price_surface(runs=20_000, workers=1))  # Cached
+        self.assertEqual(surface.values.shape, (3, 3, 13, len(SURFACE_METRICS)))
+
+        self.assertLess(surface.optimum(elasticity=2.4)["price_change"], 0)   # Elastic demand: cut
+        self.assertGreater(surface.optimum(elasticity=0.7)["price_change"], 0)  # Inelastic: raise
+        turbulent = surface.optimum(volatility=0.4, max_risk_of_ruin=0.13)
+        self.assertLessEqual(turbulent["risk_of_ruin"], 0.13)
+        self.assertEqual(turbulent["volatility"], 0.4)
+
+    def test_process_pool_fills_the_same_surface(self):
+        grid = dict(changes=(-0.2, 0.0, 0.2), elasticities=[(0.8, 0.3), (1.5, 0.5)], volatilities=(0.1, 0.4),
+                    runs=5_000, seed=3)
+        serial = PriceSurface.sweep(workers=1, **grid)
+        pooled = PriceSurface.sweep(workers=2, **grid)
+        np.testing.assert_array_equal(serial.values, pooled.values)
+
+    def test_executor_prices_from_the_surface(self):
+        executor = ECOMExecutor.__new__(ECOMExecutor)
+        executor.action_log = []
+        decision = {"decision": "UPDATE_PRICE",
+                    "parameters": {"platform": "gumroad", "product_id": "p1", "new_price": 25}}
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        listed = {"price": 2000}  # Cents, as the platform reports it
+
+        def update_price(product_id, price):
+            listed["price"] = round(price * 100)
+            return True
+
+        with mock.patch("core.ecom_executor.kill_switch_active", return_value=False), \
+                mock.patch("core.ecom_executor.bridge_gumroad.get_product_details", side_effect=lambda _: listed), \
+                mock.patch("core.ecom_executor.bridge_gumroad.update_price", side_effect=update_price) as update:
+            self.assertTrue(executor.execute_decision(decision))
+            self.assertEqual(update.call_args.args, ("p1", 25.0))  # Off by default: the proposed price
+
+            with mock.patch("core.ecom_executor.PRICE_FROM_SURFACE", True), \
+                    mock.patch("core.ecom_executor.PRICE_ANCHORS_PATH", os.path.join(root, "anchors.json")):
+                listed["price"] = 2000
+                # Repeated updates stay at -15% of the $20 reference instead of compounding
+                for _ in range(6):
+                    self.assertTrue(executor.execute_decision(decision))
+                    self.assertEqual(update.call_args.args, ("p1", 17.0))
+
+                with mock.patch("core.ecom_executor.PRICE_MAX_TOTAL_CHANGE", 0.1):
+                    executor.execute_decision(decision)
+                self.assertEqual(update.call_args.args, ("p1", 18.0))
+
+                # No current price anywhere: the proposed price stands
+                listed.clear()
+                executor.execute_decision(decision)
+                self.assertEqual(update.call_args.args, ("p1", 25.0))
+
+if __name__ == '__main__':
+    unittest.main()
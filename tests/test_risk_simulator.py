@@ -0,0 +1,113 @@
+import unittest
+import os
+import sys
+import time
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.risk_simulator import CortexRiskSimulator, HaltonSequence, SIMULATION_BATCH
+
+FIXED = {"target_ci": 0, "target_win_ci": 0}  # Always the full path count
+
+
+class TestCortexRiskSimulator(unittest.TestCase):
+
+    def test_matches_the_closed_form(self):
+        # UPDATE_PRICE without market drift: 0.9 * (1 + 0.1 * e) - 1 = -0.1 + 0.09 e, e ~ N(1.5, 0.5)
+        result = CortexRiskSimulator(config=FIXED, runs=200_000, seed=1).simulate_decision(
+            "UPDATE_PRICE", {"cvr": 0.02, "volatility": 0.0})
+        self.assertAlmostEqual(result["expected_impact"], 0.035, delta=0.001)
+        self.assertAlmostEqual(result["win_probability"], 0.782, delta=0.005)  # P(e > 1/0.9)
+        self.assertAlmostEqual(result["p90_worst_case"], 0.035 - 1.2816 * 0.045, delta=0.001)
+        self.assertEqual(result["paths"], 200_000)
+
+        hold = CortexRiskSimulator(config=FIXED, runs=200_000, seed=1).simulate_decision("HOLD", {"volatility": 0.4})
+        self.assertAlmostEqual(hold["risk_of_ruin"], 0.1587, delta=0.005)  # P(0.5 * N(0, 0.4) < -0.2)
+        self.assertAlmostEqual(hold["var_95"], 1.645 * 0.2, delta=0.005)
+        self.assertAlmostEqual(hold["cvar_95"], 2.063 * 0.2, delta=0.005)  # phi(1.645) / 0.05
+
+    def test_chunking_and_seeds_are_reproducible(self):
+        whole = CortexRiskSimulator(config=FIXED, runs=10_000, seed=3).simulate_decision("MODIFY_COPY", {})
+        with mock.patch("core.risk_simulator.SIMULATION_CHUNK", 999):
+            chunked = CortexRiskSimulator(config=FIXED, runs=10_000, seed=3).simulate_decision("MODIFY_COPY", {})
+        for key in whole:
+            self.assertAlmostEqual(whole[key], chunked[key], places=9)
+        other = CortexRiskSimulator(config=FIXED, runs=10_000, seed=4)
+        self.assertNotEqual(whole, other.simulate_decision("MODIFY_COPY", {}))
+
+    def test_million_paths(self):
+        cortex = CortexRiskSimulator(config={**FIXED, "simulation_runs": 1_000_000}, seed=0)
+        t0 = time.perf_counter()
+        result = cortex.simulate_decision("MODIFY_COPY", {"volatility": 0.0})
+        self.assertLess(time.perf_counter() - t0, 1.0)
+        self.assertAlmostEqual(result["risk_of_ruin"], 0.0062, delta=0.0005)  # P(N(0.05, 0.1) < -0.2)
+
+    def test_actions_share_their_futures(self):
+        context = {"volatility": 0.4}
+        cortex = CortexRiskSimulator(config=FIXED, runs=20_000, seed=5)
+        paired = cortex.simulate_actions(["MODIFY_COPY", "HOLD"], context)
+        copy_vs_hold = paired["vs"]["MODIFY_COPY"]["HOLD"]
+        # The market shock cancels: the difference is the copy lift alone, N(0.05, 0.1)
+        self.assertAlmostEqual(copy_vs_hold["delta"], 0.05, delta=0.003)
+        self.assertAlmostEqual(copy_vs_hold["p_beats"], 0.691, delta=0.01)
+        self.assertAlmostEqual(copy_vs_hold["delta_ci95"], 1.96 * 0.1 / 20_000 ** 0.5, delta=2e-4)
+        self.assertEqual(paired["vs"]["HOLD"]["MODIFY_COPY"]["delta"], -copy_vs_hold["delta"])
+        self.assertEqual(paired["ranking"], ["MODIFY_COPY", "HOLD"])
+
+        # Separate runs of the same size would compare with the market variance left in
+        independent_ci95 = 1.96 * ((0.1 ** 2 + 2 * 0.2 ** 2) / 20_000) ** 0.5
+        self.assertLess(copy_vs_hold["delta_ci95"], independent_ci95 / 2.5)
+
+        # Each action's own statistics match a single-action run on the same stream
+        alone = CortexRiskSimulator(config=FIXED, runs=20_000, seed=5).simulate_decision("HOLD", context)
+        self.assertAlmostEqual(alone["expected_impact"], paired["actions"]["HOLD"]["expected_impact"], places=9)
+
+    def test_adaptive_stopping_meets_the_targets(self):
+        result = CortexRiskSimulator(seed=2).simulate_actions(["UPDATE_PRICE", "HOLD"], {})
+        self.assertTrue(result["converged"])
+        self.assertLess(result["paths"], 100_000)
+        for stat in result["actions"].values():
+            self.assertLessEqual(stat["impact_ci95"], 0.002)
+            self.assertLessEqual(stat["win_ci95"], 0.01)
+
+        # An obvious answer stops after the first batch...
+        obvious = CortexRiskSimulator(seed=2).simulate_decision("HOLD", {"volatility": 0.0})
+        self.assertEqual(obvious["paths"], SIMULATION_BATCH)
+        # ...and an unreachable target stops at the cap
+        capped = CortexRiskSimulator(runs=5_000, seed=2, target_ci=1e-5).simulate_actions(["MODIFY_COPY"], {})
+        self.assertEqual((capped["paths"], capped["converged"]), (5_000, False))
+
+    def test_low_discrepancy_samplers(self):
+        points = HaltonSequence(seed=0).random(4096)
+        self.assertTrue(((points >= 0) & (points < 1)).all())
+        self.assertTrue(abs(points.mean(axis=0) - 0.5).max() < 1e-3)
+
+        context = {"volatility": 0.0}
+        for seed in range(3):
+            halton = CortexRiskSimulator(config=FIXED, runs=4096, seed=seed, sampler="halton")
+            result = halton.simulate_decision("UPDATE_PRICE", context)
+            # An order of magnitude inside the Monte Carlo interval at the same path count
+            self.assertLess(abs(result["expected_impact"] - 0.035), result["impact_ci95"] / 5)
+            self.assertLess(abs(result["win_probability"] - 0.782), 0.003)
+
+        whole = CortexRiskSimulator(config=FIXED, runs=10_000, seed=3, sampler="halton").simulate_decision(
+            "MODIFY_COPY", {})
+        with mock.patch("core.risk_simulator.SIMULATION_CHUNK", 999):
+            chunked = CortexRiskSimulator(config=FIXED, runs=10_000, seed=3, sampler="halton").simulate_decision(
+                "MODIFY_COPY", {})
+        for key in whole:
+            self.assertAlmostEqual(whole[key], chunked[key], places=9)
+        other = CortexRiskSimulator(config=FIXED, runs=10_000, seed=4, sampler="halton")
+        self.assertNotEqual(whole, other.simulate_decision("MODIFY_COPY", {}))
+
+        # Sobol needs scipy; without it the Halton sequence stands in
+        sobol = CortexRiskSimulator(config=FIXED, runs=4096, seed=0, sampler="sobol")
+        self.assertAlmostEqual(sobol.simulate_decision("UPDATE_PRICE", context)["expected_impact"], 0.035, delta=3e-4)
+        with self.assertRaises(ValueError):
+            CortexRiskSimulator(sampler="lattice")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger, to_micros
+from core.kpi_materializer import KPIMaterializer
+from core.rollups import SalesRollups
+
+FEES = {"gumroad": {"percent": 0.10, "fixed": 0.30}, "shopify": {"percent": 0.0, "fixed": 1.0}}
+
+
+class TestSalesRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ledger = SalesLedger(os.path.join(self.root, "ledger"), seal_rows=8)
+        self.rollups = SalesRollups(self.ledger, os.path.join(self.root, "events.sqlite"), fee_rates=FEES)
+        self.today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        # 300 days of history, 2 orders per day
+        days = [self.today - timedelta(days=d) for d in range(300, 0, -1)]
+        self.ledger.write_columns({
+            "timestamp": np.array([to_micros(t) for d in days for t in (d, d + timedelta(hours=1))]),
+            "platform": np.array(["Gumroad", "Shopify"] * 300),
+            "product_name": np.array(["Guide", "Pack"] * 300),
+            "amount": np.array([10.0, 30.0] * 300),
+        })
+
+    def tearDown(self):
+        self.rollups.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_totals_fees_and_aov(self):
+        self.assertEqual(self.rollups.update(), 600)
+        totals = self.rollups.totals()
+        self.assertEqual(totals["orders"], 600)
+        self.assertEqual(totals["revenue"], 12000.0)
+        self.assertEqual(totals["fees"], round(300 * (1.0 + 0.30) + 300 * 1.0, 2))
+        self.assertEqual(totals["aov"], 20.0)
+        self.assertEqual((totals["min_amount"], totals["max_amount"]), (10.0, 30.0))
+
+    def test_incremental_update(self):
+        self.rollups.update()
+        self.ledger.append("Shopify", "sale", "new", "Pack", "30", "USD", "")
+        self.assertEqual(self.rollups.update(), 1)
+        self.assertEqual(self.rollups.update(), 0)
+        self.assertEqual(self.rollups.totals(platform="shopify")["orders"], 301)
+
+    def test_range_grouping_and_downsampling(self):
+        """Hourly rows only exist inside the retention; daily rows cover everything"""
+        self.rollups.update()
+        month = self.rollups.range(start=self.today - timedelta(days=30), end=self.today,
+                                   grain="day", group_by="product")
+        self.assertEqual(len(month), 60)
+        self.assertEqual(self.rollups.rows("hour", end=self.today - timedelta(days=100)), [])
+        by_platform = self.rollups.range(group_by="platform", by_bucket=False)
+        self.assertEqual({r["platform"]: r["orders"] for r in by_platform}, {"Gumroad": 300, "Shopify": 300})
+
+    def test_archive_keeps_aggregates(self):
+        """Archived raw partitions leave the ledger; KPIs rebuild from rollups + recent raw"""
+        archive = os.path.join(self.root, "archive")
+        moved = self.rollups.archive_raw(retention_days=180, dest=archive)
+        self.assertTrue(119 <= len(moved) <= 121)
+        self.assertTrue(os.path.isdir(os.path.join(archive, moved[0])))
+        self.assertLess(self.ledger.count(), 600)
+        self.assertEqual(self.rollups.totals()["orders"], 600)
+
+        kpis = KPIMaterializer(self.ledger, os.path.join(self.root, "kpi.json"), rollups=self.rollups)
+        kpis.rebuild()
+        snap = kpis.snapshot(include_products=True)
+        self.assertEqual(snap["total_orders"], 600)
+        self.assertEqual(snap["products"]["Guide"]["orders"], 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
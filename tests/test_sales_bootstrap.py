@@ -0,0 +1,107 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger, to_micros
+from core.rollups import SalesRollups, DAY_US
+from core.sales_bootstrap import SalesBootstrap, weekday
+from core.risk_simulator import CortexRiskSimulator
+
+FEES = {"gumroad": {"percent": 0.10, "fixed": 0.30}}
+
+
+class TestSalesBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ledger = SalesLedger(os.path.join(self.root, "ledger"), seal_rows=64)
+        self.rollups = SalesRollups(self.ledger, os.path.join(self.root, "events.sqlite"), fee_rates=FEES)
+        self.now = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        # 120 days: one $20 order on weekdays, three at weekends, a $500 order every 30th day
+        stamps, amounts = [], []
+        for d in range(120, 0, -1):
+            day = self.now - timedelta(days=d)
+            for k in range(3 if day.weekday() >= 5 else 1):
+                stamps.append(day + timedelta(minutes=k))
+                amounts.append(20.0)
+            if d % 30 == 0:
+                stamps.append(day + timedelta(hours=1))
+                amounts.append(500.0)
+        self.ledger.write_columns({
+            "timestamp": np.array([to_micros(t) for t in stamps]),
+            "platform": np.array(["Gumroad"] * len(stamps)),
+            "product_name": np.array(["Guide"] * len(stamps)),
+            "amount": np.array(amounts),
+        })
+
+    def tearDown(self):
+        self.rollups.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def bootstrap(self, **kwargs):
+        bootstrap = SalesBootstrap(self.rollups, now=self.now, paths=20_000, **kwargs)
+        self.assertTrue(bootstrap.refresh())
+        return bootstrap
+
+    def test_series_and_cache_follow_the_data_version(self):
+        bootstrap = self.bootstrap()
+        self.assertEqual(len(bootstrap.revenue), 120)
+        self.assertAlmostEqual(bootstrap.revenue.sum(), self.rollups.totals()["revenue"])
+        indices = bootstrap.indices()
+        with mock.patch.object(self.rollups, "rows", side_effect=AssertionError("re-read")):
+            self.assertTrue(bootstrap.refresh())  # Same version: nothing is read again
+        self.assertIs(bootstrap.indices(), indices)
+
+        self.ledger.append("Gumroad", "sale", "late", "Guide", "20", "USD", "")
+        bootstrap.refresh()
+        self.assertIsNot(bootstrap.indices(), indices)
+
+    def test_resamples_weekday_blocks_and_real_tails(self):
+        bootstrap = self.bootstrap(horizon=1, block=1)
+        days = bootstrap.indices()[:, 0]
+        today = weekday(to_micros(self.now))
+        self.assertTrue((weekday(bootstrap.first_day + days.astype(np.int64) * DAY_US) == today).all())
+
+        same_weekday = bootstrap.revenue[weekday(bootstrap.first_day + np.arange(120) * DAY_US) == today]
+        revenue = bootstrap.scenarios()["revenue"]
+        self.assertAlmostEqual(float(revenue.mean()), same_weekday.mean() / bootstrap.revenue.mean() - 1, delta=0.05)
+        self.assertAlmostEqual(float(revenue.max()), same_weekday.max() / bootstrap.revenue.mean() - 1, places=4)
+
+        weekly = self.bootstrap(horizon=7, block=3)
+        self.assertEqual(weekly.indices().shape, (20_000, 7))
+        np.testing.assert_array_equal(np.diff(weekly.indices()[:, :3], axis=1), 1)  # Consecutive days per block
+        # Orders are resampled on the same days as revenue
+        scenarios = weekly.scenarios()
+        self.assertGreater(np.corrcoef(scenarios["revenue"], scenarios["orders"])[0, 1], 0.5)
+
+    def test_simulator_draws_the_market_from_history(self):
+        bootstrap = self.bootstrap()
+        cortex = CortexRiskSimulator(config={"target_ci": 0, "target_win_ci": 0}, runs=20_000, seed=1,
+                                     market="bootstrap", history=bootstrap)
+        result = cortex.simulate_actions(["MODIFY_COPY", "HOLD"], {"volatility": 0.9})
+        self.assertEqual(result["market"], "bootstrap")
+        hold = result["actions"]["HOLD"]
+        self.assertAlmostEqual(hold["expected_impact"], float(bootstrap.scenarios()["revenue"].mean()), delta=0.01)
+        # The shared history cancels from the paired comparison, as the Gaussian market does
+        self.assertAlmostEqual(result["vs"]["MODIFY_COPY"]["HOLD"]["delta"], 0.05, delta=0.003)
+
+        again = CortexRiskSimulator(config={"target_ci": 0, "target_win_ci": 0}, runs=20_000, seed=1,
+                                    market="bootstrap", history=bootstrap).simulate_actions(["HOLD"], {})
+        self.assertEqual(again["actions"]["HOLD"]["expected_impact"], hold["expected_impact"])
+
+        short = SalesBootstrap(self.rollups, now=self.now, history_days=20)
+        fallback = CortexRiskSimulator(runs=1_000, seed=1, market="bootstrap", history=short)
+        self.assertEqual(fallback.simulate_actions(["HOLD"], {})["market"], "gaussian")
+
+
+if __name__ == '__main__':
+    unittest.main()
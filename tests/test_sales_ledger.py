@@ -0,0 +1,197 @@
+import unittest
+import os
+import sys
+import csv
+import shutil
+import tempfile
+import threading
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger, LedgerReadConflict, CSV_COLUMNS, SCHEMA, to_micros
+
+
+class TestSalesLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ledger = SalesLedger(os.path.join(self.root, "ledger"), seal_rows=4)
+        self.base = datetime(2026, 1, 1, 9, 0)
+        for i in range(10):
+            self.ledger.append("Gumroad" if i % 2 else "Shopify", "sale", f"o{i}",
+                               "Prompt Pack", str(10 + i), "USD", "buyer@example.com",
+                               timestamp=self.base + timedelta(hours=8 * i))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_day_partitions_and_count(self):
+        """Rows are sealed into one partition per day; hot rows stay readable"""
+        self.assertEqual(self.ledger.count(), 10)
+        self.assertEqual(self.ledger.partitions()[0], "dt=2026-01-01")
+
+    def test_time_range_and_projection(self):
+        """scan() honours [start, end) and returns only projected columns"""
+        data = self.ledger.scan(start=self.base + timedelta(days=1),
+                                end=self.base + timedelta(days=2),
+                                columns=["amount"])
+        self.assertEqual(list(data), ["amount"])
+        self.assertEqual(data["amount"].tolist(), [13.0, 14.0, 15.0])
+
+    def test_reopen_continues_sequence(self):
+        """A restarted writer picks up the hot buffer and sequence counter"""
+        reopened = SalesLedger(self.ledger.root, seal_rows=4)
+        reopened.append("Payhip", "sale", "p1", "Guide", "5", "USD", "")
+        seqs = reopened.scan(columns=["seq"])["seq"].tolist()
+        self.assertEqual(seqs, list(range(1, 12)))
+
+    def test_csv_roundtrip(self):
+        """export_csv() writes the legacy layout and import_csv() reads it back"""
+        path = os.path.join(self.root, "sales_history.csv")
+        self.assertEqual(self.ledger.export_csv(path), 10)
+        with open(path, newline='', encoding='utf-8') as f:
+            self.assertEqual(next(csv.reader(f)), CSV_COLUMNS)
+
+        other = SalesLedger(os.path.join(self.root, "imported"))
+        self.assertEqual(other.import_csv(path), 10)
+        self.assertAlmostEqual(float(other.scan(columns=["amount"])["amount"].sum()), 145.0)
+
+    def test_aware_bounds_use_the_ledger_clock(self):
+        """Offsets are converted to local wall-clock time, not dropped"""
+        aware = datetime(2026, 1, 1, 9, 0, tzinfo=timezone(timedelta(hours=9)))
+        local = aware.astimezone().replace(tzinfo=None)
+        self.assertEqual(to_micros(aware), to_micros(local))
+        self.assertEqual(to_micros(aware.isoformat()), to_micros(local))
+        self.assertEqual(to_micros("2026-01-01"), to_micros(datetime(2026, 1, 1)))
+
+    def test_tail(self):
+        """tail() returns the newest rows in order"""
+        last = self.ledger.tail(2)
+        self.assertEqual([r["order_id"] for r in last], ["o8", "o9"])
+
+    def test_write_columns_bulk_load(self):
+        """write_columns() seals arrays directly and keeps sequence order"""
+        ts = np.array([to_micros(self.base + timedelta(days=9, hours=h)) for h in (3, 1, 2)])
+        self.ledger.write_columns({"timestamp": ts, "platform": np.array(["Payhip"] * 3),
+                                   "amount": np.array([1.0, 2.0, 3.0])})
+        self.assertEqual(self.ledger.count(), 13)
+        data = self.ledger.scan(start=self.base + timedelta(days=9), columns=["seq", "amount"])
+        self.assertEqual(data["amount"].tolist(), [2.0, 3.0, 1.0])
+        self.assertEqual(data["seq"].tolist(), [11, 12, 13])
+
+    def test_scan_ignores_segments_ahead_of_the_manifest(self):
+        """A reader between a seal's segment write and its manifest update sees each row once"""
+        manifest = self.ledger._read_manifest()
+        hot = self.ledger._read_hot(manifest["sealed_seq"])
+        self.assertTrue(hot)
+        self.ledger._write_segment("dt=2026-01-04", {
+            name: np.array([r[name] for r in hot], dtype=None if dtype == "U" else dtype)
+            for name, dtype in SCHEMA.items()})
+        self.assertEqual(self.ledger.count(), 10)
+
+    def test_scan_retries_then_gives_up(self):
+        """Segments vanishing mid-read are retried; a ledger that never settles raises"""
+        load = self.ledger._load_segments
+        calls = []
+
+        def flaky(paths, columns):
+            calls.append(1)
+            if len(calls) == 1:
+                raise FileNotFoundError(paths[0])
+            return load(paths, columns)
+
+        with mock.patch.object(self.ledger, "_load_segments", side_effect=flaky):
+            self.assertEqual(self.ledger.count(), 10)
+        with mock.patch.object(self.ledger, "_load_segments", side_effect=FileNotFoundError("gone")):
+            with self.assertRaises(LedgerReadConflict):
+                self.ledger.count()
+
+    def test_seal_is_durable_before_the_hot_buffer_is_dropped(self):
+        """Segment, partition directory and manifest are fsync'ed before the truncate"""
+        events = []
+        fsync, truncate = os.fsync, self.ledger._truncate_hot
+
+        def record_fsync(fd):
+            events.append("fsync")
+            fsync(fd)
+
+        def record_truncate():
+            events.append("truncate")
+            truncate()
+
+        self.ledger.append("Payhip", "sale", "s1", "Guide", "5", "USD", "",
+                           timestamp=self.base + timedelta(days=3, hours=20))
+        with mock.patch("core.sales_ledger.os.fsync", side_effect=record_fsync), \
+                mock.patch.object(self.ledger, "_truncate_hot", side_effect=record_truncate):
+            self.assertGreater(self.ledger.seal(), 0)
+        self.assertEqual(events[-1], "truncate")
+        self.assertGreaterEqual(events.count("fsync"), 4)  # segment, its directory, manifest, root
+
+    def test_archive_from_another_process_waits_and_keeps_hot_days(self):
+        """Manifest updates are serialised across ledger instances; hot days are never archived"""
+        self.ledger.append("Payhip", "sale", "h1", "Guide", "5", "USD", "",
+                           timestamp=self.base + timedelta(days=5))
+        self.ledger.seal()
+        maintenance = SalesLedger(self.ledger.root, seal_rows=4)  # Like the consolidator's process
+        self.ledger.append("Payhip", "sale", "h2", "Guide", "5", "USD", "",
+                           timestamp=self.base + timedelta(days=5, hours=1))
+        hot_day = self.ledger._hot_partition
+        self.assertIsNone(maintenance._hot_partition)  # It never sees the writer's appends
+
+        dest = os.path.join(self.root, "archive")
+        moved = []
+        with self.ledger._exclusive():
+            worker = threading.Thread(target=lambda: moved.extend(
+                maintenance.archive(self.base + timedelta(days=30), dest)))
+            worker.start()
+            worker.join(0.2)
+            self.assertTrue(worker.is_alive())  # Blocked behind the writer's lock
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertNotIn(hot_day, moved)
+        self.assertEqual(self.ledger.partitions(), [hot_day])
+        self.assertEqual(sorted(self.ledger.scan(columns=["order_id"])["order_id"].tolist()), ["h1", "h2"])
+
+    def test_compact_merges_without_duplicates(self):
+        """compact() leaves one segment per partition holding every row once"""
+        day = datetime(2026, 2, 1, 9, 0)
+        for i in range(20):
+            self.ledger.append("Gumroad", "sale", f"c{i}", "Guide", "2", "USD", "",
+                               timestamp=day + timedelta(minutes=i))
+        self.ledger.seal()
+        partition = "dt=2026-02-01"
+        self.assertGreaterEqual(len(self.ledger._segments(partition)), 2)
+        before = self.ledger.scan(columns=["amount"])["amount"]
+
+        generation = self.ledger._read_manifest()["generation"]
+        self.ledger.compact(partition)
+        self.assertEqual(len(self.ledger._segments(partition)), 1)
+        self.assertEqual(self.ledger._read_manifest()["generation"], generation + 1)
+        after = self.ledger.scan(columns=["amount"])["amount"]
+        self.assertEqual((len(after), float(after.sum())), (len(before), float(before.sum())))
+        self.assertEqual(self.ledger.count(), 30)
+
+    def test_merged_segment_hides_its_inputs(self):
+        """Between compact()'s segment write and its removals, readers see each row once"""
+        day = datetime(2026, 2, 1, 9, 0)
+        for i in range(10):
+            self.ledger.append("Gumroad", "sale", f"c{i}", "Guide", "2", "USD", "",
+                               timestamp=day + timedelta(minutes=i))
+        self.ledger.seal()
+        partition = "dt=2026-02-01"
+        inputs = self.ledger._segments(partition)
+        self.assertGreaterEqual(len(inputs), 2)
+        self.ledger._write_segment(partition, self.ledger._load_segments(inputs, list(SCHEMA)))
+        self.assertEqual(len(self.ledger._segments(partition, superseded=True)), len(inputs) + 1)
+        self.assertEqual(self.ledger.count(), 20)
+        self.ledger.compact(partition)  # Finishes the interrupted compaction
+        self.assertEqual(len(self.ledger._segments(partition, superseded=True)), 1)
+        self.assertEqual(self.ledger.count(), 20)
+
+if __name__ == '__main__':
+    unittest.main()
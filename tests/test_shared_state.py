@@ -0,0 +1,118 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import time
+import multiprocessing
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.shared_state import SharedStateWriter, SharedStateReader, HEADER, MAGIC
+
+
+def _hammer(path, n):
+    """Writer process: every publish keeps revenue == 2.5 * orders"""
+    writer = SharedStateWriter(path, config_path=os.devnull)
+    for i in range(1, n + 1):
+        writer.publish(total_orders=i, total_revenue=2.5 * i, orders_24h=i, revenue_24h=2.5 * i)
+    writer.close()
+
+
+class TestSharedState(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "shared_state.bin")
+        self.config = os.path.join(self.root, "config.json")
+        with open(self.config, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"evolution_count": 3},
+                       "strategy_parameters": {"strategy_mode": "aggressive", "tone": "witty",
+                                               "risk_tolerance": "high", "price_step": 0.1}}, f)
+        self.writer = SharedStateWriter(self.path, config_path=self.config)
+        self.reader = SharedStateReader(self.path)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_kpis_and_strategy_roundtrip(self):
+        self.writer.publish_kpis({
+            "total_orders": 12, "total_revenue": 340.5,
+            "window_24h": {"orders": 2, "revenue": 40.0}, "window_7d": {"orders": 9, "revenue": 250.0},
+            "platforms": {"Shopify": {"orders": 10, "revenue": 300.0}, "Gumroad": {"orders": 2, "revenue": 40.5}},
+            "last_order": {"timestamp": "2026-03-01T12:00:00", "platform": "Shopify", "event_type": "sale",
+                           "product_name": "Prompt Pack", "amount": 20.0, "customer_email": "a@b.c"},
+            "watermark_seq": 11,
+        })
+        self.assertTrue(self.writer.publish_strategy())
+        self.assertFalse(self.writer.publish_strategy())  # config.json unchanged
+
+        state = self.reader.read()
+        view = state.to_dict()
+        self.assertEqual((state.total_orders, state.revenue_24h), (12, 40.0))
+        self.assertEqual(view["platforms"]["Shopify"], {"orders": 10, "revenue": 300.0})
+        self.assertEqual(view["last_order"], {"timestamp": "2026-03-01T12:00:00", "platform": "Shopify",
+                                              "product_name": "Prompt Pack", "amount": 20.0})
+        self.assertEqual(view["strategy_parameters"]["strategy_mode"], "aggressive")
+        self.assertEqual(state.evolution_count, 3)
+        self.assertFalse(state.is_stale)
+
+    def test_long_names_are_cut_on_a_character_boundary(self):
+        self.writer.publish(strategy_mode="ü" * 9, kill_reason="價格" * 20)  # 18 and 120 bytes
+        state = self.reader.read()
+        self.assertEqual(state.strategy["strategy_mode"], "ü" * 8)
+        self.assertEqual(state.reason, "價格" * 10 + "價")
+
+    def test_kill_flags_survive_writer_restart(self):
+        self.writer.set_kill_flags(["halt", "pause_pricing"], "manual stop")
+        self.writer.close()
+        self.writer = SharedStateWriter(self.path, config_path=self.config)
+        state = self.reader.read()
+        self.assertTrue(state.flag("halt") and state.flag("pause_pricing"))
+        self.assertEqual(state.reason, "manual stop")
+        with self.assertRaises(KeyError):
+            self.writer.set_kill_flags(["self_destruct"])
+        self.writer.set_kill_flags([])
+        self.assertEqual(self.reader.read().active_flags, [])
+
+    def test_refresh_keeps_windows_decaying(self):
+        window = {"orders": 2, "revenue": 40.0}
+        snap = lambda: {"total_orders": 2, "total_revenue": 40.0, "window_24h": dict(window),
+                        "window_7d": {"orders": 2, "revenue": 40.0}, "platforms": {}}
+        self.writer.publish_kpis(snap())
+        first = self.reader.read().updated_us
+        self.writer.start_refresh(snap, interval=0.02)
+        window.update(orders=0, revenue=0.0)  # The sales left the 24h window; no new sale arrives
+        deadline = time.time() + 2
+        while self.reader.read().orders_24h and time.time() < deadline:
+            time.sleep(0.01)
+        state = self.reader.read()
+        self.assertEqual((state.orders_24h, state.revenue_24h, state.orders_7d), (0, 0.0, 2))
+        self.assertGreater(state.updated_us, first)
+
+    def test_reader_rejects_foreign_layout(self):
+        self.assertIsNotNone(self.reader.read())
+        HEADER.pack_into(self.writer.mm, 0, MAGIC, 999, 0, 0)
+        self.assertIsNone(self.reader.read())
+        self.assertIsNone(SharedStateReader(os.path.join(self.root, "missing.bin")).read())
+
+    def test_no_torn_reads_across_processes(self):
+        ctx = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+        proc = ctx.Process(target=_hammer, args=(self.path, 20000))
+        proc.start()
+        reads = 0
+        while proc.is_alive() or reads == 0:
+            state = self.reader.read()
+            self.assertEqual(state.total_revenue, 2.5 * state.total_orders)
+            self.assertEqual(state.orders_24h, state.total_orders)
+            reads += 1
+        proc.join()
+        self.assertEqual(self.reader.read().total_orders, 20000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.sales_ledger import SalesLedger, to_micros
+from core.shm_ledger import SharedLedger, SharedLedgerView, attach_shared_ledger
+
+
+def _revenue_by_platform(name):
+    """Worker task: aggregate straight from the shared codes"""
+    view = attach_shared_ledger(name)
+    codes = view.column("platform")
+    sums = np.bincount(codes, weights=view.column("amount"), minlength=len(view.labels("platform")))
+    return dict(zip(view.labels("platform").tolist(), sums.tolist()))
+
+
+def _attach_and_exit(name):
+    view = SharedLedgerView.attach(name)
+    return view.rows
+
+
+class TestSharedLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ledger = SalesLedger(os.path.join(self.root, "ledger"), seal_rows=4)
+        self.day = datetime(2026, 3, 1, 12, 0)
+        self.ledger.write_columns({
+            "timestamp": np.array([to_micros(self.day + timedelta(days=d)) for d in range(30)]),
+            "platform": np.array(["Shopify", "Gumroad", "Payhip"] * 10),
+            "product_name": np.array(["Guide", "Pack"] * 15),
+            "amount": np.arange(30, dtype=float),
+        })
+        self.ledger.append("Gumroad", "sale", "hot", "Guide", "100", "USD", "",
+                           timestamp=self.day + timedelta(days=40))  # Unsealed hot row
+        self.owner = SharedLedger.publish(self.ledger)
+
+    def tearDown(self):
+        self.owner.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_columns_and_dictionaries(self):
+        self.assertEqual(self.owner.rows, 31)
+        self.assertEqual(self.owner.manifest["watermark_seq"], 31)
+        self.assertEqual(float(self.owner.column("amount").sum()), sum(range(30)) + 100.0)
+        self.assertEqual(self.owner.column("platform").dtype, np.int32)
+        self.assertEqual(self.owner.decode("platform")[:3].tolist(), ["Shopify", "Gumroad", "Payhip"])
+        frame = self.owner.to_frame()
+        self.assertEqual(str(frame["product_name"].dtype), "category")
+        self.assertEqual(frame["timestamp"].iloc[0], self.day)
+
+    def test_window_subset(self):
+        with SharedLedger.publish(self.ledger, start=self.day + timedelta(days=10),
+                                  end=self.day + timedelta(days=20), columns=["amount"]) as part:
+            self.assertEqual(part.rows, 10)
+            self.assertEqual(part.column("amount").tolist(), [float(x) for x in range(10, 20)])
+
+    def test_pool_workers_attach_without_copy(self):
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(2, mp_context=ctx, initializer=attach_shared_ledger,
+                                 initargs=(self.owner.name,)) as pool:
+            results = list(pool.map(_revenue_by_platform, [self.owner.name] * 4))
+        self.assertEqual(results[0]["Gumroad"], sum(range(1, 30, 3)) + 100.0)
+        self.assertTrue(all(r == results[0] for r in results))
+
+    def test_lifecycle(self):
+        """Attachers exiting never unlink; the owner's close() does"""
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(1) as pool:
+            self.assertEqual(pool.apply(_attach_and_exit, (self.owner.name,)), 31)
+        with SharedLedgerView.attach(self.owner.name) as view:
+            self.assertEqual(view.rows, 31)
+            self.assertFalse(view.column("amount").flags.writeable)
+        self.owner.close()
+        self.owner.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedLedgerView.attach(self.owner.name)
+
+
+if __name__ == '__main__':
+    unittest.main()